@@ -0,0 +1,297 @@
+"""Aggregate accumulators and hash aggregation for GROUP BY
+
+Aggregates are computed by accumulator objects updated in a single pass
+over the rows. For GROUP BY each group gets its own accumulators; when
+more groups than the memory budget allows have been seen, rows of new
+groups are hash partitioned into temporary files and each partition is
+aggregated on its own afterwards.
+"""
+
+import pickle
+import tempfile
+from operator import itemgetter
+
+# Partitioning rounds before a partition is aggregated in memory regardless
+_MAX_SPILL_DEPTH = 4
+
+
+class Accumulator:
+    """Running state of one aggregate, updated one value at a time
+
+    Every accumulator keeps O(1) state: AVG holds a running sum and count
+    rather than the values, and MIN/MAX compare values natively.
+    """
+
+    __slots__ = ()
+
+    def add(self, value):
+        raise NotImplementedError
+
+    def result(self):
+        raise NotImplementedError
+
+    def merge(self, other):
+        """Fold in the state of an accumulator of the same class"""
+        raise NotImplementedError
+
+
+class CountAll(Accumulator):
+    """COUNT(*): every row counts, NULL or not"""
+
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+
+    def result(self):
+        return self.count
+
+    def merge(self, other):
+        self.count += other.count
+
+
+class Count(Accumulator):
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def add(self, value):
+        if value is not None:
+            self.count += 1
+
+    def result(self):
+        return self.count
+
+    def merge(self, other):
+        self.count += other.count
+
+
+class Sum(Accumulator):
+    __slots__ = ('total',)
+
+    def __init__(self):
+        self.total = None
+
+    def add(self, value):
+        if value is not None:
+            self.total = value if self.total is None else self.total + value
+
+    def result(self):
+        return self.total
+
+    def merge(self, other):
+        self.add(other.total)
+
+
+class Avg(Accumulator):
+    __slots__ = ('total', 'count')
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+
+    def add(self, value):
+        if value is not None:
+            self.total += value
+            self.count += 1
+
+    def result(self):
+        return self.total / self.count if self.count else None
+
+    def merge(self, other):
+        self.total += other.total
+        self.count += other.count
+
+
+class Min(Accumulator):
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+    def add(self, value):
+        if value is not None and (self.value is None or value < self.value):
+            self.value = value
+
+    def result(self):
+        return self.value
+
+    def merge(self, other):
+        self.add(other.value)
+
+
+class Max(Accumulator):
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = None
+
+    def add(self, value):
+        if value is not None and (self.value is None or value > self.value):
+            self.value = value
+
+    def result(self):
+        return self.value
+
+    def merge(self, other):
+        self.add(other.value)
+
+
+ACCUMULATORS = {
+    'COUNT': Count,
+    'SUM': Sum,
+    'AVG': Avg,
+    'MIN': Min,
+    'MAX': Max,
+}
+
+
+def accumulator_class(func, key):
+    """Return the Accumulator class for func; a key of None means COUNT(*)"""
+    if func not in ACCUMULATORS:
+        raise ValueError(f"Unsupported aggregate function: {func}")
+    if func == 'COUNT' and key is None:
+        return CountAll
+    return ACCUMULATORS[func]
+
+
+def aggregate_rows(rows, aggregates):
+    """Compute several aggregates over rows in a single scan
+
+    aggregates is a list of (func, row key) pairs; returns their results.
+    """
+    return [acc.result() for acc in accumulate(rows, aggregates)]
+
+
+def accumulate(rows, aggregates):
+    """Like aggregate_rows, but return the accumulators themselves
+
+    Accumulators filled from different parts of a table can be combined
+    with merge() before reading their results.
+    """
+    accumulators = [accumulator_class(func, key)() for func, key in aggregates]
+    updates = [(acc.add, key) for acc, (func, key) in zip(accumulators, aggregates)]
+    try:
+        if len(updates) == 1:
+            add, key = updates[0]
+            for row in rows:
+                add(row.get(key))
+        else:
+            for row in rows:
+                for add, key in updates:
+                    add(row.get(key))
+    except TypeError:
+        raise ValueError("Aggregate functions need comparable numeric values")
+    return accumulators
+
+
+class HashAggregate:
+    """Single-pass GROUP BY operator with partitioned spilling
+
+    group_keys are the row keys to group on and aggregates a list of
+    (func, row key) pairs, with a key of None for COUNT(*). At most
+    max_groups groups are held in memory per pass.
+    """
+
+    def __init__(self, group_keys, aggregates, max_groups=100000, partitions=16):
+        self.group_keys = list(group_keys)
+        self.aggregates = list(aggregates)
+        self.max_groups = max_groups
+        self.partitions = partitions
+        self.spilled_rows = 0
+        self.classes = [accumulator_class(func, key) for func, key in self.aggregates]
+
+    def run(self, rows):
+        """Yield (group key tuple, list of aggregate results) for each group"""
+        if len(self.group_keys) == 1:
+            get_key = itemgetter(self.group_keys[0])
+            key_of = lambda row: (get_key(row),)
+        elif self.group_keys:
+            key_of = itemgetter(*self.group_keys)
+        else:
+            key_of = lambda row: ()
+
+        arg_keys = [key for func, key in self.aggregates]
+        args_of = lambda row: tuple(None if key is None else row[key] for key in arg_keys)
+
+        pairs = ((key_of(row), args_of(row)) for row in rows)
+        try:
+            yield from self._aggregate(pairs, 0)
+        except KeyError as e:
+            raise ValueError(f"Unknown column: {e.args[0]}")
+
+    def _aggregate(self, pairs, depth):
+        classes = self.classes
+        groups = {}
+        spill = None
+        can_spill = depth < _MAX_SPILL_DEPTH
+        try:
+            for key, args in pairs:
+                accumulators = groups.get(key)
+                if accumulators is None:
+                    if can_spill and len(groups) >= self.max_groups:
+                        if spill is None:
+                            spill = _SpillFiles(self.partitions)
+                        spill.add(hash((depth, key)) % self.partitions, (key, args))
+                        self.spilled_rows += 1
+                        continue
+                    accumulators = groups[key] = [cls() for cls in classes]
+                for accumulator, value in zip(accumulators, args):
+                    accumulator.add(value)
+        except TypeError:
+            raise ValueError("Aggregate functions need comparable numeric values")
+
+        for key, accumulators in groups.items():
+            yield key, [accumulator.result() for accumulator in accumulators]
+        groups = None
+
+        if spill is not None:
+            for partition in spill.partitions():
+                yield from self._aggregate(partition, depth + 1)
+
+
+class _SpillFiles:
+    """Hash partitions of (key, args) pairs written to temporary files"""
+
+    def __init__(self, count, batch_size=1000):
+        self.batch_size = batch_size
+        self.files = [None] * count
+        self.buffers = [[] for _ in range(count)]
+
+    def add(self, index, item):
+        buffer = self.buffers[index]
+        buffer.append(item)
+        if len(buffer) >= self.batch_size:
+            self._flush(index)
+
+    def _flush(self, index):
+        buffer = self.buffers[index]
+        if not buffer:
+            return
+        if self.files[index] is None:
+            self.files[index] = tempfile.TemporaryFile()
+        pickle.dump(buffer, self.files[index], pickle.HIGHEST_PROTOCOL)
+        buffer.clear()
+
+    def partitions(self):
+        """Yield each non-empty partition as an iterator of its pairs"""
+        for index in range(len(self.files)):
+            self._flush(index)
+            spill_file = self.files[index]
+            if spill_file is not None:
+                self.files[index] = None
+                yield self._read(spill_file)
+
+    def _read(self, spill_file):
+        with spill_file:
+            spill_file.seek(0)
+            while True:
+                try:
+                    batch = pickle.load(spill_file)
+                except EOFError:
+                    return
+                yield from batch
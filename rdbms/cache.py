@@ -0,0 +1,154 @@
+"""Small LRU caches for parsed statements and query results"""
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+# String literals are kept verbatim; whitespace elsewhere collapses to one space
+_NORMALIZE_RE = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|\s+""")
+
+
+def normalize_sql(sql):
+    """Normalize SQL text for use as a cache key"""
+    text = _NORMALIZE_RE.sub(lambda m: m.group(1) or ' ', sql).strip()
+    return text[:-1].rstrip() if text.endswith(';') else text
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        try:
+            value = self.entries[key]
+            self.entries.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a value, evicting the oldest entry when full"""
+        if self.capacity <= 0:
+            return
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self.entries),
+            'capacity': self.capacity,
+        }
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def estimate_size(rows):
+    """Rough memory footprint in bytes of a list of row dicts"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class ResultCache:
+    """LRU cache of SELECT results bounded by their estimated size
+
+    Each entry remembers the versions of the tables it was computed from and
+    is discarded as soon as any of them changes. Rows are stored and handed
+    out as copies so callers cannot modify cached results. The cache may be
+    shared by executors on several threads.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # key -> (tables, versions, rows, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, current_versions):
+        """Return a copy of the cached rows if the tables haven't changed"""
+        with self.lock:
+            rows = self._get(key, current_versions)
+        return rows if rows is None else [dict(row) for row in rows]
+
+    def _get(self, key, current_versions):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        tables, versions, rows, size = entry
+        if current_versions(tables) != versions:
+            self._discard(key)
+            self.invalidations += 1
+            self.misses += 1
+            return None
+
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            pass
+        self.hits += 1
+        return rows
+
+    def put(self, key, tables, versions, rows):
+        """Cache a copy of rows computed from tables at the given versions"""
+        rows = tuple(dict(row) for row in rows)
+        size = estimate_size(rows)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            self._discard(key)
+            self.entries[key] = (tuple(tables), versions, rows, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self.entries:
+                old_key = next(iter(self.entries))
+                self._discard(old_key)
+                self.evictions += 1
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[3]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Return hit/miss/invalidation counters and memory use"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'evictions': self.evictions,
+            'size': len(self.entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+        }
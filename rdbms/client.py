@@ -0,0 +1,260 @@
+"""Client for the MyRDBMS database server
+
+A Connection speaks the frame protocol described in rdbms.server over one
+TCP socket. It is not thread-safe; threads share a ConnectionPool instead
+and each borrows a connection for as long as it needs one.
+
+    pool = ConnectionPool('127.0.0.1', 5433)
+    with pool.connection() as conn:
+        conn.execute("SELECT * FROM students WHERE student_id = ?", [1])
+"""
+
+import json
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from .server import FRAME_HEADER, encode_frame
+
+
+class QueryError(ValueError):
+    """An error the server reported for one request; the connection stays in sync"""
+
+
+class RemoteStatement:
+    """A statement prepared on the server, executed through its connection"""
+
+    def __init__(self, connection, handle, sql, param_count, param_names):
+        self.connection = connection
+        self.handle = handle
+        self.sql = sql
+        self.param_count = param_count
+        self.param_names = param_names
+
+    def execute(self, params=None):
+        return self.connection.execute(self, params)
+
+    def close(self):
+        self.connection._request({'op': 'close', 'statement': self.handle})
+
+    def __repr__(self):
+        return f"RemoteStatement({self.sql!r})"
+
+
+class Connection:
+    """One client connection to a DatabaseServer"""
+
+    def __init__(self, host='127.0.0.1', port=5433, timeout=None):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile('rb')
+        self.next_id = 1
+        self.open_stream = None  # row generator still receiving batches
+
+    def execute(self, sql, params=None):
+        """Run SQL text or a RemoteStatement; a SELECT returns its rows as a list"""
+        return self._result(self._send(self._execute_request(sql, params))[0])
+
+    def iter_rows(self, sql, params=None):
+        """Yield the rows of a SELECT as the server streams them in batches"""
+        return self._rows(self._send(self._execute_request(sql, params))[0])
+
+    def prepare(self, sql):
+        """Parse a statement on the server for repeated execution"""
+        response = self._request({'op': 'prepare', 'sql': sql})
+        return RemoteStatement(self, response['statement'], sql, response['param_count'],
+                               response['param_names'])
+
+    def pipeline(self, statements):
+        """Send several statements at once and return their results in order
+
+        Each item is SQL text, a RemoteStatement or a (statement, params)
+        pair. All requests go out before the first response is read, so
+        the whole batch costs one round trip.
+        """
+        requests = []
+        for item in statements:
+            sql, params = item if isinstance(item, tuple) else (item, None)
+            requests.append(self._execute_request(sql, params))
+        request_ids = self._send(*requests)
+        results = []
+        for request_id in request_ids:
+            try:
+                results.append(self._result(request_id))
+            except ValueError as e:
+                results.append(e)
+        for result in results:
+            if isinstance(result, ValueError):
+                raise result
+        return results
+
+    def ping(self):
+        return self._request({'op': 'ping'})['result'] == 'pong'
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # Protocol
+
+    @staticmethod
+    def _execute_request(sql, params):
+        if isinstance(sql, RemoteStatement):
+            return {'op': 'execute', 'statement': sql.handle, 'params': params}
+        return {'op': 'query', 'sql': sql, 'params': params}
+
+    def _send(self, *requests):
+        """Write requests in one packet; returns their IDs"""
+        if self.open_stream is not None:
+            # Rows of an earlier SELECT nobody finished reading; skip them
+            try:
+                for _ in self.open_stream:
+                    pass
+            except ValueError:
+                pass
+        request_ids = []
+        frames = []
+        for request in requests:
+            request['id'] = self.next_id
+            self.next_id += 1
+            request_ids.append(request['id'])
+            frames.append(encode_frame(request))
+        self.sock.sendall(b''.join(frames))
+        return request_ids
+
+    def _receive(self, request_id):
+        header = self.stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            raise ValueError("Connection closed by the server")
+        length = FRAME_HEADER.unpack(header)[0]
+        response = json.loads(self.stream.read(length))
+        if response.get('id') != request_id:
+            raise ValueError(f"Response for request {response.get('id')} while waiting "
+                             f"for {request_id}")
+        if 'error' in response:
+            raise QueryError(response['error'])
+        return response
+
+    def _request(self, request):
+        return self._receive(self._send(request)[0])
+
+    def _result(self, request_id):
+        response = self._receive(request_id)
+        if 'rows' not in response:
+            return response['result']
+        return list(self._rows(request_id, response))
+
+    def _rows(self, request_id, response=None):
+        self.open_stream = rows = self._read_batches(request_id, response)
+        return rows
+
+    def _read_batches(self, request_id, response):
+        try:
+            if response is None:
+                response = self._receive(request_id)
+                if 'rows' not in response:
+                    raise ValueError("Only SELECT statements produce rows")
+            columns = response['columns']
+            while True:
+                for values in response['rows']:
+                    try:
+                        yield dict(zip(columns, values))
+                    except GeneratorExit:
+                        # Closed part way: read the remaining batches off the socket
+                        while response['more']:
+                            response = self._receive(request_id)
+                        raise
+                if not response['more']:
+                    return
+                response = self._receive(request_id)
+        finally:
+            self.open_stream = None
+
+
+class ConnectionPool:
+    """Thread-safe pool of at most size connections to one server"""
+
+    def __init__(self, host='127.0.0.1', port=5433, size=8, timeout=30):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a connection, opening one if fewer than size exist
+
+        Waits up to timeout seconds for a connection to be released when
+        all of them are in use.
+        """
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if self.created < self.size:
+                self.created += 1
+                try:
+                    return Connection(self.host, self.port)
+                except OSError:
+                    self.created -= 1
+                    raise
+
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ValueError(f"No database connection became free within {self.timeout}s")
+
+    def release(self, connection, broken=False):
+        """Return a connection to the pool, or drop it if it failed mid-request"""
+        if broken:
+            connection.close()
+            with self.lock:
+                self.created -= 1
+            return
+        self.idle.put(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of a with block
+
+        The connection goes back to the pool after a clean exit or an error
+        the server reported for a query. Any other exception may have left
+        it part way through a response, so it is closed instead.
+        """
+        connection = self.acquire()
+        broken = True
+        try:
+            yield connection
+            broken = False
+        except QueryError:
+            broken = False
+            raise
+        finally:
+            self.release(connection, broken)
+
+    def close(self):
+        """Close the idle connections"""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def stats(self):
+        """Return the number of connections opened and currently idle"""
+        return {
+            'size': self.size,
+            'created': self.created,
+            'idle': self.idle.qsize(),
+        }
@@ -0,0 +1,443 @@
+"""DB-API 2.0 (PEP 249) interface to the engine
+
+Lets code written for sqlite3 and other drivers use MyRDBMS:
+
+    from rdbms import dbapi
+
+    conn = dbapi.connect('app.db')
+    cur = conn.cursor()
+    cur.executemany("INSERT INTO students VALUES (?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    cur.execute("SELECT first_name FROM students WHERE enrollment_year = ?", (2024,))
+    print(cur.fetchall())
+
+The first statement that writes opens a transaction, which commit() or
+rollback() ends. While it is open the connection holds the database's
+write lock (other writers, in this process or others, wait) and its
+queries see its uncommitted changes; other connections read the last
+committed version and never wait (opening a new connection, which reads
+the whole file, does wait). The engine has no savepoints, so a
+statement that fails inside a transaction rolls the whole transaction
+back before its error is raised.
+
+Connections must not be shared between threads (threadsafety 1). Rows are
+tuples in the column order of cursor.description.
+"""
+
+import datetime
+import re
+import time
+from contextlib import contextmanager
+
+from .executor import QueryExecutor
+from .types import DataType
+from .stats import STATEMENT_STATS_COLUMNS
+
+apilevel = '2.0'
+threadsafety = 1  # threads may share the module, but not connections
+paramstyle = 'qmark'  # ':name' placeholders with a mapping also work
+
+_WRITES = ('INSERT', 'UPDATE', 'DELETE', 'CREATE_TABLE', 'CREATE_INDEX',
+           'CREATE_MATERIALIZED_VIEW', 'REFRESH_MATERIALIZED_VIEW', 'COPY_FROM')
+
+
+# Exceptions (PEP 249 hierarchy)
+
+class Warning(Exception):
+    pass
+
+
+class Error(Exception):
+    pass
+
+
+class InterfaceError(Error):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class DataError(DatabaseError):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class IntegrityError(DatabaseError):
+    pass
+
+
+class InternalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
+
+
+class NotSupportedError(DatabaseError):
+    pass
+
+
+# Engine errors are ValueErrors; their messages tell which kind they are
+_ERROR_CLASSES = [
+    (re.compile(r"Duplicate|cannot be NULL|Missing required column"), IntegrityError),
+    (re.compile(r"Invalid (INT|FLOAT|BOOL|DATE)|exceeds max length"), DataError),
+]
+
+
+@contextmanager
+def _translate_errors():
+    """Re-raise engine errors as the matching DB-API exception"""
+    try:
+        yield
+    except Error:
+        raise
+    except ValueError as e:
+        for pattern, error_class in _ERROR_CLASSES:
+            if pattern.search(str(e)):
+                raise error_class(str(e)) from e
+        raise ProgrammingError(str(e)) from e
+    except OSError as e:
+        raise OperationalError(str(e)) from e
+
+
+# Type objects and constructors
+
+class _TypeObject:
+    """Compares equal to every engine type name in a group"""
+
+    def __init__(self, *type_names):
+        self.type_names = frozenset(type_names)
+
+    def __eq__(self, other):
+        return other in self.type_names
+
+    def __hash__(self):
+        return hash(self.type_names)
+
+
+STRING = _TypeObject('VARCHAR', 'TEXT')
+BINARY = _TypeObject()
+NUMBER = _TypeObject('INT', 'FLOAT', 'BOOL')
+DATETIME = _TypeObject('DATE')
+ROWID = _TypeObject('ROWID')
+
+Date = datetime.date
+Time = datetime.time
+Timestamp = datetime.datetime
+Binary = bytes
+
+
+def DateFromTicks(ticks):
+    return Date(*time.localtime(ticks)[:3])
+
+
+def TimeFromTicks(ticks):
+    return Time(*time.localtime(ticks)[3:6])
+
+
+def TimestampFromTicks(ticks):
+    return Timestamp(*time.localtime(ticks)[:6])
+
+
+def _adapt(params):
+    """Convert date parameters to the 'YYYY-MM-DD' text DATE columns hold"""
+    if params is None:
+        return None
+
+    def adapt(value):
+        if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+            return value.isoformat()
+        return value
+
+    if hasattr(params, 'keys'):
+        return {name: adapt(value) for name, value in params.items()}
+    return [adapt(value) for value in params]
+
+
+def connect(database='database.db', autocommit=False, **options):
+    """Open a connection to a database file
+
+    options are passed to QueryExecutor (plan_cache_size,
+    result_cache_bytes, batch_mode, max_parallel_workers). With
+    autocommit every statement is committed as it runs.
+    """
+    with _translate_errors():
+        return Connection(QueryExecutor(database, **options), autocommit)
+
+
+class Connection:
+    """A DB-API connection wrapping one QueryExecutor"""
+
+    Warning = Warning
+    Error = Error
+    InterfaceError = InterfaceError
+    DatabaseError = DatabaseError
+    DataError = DataError
+    OperationalError = OperationalError
+    IntegrityError = IntegrityError
+    InternalError = InternalError
+    ProgrammingError = ProgrammingError
+    NotSupportedError = NotSupportedError
+
+    def __init__(self, executor, autocommit=False):
+        self.executor = executor
+        self.autocommit = autocommit
+        self.closed = False
+        self._transaction = None  # the open storage.transaction() context
+
+    @property
+    def in_transaction(self):
+        return self._transaction is not None
+
+    def cursor(self):
+        self._check_open()
+        return Cursor(self)
+
+    def commit(self):
+        """Publish and save the open transaction's changes"""
+        self._check_open()
+        transaction, self._transaction = self._transaction, None
+        if transaction is not None:
+            with _translate_errors():
+                transaction.__exit__(None, None, None)
+
+    def rollback(self):
+        """Undo every change made since the transaction began"""
+        self._check_open()
+        transaction, self._transaction = self._transaction, None
+        if transaction is not None:
+            error = _Rollback()
+            transaction.__exit__(_Rollback, error, None)
+
+    def close(self):
+        """Roll back an open transaction and stop the engine's workers"""
+        if self.closed:
+            return
+        self.rollback()
+        self.executor.storage.close()
+        self.closed = True
+
+    # sqlite3-style shortcuts
+
+    def execute(self, operation, parameters=None):
+        return self.cursor().execute(operation, parameters)
+
+    def executemany(self, operation, seq_of_parameters):
+        return self.cursor().executemany(operation, seq_of_parameters)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Like sqlite3: commit or roll back, but leave the connection open
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def _check_open(self):
+        if self.closed:
+            raise ProgrammingError("Cannot operate on a closed connection")
+
+    def _run(self, statement, call):
+        """Run call() for a prepared statement, opening a transaction if it writes"""
+        writes = statement.parsed_query['type'] in _WRITES
+        if writes and not self.autocommit and self._transaction is None:
+            self._transaction = self.executor.storage.transaction()
+            with _translate_errors():
+                self._transaction.__enter__()
+        try:
+            with _translate_errors():
+                return call()
+        except DatabaseError:
+            # Without savepoints a failed write can't be undone on its own
+            if writes:
+                self.rollback()
+            raise
+
+
+class _Rollback(Exception):
+    """Thrown into a transaction to undo it"""
+
+
+class Cursor:
+    """A DB-API cursor; SELECT rows are read from the engine as they are fetched"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.arraysize = 1
+        self.description = None
+        self.rowcount = -1
+        self.lastrowid = None
+        self.closed = False
+        self._cursor = connection.executor.cursor()
+        self._columns = None  # row keys in description order
+
+    def execute(self, operation, parameters=None):
+        """Prepare (or reuse the cached parse of) a statement and run it"""
+        self._check_open()
+        statement = self._prepare(operation)
+        self.description = self._columns = None
+        self.rowcount = -1
+        self.lastrowid = None
+
+        params = _adapt(parameters)
+        self.connection._run(statement, lambda: self._cursor.execute(statement, params))
+        if self._cursor.has_rows:
+            self._describe(statement.parsed_query)
+        else:
+            self.rowcount = self._cursor.rowcount
+            self.lastrowid = self._cursor.lastrowid
+        return self
+
+    def executemany(self, operation, seq_of_parameters):
+        """Run a statement once per parameter set as one batch
+
+        INSERTs are stored with one constraint pass; other statements run
+        in a single transaction with one save at the end. rowcount is the
+        total number of rows changed.
+        """
+        self._check_open()
+        statement = self._prepare(operation)
+        if statement.parsed_query['type'] == 'SELECT':
+            raise ProgrammingError("executemany() can't run a SELECT")
+        self.description = self._columns = None
+        self.lastrowid = None
+
+        params = (_adapt(item) for item in seq_of_parameters)
+        result = self.connection._run(
+            statement, lambda: self.connection.executor.executemany(statement, params))
+        self.rowcount = len(result) if isinstance(result, list) else result
+        return self
+
+    def fetchone(self):
+        row = self._fetch(lambda cursor: cursor.fetchone())
+        return None if row is None else self._tuple(row)
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        return [self._tuple(row) for row in self._fetch(lambda cursor: cursor.fetchmany(size))]
+
+    def fetchall(self):
+        return [self._tuple(row) for row in self._fetch(lambda cursor: cursor.fetchall())]
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def close(self):
+        self._cursor.close()
+        self.closed = True
+
+    def setinputsizes(self, sizes):
+        pass
+
+    def setoutputsize(self, size, column=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _check_open(self):
+        if self.closed:
+            raise ProgrammingError("Cannot operate on a closed cursor")
+        self.connection._check_open()
+
+    def _prepare(self, operation):
+        if not isinstance(operation, str):
+            raise ProgrammingError("operation must be SQL text")
+        with _translate_errors():
+            return self.connection.executor.prepare(operation)
+
+    def _fetch(self, fetch):
+        self._check_open()
+        if self.description is None:
+            raise ProgrammingError("The last statement did not return rows")
+        with _translate_errors():
+            rows = fetch(self._cursor)
+        if self._columns is None and rows:
+            # SELECT * column names are known from the first row, as 'table.column'
+            first = rows if isinstance(rows, dict) else rows[0]
+            names = [key for key in first if key != '_rowid']
+            storage = self.connection.executor.storage
+            self._set_columns(names, [_column_type(storage._column_schema(name)) for name in names])
+        return rows
+
+    def _describe(self, parsed_query):
+        """Set description from the SELECT list, or wait for the first row for '*'
+
+        Type codes come from the columns of the tables the query reads; an
+        aggregate has the type of its argument (INT for COUNT, FLOAT for
+        AVG), and a column that can't be found has None.
+        """
+        if parsed_query['type'] == 'EXPLAIN':
+            self._set_columns(['QUERY PLAN'], [DataType.TEXT])
+            return
+        if parsed_query['type'] == 'SHOW_STATEMENT_STATS':
+            self._set_columns(STATEMENT_STATS_COLUMNS)
+            return
+        storage = self.connection.executor.storage
+        table_name = parsed_query['table_name']
+        joins = parsed_query.get('join') or []
+        columns = parsed_query['columns']
+        if columns == '*':
+            self._columns = None
+            if not joins:
+                table = storage.schema.get(table_name, {}).get('columns', [])
+                self._set_columns([col['name'] for col in table], [col['type'] for col in table])
+            else:
+                self.description = []
+            return
+
+        if joins:
+            tables = [table_name] + [join['table'] for join in joins]
+            keys = [f"{table}.{col['name']}" for table in tables
+                    for col in storage.schema.get(table, {}).get('columns', [])]
+            resolve = storage._column_resolver(keys)
+        else:
+            keys = [col['name'] for col in storage.schema.get(table_name, {}).get('columns', [])]
+            resolve = storage._column_resolver(keys, table_name)
+        names = []
+        types = []
+        for item in columns:
+            if item['type'] == 'AGGREGATE':
+                names.append(item['alias'] or f"{item['func']}({item['arg'] or '*'})")
+                if item['func'] == 'COUNT':
+                    types.append(DataType.INT)
+                elif item['func'] == 'AVG':
+                    types.append(DataType.FLOAT)
+                elif item['arg']:
+                    types.append(_column_type(storage._column_schema(resolve(item['arg']), table_name)))
+                else:
+                    types.append(None)
+            else:
+                names.append(item['alias'] or item['name'])
+                types.append(_column_type(storage._column_schema(resolve(item['name']), table_name)))
+        self._set_columns(names, types)
+
+    def _set_columns(self, names, types=None):
+        self._columns = names
+        types = types or [None] * len(names)
+        self.description = [(name, type_code, None, None, None, None, None)
+                            for name, type_code in zip(names, types)]
+
+    def _tuple(self, row):
+        return tuple(row.get(name) for name in self._columns)
+
+
+def _column_type(col):
+    """Type code of a schema entry, or None for a column that wasn't found"""
+    return None if col is None else col['type']
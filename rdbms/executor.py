@@ -1,15 +1,195 @@
 """Query Execution Engine"""
 
+import csv
+import io
+import json
+import time
+from itertools import chain, islice
 from .storage import StorageEngine
+from .parser import SQLParser
+from .cache import LRUCache, ResultCache, normalize_sql
+from .plan import QueryPlan
+from .stats import StatementStats, statement_fingerprint
+
+
+class PreparedStatement:
+    """A parsed statement with '?' or ':name' placeholders"""
+    
+    def __init__(self, sql, parsed_query):
+        self.sql = sql
+        self.key = normalize_sql(sql)
+        self.fingerprint = statement_fingerprint(sql)  # groups its statement statistics
+        self.parsed_query = parsed_query
+        self.param_count, self.param_names = SQLParser.parameters(parsed_query)
+    
+    def bind(self, params=None):
+        """Return the parsed query with parameters substituted"""
+        if not self.param_count and not self.param_names and not params:
+            return self.parsed_query
+        return SQLParser.bind_parameters(self.parsed_query, params)
+    
+    def __repr__(self):
+        return f"PreparedStatement({self.sql!r})"
+
+
+class Cursor:
+    """Fetches the result of one statement at a time in bounded memory
+    
+    A SELECT is not run up front: execute() reads its first row (so that
+    errors surface there) and the rest are produced as they are fetched,
+    from a snapshot held until the rows run out or the cursor is closed or
+    executes another statement.
+    """
+    
+    def __init__(self, executor):
+        self.executor = executor
+        self.arraysize = 1  # rows fetchmany() returns by default
+        self.rowcount = -1  # rows changed by the last INSERT/UPDATE/DELETE/COPY
+        self.lastrowid = None  # row ID of the last single-row INSERT
+        self.result = None  # what execute() returned for a statement without rows
+        self.closed = False
+        self.has_rows = None  # whether the last statement returned rows; None before any
+        self._rows = None
+        self._source = None  # the iter_select() generator behind _rows
+        self._snapshot = None
+    
+    def execute(self, query, params=None):
+        """Run SQL text, a prepared statement or a parsed query; returns the cursor"""
+        if self.closed:
+            raise ValueError("Cursor is closed")
+        self._release()
+        self.rowcount = -1
+        self.lastrowid = self.result = None
+        
+        parsed_query = self.executor._bind(query, params)
+        self.has_rows = parsed_query['type'] in ('SELECT', 'EXPLAIN', 'SHOW_STATEMENT_STATS')
+        if self.has_rows and parsed_query['type'] != 'SELECT':
+            self._rows = iter(self.executor.execute(parsed_query))
+            return self
+        if self.has_rows:
+            self._snapshot = self.executor.storage.snapshot()
+            self._source = self._snapshot.iter_select(*_select_clauses(parsed_query))
+            try:
+                first = next(self._source, None)
+            except Exception:
+                self._release()
+                raise
+            self._rows = chain([first], self._source) if first is not None else iter(())
+            return self
+        
+        self.result = self.executor.execute(parsed_query)
+        if parsed_query['type'] == 'INSERT':
+            self.rowcount = len(parsed_query['rows'])
+            if self.rowcount == 1:
+                self.lastrowid = self.result
+        elif parsed_query['type'] in ('UPDATE', 'DELETE'):
+            self.rowcount = self.result
+        elif parsed_query['type'] in ('COPY_FROM', 'COPY_TO'):
+            self.rowcount = self.result['rows']
+        return self
+    
+    def fetchone(self):
+        """Return the next row, or None when there are no more"""
+        row = next(self._check_rows(), None)
+        if row is None:
+            self._release()
+        return row
+    
+    def fetchmany(self, size=None):
+        """Return a list of up to size (default arraysize) rows"""
+        size = self.arraysize if size is None else size
+        rows = list(islice(self._check_rows(), size))
+        if len(rows) < size:
+            self._release()
+        return rows
+    
+    def fetchall(self):
+        """Return the remaining rows"""
+        rows = list(self._check_rows())
+        self._release()
+        return rows
+    
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+    
+    def close(self):
+        """Release the snapshot and stop producing rows"""
+        self._release()
+        self.closed = True
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def _check_rows(self):
+        if self.closed:
+            raise ValueError("Cursor is closed")
+        if self.has_rows is None:
+            raise ValueError("No statement has been executed")
+        if not self.has_rows:
+            raise ValueError("The last statement did not return rows")
+        return self._rows if self._rows is not None else iter(())
+    
+    def _release(self):
+        self._rows = None
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        if self._snapshot is not None:
+            self._snapshot.release()
+            self._snapshot = None
+
 
 class QueryExecutor:
     
-    def __init__(self, db_file='database.db'):
-        # Create StorageEngine instance
-        self.storage = StorageEngine(db_file)
+    def __init__(self, db_file='database.db', plan_cache_size=128, result_cache_bytes=0,
+                 batch_mode=False, max_parallel_workers=0, storage=None, slow_query_log=None,
+                 slow_query_ms=100):
+        # Create StorageEngine instance, unless sharing one with other executors
+        if storage is None:
+            storage = StorageEngine(db_file)
+            # Numeric scans over NumPy column batches (ignored without NumPy)
+            storage.batch_mode = batch_mode
+            # Worker processes for scans of large tables
+            storage.max_parallel_workers = max_parallel_workers
+        self.storage = storage
+        # Parsed statements keyed on normalized SQL text
+        self.plan_cache = LRUCache(plan_cache_size)
+        # Optional SELECT result cache, invalidated by table versions
+        self.result_cache = ResultCache(result_cache_bytes) if result_cache_bytes else None
+        # Timings per statement, and a log of those slower than slow_query_ms;
+        # None turns measuring off
+        self.statement_stats = StatementStats(slow_query_log, slow_query_ms)
+    
+    def prepare(self, sql):
+        """Parse a statement once for repeated execution with parameters"""
+        key = normalize_sql(sql)
+        statement = self.plan_cache.get(key)
+        if statement is None:
+            statement = PreparedStatement(sql, SQLParser.parse(sql))
+            self.plan_cache.put(key, statement)
+        return statement
     
-    def execute(self, parsed_query):
-        """Execute a parsed query"""
+    def execute(self, parsed_query, params=None):
+        """Execute a parsed query or a prepared statement"""
+        if isinstance(parsed_query, PreparedStatement) and self.statement_stats is not None:
+            return self._execute_measured(parsed_query, params)
+        return self._execute(parsed_query, params)
+    
+    def _execute(self, parsed_query, params=None):
+        if isinstance(parsed_query, PreparedStatement):
+            if self.result_cache is not None and parsed_query.parsed_query['type'] == 'SELECT':
+                return self._execute_cached(parsed_query, params)
+            parsed_query = parsed_query.bind(params)
+        elif params is not None:
+            parsed_query = SQLParser.bind_parameters(parsed_query, params)
+        
         query_type = parsed_query['type']
         
         if query_type == 'CREATE_TABLE':
@@ -21,49 +201,17 @@ class QueryExecutor:
             )
         
         elif query_type == 'INSERT':
-            values_dict = parsed_query['values']
-            table_name = parsed_query['table_name']
-            
-            # Check if this is a positional INSERT (no column names specified)
-            if parsed_query.get('is_positional', False):
-                # Get the positional values list
-                positional_values = values_dict['__positional_values']
-                
-                # Check if table exists
-                if table_name not in self.storage.schema:
-                    raise ValueError(f"Table '{table_name}' doesn't exist")
-                
-                # Get column names in order from table schema
-                table_schema = self.storage.schema[table_name]
-                column_names = [col['name'] for col in table_schema['columns']]
-                
-                # Check if we have the right number of values
-                if len(positional_values) != len(column_names):
-                    raise ValueError(
-                        f"Table '{table_name}' has {len(column_names)} columns "
-                        f"but {len(positional_values)} values were provided"
-                    )
-                
-                # Map positional values to column names
-                mapped_values = {}
-                for i, col_name in enumerate(column_names):
-                    mapped_values[col_name] = positional_values[i]
-                
-                # Insert with mapped values
-                return self.storage.insert(table_name, mapped_values)
-            else:
-                # Regular INSERT with column names
-                return self.storage.insert(table_name, values_dict)
-        
-        elif query_type == 'SELECT':
-            return self.storage.select(
+            row_ids = self.storage.insert_many(
                 parsed_query['table_name'],
-                parsed_query['columns'],
-                parsed_query.get('where'),
-                parsed_query.get('join'),
-                parsed_query.get('order_by'),
-                parsed_query.get('limit')
+                self._insert_rows(parsed_query)
             )
+            # A single-row INSERT returns its row ID, a multi-row one the list
+            return row_ids[0] if len(row_ids) == 1 else row_ids
+        
+        elif query_type == 'SELECT':
+            # Reads run on a snapshot, so they never wait for writers
+            with self.storage.snapshot() as snapshot:
+                return self._select(snapshot, parsed_query)
         
         elif query_type == 'UPDATE':
             return self.storage.update(
@@ -84,11 +232,393 @@ class QueryExecutor:
                 parsed_query['column_name']
             )
         
+        elif query_type == 'CREATE_MATERIALIZED_VIEW':
+            return self.storage.create_materialized_view(
+                parsed_query['view_name'],
+                parsed_query['query']
+            )
+        
+        elif query_type == 'REFRESH_MATERIALIZED_VIEW':
+            return self.storage.refresh_materialized_view(parsed_query['view_name'])
+        
+        elif query_type == 'COPY_FROM':
+            newline = '' if parsed_query['format'] == 'csv' else None
+            with open(parsed_query['path'], newline=newline, encoding='utf-8') as f:
+                return self.copy_from(
+                    parsed_query['table_name'], f,
+                    parsed_query['format'], parsed_query['header']
+                )
+        
+        elif query_type == 'EXPLAIN':
+            return self.explain(parsed_query).rows()
+        
+        elif query_type == 'SHOW_STATEMENT_STATS':
+            if self.statement_stats is None:
+                raise ValueError("Statement statistics are turned off")
+            return self.statement_stats.rows()
+        
+        elif query_type == 'COPY_TO':
+            newline = '' if parsed_query['format'] == 'csv' else None
+            with open(parsed_query['path'], 'w', newline=newline, encoding='utf-8') as f:
+                return self.copy_to(
+                    parsed_query['query'] or parsed_query['table_name'], f,
+                    parsed_query['format'], parsed_query['header']
+                )
+        
         else:
             raise ValueError(f"Unknown query type: {query_type}")
     
-    def execute_raw(self, sql):
-        """Parse and execute raw SQL"""
-        from .parser import SQLParser
-        parsed = SQLParser.parse(sql)
-        return self.execute(parsed)
\ No newline at end of file
+    def explain(self, query, params=None, analyze=False):
+        """Return the QueryPlan of a SELECT, executed with statistics if analyze
+        
+        query is SQL text, a prepared statement or a parsed query, either a
+        SELECT or an EXPLAIN [ANALYZE] of one.
+        """
+        parsed_query = self._bind(query, params)
+        if parsed_query['type'] == 'EXPLAIN':
+            analyze = analyze or parsed_query['analyze']
+            parsed_query = parsed_query['query']
+        if parsed_query['type'] != 'SELECT':
+            raise ValueError("EXPLAIN supports SELECT statements only")
+        
+        with self.storage.snapshot() as snapshot:
+            start = time.perf_counter()
+            root = snapshot.plan_select(*_select_clauses(parsed_query))
+            plan = QueryPlan(root, time.perf_counter() - start)
+            if analyze:
+                plan.analyze()
+        return plan
+    
+    @staticmethod
+    def _select(storage, parsed_query):
+        """Run a parsed SELECT against a storage engine or a snapshot of one"""
+        return storage.select(*_select_clauses(parsed_query))
+    
+    def _insert_rows(self, parsed_query):
+        """Map the VALUES rows of an INSERT to column-name dicts"""
+        table_name = parsed_query['table_name']
+        columns = parsed_query['columns']
+        
+        if columns is None:
+            # Get column names in order from table schema
+            table_schema = self._table_schema(table_name)
+            columns = [col['name'] for col in table_schema['columns']]
+            
+            # Check if we have the right number of values
+            width = len(parsed_query['rows'][0])
+            if width != len(columns):
+                raise ValueError(
+                    f"Table '{table_name}' has {len(columns)} columns "
+                    f"but {width} values were provided"
+                )
+        
+        return [dict(zip(columns, values)) for values in parsed_query['rows']]
+    
+    def _table_schema(self, table_name):
+        """Return a table's schema, first reloading the file if the table is unknown
+        
+        Another process may have created the table since this engine last
+        read the database file.
+        """
+        table_schema = self.storage.schema.get(table_name)
+        if table_schema is None and self.storage.refresh():
+            table_schema = self.storage.schema.get(table_name)
+        if table_schema is None:
+            raise ValueError(f"Table '{table_name}' doesn't exist")
+        return table_schema
+    
+    def executemany(self, sql, seq_of_params):
+        """Execute one statement for each set of parameters
+        
+        INSERT statements are bound row by row and stored as a single batch
+        (one constraint pass, one save). Other statements run once per set
+        inside one transaction, so the batch is published and saved once
+        and either every set is applied or none is.
+        """
+        statement = sql if isinstance(sql, PreparedStatement) else self.prepare(sql)
+        
+        if statement.parsed_query['type'] == 'INSERT':
+            rows = []
+            for params in seq_of_params:
+                rows.extend(self._insert_rows(statement.bind(params)))
+            return self.storage.insert_many(statement.parsed_query['table_name'], rows)
+        
+        total = 0
+        with self.storage.transaction():
+            for params in seq_of_params:
+                result = self.execute(statement.bind(params))
+                total += result if isinstance(result, int) else 0
+        return total
+    
+    def copy_from(self, table_name, fileobj, format='csv', header=False, chunk_size=10000):
+        """Bulk load a CSV or JSONL stream into a table
+        
+        The file is read chunk_size records at a time and stored in one
+        batch. CSV values are positional in table column order unless header
+        is true, in which case the first line names the columns; empty CSV
+        fields are NULL. JSONL lines are objects keyed by column name.
+        Returns a dict with the row count, elapsed seconds and rows/sec.
+        """
+        table_schema = self._table_schema(table_name)
+        
+        start = time.perf_counter()
+        if format == 'csv':
+            columns, records = _csv_records(fileobj, header)
+        elif format == 'jsonl':
+            columns = [col['name'] for col in table_schema['columns']]
+            records = _jsonl_records(fileobj, columns)
+        else:
+            raise ValueError(f"Unsupported COPY format: {format}")
+        
+        count = self.storage.bulk_load(table_name, _chunked(records, chunk_size), columns)
+        seconds = time.perf_counter() - start
+        return {
+            'rows': count,
+            'seconds': seconds,
+            'rows_per_sec': count / seconds if seconds > 0 else 0.0,
+        }
+    
+    def iter_rows(self, query, params=None):
+        """Yield the rows of a SELECT one at a time without building a list
+        
+        query is SQL text, a prepared statement or a parsed SELECT. SQL text
+        and prepared statements are added to statement_stats when the rows
+        run out or the iterator is closed.
+        """
+        if self.statement_stats is None or not isinstance(query, (str, PreparedStatement)):
+            return self._iter_rows(query, params)
+        start = time.perf_counter()
+        statement = self.prepare(query) if isinstance(query, str) else query
+        rows = self._iter_rows(statement, params)
+        return self.statement_stats.measure_rows(rows, statement.fingerprint, statement.sql,
+                                                 params, time.perf_counter() - start)
+    
+    def _iter_rows(self, query, params=None):
+        query = self._bind(query, params)
+        if query['type'] != 'SELECT':
+            raise ValueError("Only SELECT statements produce rows")
+        return self._snapshot_rows(*_select_clauses(query))
+    
+    def _bind(self, query, params):
+        """Return the parsed form of SQL text, a prepared statement or a parsed query"""
+        if isinstance(query, str):
+            query = self.prepare(query)
+        if isinstance(query, PreparedStatement):
+            return query.bind(params)
+        if params is not None:
+            return SQLParser.bind_parameters(query, params)
+        return query
+    
+    def _snapshot_rows(self, table_name, *clauses):
+        """Yield iter_select() rows from a snapshot held until iteration ends"""
+        with self.storage.snapshot() as snapshot:
+            yield from snapshot.iter_select(table_name, *clauses)
+    
+    def copy_to(self, source, fileobj, format='csv', header=False, chunk_size=1000):
+        """Export a table or a SELECT to a CSV or JSONL stream
+        
+        source is a table name, SQL text or a parsed SELECT. Rows are pulled
+        through iter_rows() and written chunk_size at a time, so memory use
+        does not grow with the size of the result. NULLs are written as
+        empty CSV fields. Returns the same statistics as copy_from().
+        """
+        start = time.perf_counter()
+        if isinstance(source, str) and source.isidentifier():
+            columns = [col['name'] for col in self._table_schema(source)['columns']]
+            rows = self._snapshot_rows(source)
+        else:
+            columns = None
+            # Measured as part of the COPY statement, not as a SELECT of its own
+            rows = self._iter_rows(source)
+        
+        if format == 'csv':
+            write_chunk = _csv_writer(fileobj, columns, header)
+        elif format == 'jsonl':
+            write_chunk = _jsonl_writer(fileobj, columns)
+        else:
+            raise ValueError(f"Unsupported COPY format: {format}")
+        
+        count = 0
+        for chunk in _chunked(rows, chunk_size):
+            write_chunk(chunk)
+            count += len(chunk)
+        
+        # A CSV header is still written for an empty result
+        if not count and format == 'csv':
+            write_chunk([])
+        
+        seconds = time.perf_counter() - start
+        return {
+            'rows': count,
+            'seconds': seconds,
+            'rows_per_sec': count / seconds if seconds > 0 else 0.0,
+        }
+    
+    def cursor(self):
+        """Return a Cursor for fetching results a few rows at a time"""
+        return Cursor(self)
+    
+    def execute_raw(self, sql, params=None):
+        """Parse and execute raw SQL, reusing cached parses of the same text"""
+        if self.statement_stats is None:
+            return self._execute(self.prepare(sql), params)
+        start = time.perf_counter()
+        statement = self.prepare(sql)
+        return self._execute_measured(statement, params, time.perf_counter() - start)
+    
+    def _execute_measured(self, statement, params, parse_time=0.0):
+        """Execute a prepared statement, adding what it did to statement_stats"""
+        query_type = statement.parsed_query['type']
+        with self.statement_stats.measure(statement.fingerprint, statement.sql, params,
+                                          parse_time, query_type) as metrics:
+            result = self._execute(statement, params)
+            metrics.rows_returned = _result_rows(query_type, result)
+        return result
+    
+    def _execute_cached(self, statement, params):
+        """Run a SELECT through the result cache"""
+        try:
+            key = (statement.key, _freeze(params))
+            hash(key)
+        except TypeError:
+            # Unhashable parameters; just run the query
+            return self.execute(statement.bind(params))
+        
+        with self.storage.snapshot() as snapshot:
+            rows = self.result_cache.get(key, snapshot.versions)
+            if rows is not None:
+                return rows
+            
+            parsed_query = statement.bind(params)
+            tables = [parsed_query['table_name']]
+            tables.extend(join['table'] for join in parsed_query.get('join') or [])
+            
+            # The snapshot's tables can't change while the query runs
+            rows = self._select(snapshot, parsed_query)
+            self.result_cache.put(key, tables, snapshot.versions(tables), rows)
+            return rows
+    
+    def result_cache_stats(self):
+        """Return hit/miss counters of the result cache, or None if disabled"""
+        return self.result_cache.stats() if self.result_cache is not None else None
+    
+    def plan_cache_stats(self):
+        """Return hit/miss counters of the statement cache"""
+        return self.plan_cache.stats()
+
+
+def _select_clauses(parsed_query):
+    """Arguments of StorageEngine.select() for a parsed SELECT"""
+    return (
+        parsed_query['table_name'],
+        parsed_query['columns'],
+        parsed_query.get('where'),
+        parsed_query.get('join'),
+        parsed_query.get('order_by'),
+        parsed_query.get('limit'),
+        parsed_query.get('group_by'),
+        parsed_query.get('having'),
+        parsed_query.get('offset')
+    )
+
+
+def _result_rows(query_type, result):
+    """Rows a statement returned, or inserted, changed or copied"""
+    if isinstance(result, list):
+        return len(result)
+    if query_type == 'INSERT':
+        return 1
+    if query_type in ('UPDATE', 'DELETE', 'REFRESH_MATERIALIZED_VIEW'):
+        return result
+    if query_type in ('COPY_FROM', 'COPY_TO'):
+        return result['rows']
+    return 0
+
+
+def _freeze(params):
+    """Turn query parameters into a hashable cache key component"""
+    if params is None:
+        return None
+    if hasattr(params, 'keys'):
+        return tuple(sorted(params.items()))
+    return tuple(params)
+
+
+def _chunked(records, size):
+    """Group an iterator of records into lists of at most size records"""
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _csv_records(fileobj, header):
+    """Return (column names or None, iterator of value lists) for a CSV stream"""
+    reader = csv.reader(fileobj)
+    columns = None
+    if header:
+        columns = [name.strip() for name in next(reader, [])]
+        if not columns:
+            raise ValueError("COPY with HEADER needs a header line")
+    records = ([value if value != '' else None for value in record]
+               for record in reader if record)
+    return columns, records
+
+
+def _output_columns(row):
+    return [key for key in row if key != '_rowid']
+
+
+def _csv_writer(fileobj, columns, header):
+    """Return a function writing chunks of rows to fileobj as CSV"""
+    state = {'columns': columns, 'header': header}
+    
+    def write_chunk(rows):
+        if state['columns'] is None:
+            state['columns'] = _output_columns(rows[0]) if rows else []
+        columns = state['columns']
+        
+        # Format the chunk in memory and hand it to the file in one write
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        if state['header'] and columns:
+            writer.writerow(columns)
+            state['header'] = False
+        writer.writerows([row.get(name) for name in columns] for row in rows)
+        fileobj.write(buffer.getvalue())
+    
+    return write_chunk
+
+
+def _jsonl_writer(fileobj, columns):
+    """Return a function writing chunks of rows to fileobj as JSON lines"""
+    state = {'columns': columns}
+    
+    def write_chunk(rows):
+        if state['columns'] is None and rows:
+            state['columns'] = _output_columns(rows[0])
+        columns = state['columns']
+        fileobj.write(''.join(
+            json.dumps({name: row.get(name) for name in columns}) + '\n' for row in rows
+        ))
+    
+    return write_chunk
+
+
+def _jsonl_records(fileobj, columns):
+    """Yield value lists in column order from a stream of JSON objects"""
+    known = set(columns)
+    for line_number, line in enumerate(fileobj, 1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number}: invalid JSON ({e.msg})")
+        if not isinstance(obj, dict):
+            raise ValueError(f"Line {line_number}: expected a JSON object")
+        unknown = obj.keys() - known
+        if unknown:
+            raise ValueError(f"Line {line_number}: unknown column(s): {', '.join(sorted(unknown))}")
+        yield [obj.get(name) for name in columns]
@@ -0,0 +1,572 @@
+"""WHERE expression parsing and compilation
+
+Conditions are parsed once into a small AST of dicts (the same shape the
+SQL parser uses for statements) and compiled into nested closures, so the
+per-row cost is just the closure calls.
+"""
+
+import operator
+import re
+
+from .lexer import tokenize
+
+# Words that can never be used as a bare column name in an expression
+_RESERVED = {
+    'AND', 'OR', 'NOT', 'IN', 'BETWEEN', 'IS', 'NULL', 'LIKE', 'TRUE', 'FALSE',
+    'ORDER', 'LIMIT', 'OFFSET', 'GROUP', 'HAVING', 'INNER', 'JOIN', 'ON', 'WHERE', 'FROM',
+}
+
+_COMPARISONS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<>': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class ExpressionParser:
+    """Recursive-descent parser for boolean and scalar expressions"""
+
+    def __init__(self, tokens, pos=0):
+        self.tokens = tokens
+        self.pos = pos
+        self.param_count = 0  # positional '?' placeholders seen so far
+
+    # Token helpers
+
+    def _peek(self, offset=0):
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def _advance(self):
+        token = self.tokens[self.pos]
+        if token.kind != 'EOF':
+            self.pos += 1
+        return token
+
+    def _is_keyword(self, word, offset=0):
+        token = self._peek(offset)
+        return token.kind == 'IDENT' and token.value.upper() == word
+
+    def _accept_keyword(self, word):
+        if self._is_keyword(word):
+            self._advance()
+            return True
+        return False
+
+    def _expect_keyword(self, word):
+        if not self._accept_keyword(word):
+            self._error(f"Expected {word}")
+
+    def _is_op(self, op, offset=0):
+        token = self._peek(offset)
+        return token.kind == 'OP' and token.value == op
+
+    def _accept_op(self, op):
+        if self._is_op(op):
+            self._advance()
+            return True
+        return False
+
+    def _expect_op(self, op):
+        if not self._accept_op(op):
+            self._error(f"Expected '{op}'")
+
+    def _error(self, message):
+        token = self._peek()
+        found = 'end of input' if token.kind == 'EOF' else repr(token.value)
+        raise ValueError(f"{message} near {found} at position {token.pos}")
+
+    # Grammar
+
+    def parse_expression(self):
+        """expression := and_expr (OR and_expr)*"""
+        operands = [self._parse_and()]
+        while self._accept_keyword('OR'):
+            operands.append(self._parse_and())
+        if len(operands) == 1:
+            return operands[0]
+        return {'type': 'OR', 'operands': operands}
+
+    def _parse_and(self):
+        operands = [self._parse_not()]
+        while self._accept_keyword('AND'):
+            operands.append(self._parse_not())
+        if len(operands) == 1:
+            return operands[0]
+        return {'type': 'AND', 'operands': operands}
+
+    def _parse_not(self):
+        if self._accept_keyword('NOT'):
+            return {'type': 'NOT', 'operand': self._parse_not()}
+        return self._parse_predicate()
+
+    def _parse_predicate(self):
+        left = self._parse_operand()
+
+        token = self._peek()
+        if token.kind == 'OP' and token.value in _COMPARISONS:
+            self._advance()
+            right = self._parse_operand()
+            return {'type': 'COMPARE', 'op': token.value, 'left': left, 'right': right}
+
+        if self._accept_keyword('IS'):
+            negated = self._accept_keyword('NOT')
+            self._expect_keyword('NULL')
+            return {'type': 'IS_NULL', 'operand': left, 'negated': negated}
+
+        negated = False
+        if self._is_keyword('NOT') and (self._is_keyword('IN', 1) or
+                                        self._is_keyword('BETWEEN', 1) or
+                                        self._is_keyword('LIKE', 1)):
+            self._advance()
+            negated = True
+
+        if self._accept_keyword('IN'):
+            self._expect_op('(')
+            values = [self._parse_operand()]
+            while self._accept_op(','):
+                values.append(self._parse_operand())
+            self._expect_op(')')
+            return {'type': 'IN', 'operand': left, 'values': values, 'negated': negated}
+
+        if self._accept_keyword('BETWEEN'):
+            low = self._parse_operand()
+            self._expect_keyword('AND')
+            high = self._parse_operand()
+            return {'type': 'BETWEEN', 'operand': left, 'low': low, 'high': high,
+                    'negated': negated}
+
+        if self._accept_keyword('LIKE'):
+            pattern = self._parse_operand()
+            return {'type': 'LIKE', 'operand': left, 'pattern': pattern, 'negated': negated}
+
+        if negated:
+            self._error("Expected IN, BETWEEN or LIKE")
+
+        # A parenthesised condition or a bare boolean column stands on its own
+        return left
+
+    def _parse_operand(self):
+        token = self._peek()
+
+        if token.kind == 'OP' and token.value == '(':
+            self._advance()
+            node = self.parse_expression()
+            if self._is_op(','):
+                # Row value, as in "(last_name, first_name) > (?, ?)"
+                items = [node]
+                while self._accept_op(','):
+                    items.append(self.parse_expression())
+                node = {'type': 'ROW', 'items': items}
+            self._expect_op(')')
+            return node
+
+        if token.kind == 'OP' and token.value == '-' and self._peek(1).kind == 'NUMBER':
+            self._advance()
+            return {'type': 'LITERAL', 'value': -self._advance().value}
+
+        if token.kind in ('NUMBER', 'STRING'):
+            self._advance()
+            return {'type': 'LITERAL', 'value': token.value}
+
+        if token.kind == 'PARAM':
+            return self._parse_param()
+
+        if token.kind == 'IDENT':
+            word = token.value.upper()
+            if word == 'NULL':
+                self._advance()
+                return {'type': 'LITERAL', 'value': None}
+            if word in ('TRUE', 'FALSE'):
+                self._advance()
+                return {'type': 'LITERAL', 'value': word == 'TRUE'}
+            if word not in _RESERVED:
+                self._advance()
+                return {'type': 'COLUMN', 'name': token.value}
+
+        self._error("Expected a column or value")
+
+    def _parse_param(self):
+        """A '?' or ':name' placeholder, bound to a value at execution time"""
+        token = self._advance()
+        if token.value == '?':
+            self.param_count += 1
+            return {'type': 'PARAM', 'index': self.param_count - 1}
+        return {'type': 'PARAM', 'name': token.value[1:]}
+
+
+def parse_where(text):
+    """Parse WHERE clause text into an expression AST"""
+    parser = ExpressionParser(tokenize(text))
+    node = parser.parse_expression()
+    if parser._peek().kind != 'EOF':
+        parser._error("Unexpected token in WHERE clause")
+    return node
+
+
+def expression_columns(node):
+    """Return the set of column names referenced by an expression"""
+    found = set()
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, list):
+            stack.extend(current)
+        elif isinstance(current, dict):
+            if current.get('type') == 'COLUMN':
+                found.add(current['name'])
+            else:
+                stack.extend(v for v in current.values() if isinstance(v, (dict, list)))
+    return found
+
+
+def format_expression(node):
+    """Render an expression AST as SQL text, as EXPLAIN shows conditions"""
+    kind = node['type']
+    if kind in ('AND', 'OR'):
+        return f" {kind} ".join(_format_operand(operand) for operand in node['operands'])
+    if kind == 'NOT':
+        return f"NOT {_format_operand(node['operand'])}"
+    if kind == 'COMPARE':
+        return f"{format_expression(node['left'])} {node['op']} {format_expression(node['right'])}"
+
+    negated = 'NOT ' if node.get('negated') else ''
+    if kind == 'IS_NULL':
+        return f"{format_expression(node['operand'])} IS {negated}NULL"
+    if kind == 'IN':
+        values = ', '.join(format_expression(value) for value in node['values'])
+        return f"{format_expression(node['operand'])} {negated}IN ({values})"
+    if kind == 'BETWEEN':
+        return (f"{format_expression(node['operand'])} {negated}BETWEEN "
+                f"{format_expression(node['low'])} AND {format_expression(node['high'])}")
+    if kind == 'LIKE':
+        return f"{format_expression(node['operand'])} {negated}LIKE {format_expression(node['pattern'])}"
+    if kind == 'ROW':
+        return f"({', '.join(format_expression(item) for item in node['items'])})"
+    if kind == 'COLUMN':
+        return node['name']
+    if kind == 'PARAM':
+        return '?' if 'index' in node else f":{node['name']}"
+    if kind == 'AGGREGATE':
+        return f"{node['func']}({node['arg'] or '*'})"
+    return format_value(node['value'])
+
+
+def format_value(value):
+    """A value as a SQL literal"""
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _format_operand(node):
+    # AND binds tighter than OR, so nested AND/OR groups keep their parentheses
+    if node['type'] in ('AND', 'OR'):
+        return f"({format_expression(node)})"
+    return format_expression(node)
+
+
+def like_to_regex(pattern):
+    """Translate a LIKE pattern into a compiled, case-insensitive regex"""
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts) + r'\Z', re.IGNORECASE | re.DOTALL)
+
+
+# Comparison with the operands swapped, for "literal op column"
+_FLIPPED = {'=': '=', '!=': '!=', '<>': '<>', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+
+def _typed(op):
+    """Wrap a comparison so NULLs and incomparable values compare unknown"""
+    def compare(left, right):
+        if left is None or right is None:
+            return None
+        try:
+            return op(left, right)
+        except TypeError:
+            return None
+    return compare
+
+
+def compile_expression(node, resolve=None, coerce=None):
+    """Compile an expression AST into a function taking a row dict
+
+    The function returns True, False or None for UNKNOWN, as SQL's three
+    valued logic has it: a NULL operand makes a comparison unknown, NOT
+    keeps it unknown, and a filter keeps only the rows that are True.
+    resolve maps a column name from the query to the key used in the row
+    dicts, and coerce(key, value) converts a literal compared against that
+    column to the column's type. Both are called at compile time only, so
+    rows are compared on their native values.
+    """
+    resolve = resolve or (lambda name: name)
+    coerce = coerce or (lambda key, value: value)
+    return _Compiler(resolve, coerce).compile(node)
+
+
+class _Compiler:
+
+    def __init__(self, resolve, coerce):
+        self.resolve = resolve
+        self.coerce = coerce
+
+    def literal_for(self, key, node):
+        """Coerce a literal node against a column key, or None if not a literal"""
+        if node['type'] != 'LITERAL':
+            return None
+        return self.coerce(key, node['value'])
+
+    def value(self, node):
+        node_type = node['type']
+        if node_type == 'LITERAL':
+            value = node['value']
+            return lambda row: value
+        if node_type == 'COLUMN':
+            key = self.resolve(node['name'])
+            return lambda row: row.get(key)
+        # Nested boolean expression used as a value
+        return self.compile(node)
+
+    def compile(self, node):
+        handler = getattr(self, '_compile_' + node['type'].lower(), None)
+        if handler is None:
+            raise ValueError(f"Unsupported expression node: {node['type']}")
+        return handler(node)
+
+    def _compile_and(self, node):
+        parts = [self.compile(operand) for operand in node['operands']]
+        if len(parts) == 2:
+            first, second = parts
+
+            def both(row):
+                result = first(row)
+                if result:
+                    return second(row)
+                # FALSE AND anything is false, UNKNOWN AND TRUE is unknown
+                if result is None and second(row) is not False:
+                    return None
+                return False
+            return both
+
+        def all_of(row):
+            result = True
+            for part in parts:
+                value = part(row)
+                if not value:
+                    if value is not None:
+                        return False
+                    result = None
+            return result
+        return all_of
+
+    def _compile_or(self, node):
+        parts = [self.compile(operand) for operand in node['operands']]
+        if len(parts) == 2:
+            first, second = parts
+
+            def either(row):
+                result = first(row)
+                if result:
+                    return True
+                if result is None:
+                    return True if second(row) else None
+                return second(row)
+            return either
+
+        def any_of(row):
+            result = False
+            for part in parts:
+                value = part(row)
+                if value:
+                    return True
+                if value is None:
+                    result = None
+            return result
+        return any_of
+
+    def _compile_not(self, node):
+        inner = self.compile(node['operand'])
+
+        def negate(row):
+            result = inner(row)
+            return None if result is None else not result
+        return negate
+
+    def _compile_compare(self, node):
+        op, left, right = node['op'], node['left'], node['right']
+        if left['type'] == 'ROW' or right['type'] == 'ROW':
+            return self._compile_row_compare(op, left, right)
+        if left['type'] == 'LITERAL' and right['type'] == 'COLUMN':
+            op, left, right = _FLIPPED[op], right, left
+
+        # Specialise the common "column op literal" shape
+        if left['type'] == 'COLUMN' and right['type'] == 'LITERAL':
+            key = self.resolve(left['name'])
+            value = self.literal_for(key, right)
+            if value is None:
+                return lambda row: None
+            if op == '=':
+                def equals(row):
+                    found = row.get(key)
+                    return None if found is None else found == value
+                return equals
+            compare = _typed(_COMPARISONS[op])
+            return lambda row: compare(row.get(key), value)
+
+        compare = _typed(_COMPARISONS[op])
+        get_left = self.value(left)
+        get_right = self.value(right)
+        return lambda row: compare(get_left(row), get_right(row))
+
+    def _compile_row_compare(self, op, left, right):
+        """Compare row values item by item, the first unequal pair deciding
+
+        (a, b) > (x, y) means a > x OR (a = x AND b > y). A NULL reached
+        before the comparison is decided makes the whole comparison unknown.
+        """
+        if left['type'] != 'ROW' or right['type'] != 'ROW':
+            raise ValueError("A row value can only be compared with another row value")
+        if len(left['items']) != len(right['items']):
+            raise ValueError(f"Cannot compare rows of {len(left['items'])} and "
+                             f"{len(right['items'])} values")
+
+        pairs = [(self._row_item(first, second), self._row_item(second, first))
+                 for first, second in zip(left['items'], right['items'])]
+        decide = _COMPARISONS[op]
+        when_equal = op in ('=', '<=', '>=')
+
+        def compare_rows(row):
+            for get_left, get_right in pairs:
+                left_value, right_value = get_left(row), get_right(row)
+                if left_value is None or right_value is None:
+                    return None
+                if left_value != right_value:
+                    try:
+                        return decide(left_value, right_value)
+                    except TypeError:
+                        return None
+            return when_equal
+        return compare_rows
+
+    def _row_item(self, node, other):
+        """Value getter for a row item, coercing a literal paired with a column"""
+        if node['type'] == 'LITERAL' and other['type'] == 'COLUMN':
+            value = self.literal_for(self.resolve(other['name']), node)
+            return lambda row: value
+        return self.value(node)
+
+    def _compile_is_null(self, node):
+        get_value = self.value(node['operand'])
+        if node['negated']:
+            return lambda row: get_value(row) is not None
+        return lambda row: get_value(row) is None
+
+    def _compile_in(self, node):
+        operand, values, negated = node['operand'], node['values'], node['negated']
+
+        if operand['type'] == 'COLUMN' and all(v['type'] == 'LITERAL' for v in values):
+            key = self.resolve(operand['name'])
+            members = frozenset(self.literal_for(key, v) for v in values)
+            # A NULL in the list makes a value that matches nothing unknown
+            has_null = None in members
+            members = members - {None}
+
+            def in_list(row):
+                value = row.get(key)
+                if value is None:
+                    return None
+                if value in members:
+                    return not negated
+                return None if has_null else negated
+            return in_list
+
+        get_value = self.value(operand)
+        getters = [self.value(v) for v in values]
+
+        def in_values(row):
+            value = get_value(row)
+            if value is None:
+                return None
+            found = [get(row) for get in getters]
+            if any(value == item for item in found if item is not None):
+                return not negated
+            return None if None in found else negated
+        return in_values
+
+    def _compile_between(self, node):
+        operand, low, high = node['operand'], node['low'], node['high']
+        negated = node['negated']
+        at_least = _typed(operator.ge)
+        at_most = _typed(operator.le)
+
+        if operand['type'] == 'COLUMN':
+            key = self.resolve(operand['name'])
+            if low['type'] == 'LITERAL':
+                low = {'type': 'LITERAL', 'value': self.literal_for(key, low)}
+            if high['type'] == 'LITERAL':
+                high = {'type': 'LITERAL', 'value': self.literal_for(key, high)}
+
+        get_value = self.value(operand)
+        get_low = self.value(low)
+        get_high = self.value(high)
+
+        def between(row):
+            value = get_value(row)
+            if value is None:
+                return None
+            low_ok = at_least(value, get_low(row))
+            high_ok = at_most(value, get_high(row))
+            if low_ok is False or high_ok is False:
+                return negated
+            if low_ok is None or high_ok is None:
+                return None
+            return not negated
+        return between
+
+    def _compile_like(self, node):
+        get_value = self.value(node['operand'])
+        negated = node['negated']
+        if node['pattern']['type'] == 'LITERAL':
+            matcher = like_to_regex(str(node['pattern']['value'])).match
+
+            def like(row):
+                value = get_value(row)
+                if value is None:
+                    return None
+                return (matcher(str(value)) is not None) != negated
+            return like
+
+        get_pattern = self.value(node['pattern'])
+
+        def like_dynamic(row):
+            value, pattern = get_value(row), get_pattern(row)
+            if value is None or pattern is None:
+                return None
+            return (like_to_regex(str(pattern)).match(str(value)) is not None) != negated
+        return like_dynamic
+
+    def _compile_literal(self, node):
+        value = None if node['value'] is None else bool(node['value'])
+        return lambda row: value
+
+    def _compile_column(self, node):
+        key = self.resolve(node['name'])
+
+        def truth(row):
+            value = row.get(key)
+            return None if value is None else bool(value)
+        return truth
@@ -0,0 +1,44 @@
+"""Single-pass SQL tokenizer"""
+
+import re
+from collections import namedtuple
+
+Token = namedtuple('Token', ['kind', 'value', 'pos'])
+
+# One master pattern scanned left to right; the first matching group wins
+_TOKEN_RE = re.compile(r"""
+    (?P<WS>\s+)
+  | (?P<NUMBER>\d+\.\d*|\.\d+|\d+)
+  | (?P<STRING>'(?:[^']|'')*'|"(?:[^"]|"")*")
+  | (?P<IDENT>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)?)
+  | (?P<PARAM>\?|:[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<OP><=|>=|!=|<>|[=<>(),*;+\-/%])
+""", re.VERBOSE)
+
+
+def tokenize(sql):
+    """Split SQL text into a list of tokens ending with an EOF token"""
+    tokens = []
+    pos = 0
+    length = len(sql)
+    match = _TOKEN_RE.match
+
+    while pos < length:
+        m = match(sql, pos)
+        if not m:
+            raise ValueError(f"Unexpected character {sql[pos]!r} at position {pos}")
+
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == 'NUMBER':
+            value = float(text) if '.' in text else int(text)
+            tokens.append(Token(kind, value, pos))
+        elif kind == 'STRING':
+            quote = text[0]
+            tokens.append(Token(kind, text[1:-1].replace(quote * 2, quote), pos))
+        elif kind != 'WS':
+            tokens.append(Token(kind, text, pos))
+        pos = m.end()
+
+    tokens.append(Token('EOF', None, length))
+    return tokens
@@ -0,0 +1,222 @@
+"""Ordered indexes for ORDER BY ... LIMIT queries
+
+An ordered index holds the list positions of a table's rows sorted on one
+or more columns, in exactly the order StorageEngine._apply_order_by would
+put them: NULLs first when ascending, last when descending, and ties in
+table order. A page of an ordered query then reads rows in index order and
+stops when the page is full instead of sorting the whole table, and a
+keyset condition such as "(last_name, first_name) > (?, ?)" becomes a
+binary search for the first row of the page.
+
+Indexes are built on first use and rebuilt after the table changes, like
+the NumPy columns of vectorized.ColumnCache.
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+def sort_key(row, keys):
+    """The value a row is ordered by; NULLs sort before every value"""
+    return tuple((row.get(key) is not None, row.get(key)) for key in keys)
+
+
+class OrderedIndex:
+    """Row positions of one table version sorted on some columns"""
+
+    def __init__(self, rows, keys, descending=False):
+        self.descending = descending
+        # A descending scan walks the list backwards, so ties are stored in
+        # reverse table order to come out in table order
+        direction = -1 if descending else 1
+        entries = sorted((sort_key(row, keys), direction * position)
+                         for position, row in enumerate(rows))
+        self.keys = [key for key, _ in entries]
+        self.positions = [direction * position for _, position in entries]
+
+    def scan(self, bound=None, inclusive=False):
+        """Yield row positions in ORDER BY order
+
+        With a bound, only rows ordered after it are visited: rows whose key
+        is greater (ascending) or smaller (descending) than the bound, or
+        equal to it as well when inclusive.
+        """
+        positions = self.positions
+        if not self.descending:
+            start = 0
+            if bound is not None:
+                start = (bisect_left if inclusive else bisect_right)(self.keys, bound)
+            for i in range(start, len(positions)):
+                yield positions[i]
+        else:
+            end = len(positions)
+            if bound is not None:
+                end = (bisect_right if inclusive else bisect_left)(self.keys, bound)
+            for i in range(end - 1, -1, -1):
+                yield positions[i]
+
+
+class OrderedIndexCache:
+    """Ordered indexes per table and sort columns, rebuilt when the table changes"""
+
+    def __init__(self):
+        self.indexes = {}  # (table_name, keys, descending) -> (stamp, OrderedIndex or None)
+
+    def index(self, storage, table_name, keys, descending=False):
+        """Return the OrderedIndex of a table on keys, or None if its values don't sort"""
+        rows = storage.data[table_name]
+        stamp = (storage.table_versions[table_name], id(rows), len(rows))
+        cache_key = (table_name, tuple(keys), descending)
+        entry = self.indexes.get(cache_key)
+        if entry is None or entry[0] != stamp:
+            try:
+                index = OrderedIndex(rows, keys, descending)
+            except TypeError:
+                # Mixed types in a column; ORDER BY leaves such rows unsorted
+                index = None
+            entry = self.indexes[cache_key] = (stamp, index)
+        return entry[1]
+
+    def clear(self, table_name=None):
+        if table_name is None:
+            self.indexes.clear()
+        else:
+            for cache_key in [k for k in self.indexes if k[0] == table_name]:
+                del self.indexes[cache_key]
+
+
+def keyset_bound(where, keys, descending, resolve, coerce):
+    """Find the keyset condition of a WHERE clause
+
+    Looks for a top-level conjunct comparing the ORDER BY columns, as a
+    row value or a single column, with literals in the direction of the
+    scan: "(a, b) > (x, y)" for ascending order, "<" for descending. A
+    NULL compares false there, so a keyset holding NULLs, or followed by
+    NULLs in descending order, is written out column by column instead
+    (see after_condition()), which is recognized too.
+    Returns (bound, inclusive) for OrderedIndex.scan(), or (None, False).
+    """
+    if where is None:
+        return None, False
+    conjuncts = where['operands'] if where['type'] == 'AND' else [where]
+    wanted = ('<', '<=') if descending else ('>', '>=')
+
+    for cond in conjuncts:
+        if cond['type'] in ('OR', 'AND') and len(keys) > 1:
+            bound = _expanded_bound(cond, keys, descending, resolve, coerce)
+            if bound is not None:
+                return bound, False
+            continue
+        if cond['type'] != 'COMPARE' or cond['op'] not in wanted:
+            continue
+        left, right = cond['left'], cond['right']
+        if left['type'] == 'ROW' and right['type'] == 'ROW':
+            columns, values = left['items'], right['items']
+        else:
+            columns, values = [left], [right]
+        if (len(columns) != len(keys)
+                or any(node['type'] != 'COLUMN' for node in columns)
+                or any(node['type'] != 'LITERAL' for node in values)
+                or [resolve(node['name']) for node in columns] != list(keys)):
+            continue
+        try:
+            bound = tuple(coerce(key, node['value']) for key, node in zip(keys, values))
+        except ValueError:
+            continue
+        if any(value is None for value in bound):
+            continue
+        return tuple((True, value) for value in bound), cond['op'] in ('>=', '<=')
+    return None, False
+
+
+def after_condition(columns, names, values, descending):
+    """SQL condition for the rows ordered after a keyset that may hold NULLs
+
+    columns are the ORDER BY columns, ending with a unique one that is
+    never NULL, names the placeholders of their values. NULLs sort first
+    in ascending order and last in descending order, as ORDER BY puts
+    them. keyset_bound() turns the condition back into an index seek.
+    """
+    alternatives = []
+    for parts in _after_terms(columns, names, values, descending):
+        text = ' AND '.join(_term_sql(*part) for part in parts)
+        alternatives.append(f"({text})")
+    return '(' + ' OR '.join(alternatives) + ')'
+
+
+def _after_terms(columns, operands, values, descending):
+    """The alternatives of after_condition(), each a list of terms
+
+    A term is ('cmp', column, op, operand), ('null', column, negated) or
+    ('or', (term, term)); operands are placeholders or literal values.
+    """
+    alternatives = []
+    last = len(columns) - 1
+    for i, (column, operand, value) in enumerate(zip(columns, operands, values)):
+        if value is None:
+            if descending:
+                continue  # nothing sorts after a NULL but more NULLs
+            later = ('null', column, True)
+        elif descending and i < last:
+            later = ('or', (('cmp', column, '<', operand), ('null', column, False)))
+        else:
+            later = ('cmp', column, '<' if descending else '>', operand)
+        equal = [('null', c, False) if v is None else ('cmp', c, '=', o)
+                 for c, o, v in zip(columns[:i], operands[:i], values[:i])]
+        alternatives.append(equal + [later])
+    return alternatives
+
+
+def _term_sql(kind, column, *rest):
+    if kind == 'cmp':
+        return f"{column} {rest[0]} {rest[1]}"
+    if kind == 'null':
+        return f"{column} IS {'NOT ' if rest[0] else ''}NULL"
+    return '(' + ' OR '.join(_term_sql(*term) for term in column) + ')'
+
+
+def _expanded_bound(cond, keys, descending, resolve, coerce):
+    """Bound of an after_condition() conjunct on keys, or None"""
+    shape = _shape(cond, resolve)
+    # One alternative parses as its AND, several as an OR of them
+    alternatives = list(shape[1]) if shape[0] == 'or' else [shape]
+    last = alternatives[-1]
+    parts = list(last[1]) if last[0] == 'and' else [last]
+    if len(parts) != len(keys):
+        return None
+
+    # The last alternative holds every value of the keyset
+    values = []
+    for key, part in zip(keys[:-1], parts):
+        if part[:3] == ('cmp', key, '='):
+            values.append(part[3])
+        elif part == ('null', key, False):
+            values.append(None)
+        else:
+            return None
+    if parts[-1][:3] != ('cmp', keys[-1], '<' if descending else '>'):
+        return None
+    values.append(parts[-1][3])
+
+    expected = []
+    for terms in _after_terms(keys, values, values, descending):
+        expected.append(('and', tuple(terms)) if len(terms) > 1 else terms[0])
+    if expected != alternatives or values[-1] is None:
+        return None
+    try:
+        return tuple((value is not None, None if value is None else coerce(key, value))
+                     for key, value in zip(keys, values))
+    except ValueError:
+        return None
+
+
+def _shape(node, resolve):
+    """A condition as the terms of _after_terms(), with resolved columns and literal values"""
+    kind = node['type']
+    if kind in ('AND', 'OR'):
+        return (kind.lower(), tuple(_shape(operand, resolve) for operand in node['operands']))
+    if (kind == 'COMPARE' and node['left']['type'] == 'COLUMN'
+            and node['right']['type'] == 'LITERAL'):
+        return ('cmp', resolve(node['left']['name']), node['op'], node['right']['value'])
+    if kind == 'IS_NULL' and node['operand']['type'] == 'COLUMN':
+        return ('null', resolve(node['operand']['name']), node['negated'])
+    return ('other',)
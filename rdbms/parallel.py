@@ -0,0 +1,175 @@
+"""Parallel table scans over a process pool
+
+A table's row list is split into contiguous ranges and each range is
+filtered (and optionally aggregated) by a worker process. Workers are
+forked from the query process, so they inherit the tables instead of
+receiving them over a pipe; only the WHERE AST and the range bounds are
+sent, and the predicate is compiled inside the worker because closures
+cannot be pickled. Workers return the positions of matching rows, or
+partial aggregate states that are merged into the final result.
+
+Hash joins are partitioned the same way: both inputs are split on
+hash(join key) into partitions small enough for a worker to hash in
+memory, and each pair of partitions is joined by a worker that returns
+the matching (left position, right position) pairs.
+
+A pool serves queries as long as the tables it was forked with are
+unchanged, and is replaced when a query reads a different version of
+them. Queries from several threads take turns on the pool. Platforms
+without fork() scan serially.
+"""
+
+import heapq
+import multiprocessing
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from .aggregate import accumulate
+from .expressions import compile_expression
+
+# The storage engine a worker process was forked with
+_storage = None
+
+
+def available():
+    """Return whether worker processes can inherit the tables"""
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _init_worker(storage):
+    global _storage
+    _storage = storage
+
+
+def _scan_range(table_name, where, start, stop, aggregates):
+    """Worker: filter rows[start:stop], returning positions or accumulators"""
+    storage = _storage
+    rows = storage.data[table_name]
+    keys = [col['name'] for col in storage.schema[table_name]['columns']]
+    predicate = None
+    if where is not None:
+        predicate = compile_expression(where, storage._column_resolver(keys, table_name),
+                                       storage._literal_coercer(table_name))
+
+    if aggregates is None:
+        return [position for position in range(start, stop) if predicate(rows[position])]
+
+    part = rows[start:stop]
+    if predicate is not None:
+        part = [row for row in part if predicate(row)]
+    return accumulate(part, aggregates)
+
+
+def _join_partition(table_name, column, right_positions, left_positions, keys):
+    """Worker: hash one partition of a table and probe it with the left keys"""
+    rows = _storage.data[table_name]
+    table = {}
+    for position in right_positions:
+        table.setdefault(rows[position].get(column), []).append(position)
+
+    left_out = array('q')
+    right_out = array('q')
+    for position, key in zip(left_positions, keys):
+        matches = table.get(key)
+        if matches:
+            for match in matches:
+                left_out.append(position)
+                right_out.append(match)
+    return left_out, right_out
+
+
+class ParallelScanner:
+    """Runs range scans on a pool of workers forked with the tables being read"""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = None
+        self.stamp = None
+        self.lock = threading.Lock()
+
+    def _pool(self, storage):
+        # Workers see the tables as they were when forked; call with self.lock held
+        stamp = {name: (storage.table_versions[name], id(rows), len(rows))
+                 for name, rows in storage.data.items()}
+        if self.pool is not None and stamp == self.stamp:
+            return self.pool
+        self._shutdown()
+        self.pool = ProcessPoolExecutor(self.workers, multiprocessing.get_context('fork'),
+                                        initializer=_init_worker, initargs=(storage,))
+        self.stamp = stamp
+        return self.pool
+
+    def _ranges(self, count):
+        # A few ranges per worker so an unlucky slow range doesn't hold up the rest
+        parts = self.workers * 4
+        size = max(1, -(-count // parts))
+        return [(start, min(start + size, count)) for start in range(0, count, size)]
+
+    def filter(self, storage, table_name, where):
+        """Return the rows of a table matching where, in table order"""
+        rows = storage.data[table_name]
+        matched = []
+        with self.lock:
+            pool = self._pool(storage)
+            futures = [pool.submit(_scan_range, table_name, where, start, stop, None)
+                       for start, stop in self._ranges(len(rows))]
+            for future in futures:
+                matched.extend(map(rows.__getitem__, future.result()))
+        return matched
+
+    def aggregate(self, storage, table_name, where, aggregates):
+        """Compute (func, row key) aggregates over the rows matching where"""
+        rows = storage.data[table_name]
+        totals = accumulate((), aggregates)
+        with self.lock:
+            pool = self._pool(storage)
+            futures = [pool.submit(_scan_range, table_name, where, start, stop, aggregates)
+                       for start, stop in self._ranges(len(rows))]
+            try:
+                for future in futures:
+                    for total, part in zip(totals, future.result()):
+                        total.merge(part)
+            except TypeError:
+                raise ValueError("Aggregate functions need comparable numeric values")
+        return [total.result() for total in totals]
+
+    def join(self, storage, keys, table_name, column, partitions):
+        """Match left join keys against table_name.column in worker processes
+
+        keys holds one key per left row, None for rows that cannot match.
+        Returns an iterator of (left position, right position) pairs in the
+        order a nested loop over the left rows and then the table would
+        produce them.
+        """
+        left_parts = [(array('q'), []) for _ in range(partitions)]
+        for position, key in enumerate(keys):
+            if key is not None:
+                positions, part_keys = left_parts[hash(key) % partitions]
+                positions.append(position)
+                part_keys.append(key)
+
+        right_parts = [array('q') for _ in range(partitions)]
+        for position, row in enumerate(storage.data[table_name]):
+            key = row.get(column)
+            if key is not None:
+                right_parts[hash(key) % partitions].append(position)
+
+        with self.lock:
+            pool = self._pool(storage)
+            futures = [pool.submit(_join_partition, table_name, column, right, left, part_keys)
+                       for right, (left, part_keys) in zip(right_parts, left_parts)
+                       if right and left]
+            results = [future.result() for future in futures]
+        return heapq.merge(*(zip(*result) for result in results))
+
+    def close(self):
+        """Shut down the worker processes"""
+        with self.lock:
+            self._shutdown()
+
+    def _shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+            self.stamp = None
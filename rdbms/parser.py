@@ -1,138 +1,289 @@
-import re
+from .lexer import tokenize
+from .expressions import ExpressionParser
+
+AGGREGATE_FUNCTIONS = ('COUNT', 'SUM', 'AVG', 'MIN', 'MAX')
+COPY_FORMATS = ('csv', 'jsonl')
+
 
 # Parser for SQL commands
 class SQLParser:
-    
+
     @staticmethod
     def parse(sql):
         """Parse a SQL command and return its components"""
-        # Removed uppercase conversion from here
-        sql = sql.strip()
-        
-        sql_upper = sql.upper()
-        if sql_upper.startswith('CREATE TABLE'):
-            return SQLParser._parse_create_table(sql)
-        elif sql_upper.startswith('INSERT INTO'):
-            return SQLParser._parse_insert(sql)
-        elif sql_upper.startswith('SELECT'):
-            return SQLParser._parse_select(sql)
-        elif sql_upper.startswith('UPDATE'):
-            return SQLParser._parse_update(sql)
-        elif sql_upper.startswith('DELETE FROM'):
-            return SQLParser._parse_delete(sql)
-        elif sql_upper.startswith('CREATE INDEX'):
-            return SQLParser._parse_create_index(sql)
+        tokens = tokenize(sql)
+        return _StatementParser(tokens, sql).parse_statement()
+
+    @staticmethod
+    def parameters(parsed_query):
+        """Return (positional count, set of names) of a query's placeholders"""
+        count = 0
+        names = set()
+        for node in _param_nodes(parsed_query):
+            if 'index' in node:
+                count = max(count, node['index'] + 1)
+            else:
+                names.add(node['name'])
+        return count, names
+
+    @staticmethod
+    def bind_parameters(parsed_query, params):
+        """Return a copy of a parsed query with its placeholders replaced
+
+        params is a sequence for '?' placeholders or a mapping for ':name'
+        ones. The parsed query itself is left untouched so it can be reused.
+        """
+        count, names = SQLParser.parameters(parsed_query)
+        params = () if params is None else params
+
+        if names and count:
+            raise ValueError("Cannot mix '?' and ':name' placeholders")
+        if names:
+            if not hasattr(params, 'keys'):
+                raise ValueError("Named placeholders need a mapping of parameters")
+            missing = names - set(params.keys())
+            if missing:
+                raise ValueError(f"Missing parameter(s): {', '.join(sorted(missing))}")
         else:
-            raise ValueError(f"Unsupported SQL command: {sql}")
-    
+            if hasattr(params, 'keys') or isinstance(params, str):
+                raise ValueError("'?' placeholders need a sequence of parameters")
+            if len(params) != count:
+                raise ValueError(f"Statement expects {count} parameter(s), got {len(params)}")
+
+        def value(item):
+            if _is_param(item):
+                return params[item['index']] if 'index' in item else params[item['name']]
+            return item
+
+        def expression(node):
+            if _is_param(node):
+                return {'type': 'LITERAL', 'value': value(node)}
+            if isinstance(node, dict):
+                return {key: expression(item) for key, item in node.items()}
+            if isinstance(node, list):
+                return [expression(item) for item in node]
+            return node
+
+        bound = dict(parsed_query)
+        if 'rows' in bound:
+            bound['rows'] = [[value(v) for v in values] for values in bound['rows']]
+        if 'set_values' in bound:
+            bound['set_values'] = {col: value(val) for col, val in bound['set_values'].items()}
+        if 'limit' in bound:
+            bound['limit'] = value(bound['limit'])
+        if 'offset' in bound:
+            bound['offset'] = value(bound['offset'])
+        if bound.get('where'):
+            bound['where'] = expression(bound['where'])
+        if bound.get('having'):
+            bound['having'] = expression(bound['having'])
+        if bound.get('query'):
+            bound['query'] = SQLParser.bind_parameters(bound['query'], params)
+        return bound
+
+    @staticmethod
+    def parse_select_list(text):
+        """Parse the column list of a SELECT ('*', 'a, b AS c', 'COUNT(*)')"""
+        parser = _StatementParser(tokenize(text), text)
+        items = parser._parse_select_list()
+        parser._expect_end()
+        return items
+
     @staticmethod
-    def _parse_create_table(sql):
-        # Replace newlines and multiple spaces
-        sql = re.sub(r'\s+', ' ', sql.strip())
-        sql = sql.rstrip(';')
-
-        # CREATE TABLE table_name (col1 TYPE, col2 TYPE, PRIMARY KEY(col))
-        pattern = r'CREATE TABLE (\w+) \((.+)\)'
-        match = re.match(pattern, sql, re.IGNORECASE | re.DOTALL)
-        if not match:
-            raise ValueError(f"Invalid CREATE TABLE syntax: {sql}")
-        
-        table_name = match.group(1)
-        columns_str = match.group(2).strip()
-        
+    def parse_joins(text):
+        """Parse one or more '[INNER] JOIN table ON a = b' clauses"""
+        parser = _StatementParser(tokenize(text), text)
+        joins = parser._parse_joins()
+        parser._expect_end()
+        return joins
+
+    @staticmethod
+    def parse_having(text):
+        """Parse a HAVING condition, which may call aggregate functions"""
+        parser = _StatementParser(tokenize(text), text)
+        parser.allow_aggregates = True
+        node = parser.parse_expression()
+        parser._expect_end()
+        return node
+
+    @staticmethod
+    def parse_order_by(text):
+        """Parse the column list of an ORDER BY clause"""
+        parser = _StatementParser(tokenize(text), text)
+        order_by = parser._parse_order_list()
+        parser._expect_end()
+        return order_by
+
+
+def _is_param(node):
+    return isinstance(node, dict) and node.get('type') == 'PARAM'
+
+
+def _param_nodes(parsed_query):
+    """Yield the PARAM nodes of a parsed query, in no particular order"""
+    for values in parsed_query.get('rows') or []:
+        for item in values:
+            if _is_param(item):
+                yield item
+    for item in (parsed_query.get('set_values') or {}).values():
+        if _is_param(item):
+            yield item
+    if _is_param(parsed_query.get('limit')):
+        yield parsed_query['limit']
+    if _is_param(parsed_query.get('offset')):
+        yield parsed_query['offset']
+    if parsed_query.get('query'):
+        yield from _param_nodes(parsed_query['query'])
+
+    # Expression trees only contain typed nodes, so a plain walk is safe
+    stack = [parsed_query.get('where'), parsed_query.get('having')]
+    while stack:
+        node = stack.pop()
+        if _is_param(node):
+            yield node
+        elif isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+
+
+class _StatementParser(ExpressionParser):
+    """Recursive-descent parser turning a token list into a query dict"""
+
+    def __init__(self, tokens, sql):
+        super().__init__(tokens)
+        self.sql = sql
+        self.allow_aggregates = False
+
+    def parse_statement(self):
+        if self._accept_keyword('SELECT'):
+            query = self._parse_select()
+        elif self._accept_keyword('INSERT'):
+            self._expect_keyword('INTO')
+            query = self._parse_insert()
+        elif self._accept_keyword('UPDATE'):
+            query = self._parse_update()
+        elif self._accept_keyword('DELETE'):
+            self._expect_keyword('FROM')
+            query = self._parse_delete()
+        elif self._is_keyword('CREATE') and self._is_keyword('TABLE', 1):
+            self.pos += 2
+            query = self._parse_create_table()
+        elif self._is_keyword('CREATE') and self._is_keyword('INDEX', 1):
+            self.pos += 2
+            query = self._parse_create_index()
+        elif self._is_keyword('CREATE') and self._is_keyword('MATERIALIZED', 1):
+            self.pos += 2
+            query = self._parse_create_view()
+        elif self._is_keyword('REFRESH') and self._is_keyword('MATERIALIZED', 1):
+            self.pos += 2
+            self._expect_keyword('VIEW')
+            query = {'type': 'REFRESH_MATERIALIZED_VIEW', 'view_name': self._expect_name('view name')}
+        elif self._accept_keyword('COPY'):
+            query = self._parse_copy()
+        elif self._accept_keyword('EXPLAIN'):
+            query = self._parse_explain()
+        elif self._accept_keyword('SHOW'):
+            self._expect_keyword('STATEMENT')
+            self._expect_keyword('STATS')
+            query = {'type': 'SHOW_STATEMENT_STATS'}
+        else:
+            raise ValueError(f"Unsupported SQL command: {self.sql.strip()}")
+
+        self._expect_end()
+        return query
+
+    # Helpers
+
+    def _expect_end(self):
+        self._accept_op(';')
+        if self._peek().kind != 'EOF':
+            self._error("Unexpected token")
+
+    def _expect_name(self, what='name'):
+        token = self._peek()
+        if token.kind != 'IDENT':
+            self._error(f"Expected {what}")
+        self._advance()
+        return token.value
+
+    def _parse_literal(self):
+        """A single constant value: number, string, NULL, TRUE or FALSE
+
+        Placeholders are returned as their PARAM node and replaced by
+        SQLParser.bind_parameters.
+        """
+        node = self._parse_operand()
+        if node['type'] == 'PARAM':
+            return node
+        if node['type'] != 'LITERAL':
+            self._error("Expected a value")
+        return node['value']
+
+    def _parse_name_list(self):
+        self._expect_op('(')
+        names = [self._expect_name('column name')]
+        while self._accept_op(','):
+            names.append(self._expect_name('column name'))
+        self._expect_op(')')
+        return names
+
+    # CREATE TABLE table_name (col1 TYPE, col2 TYPE, PRIMARY KEY(col))
+
+    def _parse_create_table(self):
+        table_name = self._expect_name('table name')
+        self._expect_op('(')
+
         columns = []
         primary_key = None
         unique_keys = []
-        
-        # Token splitting that handles constraints properly
-        tokens = []
-        current = ""
-        depth = 0
-        
-        # First pass: split by commas, respecting parentheses
-        for char in columns_str:
-            if char == '(':
-                depth += 1
-                current += char
-            elif char == ')':
-                depth -= 1
-                current += char
-            elif char == ',' and depth == 0:
-                tokens.append(current.strip())
-                current = ""
-            else:
-                current += char
-        
-        if current.strip():
-            tokens.append(current.strip())
-        
-        # Second pass: separate column definitions from constraints
-        column_tokens = []
-        constraint_tokens = []
-        
-        for token in tokens:
-            token_upper = token.upper()
-            if token_upper.startswith('PRIMARY KEY') or token_upper.startswith('UNIQUE'):
-                constraint_tokens.append(token)
+
+        def set_primary_key(col_name):
+            nonlocal primary_key
+            if primary_key is not None:
+                raise ValueError(f"Multiple primary keys defined: {primary_key} and {col_name}")
+            primary_key = col_name
+
+        while True:
+            if self._accept_keyword('PRIMARY'):
+                self._expect_keyword('KEY')
+                for col_name in self._parse_name_list():
+                    set_primary_key(col_name)
+            elif self._accept_keyword('UNIQUE'):
+                self._accept_keyword('KEY')
+                unique_keys.extend(self._parse_name_list())
             else:
-                column_tokens.append(token)
-        
-        # Process column definitions
-        for token in column_tokens:
-            # Split into parts
-            parts = token.split()
-            if len(parts) < 2:
-                raise ValueError(f"Invalid column definition: {token}")
-            
-            col_name = parts[0]
-            col_type = parts[1]
-            
-            # Check for PRIMARY KEY in the same token (e.g., "id INT PRIMARY KEY")
-            # We need to handle this case
-            if 'PRIMARY KEY' in token.upper():
-                # Extract column type before PRIMARY KEY
-                for i, part in enumerate(parts):
-                    if part.upper() == 'PRIMARY':
-                        # Everything before "PRIMARY" is column definition
-                        col_type = parts[i-1] if i > 1 else parts[1]
-                        # Set as primary key
-                        if primary_key is None:
-                            primary_key = col_name
-                        else:
-                            raise ValueError(f"Multiple primary keys defined: {primary_key} and {col_name}")
-                        break
-            
-            # Handle NOT NULL
-            nullable = True
-            if 'NOT NULL' in token.upper():
-                nullable = False
-            
-            # Handle VARCHAR length
-            if '(' in col_type:
-                # Keep as is (e.g., VARCHAR(50))
-                pass
-            
-            columns.append((col_name, col_type, 'NOT NULL' if not nullable else None))
-        
-        # Process constraint tokens
-        for token in constraint_tokens:
-            token_upper = token.upper()
-            
-            if token_upper.startswith('PRIMARY KEY'):
-                # PRIMARY KEY(col_name)
-                pk_match = re.search(r'PRIMARY KEY\((\w+)\)', token, re.IGNORECASE)
-                if pk_match:
-                    if primary_key is None:
-                        primary_key = pk_match.group(1)
+                col_name = self._expect_name('column name')
+                col_type = self._expect_name('column type')
+                if self._accept_op('('):
+                    length = self._advance()
+                    if length.kind != 'NUMBER':
+                        raise ValueError(f"Invalid length for column {col_name}")
+                    self._expect_op(')')
+                    col_type = f"{col_type}({length.value})"
+
+                nullable = True
+                while True:
+                    if self._accept_keyword('PRIMARY'):
+                        self._expect_keyword('KEY')
+                        set_primary_key(col_name)
+                    elif self._accept_keyword('NOT'):
+                        self._expect_keyword('NULL')
+                        nullable = False
+                    elif self._accept_keyword('NULL'):
+                        nullable = True
+                    elif self._accept_keyword('UNIQUE'):
+                        unique_keys.append(col_name)
                     else:
-                        raise ValueError(f"Multiple primary keys defined: {primary_key} and {pk_match.group(1)}")
-            
-            elif token_upper.startswith('UNIQUE'):
-                # UNIQUE(col_name) or UNIQUE KEY(col_name)
-                unique_match = re.search(r'UNIQUE(?: KEY)?\((\w+)\)', token, re.IGNORECASE)
-                if unique_match:
-                    unique_keys.append(unique_match.group(1))
-        
+                        break
+
+                columns.append((col_name, col_type, 'NOT NULL' if not nullable else None))
+
+            if not self._accept_op(','):
+                break
+
+        self._expect_op(')')
+
         return {
             'type': 'CREATE_TABLE',
             'table_name': table_name,
@@ -140,252 +291,317 @@ class SQLParser:
             'primary_key': primary_key,
             'unique_keys': unique_keys
         }
-    
-    @staticmethod
-    def _parse_insert(sql):
-        # Replace newlines with spaces
-        sql = re.sub(r'\s+', ' ', sql.strip())
-        sql = sql.rstrip(';')
-        
-        # INSERT INTO table_name (col1, col2) VALUES ('val1', 'val2')
-        pattern = r'INSERT INTO (\w+) \((.+?)\) VALUES \((.+)\)'
-        match = re.match(pattern, sql, re.IGNORECASE)
-        if not match:
-            # Try without column names
-            pattern2 = r'INSERT INTO (\w+) VALUES \((.+)\)'
-            match = re.match(pattern2, sql, re.IGNORECASE)
-            if not match:
-                raise ValueError(f"Invalid INSERT syntax: {sql}")
-            table_name = match.group(1)
-            values_str = match.group(2)
-            columns = None
-        else:
-            table_name = match.group(1)
-            columns_str = match.group(2)
-            values_str = match.group(3)
-            columns = [col.strip() for col in columns_str.split(',')]
-        
-        # Parse values
-        values = SQLParser._parse_values(values_str)
-        
-        if columns:
-            # Map values to columns
-            if len(columns) != len(values):
-                raise ValueError(f"Column count ({len(columns)}) doesn't match value count ({len(values)})")
-            values_dict = dict(zip(columns, values))
-            is_positional = False
-        else:
-            # For positional INSERT (no column names), store values as a list
-            values_dict = {'__positional_values': values}
-            is_positional = True
-        
+
+    # INSERT INTO table_name [(col1, col2)] VALUES ('val1', 'val2')[, (...)]
+
+    def _parse_insert(self):
+        table_name = self._expect_name('table name')
+
+        # No column names means values are positional, in table order
+        columns = None
+        if self._is_op('('):
+            columns = self._parse_name_list()
+
+        self._expect_keyword('VALUES')
+        rows = [self._parse_value_tuple()]
+        while self._accept_op(','):
+            rows.append(self._parse_value_tuple())
+
+        width = len(columns) if columns else len(rows[0])
+        for values in rows:
+            if len(values) != width:
+                if columns:
+                    raise ValueError(f"Column count ({len(columns)}) doesn't match value count ({len(values)})")
+                raise ValueError(f"All VALUES rows must have {width} values, got {len(values)}")
+
         return {
             'type': 'INSERT',
             'table_name': table_name,
-            'values': values_dict,
-            'is_positional': is_positional
+            'columns': columns,
+            'rows': rows
         }
-    
-    @staticmethod
-    def _parse_select(sql):
-        # Replace newlines and multiple spaces
-        sql = re.sub(r'\s+', ' ', sql.strip())
-        sql = sql.rstrip(';')
-
-        # Parse SELECT statement
-        # Pattern: SELECT columns FROM table [JOIN ...] [WHERE ...] [ORDER BY ...] [LIMIT ...]
-        
-        # Extract SELECT clause
-        select_match = re.match(r'SELECT (.+?) FROM (.+)', sql, re.IGNORECASE)
-        if not select_match:
-            raise ValueError(f"Invalid SELECT syntax: {sql}")
-        
-        columns = select_match.group(1).strip()
-        from_part = select_match.group(2).strip()
-        
-        # Parse FROM clause which may include JOINs
-        # Find the main table (first word before JOIN, WHERE, ORDER BY, or LIMIT)
-        main_table_match = re.match(r'(\w+)(?:\s+.*)?', from_part)
-        if not main_table_match:
-            raise ValueError(f"Could not parse table name from: {from_part}")
-        
-        table_name = main_table_match.group(1)
-        
-        # Initialize components
-        join = None
+
+    def _parse_value_tuple(self):
+        self._expect_op('(')
+        values = [self._parse_literal()]
+        while self._accept_op(','):
+            values.append(self._parse_literal())
+        self._expect_op(')')
+        return values
+
+    # EXPLAIN [ANALYZE] SELECT ...
+
+    def _parse_explain(self):
+        analyze = self._accept_keyword('ANALYZE')
+        if not self._accept_keyword('SELECT'):
+            self._error("EXPLAIN supports SELECT statements only")
+        return {'type': 'EXPLAIN', 'analyze': analyze, 'query': self._parse_select()}
+
+    # SELECT columns FROM table [JOIN ...] [WHERE ...] [ORDER BY ...] [LIMIT ...] [OFFSET ...]
+
+    def _parse_select(self):
+        columns = self._parse_select_list()
+        self._expect_keyword('FROM')
+        table_name = self._expect_name('table name')
+
+        join = self._parse_joins() or None
+
         where = None
+        if self._accept_keyword('WHERE'):
+            where = self.parse_expression()
+
+        group_by = None
+        if self._accept_keyword('GROUP'):
+            self._expect_keyword('BY')
+            group_by = [self._expect_name('column')]
+            while self._accept_op(','):
+                group_by.append(self._expect_name('column'))
+
+        having = None
+        if self._accept_keyword('HAVING'):
+            self.allow_aggregates = True
+            having = self.parse_expression()
+            self.allow_aggregates = False
+
         order_by = None
+        if self._accept_keyword('ORDER'):
+            self._expect_keyword('BY')
+            order_by = self._parse_order_list()
+
         limit = None
-        
-        # Extract JOIN clause (everything from JOIN to WHERE/ORDER BY/LIMIT/end)
-        join_pattern = r'(JOIN .+?)(?=(?: WHERE | ORDER BY | LIMIT |$))'
-        join_match = re.search(join_pattern, from_part, re.IGNORECASE | re.DOTALL)
-        if join_match:
-            join = join_match.group(1).strip()
-        
-        # Extract WHERE clause
-        where_pattern = r'WHERE (.+?)(?=(?: ORDER BY | LIMIT |$))'
-        where_match = re.search(where_pattern, from_part, re.IGNORECASE)
-        if where_match:
-            where = where_match.group(1).strip()
-        
-        # Extract ORDER BY clause
-        order_pattern = r'ORDER BY (.+?)(?=(?: LIMIT |$))'
-        order_match = re.search(order_pattern, from_part, re.IGNORECASE)
-        if order_match:
-            order_by = order_match.group(1).strip()
-        
-        # Extract LIMIT clause
-        limit_pattern = r'LIMIT (.+?)$'
-        limit_match = re.search(limit_pattern, from_part, re.IGNORECASE)
-        if limit_match:
-            limit = limit_match.group(1).strip()
-        
+        if self._accept_keyword('LIMIT'):
+            limit = self._parse_count('LIMIT')
+
+        offset = None
+        if self._accept_keyword('OFFSET'):
+            offset = self._parse_count('OFFSET')
+
         return {
             'type': 'SELECT',
             'columns': columns,
             'table_name': table_name,
             'where': where,
             'join': join,
+            'group_by': group_by,
+            'having': having,
             'order_by': order_by,
-            'limit': limit
+            'limit': limit,
+            'offset': offset
         }
-    
-    @staticmethod
-    def _parse_update(sql):
-        # Replace newlines and multiple spaces
-        sql = re.sub(r'\s+', ' ', sql.strip())
-        sql = sql.rstrip(';')
-
-        # UPDATE table SET col1='val1', col2='val2' WHERE condition
-        pattern = r'UPDATE (\w+) SET (.+?)(?: WHERE (.+))?$'
-        match = re.match(pattern, sql, re.IGNORECASE)
-        if not match:
-            raise ValueError(f"Invalid UPDATE syntax: {sql}")
-        
-        table_name = match.group(1)
-        set_clause = match.group(2)
-        where = match.group(3) if match.group(3) else None
-        
-        # Parse SET clause
-        set_values = {}
-        for pair in set_clause.split(','):
-            col, value = pair.split('=', 1)
-            col = col.strip()
-            value = value.strip()
-            
-            # Handle NULL in UPDATE
-            if value.upper() == 'NULL':
-                set_values[col] = None
-            # Handle quoted strings
-            elif (value.startswith("'") and value.endswith("'")) or (value.startswith('"') and value.endswith('"')):
-                set_values[col] = value[1:-1]
+
+    def _parse_count(self, clause):
+        """A non-negative integer or a placeholder, as used by LIMIT and OFFSET"""
+        if self._peek().kind == 'PARAM':
+            return self._parse_param()
+        token = self._advance()
+        if token.kind != 'NUMBER' or not isinstance(token.value, int):
+            raise ValueError(f"Invalid {clause} value: {token.value}")
+        return token.value
+
+    def _parse_select_list(self):
+        if self._accept_op('*'):
+            return '*'
+
+        items = [self._parse_select_item()]
+        while self._accept_op(','):
+            items.append(self._parse_select_item())
+        return items
+
+    def _parse_select_item(self):
+        if self._is_aggregate_call():
+            item = self._parse_aggregate()
+        else:
+            item = {'type': 'COLUMN', 'name': self._expect_name('column')}
+
+        item['alias'] = None
+        if self._accept_keyword('AS'):
+            item['alias'] = self._expect_name('alias')
+        return item
+
+    def _is_aggregate_call(self):
+        token = self._peek()
+        return (token.kind == 'IDENT' and token.value.upper() in AGGREGATE_FUNCTIONS
+                and self._is_op('(', 1))
+
+    def _parse_aggregate(self):
+        """COUNT(*) or FUNC(column)"""
+        func = self._advance().value.upper()
+        self._expect_op('(')
+        if self._accept_op('*'):
+            if func != 'COUNT':
+                self._error(f"{func}(*) is not supported")
+            arg = None
+        else:
+            arg = self._expect_name('column')
+        self._expect_op(')')
+        return {'type': 'AGGREGATE', 'func': func, 'arg': arg}
+
+    def _parse_operand(self):
+        # Aggregates are values in HAVING; everywhere else they are an error
+        if self.allow_aggregates and self._is_aggregate_call():
+            return self._parse_aggregate()
+        return super()._parse_operand()
+
+    def _parse_joins(self):
+        joins = []
+        while self._is_keyword('JOIN') or (self._is_keyword('INNER') and self._is_keyword('JOIN', 1)):
+            self._accept_keyword('INNER')
+            self._expect_keyword('JOIN')
+            other_table = self._expect_name('table name')
+            self._expect_keyword('ON')
+
+            left = self._parse_operand()
+            self._expect_op('=')
+            right = self._parse_operand()
+            if left['type'] != 'COLUMN' or right['type'] != 'COLUMN':
+                raise ValueError("JOIN ... ON only supports column = column conditions")
+
+            # Keep the joined table's column on the right
+            if left['name'].split('.')[0] == other_table:
+                left, right = right, left
+            joins.append({'table': other_table, 'left': left['name'], 'right': right['name']})
+        return joins
+
+    def _parse_order_list(self):
+        order_by = []
+        while True:
+            column = self._expect_name('column')
+            descending = False
+            if self._accept_keyword('DESC'):
+                descending = True
             else:
-                # Try to convert to number
-                try:
-                    if '.' in value:
-                        set_values[col] = float(value)
-                    else:
-                        set_values[col] = int(value)
-                except ValueError:
-                    set_values[col] = value
-        
+                self._accept_keyword('ASC')
+            order_by.append({'column': column, 'descending': descending})
+            if not self._accept_op(','):
+                return order_by
+
+    # UPDATE table SET col1='val1', col2='val2' WHERE condition
+
+    def _parse_update(self):
+        table_name = self._expect_name('table name')
+        self._expect_keyword('SET')
+
+        set_values = {}
+        while True:
+            col = self._expect_name('column name')
+            self._expect_op('=')
+            set_values[col] = self._parse_literal()
+            if not self._accept_op(','):
+                break
+
+        where = None
+        if self._accept_keyword('WHERE'):
+            where = self.parse_expression()
+
         return {
             'type': 'UPDATE',
             'table_name': table_name,
             'set_values': set_values,
             'where': where
         }
-    
-    @staticmethod
-    def _parse_delete(sql):
-        # Replace newlines and multiple spaces
-        sql = re.sub(r'\s+', ' ', sql.strip())
-        sql = sql.rstrip(';')
-
-        # DELETE FROM table WHERE condition
-        pattern = r'DELETE FROM (\w+)(?: WHERE (.+))?$'
-        match = re.match(pattern, sql, re.IGNORECASE)
-        if not match:
-            raise ValueError(f"Invalid DELETE syntax: {sql}")
-        
-        table_name = match.group(1)
-        where = match.group(2) if match.group(2) else None
-        
+
+    # DELETE FROM table WHERE condition
+
+    def _parse_delete(self):
+        table_name = self._expect_name('table name')
+
+        where = None
+        if self._accept_keyword('WHERE'):
+            where = self.parse_expression()
+
         return {
             'type': 'DELETE',
             'table_name': table_name,
             'where': where
         }
-    
-    @staticmethod
-    def _parse_create_index(sql):
-        # Replace newlines and multiple spaces
-        sql = re.sub(r'\s+', ' ', sql.strip())
-        sql = sql.rstrip(';')
-        
-        # CREATE INDEX index_name ON table_name(column_name)
-        pattern = r'CREATE INDEX (\w+) ON (\w+)\((\w+)\)'
-        match = re.match(pattern, sql, re.IGNORECASE)
-        if not match:
-            raise ValueError(f"Invalid CREATE INDEX syntax: {sql}")
-        
-        index_name = match.group(1)
-        table_name = match.group(2)
-        column_name = match.group(3)
-        
+
+    # CREATE INDEX index_name ON table_name(column_name)
+
+    def _parse_create_index(self):
+        index_name = self._expect_name('index name')
+        self._expect_keyword('ON')
+        table_name = self._expect_name('table name')
+        self._expect_op('(')
+        column_name = self._expect_name('column name')
+        self._expect_op(')')
+
         return {
             'type': 'CREATE_INDEX',
             'index_name': index_name,
             'table_name': table_name,
             'column_name': column_name
         }
-    
-    @staticmethod
-    def _parse_values(values_str):
-        # Parse comma-separated values, handling quotes
-        values = []
-        current = ""
-        in_quotes = False
-        quote_char = None
-        
-        for char in values_str:
-            if char in ("'", '"') and (not in_quotes or char == quote_char):
-                in_quotes = not in_quotes
-                quote_char = char if in_quotes else None
-                current += char
-            elif char == ',' and not in_quotes:
-                values.append(current.strip())
-                current = ""
-            else:
-                current += char
-        
-        if current:
-            values.append(current.strip())
-        
-        # Clean up values
-        cleaned = []
-        for val in values:
-            val = val.strip()
-            
-            # Check for NULL keyword (case-insensitive)
-            if val.upper() == 'NULL':
-                cleaned.append(None)  # Convert NULL to Python None
-            # Handle quoted strings
-            elif val.startswith("'") and val.endswith("'"):
-                cleaned.append(val[1:-1])
-            elif val.startswith('"') and val.endswith('"'):
-                cleaned.append(val[1:-1])
-            # Handle numbers
-            else:
-                # Try to convert to int or float if it looks like a number
-                try:
-                    if '.' in val:
-                        cleaned.append(float(val))
-                    else:
-                        cleaned.append(int(val))
-                except ValueError:
-                    # Keep as string if not a number
-                    cleaned.append(val)
-        
-        return cleaned
\ No newline at end of file
+
+    # CREATE MATERIALIZED VIEW view_name AS SELECT ...
+
+    def _parse_create_view(self):
+        self._expect_keyword('VIEW')
+        view_name = self._expect_name('view name')
+        self._expect_keyword('AS')
+        self._expect_keyword('SELECT')
+        return {
+            'type': 'CREATE_MATERIALIZED_VIEW',
+            'view_name': view_name,
+            'query': self._parse_select()
+        }
+
+    # COPY table FROM 'path' [WITH] [(FORMAT csv|jsonl, HEADER [true|false])]
+    # COPY table|(SELECT ...) TO 'path' [WITH] [(...)]
+
+    def _parse_copy(self):
+        table_name = None
+        query = None
+        if self._accept_op('('):
+            self._expect_keyword('SELECT')
+            query = self._parse_select()
+            self._expect_op(')')
+        else:
+            table_name = self._expect_name('table name')
+
+        if self._accept_keyword('TO'):
+            query_type = 'COPY_TO'
+        else:
+            if query is not None:
+                self._error("Expected TO")
+            self._expect_keyword('FROM')
+            query_type = 'COPY_FROM'
+
+        token = self._advance()
+        if token.kind != 'STRING':
+            raise ValueError("COPY expects a quoted file path")
+        path = token.value
+
+        # The format defaults to the file extension
+        options = {
+            'format': 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv',
+            'header': False,
+        }
+        self._accept_keyword('WITH')
+        if self._accept_op('('):
+            while True:
+                option = self._expect_name('COPY option').lower()
+                if option == 'format':
+                    value = self._expect_name('format').lower()
+                    if value not in COPY_FORMATS:
+                        raise ValueError(f"Unsupported COPY format: {value}")
+                    options['format'] = value
+                elif option == 'header':
+                    options['header'] = True
+                    if self._is_keyword('TRUE') or self._is_keyword('FALSE'):
+                        options['header'] = self._advance().value.upper() == 'TRUE'
+                else:
+                    raise ValueError(f"Unknown COPY option: {option}")
+                if not self._accept_op(','):
+                    break
+            self._expect_op(')')
+
+        copy = {
+            'type': query_type,
+            'table_name': table_name,
+            'path': path,
+            'format': options['format'],
+            'header': options['header']
+        }
+        if query_type == 'COPY_TO':
+            copy['query'] = query
+        return copy
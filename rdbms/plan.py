@@ -0,0 +1,240 @@
+"""Query plans for EXPLAIN and EXPLAIN ANALYZE
+
+StorageEngine.plan_select() decides how a SELECT will run and returns a
+tree of PlanNodes, one per operator: a scan or index lookup at the leaves,
+then filters, joins, aggregation, sorting, LIMIT and projection above them.
+select() executes that tree, so EXPLAIN shows the plan a query really runs.
+
+A node's run function takes its children's outputs and returns a list of
+rows, or an iterator for the operators that stream (the ordered index
+path reads only as many rows as its LIMIT needs). Analyzing a plan runs
+it while recording, per node, the rows produced, how many times it ran,
+its wall time including its inputs and, for nodes that build a list, the
+peak memory allocated. Memory is traced with tracemalloc, which slows the
+query down while it is analyzed.
+
+Even without analyzing, the leaves (scans and index lookups) count the
+rows they read, which statement statistics report as rows scanned.
+"""
+
+import threading
+import time
+import tracemalloc
+
+_END = object()
+
+# Concurrent EXPLAIN ANALYZE runs share one tracemalloc session
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_owns_tracing = False
+
+
+class PlanNode:
+    """One operator of a query plan and, once analyzed, what it did"""
+
+    # Every SELECT builds a plan, so statistics start out as class defaults
+    notes = ()  # what happened at run time, such as a parallel join
+    loops = 0
+    rows = 0
+    time = 0.0  # seconds, including the node's inputs
+    peak_memory = None  # bytes; not measured for streaming nodes
+    reads = None  # function counting the table rows a leaf read, if not its output rows
+
+    def __init__(self, operator, detail=None, children=(), run=None, streams=False,
+                 fallback=None, reads=None):
+        self.operator = operator
+        self._detail = detail  # text, or a function building it when the plan is shown
+        self.children = children
+        self.run = run
+        self.streams = streams  # run returns an iterator its parent consumes
+        self.fallback = fallback  # plan executed instead when run returns None
+        if reads is not None:
+            self.reads = reads
+
+    @property
+    def detail(self):
+        if callable(self._detail):
+            self._detail = self._detail()
+        return self._detail
+
+    def note(self, text):
+        self.notes = self.notes + (text,)
+
+    def execute(self, analyze=False):
+        """Run the plan and return its result, recording statistics if analyze"""
+        if not analyze:
+            # Most operators have one input; skip building an argument list for them
+            if len(self.children) == 1:
+                result = self.run(self.children[0].execute())
+            elif self.children:
+                result = self.run(*[child.execute() for child in self.children])
+            else:
+                # Leaves count the rows they read, for statement statistics
+                result = self.run()
+                self.loops += 1
+                if self.streams:
+                    return self._tallied(result)
+                if result is not None:
+                    self.rows = len(result)
+            if result is None and self.fallback is not None:
+                self.children = (self.fallback,)
+                result = self.fallback.execute()
+            return result
+
+        inputs = [child.execute(analyze) for child in self.children]
+        self.loops += 1
+        # List inputs were built before this node ran; streamed ones are timed inside it
+        input_time = sum(child.time for child in self.children if not child.streams)
+        if self.streams:
+            self.time += input_time
+            return self._counted(self.run(*inputs))
+
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = self.run(*inputs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - base
+
+        if result is None and self.fallback is not None:
+            self.note("not possible for this query, ran the plan below instead")
+            self.children = (self.fallback,)
+            result = self.fallback.execute(analyze)
+            elapsed += self.fallback.time
+            peak = max(peak, self.fallback.peak_memory or 0)
+
+        self.time += input_time + elapsed
+        self.peak_memory = max(peak, self.peak_memory or 0)
+        self.rows += len(result)
+        return result
+
+    def _counted(self, rows):
+        """Pass rows through, counting them and the time spent producing them"""
+        rows = iter(rows)
+        while True:
+            start = time.perf_counter()
+            row = next(rows, _END)
+            self.time += time.perf_counter() - start
+            if row is _END:
+                return
+            self.rows += 1
+            yield row
+
+    def _tallied(self, rows):
+        """Pass rows through, counting them"""
+        for row in rows:
+            self.rows += 1
+            yield row
+
+    def rows_read(self):
+        """Table rows the executed plan read: the total of what its leaves read"""
+        if self.children:
+            total = 0
+            for child in self.children:
+                total += child.rows_read()
+            return total
+        if not self.loops:
+            return 0
+        return self.reads() if self.reads is not None else self.rows
+
+    def lines(self, analyze=False, depth=0):
+        """The plan as indented text, one line per operator"""
+        text = self.operator if not self.detail else f"{self.operator} {self.detail}"
+        if analyze:
+            text += f"  ({self._stats()})"
+        lines = [text if not depth else '      ' * (depth - 1) + '  ->  ' + text]
+        if analyze:
+            lines.extend(' ' * (6 * depth + 2) + note for note in self.notes)
+        for child in self.children:
+            lines.extend(child.lines(analyze, depth + 1))
+        return lines
+
+    def to_dict(self, analyze=False):
+        """The plan as nested dicts, for JSON"""
+        node = {'operator': self.operator, 'detail': self.detail}
+        if analyze:
+            node.update({
+                'rows': self.rows,
+                'loops': self.loops,
+                'time_ms': round(self.time * 1000, 3),
+                'peak_memory_bytes': self.peak_memory,
+                'notes': list(self.notes),
+            })
+        node['children'] = [child.to_dict(analyze) for child in self.children]
+        return node
+
+    def _stats(self):
+        if not self.loops:
+            return "never executed"
+        stats = f"actual rows={self.rows} loops={self.loops} time={self.time * 1000:.3f} ms"
+        if self.peak_memory is not None:
+            stats += f" memory={_format_bytes(self.peak_memory)}"
+        return stats
+
+
+class QueryPlan:
+    """The plan of one SELECT, with its planning and (if analyzed) execution time"""
+
+    def __init__(self, root, planning_time):
+        self.root = root
+        self.planning_time = planning_time
+        self.analyzed = False
+        self.execution_time = None
+
+    def analyze(self):
+        """Execute the plan with per-operator statistics; returns its rows"""
+        _start_tracing()
+        try:
+            start = time.perf_counter()
+            rows = self.root.execute(analyze=True)
+            self.execution_time = time.perf_counter() - start
+        finally:
+            _stop_tracing()
+        self.analyzed = True
+        return rows
+
+    def lines(self):
+        lines = self.root.lines(self.analyzed)
+        lines.append(f"Planning time: {self.planning_time * 1000:.3f} ms")
+        if self.analyzed:
+            lines.append(f"Execution time: {self.execution_time * 1000:.3f} ms")
+        return lines
+
+    def rows(self):
+        """The plan as result rows with a single 'QUERY PLAN' column"""
+        return [{'QUERY PLAN': line} for line in self.lines()]
+
+    def to_dict(self):
+        plan = {
+            'plan': self.root.to_dict(self.analyzed),
+            'planning_time_ms': round(self.planning_time * 1000, 3),
+        }
+        if self.analyzed:
+            plan['execution_time_ms'] = round(self.execution_time * 1000, 3)
+        return plan
+
+
+def _start_tracing():
+    global _tracing_users, _owns_tracing
+    with _tracing_lock:
+        if not _tracing_users:
+            # Leave a session someone else started running when we're done
+            _owns_tracing = not tracemalloc.is_tracing()
+            if _owns_tracing:
+                tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if not _tracing_users and _owns_tracing:
+            tracemalloc.stop()
+
+
+def _format_bytes(size):
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024 or unit == 'MB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
@@ -0,0 +1,80 @@
+"""Pool of query sessions sharing one storage engine
+
+Opening a QueryExecutor reads and unpickles the whole database file. A
+long-running process (such as the web app) instead loads the database
+once and hands out sessions from a pool: each session is a QueryExecutor
+with its own statement cache, while the storage engine and the result
+cache are shared by all of them. SELECTs read snapshots of the tables
+and never wait; writes from different sessions take turns on the storage
+engine's lock. Statement statistics are kept for the pool as a whole.
+"""
+
+import queue
+import threading
+
+from .cache import ResultCache
+from .executor import QueryExecutor
+from .stats import StatementStats
+from .storage import StorageEngine
+
+
+class SessionPool:
+    """Thread-safe pool of at most size sessions over one database file"""
+
+    def __init__(self, db_file='database.db', size=8, timeout=30, plan_cache_size=128,
+                 result_cache_bytes=0, slow_query_log=None, slow_query_ms=100):
+        self.db_file = db_file
+        self.size = size
+        self.timeout = timeout
+        self.plan_cache_size = plan_cache_size
+        self.storage = StorageEngine(db_file)
+        self.result_cache = ResultCache(result_cache_bytes) if result_cache_bytes else None
+        self.statement_stats = StatementStats(slow_query_log, slow_query_ms)
+        self.idle = queue.LifoQueue()
+        self.sessions = []  # every session created, idle or not
+        self.created = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take a session, creating one if fewer than size exist
+
+        Waits up to timeout seconds for a session to be released when all
+        of them are in use.
+        """
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            if self.created < self.size:
+                self.created += 1
+                return self._new_session()
+
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise ValueError(f"No database session became free within {self.timeout}s")
+
+    def release(self, session):
+        """Return a session to the pool"""
+        self.idle.put(session)
+
+    def _new_session(self):
+        session = QueryExecutor(self.db_file, self.plan_cache_size, storage=self.storage)
+        session.result_cache = self.result_cache
+        session.statement_stats = self.statement_stats
+        self.sessions.append(session)
+        return session
+
+    def close(self):
+        """Stop background workers of the shared storage engine"""
+        self.storage.close()
+
+    def stats(self):
+        """Return the number of sessions created and currently idle"""
+        return {
+            'size': self.size,
+            'created': self.created,
+            'idle': self.idle.qsize(),
+        }
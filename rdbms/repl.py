@@ -40,6 +40,12 @@ class REPL:
                 # Remove trailing semicolon
                 sql = sql.strip()[:-1]
                 
+                # Print SELECT rows as the cursor fetches them
+                if sql.upper().startswith('SELECT'):
+                    with self.executor.cursor() as cursor:
+                        self._display_rows(cursor.execute(sql))
+                    continue
+                
                 # Execute query
                 result = self.executor.execute_raw(sql)
                 
@@ -55,11 +61,17 @@ class REPL:
         """Display help information"""
         print("\nAvailable commands:")
         print("  CREATE TABLE table_name (col1 TYPE, col2 TYPE, PRIMARY KEY(col))")
-        print("  INSERT INTO table_name VALUES ('val1', 'val2')")
+        print("  INSERT INTO table_name VALUES ('val1', 'val2')[, ('val3', 'val4')]")
         print("  SELECT * FROM table_name [WHERE condition] [JOIN ...]")
         print("  UPDATE table_name SET col='value' WHERE condition")
         print("  DELETE FROM table_name WHERE condition")
         print("  CREATE INDEX index_name ON table_name(column_name)")
+        print("  CREATE MATERIALIZED VIEW view_name AS SELECT ...")
+        print("  REFRESH MATERIALIZED VIEW view_name")
+        print("  COPY table_name FROM 'file.csv' [(FORMAT csv|jsonl, HEADER)]")
+        print("  COPY table_name|(SELECT ...) TO 'file.jsonl' [(FORMAT csv|jsonl, HEADER)]")
+        print("  EXPLAIN [ANALYZE] SELECT ...")
+        print("  SHOW STATEMENT STATS")
         print("\nData types: INT, VARCHAR(n), TEXT, DATE, FLOAT, BOOL")
         print("\nExamples:")
         print("  CREATE TABLE students (id INT PRIMARY KEY, name VARCHAR(50))")
@@ -73,30 +85,15 @@ class REPL:
         
         if sql_upper.startswith('SELECT'):
             if isinstance(result, list):
-                if not result:
-                    print("No rows found")
-                else:
-                    # Get column names
-                    columns = list(result[0].keys())
-                    
-                    # Print header
-                    print("\n" + " | ".join(columns))
-                    print("-" * (len(" | ".join(columns))))
-                    
-                    # Print rows
-                    for row in result:
-                        values = []
-                        for col in columns:
-                            val = row.get(col, 'NULL')
-                            values.append(str(val))
-                        print(" | ".join(values))
-                    
-                    print(f"\n{len(result)} row(s) returned")
+                self._display_rows(result)
             else:
                 print(f"Result: {result}")
         
         elif sql_upper.startswith('INSERT'):
-            print(f"Inserted row with ID: {result}")
+            if isinstance(result, list):
+                print(f"Inserted {len(result)} row(s)")
+            else:
+                print(f"Inserted row with ID: {result}")
         
         elif sql_upper.startswith('UPDATE'):
             print(f"Updated {result} row(s)")
@@ -107,5 +104,45 @@ class REPL:
         elif sql_upper.startswith('CREATE'):
             print("Command executed successfully")
         
+        elif sql_upper.startswith('REFRESH'):
+            print(f"Refreshed view with {result} row(s)")
+        
+        elif sql_upper.startswith('EXPLAIN'):
+            print()
+            for row in result:
+                print(row['QUERY PLAN'])
+        
+        elif sql_upper.startswith('SHOW'):
+            self._display_rows(result)
+        
+        elif sql_upper.startswith('COPY') and isinstance(result, dict):
+            print(f"Copied {result['rows']} row(s) in {result['seconds']:.2f}s "
+                  f"({result['rows_per_sec']:,.0f} rows/sec)")
+        
+        else:
+            print(f"Result: {result}")
+    
+    def _display_rows(self, rows):
+        """Print rows as a table while reading them, so a large result isn't held in memory"""
+        columns = None
+        count = 0
+        for row in rows:
+            if columns is None:
+                # Get column names
+                columns = list(row.keys())
+                
+                # Print header
+                print("\n" + " | ".join(columns))
+                print("-" * (len(" | ".join(columns))))
+            
+            values = []
+            for col in columns:
+                val = row.get(col, 'NULL')
+                values.append(str(val))
+            print(" | ".join(values))
+            count += 1
+        
+        if columns is None:
+            print("No rows found")
         else:
-            print(f"Result: {result}")
\ No newline at end of file
+            print(f"\n{count} row(s) returned")
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""Asyncio database server speaking a length-prefixed message protocol
+
+Every message in either direction is a frame: a 4-byte big-endian length
+followed by that many bytes of UTF-8 JSON. Each request carries an "id"
+chosen by the client, which the server copies into every response frame
+for it. Clients may send any number of requests without waiting
+(pipelining); a connection's requests are executed and answered in the
+order they arrived.
+
+Requests:
+
+    {"id": 1, "op": "query", "sql": "...", "params": [...] or {...}}
+    {"id": 2, "op": "prepare", "sql": "..."}
+    {"id": 3, "op": "execute", "statement": 1, "params": [...]}
+    {"id": 4, "op": "close", "statement": 1}
+    {"id": 5, "op": "ping"}
+
+A SELECT answers with one or more batches of rows; the first batch names
+the columns and "more" is false on the last one (which may be empty):
+
+    {"id": 1, "columns": ["id", "name"], "rows": [[1, "Ann"], ...], "more": true}
+    {"id": 1, "rows": [...], "more": false}
+
+Other statements answer {"id": 1, "result": ...}, "prepare" answers
+{"id": 2, "statement": 1, "param_count": 1, "param_names": []}, and any
+failure answers {"id": 1, "error": "message"}.
+
+Statements run on threads with sessions from a SessionPool, so a slow
+query on one connection doesn't hold up the others.
+
+Clients are not authenticated, so COPY, which reads and writes files on
+the server, is refused unless the server is created with allow_copy=True.
+Clients can load rows with a prepared INSERT and pipelined requests instead.
+"""
+
+import asyncio
+import json
+import struct
+from itertools import islice
+
+from .executor import PreparedStatement
+from .pool import SessionPool
+
+FRAME_HEADER = struct.Struct('>I')
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+def encode_frame(message):
+    """Return a message as a frame ready to send"""
+    payload = json.dumps(message, separators=(',', ':'), default=str).encode('utf-8')
+    return FRAME_HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader):
+    """Read one message from a stream, or return None at end of stream
+
+    A stream ending inside a frame counts as its end too.
+    """
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    length = FRAME_HEADER.unpack(header)[0]
+    if length > MAX_FRAME_BYTES:
+        raise ValueError(f"Frame of {length} bytes exceeds the {MAX_FRAME_BYTES} byte limit")
+    try:
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        # The client went away part way through a frame
+        return None
+    return json.loads(payload)
+
+
+class DatabaseServer:
+    """Serves one database file to TCP clients"""
+
+    def __init__(self, db_file='database.db', host='127.0.0.1', port=5433, pool_size=8,
+                 batch_size=1000, result_cache_bytes=0, allow_copy=False):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.allow_copy = allow_copy  # let clients run COPY on the server's files
+        self.pool = SessionPool(db_file, size=pool_size, result_cache_bytes=result_cache_bytes)
+        self.server = None
+
+    async def start(self):
+        """Start listening; with port 0 the chosen port is stored in self.port"""
+        self.server = await asyncio.start_server(self._serve_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self.server
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        """Stop accepting connections and stop the storage engine's workers"""
+        if self.server is not None:
+            self.server.close()
+        self.pool.close()
+
+    async def _serve_connection(self, reader, writer):
+        statements = {}  # handle -> PreparedStatement, for this connection only
+        try:
+            while True:
+                try:
+                    request = await read_frame(reader)
+                except (ValueError, json.JSONDecodeError) as e:
+                    writer.write(encode_frame({'id': None, 'error': f"Bad frame: {e}"}))
+                    break
+                if request is None:
+                    break
+                await self._handle(request, statements, writer)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, request, statements, writer):
+        """Run one request and write its response frames"""
+        loop = asyncio.get_running_loop()
+        request_id = request.get('id')
+        op = request.get('op')
+        try:
+            if op == 'ping':
+                response = {'result': 'pong'}
+            elif op == 'prepare':
+                statement = await loop.run_in_executor(None, self._prepare, request.get('sql'))
+                handle = len(statements) + 1
+                while handle in statements:
+                    handle += 1
+                statements[handle] = statement
+                response = {'statement': handle, 'param_count': statement.param_count,
+                            'param_names': sorted(statement.param_names)}
+            elif op == 'close':
+                statements.pop(request.get('statement'), None)
+                response = {'result': None}
+            elif op in ('query', 'execute'):
+                if op == 'execute':
+                    statement = statements.get(request.get('statement'))
+                    if statement is None:
+                        raise ValueError(f"Unknown statement handle: {request.get('statement')}")
+                else:
+                    statement = request.get('sql')
+                rows, result = await loop.run_in_executor(
+                    None, self._run, statement, request.get('params'))
+                if rows is not None:
+                    await self._stream(request_id, rows, writer)
+                    return
+                response = {'result': result}
+            else:
+                raise ValueError(f"Unknown operation: {op}")
+        except Exception as e:
+            response = {'error': str(e)}
+        response['id'] = request_id
+        writer.write(encode_frame(response))
+
+    async def _stream(self, request_id, rows, writer):
+        """Send the rows of a SELECT in batches of batch_size"""
+        loop = asyncio.get_running_loop()
+        try:
+            batch = await loop.run_in_executor(None, _next_batch, rows, self.batch_size)
+            # SELECT * rows carry the internal _rowid, which clients never see
+            columns = [key for key in batch[0] if key != '_rowid'] if batch else []
+            message = {'id': request_id, 'columns': columns}
+            while True:
+                # A full batch may be followed by more rows, or by an empty last batch
+                message['rows'] = [[row.get(column) for column in columns] for row in batch]
+                message['more'] = len(batch) == self.batch_size
+                writer.write(encode_frame(message))
+                await writer.drain()
+                if not message['more']:
+                    return
+                batch = await loop.run_in_executor(None, _next_batch, rows, self.batch_size)
+                message = {'id': request_id}
+        except Exception as e:
+            writer.write(encode_frame({'id': request_id, 'error': str(e)}))
+        finally:
+            rows.close()
+
+    def _prepare(self, sql):
+        session = self.pool.acquire()
+        try:
+            return session.prepare(sql)
+        finally:
+            self.pool.release(session)
+
+    def _run(self, statement, params):
+        """Execute a statement; returns (row iterator, None) for a SELECT, else (None, result)"""
+        session = self.pool.acquire()
+        try:
+            if not isinstance(statement, PreparedStatement):
+                statement = session.prepare(statement)
+            query_type = statement.parsed_query['type']
+            if query_type in ('COPY_FROM', 'COPY_TO') and not self.allow_copy:
+                raise ValueError("COPY reads and writes files on the server and is disabled; "
+                                 "start the server with allow_copy=True to enable it")
+            if query_type == 'SELECT':
+                if session.result_cache is not None:
+                    return (row for row in session.execute(statement, params)), None
+                return session.iter_rows(statement, params), None
+            return None, session.execute(statement, params)
+        finally:
+            self.pool.release(session)
+
+
+def _next_batch(rows, size):
+    return list(islice(rows, size))
@@ -0,0 +1,279 @@
+"""Per-statement execution metrics and the slow query log
+
+QueryExecutor.execute_raw() (and execute() of a prepared statement)
+measures each statement it runs in four phases: parsing the SQL, planning
+the SELECTs it runs (UPDATE and DELETE find their rows with one), executing,
+and persisting, the save() that writes the database file. It also counts
+the table rows the plans read against the rows the statement returned or
+changed, and the bytes save() wrote.
+
+The measurements are aggregated per statement fingerprint, its normalized
+text with literals replaced by '?', so the same query run with different
+values is one entry. Percentiles are computed over the most recent calls.
+Statements slower than a threshold are appended to a slow query log, one
+JSON object per line.
+"""
+
+import datetime
+import json
+import math
+import re
+import threading
+import time
+from collections import deque
+
+from .cache import normalize_sql
+
+# String and number literals, outside of identifiers such as t1.col2
+_LITERAL_RE = re.compile(r"""'(?:[^']|'')*'|"(?:[^"]|"")*"|(?<![A-Za-z0-9_.])(?:\d+\.\d*|\.\d+|\d+)""")
+
+# Columns of SHOW STATEMENT STATS
+STATEMENT_STATS_COLUMNS = [
+    'statement', 'calls', 'errors', 'total_ms', 'mean_ms', 'p95_ms', 'p99_ms', 'max_ms',
+    'parse_ms', 'plan_ms', 'execute_ms', 'persist_ms', 'rows_scanned', 'rows_returned',
+    'bytes_written',
+]
+
+_local = threading.local()
+
+# Marks the end of the rows in measure_rows()
+_END = object()
+
+
+def statement_fingerprint(sql):
+    """Normalize SQL text and replace its literals with '?'"""
+    return _LITERAL_RE.sub('?', normalize_sql(sql))
+
+
+def current_metrics():
+    """The StatementMetrics of the statement running on this thread, or None"""
+    return getattr(_local, 'metrics', None)
+
+
+class StatementMetrics:
+    """What one execution of a statement did
+
+    Used as a context manager around the execution, it is the current
+    metrics of its thread and is added to its StatementStats on exit.
+    """
+
+    def __init__(self, stats, fingerprint, sql, params=None, parse_time=0.0, query_type=None):
+        self.stats = stats
+        self.fingerprint = fingerprint
+        self.sql = sql
+        self.query_type = query_type  # 'SELECT', 'INSERT', ... as parsed
+        self.params = params
+        self.parse_time = parse_time
+        self.plan_time = 0.0
+        self.execute_time = 0.0  # time not spent parsing, planning or persisting
+        self.persist_time = 0.0
+        self.total_time = 0.0  # seconds, parsing included
+        self.rows_scanned = 0
+        self.rows_returned = 0  # rows of a result, or rows an INSERT/UPDATE/DELETE/COPY changed
+        self.bytes_written = 0
+        self.failed = False
+
+    def __enter__(self):
+        # A statement run while another is measured gets metrics of its own
+        self._previous = getattr(_local, 'metrics', None)
+        _local.metrics = self
+        self._start = time.perf_counter() - self.parse_time
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.metrics = self._previous
+        self.finish(time.perf_counter() - self._start, exc_type is not None)
+
+    def finish(self, total_time, failed=False):
+        """Add the execution, total_time seconds long, to its StatementStats"""
+        self.total_time = total_time
+        self.execute_time = max(self.total_time - self.parse_time - self.plan_time
+                                - self.persist_time, 0.0)
+        self.failed = failed
+        self.stats.record(self)
+
+    def persisted(self, seconds, size):
+        """Record a save() of size bytes"""
+        self.persist_time += seconds
+        self.bytes_written += size
+
+    def to_dict(self):
+        return {
+            'statement': self.sql,
+            'duration_ms': _ms(self.total_time),
+            'parse_ms': _ms(self.parse_time),
+            'plan_ms': _ms(self.plan_time),
+            'execute_ms': _ms(self.execute_time),
+            'persist_ms': _ms(self.persist_time),
+            'rows_scanned': self.rows_scanned,
+            'rows_returned': self.rows_returned,
+            'bytes_written': self.bytes_written,
+            'failed': self.failed,
+        }
+
+
+class _Entry:
+    """Totals of one statement fingerprint"""
+
+    def __init__(self, samples):
+        self.calls = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.parse_time = 0.0
+        self.plan_time = 0.0
+        self.execute_time = 0.0
+        self.persist_time = 0.0
+        self.rows_scanned = 0
+        self.rows_returned = 0
+        self.bytes_written = 0
+        self.times = deque(maxlen=samples)  # the latest durations, for percentiles
+
+    def add(self, metrics):
+        self.calls += 1
+        self.errors += metrics.failed
+        self.total_time += metrics.total_time
+        if metrics.total_time > self.max_time:
+            self.max_time = metrics.total_time
+        self.parse_time += metrics.parse_time
+        self.plan_time += metrics.plan_time
+        self.execute_time += metrics.execute_time
+        self.persist_time += metrics.persist_time
+        self.rows_scanned += metrics.rows_scanned
+        self.rows_returned += metrics.rows_returned
+        self.bytes_written += metrics.bytes_written
+        self.times.append(metrics.total_time)
+
+
+class StatementStats:
+    """Statement metrics aggregated by fingerprint, and the slow query log
+
+    One instance may be shared by executors on several threads (a
+    SessionPool shares one among its sessions). At most max_statements
+    fingerprints are kept; a new one replaces the least called.
+    """
+
+    def __init__(self, slow_query_log=None, slow_query_ms=100, samples=1000, max_statements=1000):
+        self.slow_query_log = slow_query_log  # file path, or None to log nothing
+        self.slow_query_ms = slow_query_ms  # statements taking at least this long are logged
+        self.samples = samples  # latest durations kept per statement for p95/p99
+        self.max_statements = max_statements
+        self.statements = {}  # fingerprint -> _Entry
+        self.slow_queries = 0
+        self.observers = []  # also called with the StatementMetrics of every execution
+        self.lock = threading.Lock()
+        self._log_lock = threading.Lock()
+
+    def measure(self, fingerprint, sql, params=None, parse_time=0.0, query_type=None):
+        """Context manager timing one statement; yields its StatementMetrics
+
+        While it is open, the storage engine adds the planning time, rows
+        scanned and save() cost of this thread's work to the metrics.
+        """
+        return StatementMetrics(self, fingerprint, sql, params, parse_time, query_type)
+
+    def measure_rows(self, rows, fingerprint, sql, params=None, parse_time=0.0):
+        """Yield the rows of a streamed SELECT, recording it once they run out or it is closed
+
+        The statement's time is the time spent fetching rows, not the time
+        the caller spends between them, and its metrics are this thread's
+        current ones only while a row is fetched. Closing the generator
+        closes rows.
+        """
+        metrics = StatementMetrics(self, fingerprint, sql, params, parse_time, 'SELECT')
+        elapsed = parse_time
+        failed = True
+        try:
+            while True:
+                previous = getattr(_local, 'metrics', None)
+                _local.metrics = metrics
+                start = time.perf_counter()
+                try:
+                    row = next(rows, _END)
+                finally:
+                    elapsed += time.perf_counter() - start
+                    _local.metrics = previous
+                if row is _END:
+                    break
+                metrics.rows_returned += 1
+                try:
+                    yield row
+                except GeneratorExit:
+                    failed = False
+                    raise
+            failed = False
+        finally:
+            rows.close()
+            metrics.finish(elapsed, failed)
+
+    def record(self, metrics):
+        """Add one execution to its statement's totals, logging it if slow"""
+        fingerprint = metrics.fingerprint
+        with self.lock:
+            entry = self.statements.get(fingerprint)
+            if entry is None:
+                if len(self.statements) >= self.max_statements:
+                    least = min(self.statements, key=lambda key: self.statements[key].calls)
+                    del self.statements[least]
+                entry = self.statements[fingerprint] = _Entry(self.samples)
+            entry.add(metrics)
+
+        if self.slow_query_log and metrics.total_time * 1000 >= self.slow_query_ms:
+            self._log_slow(metrics)
+        for observer in self.observers:
+            observer(metrics)
+
+    def rows(self):
+        """Totals per statement, slowest in total first, as SHOW STATEMENT STATS rows"""
+        with self.lock:
+            items = [(key, entry, sorted(entry.times)) for key, entry in self.statements.items()]
+        rows = []
+        for key, entry, times in items:
+            rows.append(dict(zip(STATEMENT_STATS_COLUMNS, (
+                key,
+                entry.calls,
+                entry.errors,
+                _ms(entry.total_time),
+                _ms(entry.total_time / entry.calls),
+                _ms(_percentile(times, 95)),
+                _ms(_percentile(times, 99)),
+                _ms(entry.max_time),
+                _ms(entry.parse_time),
+                _ms(entry.plan_time),
+                _ms(entry.execute_time),
+                _ms(entry.persist_time),
+                entry.rows_scanned,
+                entry.rows_returned,
+                entry.bytes_written,
+            ))))
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def reset(self):
+        """Forget all statement totals"""
+        with self.lock:
+            self.statements.clear()
+            self.slow_queries = 0
+
+    def _log_slow(self, metrics):
+        record = {'time': datetime.datetime.now().isoformat(timespec='milliseconds')}
+        record.update(metrics.to_dict())
+        params = metrics.params
+        if params is not None:
+            record['params'] = params if hasattr(params, 'keys') else list(params)
+        line = json.dumps(record, default=str) + '\n'
+        with self._log_lock:
+            with open(self.slow_query_log, 'a', encoding='utf-8') as f:
+                f.write(line)
+            self.slow_queries += 1
+
+
+def _percentile(times, percent):
+    """Nearest-rank percentile of sorted durations"""
+    if not times:
+        return 0.0
+    return times[max(math.ceil(len(times) * percent / 100) - 1, 0)]
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
@@ -1,7 +1,84 @@
 import os
 import pickle
+import struct
+import sys
+import threading
+import time
 from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from itertools import chain, islice
 from .types import DataType
+from .expressions import (parse_where, compile_expression, expression_columns,
+                          format_expression, format_value)
+from .parser import SQLParser
+from .aggregate import HashAggregate, aggregate_rows
+from .views import MaterializedView
+from .ordered import OrderedIndexCache, keyset_bound
+from .plan import PlanNode
+from .stats import current_metrics
+from .cache import estimate_size
+from . import parallel, vectorized
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, one process per database file
+    fcntl = None
+
+# Rough size of one row's entry in a join hash table (key, list slot, row position)
+_HASH_ENTRY_BYTES = 120
+
+# Database file layout: magic, generation and header length, the pickled
+# header, then one pickled (rows, indexes) section per table. A materialized
+# view's table adds the view's maintenance state as a third item.
+_FILE_MAGIC = b'MYRDBMS\x02'
+_FILE_PREFIX = struct.Struct('<QQ')
+
+# Database files currently locked by this process. A lock belongs to the
+# open file, which a forked worker would share and keep locked after the
+# parent closed it, so children close their copies right after the fork.
+_locked_files = set()
+
+
+def _close_locked_files():
+    for f in list(_locked_files):
+        f.close()
+    _locked_files.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_close_locked_files)
+
+
+def _write_operation(method):
+    """Run a StorageEngine method as one write: serialized, then published"""
+    @wraps(method)
+    def write(self, *args, **kwargs):
+        with self._writer():
+            return method(self, *args, **kwargs)
+    return write
+
+
+class _Version:
+    """The database as published by one write, shared by the snapshots reading it
+    
+    Only the per-table mappings are copied; the tables' row lists, row
+    dicts and indexes are shared with the engine until a later write
+    copies them before making changes.
+    """
+    
+    __slots__ = ('schema', 'data', 'indexes', 'rows_by_id', 'row_counter', 'table_versions',
+                 'views')
+    
+    def __init__(self, storage):
+        self.schema = dict(storage.schema)
+        self.data = dict(storage.data)
+        self.indexes = dict(storage.indexes)
+        self.rows_by_id = dict(storage.rows_by_id)
+        self.row_counter = dict(storage.row_counter)
+        self.table_versions = dict(storage.table_versions)
+        self.views = dict(storage.views)
+
 
 # Storage Engine for RDBMS
 class StorageEngine:
@@ -13,29 +90,270 @@ class StorageEngine:
         self.data = defaultdict(list)  # table_name -> list of rows
         self.indexes = defaultdict(dict)  # table_name -> {column: {value: [row_ids]}}
         self.row_counter = defaultdict(int)  # table_name -> next row_id
+        self.rows_by_id = defaultdict(dict)  # table_name -> {row_id: row}, rebuilt on load
+        self.table_versions = defaultdict(int)  # table_name -> change counter
+        self._version_clock = 0  # last change counter handed out, never reused
+        self.max_groups = 100000  # GROUP BY groups held in memory before spilling to disk
+        self.views = {}  # view_name -> MaterializedView, stored as a table of the same name
+        self.batch_mode = False  # run numeric scans over NumPy column batches when installed
+        self.batch_size = 4096  # values per column batch
+        self.batch_min_rows = 10000  # smaller tables are scanned row by row
+        self.column_cache = vectorized.ColumnCache()
+        self.ordered_indexes = OrderedIndexCache()  # sorted row positions for ORDER BY ... LIMIT
+        self.max_parallel_workers = 0  # worker processes for large scans; 0 or 1 scans serially
+        self.parallel_min_rows = 100000  # smaller tables are not worth the process round trip
+        self.join_memory_budget = 64 * 1024 * 1024  # bytes of hash table per parallel join partition
+        self._scanner = None  # ParallelScanner, started on the first parallel scan
+        self.fsync = False  # also fsync the database file after each save, not just flush it
+        self.save_observers = []  # called with (bytes, seconds, flush seconds) after each save
+        
+        # Writers are serialized by lock and publish a new version when they finish;
+        # readers take snapshots of the latest published version without waiting
+        self.lock = threading.RLock()
+        self._write_depth = 0
+        self._positions = {}  # table_name -> {row_id: list position}, during a write
+        self._transaction = None  # thread ID running an open transaction()
+        self._unsaved = False  # a write in the open transaction deferred its save
+        self._epoch = 0
+        self._versions = {}  # epoch -> _Version, kept while current or read by a snapshot
+        self._active = defaultdict(int)  # epoch -> open snapshots
+        self._snapshot_lock = threading.Lock()
+        
+        # Other processes may write the same file: writers hold an exclusive
+        # lock on it, readers a shared one, and the generation in its header
+        # tells which tables changed since this engine last read or wrote it
+        self._file = None  # the locked database file, during a write
+        self._generation = -1  # file generation the tables are in sync with; -1 before loading
+        self._stamps = {}  # table_name -> generation its section was written in
+        self._sections = {}  # table_name -> (table stamp, generation, pickled section)
         
         self.load()
     
     def load(self):
         """Load database from file"""
-        if os.path.exists(self.db_file):
-            with open(self.db_file, 'rb') as f:
-                data = pickle.load(f)
-                self.schema = data.get('schema', {})
-                self.data = data.get('data', defaultdict(list))
-                self.indexes = data.get('indexes', defaultdict(dict))
-                self.row_counter = data.get('row_counter', defaultdict(int))
+        self.schema = {}
+        self.data = defaultdict(list)
+        self.indexes = defaultdict(dict)
+        self.row_counter = defaultdict(int)
+        self.rows_by_id = defaultdict(dict)
+        self.views = {}
+        self._generation = -1
+        self._stamps = {}
+        self._sections = {}
+        with self._locked_file(shared=True) as f:
+            if f is not None:
+                self._read_file(f)
+        self._publish()
+    
+    def refresh(self, blocking=True):
+        """Reload the tables other processes changed since this engine last read the file
+        
+        Only the header is read when nothing changed. Without blocking, a
+        file being written by another process is left alone until the next
+        call. Returns whether anything was reloaded.
+        """
+        with self._locked_file(shared=True, blocking=blocking) as f:
+            if f is None or self._file_generation(f) == self._generation:
+                return False
+        
+        if not self.lock.acquire(blocking=blocking):
+            return False
+        try:
+            if self._write_depth:
+                return False
+            with self._locked_file(shared=True, blocking=blocking) as f:
+                if f is None or not self._read_file(f):
+                    return False
+            self._publish()
+            return True
+        finally:
+            self.lock.release()
     
     def save(self):
-        """Save database to file"""
-        with open(self.db_file, 'wb') as f:
-            pickle.dump({
-                'schema': self.schema,
-                'data': dict(self.data),
-                'indexes': dict(self.indexes),
-                'row_counter': dict(self.row_counter)
-            }, f)
+        """Save database to file
+        
+        Tables that haven't changed since they were last read or written
+        reuse their pickled section.
+        """
+        if self._file is None:
+            with self._writer():
+                return self.save()
+        if self._transaction == threading.get_ident():
+            # Written once when the transaction commits
+            self._unsaved = True
+            return
+        
+        start = time.perf_counter()
+        generation = max(self._generation or 0, 0) + 1
+        tables = {}
+        sections = []
+        offset = 0
+        for table_name, rows in self.data.items():
+            stamp = self._section_stamp(table_name)
+            cached = self._sections.get(table_name)
+            if cached is None or cached[0] != stamp:
+                content = (rows, self.indexes[table_name])
+                view = self.views.get(table_name)
+                if view is not None:
+                    content += (view.maintenance_state(),)
+                section = pickle.dumps(content, pickle.HIGHEST_PROTOCOL)
+                cached = self._sections[table_name] = (stamp, generation, section)
+            tables[table_name] = (cached[1], offset, len(cached[2]))
+            sections.append(cached[2])
+            offset += len(cached[2])
+        
+        header = pickle.dumps({
+            'schema': self.schema,
+            'row_counter': dict(self.row_counter),
+            'views': self.views,
+            'tables': tables,
+        }, pickle.HIGHEST_PROTOCOL)
+        
+        f = self._file
+        f.seek(0)
+        f.truncate()
+        f.write(_FILE_MAGIC + _FILE_PREFIX.pack(generation, len(header)) + header)
+        f.writelines(sections)
+        flush_start = time.perf_counter()
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+        end = time.perf_counter()
+        self._generation = generation
+        self._stamps = {name: table[0] for name, table in tables.items()}
+        
+        size = len(_FILE_MAGIC) + _FILE_PREFIX.size + len(header) + offset
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.persisted(end - start, size)
+        for observer in self.save_observers:
+            observer(size, end - start, end - flush_start)
+    
+    def _section_stamp(self, table_name):
+        """What a table's pickled section depends on; a new stamp means pickling it again
+        
+        A view's table also depends on the view, which every write that
+        maintains it replaces with a copy (_writable_view()).
+        """
+        rows = self.data[table_name]
+        return (self.table_versions[table_name], id(rows), len(rows),
+                id(self.views.get(table_name)))
+    
+    @contextmanager
+    def _locked_file(self, shared, blocking=True):
+        """Open the database file under a shared or exclusive lock
+        
+        Yields None when the file doesn't exist (shared), or when the lock is
+        taken and blocking is false. An exclusive lock creates the file.
+        """
+        try:
+            if shared:
+                f = open(self.db_file, 'rb')
+            else:
+                f = os.fdopen(os.open(self.db_file, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        except FileNotFoundError:
+            yield None
+            return
+        
+        with f:
+            if fcntl is not None:
+                operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+                try:
+                    fcntl.flock(f, operation if blocking else operation | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield None
+                    return
+            # Closing the file releases the lock
+            _locked_files.add(f)
+            try:
+                yield f
+            finally:
+                _locked_files.discard(f)
+    
+    @staticmethod
+    def _file_generation(f):
+        """Return the generation in a file's header (0 if empty, None if pickled whole)"""
+        f.seek(0)
+        prefix = f.read(len(_FILE_MAGIC) + _FILE_PREFIX.size)
+        if not prefix:
+            return 0
+        if not prefix.startswith(_FILE_MAGIC):
+            return None
+        return _FILE_PREFIX.unpack_from(prefix, len(_FILE_MAGIC))[0]
     
+    def _read_file(self, f):
+        """Bring the tables in line with a locked database file; returns whether any changed"""
+        generation = self._file_generation(f)
+        if generation == self._generation:
+            return False
+        
+        if generation is None:
+            # Files written before the header existed hold one pickled dict
+            f.seek(0)
+            data = pickle.load(f)
+            header = {
+                'schema': data.get('schema', {}),
+                'row_counter': data.get('row_counter', {}),
+                'views': data.get('views', {}),
+                'tables': {name: None for name in data.get('data', {})},
+            }
+            sections = {name: (rows, data.get('indexes', {}).get(name, {}))
+                        for name, rows in data.get('data', {}).items()}
+        elif generation:
+            f.seek(len(_FILE_MAGIC))
+            header_length = _FILE_PREFIX.unpack(f.read(_FILE_PREFIX.size))[1]
+            header = pickle.loads(f.read(header_length))
+            sections = None
+        else:
+            header = {'schema': {}, 'row_counter': {}, 'views': {}, 'tables': {}}
+            sections = {}
+        
+        base = f.tell()
+        views = header['views']
+        loaded = {}
+        for table_name, entry in header['tables'].items():
+            if sections is None:
+                stamp, offset, length = entry
+                if (self._stamps.get(table_name) == stamp and table_name in self.data
+                        and (table_name not in views or table_name in self.views)):
+                    if table_name in views:
+                        # The view read with this section still holds the matching state
+                        views[table_name] = self.views[table_name]
+                    continue
+                f.seek(base + offset)
+                section = f.read(length)
+                rows, indexes, *view_state = pickle.loads(section)
+                if view_state:
+                    views[table_name].load_maintenance_state(view_state[0])
+            else:
+                stamp = section = None
+                rows, indexes = sections[table_name]
+            
+            self.data[table_name] = rows
+            self.indexes[table_name] = indexes
+            # Row lookup used by index probes; not persisted
+            self.rows_by_id[table_name] = {row['_rowid']: row for row in rows}
+            self._bump_version(table_name)
+            self._stamps[table_name] = stamp
+            if section is not None:
+                loaded[table_name] = (stamp, section)
+        
+        for table_name in list(self.data):
+            if table_name not in header['tables']:
+                for state in (self.data, self.indexes, self.rows_by_id, self._stamps,
+                              self._sections):
+                    state.pop(table_name, None)
+                self._bump_version(table_name)
+        
+        self.schema = header['schema']
+        self.row_counter = defaultdict(int, header['row_counter'])
+        self.views = views
+        for table_name, (stamp, section) in loaded.items():
+            self._sections[table_name] = (self._section_stamp(table_name), stamp, section)
+        self._generation = generation
+        return True
+    
+    @_write_operation
     def create_table(self, table_name, columns, primary_key=None, unique_keys=None):
         """Create a new table"""
         if table_name in self.schema:
@@ -88,20 +406,77 @@ class StorageEngine:
         
         # Initialize empty data
         self.data[table_name] = []
+        self.rows_by_id[table_name] = {}
         self.row_counter[table_name] = 0
+        self._bump_version(table_name)
         
         self.save()
         return True
     
     def insert(self, table_name, values_dict):
         """Insert a row into table"""
-        if table_name not in self.schema:
-            raise ValueError(f"Table '{table_name}' doesn't exist")
+        return self.insert_many(table_name, [values_dict])[0]
+    
+    @_write_operation
+    def insert_many(self, table_name, rows):
+        """Insert a batch of rows with one constraint pass and one save
+        
+        Either every row is inserted or, if any row is invalid, none are.
+        """
+        self._check_writable(table_name)
+        self._copy_on_write(table_name)
         
         schema = self.schema[table_name]
-        row = {}
+        indexes = self.indexes[table_name]
+        prepared = [self._prepare_row(schema, values_dict) for values_dict in rows]
+        
+        # Check primary key and unique constraints against the table and the batch
+        key_columns = list(schema['unique_keys'])
+        if schema['primary_key']:
+            key_columns.insert(0, schema['primary_key'])
         
-        # Validate and prepare row
+        for col_name in key_columns:
+            is_primary = col_name == schema['primary_key']
+            existing = indexes.get(col_name, {})
+            seen = set()
+            for row in prepared:
+                value = row.get(col_name)
+                if value is None:
+                    if is_primary:
+                        raise ValueError(f"Primary key '{col_name}' cannot be NULL")
+                    continue
+                if existing.get(value) or value in seen:
+                    if is_primary:
+                        raise ValueError(f"Duplicate primary key value: {value}")
+                    raise ValueError(f"Duplicate unique value for '{col_name}': {value}")
+                seen.add(value)
+        
+        # Append rows and update indexes
+        table_rows = self.data[table_name]
+        rows_by_id = self.rows_by_id[table_name]
+        col_indexes = [(col['name'],) + self._writable_index(table_name, col['name'])
+                       for col in schema['columns']]
+        row_ids = []
+        for row in prepared:
+            row_id = self.row_counter[table_name]
+            self.row_counter[table_name] += 1
+            row['_rowid'] = row_id
+            table_rows.append(row)
+            rows_by_id[row_id] = row
+            row_ids.append(row_id)
+            
+            for col_name, index, published in col_indexes:
+                _index_add(index, published, row[col_name], row_id)
+        
+        if row_ids:
+            self._bump_version(table_name)
+            self._maintain_views(table_name, inserted=prepared)
+            self.save()
+        return row_ids
+    
+    def _prepare_row(self, schema, values_dict):
+        """Validate values against the table schema and build a row"""
+        row = {}
         for col in schema['columns']:
             col_name = col['name']
             if col_name in values_dict:
@@ -120,535 +495,1464 @@ class StorageEngine:
                 if not col['nullable']:
                     raise ValueError(f"Missing required column: {col_name}")
                 row[col_name] = None
+        return row
+    
+    @_write_operation
+    def bulk_load(self, table_name, chunks, columns=None):
+        """Load rows streamed as chunks of value sequences
+        
+        Each chunk is a list of sequences holding values for columns (all
+        table columns, in order, by default). Values are converted by
+        per-column coercers built once up front, index updates are deferred
+        until every row has been validated, and the table is saved once.
+        Either every row is loaded or, if any row is invalid, none are.
+        Returns the number of rows loaded.
+        """
+        self._check_writable(table_name)
+        
+        schema = self.schema[table_name]
+        col_map = {col['name']: col for col in schema['columns']}
+        if columns is None:
+            columns = list(col_map)
+        for col_name in columns:
+            if col_name not in col_map:
+                raise ValueError(f"Column '{col_name}' doesn't exist in table '{table_name}'")
+        
+        missing = [name for name in col_map if name not in columns]
+        for col_name in missing:
+            if not col_map[col_name]['nullable']:
+                raise ValueError(f"Missing required column: {col_name}")
         
-        # Check primary key uniqueness
+        converters = []
+        for col_name in columns:
+            col = col_map[col_name]
+            converters.append((col_name, DataType.coercer(col['type'], col['max_length']),
+                               col['nullable']))
+        
+        # Primary key and unique values seen so far, checked as rows stream in
+        key_columns = list(schema['unique_keys'])
         if schema['primary_key']:
-            pk_col = schema['primary_key']
-            if pk_col in row:
-                pk_value = row[pk_col]
-                if pk_value is None:
-                    raise ValueError(f"Primary key '{pk_col}' cannot be NULL")
+            key_columns.insert(0, schema['primary_key'])
+        key_checks = [(col_name, col_name == schema['primary_key'],
+                       self.indexes[table_name].get(col_name, {}), set())
+                      for col_name in key_columns]
+        
+        width = len(columns)
+        staged = []
+        for chunk in chunks:
+            for values in chunk:
+                line = len(staged) + 1
+                if len(values) != width:
+                    raise ValueError(f"Row {line}: expected {width} values, got {len(values)}")
                 
-                # Check if PK already exists
-                pk_index = self.indexes[table_name].get(pk_col, {})
-                if pk_value in pk_index:
-                    raise ValueError(f"Duplicate primary key value: {pk_value}")
-        
-        # Check unique constraints
-        for unique_col in schema['unique_keys']:
-            if unique_col in row and row[unique_col] is not None:
-                unique_index = self.indexes[table_name].get(unique_col, {})
-                if row[unique_col] in unique_index:
-                    raise ValueError(f"Duplicate unique value for '{unique_col}': {row[unique_col]}")
-        
-        # Add row_id
-        row_id = self.row_counter[table_name]
-        row['_rowid'] = row_id
-        self.data[table_name].append(row)
-        self.row_counter[table_name] += 1
+                row = dict.fromkeys(missing)
+                try:
+                    for (col_name, coerce, nullable), value in zip(converters, values):
+                        value = coerce(value)
+                        if value is None and not nullable:
+                            raise ValueError(f"Column '{col_name}' cannot be NULL")
+                        row[col_name] = value
+                except ValueError as e:
+                    raise ValueError(f"Row {line}: {e}")
+                
+                for col_name, is_primary, existing, seen in key_checks:
+                    value = row[col_name]
+                    if value is None:
+                        if is_primary:
+                            raise ValueError(f"Row {line}: Primary key '{col_name}' cannot be NULL")
+                        continue
+                    if value in seen or existing.get(value):
+                        if is_primary:
+                            raise ValueError(f"Row {line}: Duplicate primary key value: {value}")
+                        raise ValueError(f"Row {line}: Duplicate unique value for '{col_name}': {value}")
+                    seen.add(value)
+                
+                staged.append(row)
         
-        # Update indexes
-        for col_name in row:
-            if col_name != '_rowid':
-                if col_name not in self.indexes[table_name]:
-                    self.indexes[table_name][col_name] = {}
-                if row[col_name] not in self.indexes[table_name][col_name]:
-                    self.indexes[table_name][col_name][row[col_name]] = []
-                self.indexes[table_name][col_name][row[col_name]].append(row_id)
+        if not staged:
+            return 0
         
+        # Every row is valid; assign row IDs and build the indexes column by column
+        self._copy_on_write(table_name)
+        first_id = self.row_counter[table_name]
+        rows_by_id = self.rows_by_id[table_name]
+        for row_id, row in enumerate(staged, first_id):
+            row['_rowid'] = row_id
+            rows_by_id[row_id] = row
+        self.row_counter[table_name] = first_id + len(staged)
+        self.data[table_name].extend(staged)
+        
+        for col_name in col_map:
+            index, published = self._writable_index(table_name, col_name)
+            for row in staged:
+                value = row[col_name]
+                bucket = index.get(value)
+                if bucket is None:
+                    index[value] = [row['_rowid']]
+                else:
+                    # Buckets still shared with readers are copied once
+                    if bucket is published.get(value):
+                        bucket = index[value] = list(bucket)
+                    bucket.append(row['_rowid'])
+        
+        self._bump_version(table_name)
+        self._maintain_views(table_name, inserted=staged)
         self.save()
-        return row_id
+        return len(staged)
     
-    def select(self, table_name, columns='*', where=None, join=None, order_by=None, limit=None):
-        """Select rows from table with optional WHERE and JOIN"""
+    def select(self, table_name, columns='*', where=None, join=None, order_by=None, limit=None,
+               group_by=None, having=None, offset=None):
+        """Select rows from table with optional WHERE, JOIN and GROUP BY"""
+        metrics = current_metrics()
+        if metrics is None:
+            rows = self.plan_select(table_name, columns, where, join, order_by, limit,
+                                    group_by, having, offset).execute()
+        else:
+            start = time.perf_counter()
+            plan = self.plan_select(table_name, columns, where, join, order_by, limit,
+                                    group_by, having, offset)
+            metrics.plan_time += time.perf_counter() - start
+            rows = plan.execute()
+            metrics.rows_scanned += plan.rows_read()
+        
+        # The result is the caller's to change, never the table itself
+        if rows is self.data[table_name]:
+            rows = list(rows)
+        return rows
+    
+    def plan_select(self, table_name, columns='*', where=None, join=None, order_by=None,
+                    limit=None, group_by=None, having=None, offset=None):
+        """Decide how select() runs a query; returns the root PlanNode of its plan
+        
+        Nothing is read until the plan is executed. EXPLAIN shows this plan,
+        and EXPLAIN ANALYZE executes it with per-operator statistics.
+        """
         if table_name not in self.schema:
             raise ValueError(f"Table '{table_name}' doesn't exist")
         
-        rows = self.data[table_name]
+        columns, where, join, order_by = self._parse_clauses(columns, where, join, order_by)
+        if isinstance(having, str):
+            having = SQLParser.parse_having(having)
+        aggregating = columns != '*' and any(item['type'] == 'AGGREGATE' for item in columns)
+        
+        # A page of an ordered query is read in index order, without sorting the table
+        if order_by and limit is not None and not group_by and not having:
+            node = self._ordered_plan(table_name, columns, where, join, order_by, limit, offset)
+            if node is not None:
+                return node
+        
+        # Filter before the JOIN when the condition only uses this table
+        scan_where = where
+        node, where = self._filter_plan(table_name, where, join)
         
-        # Apply WHERE clause if provided
+        # Filters and aggregates over a whole table can run in column batches or
+        # across worker processes, falling back to the row by row plan
+        if not join and not group_by and not having:
+            fallback = node
+            if aggregating:
+                fallback = self._aggregate_plan(node, columns, table_name, join)
+            fast = self._parallel_plan(table_name, columns, scan_where, fallback)
+            fast = self._batch_plan(table_name, columns, scan_where, fast or fallback) or fast
+            if fast is not None:
+                if aggregating:
+                    return fast
+                node = fast
+        
+        for join_dict in join or []:
+            node = self._join_plan(node, join_dict)
+        
+        # Conditions on joined tables are applied to the merged rows
         if where:
-            rows = self._apply_where(rows, where)
+            node = self._joined_filter_plan(node, where)
         
-        # Apply JOIN if provided
-        if join:
-            rows = self._apply_join(rows, join)
+        # GROUP BY (or HAVING over the whole table) produces one row per group
+        if group_by or having:
+            return self._group_plan(node, table_name, columns, join, group_by or [], having,
+                                    order_by, limit, offset)
         
         # Handle aggregate functions
-        columns_upper = columns.upper()
-        if ('COUNT(' in columns_upper or 'SUM(' in columns_upper or 
-            'AVG(' in columns_upper or 'MIN(' in columns_upper or 
-            'MAX(' in columns_upper):
-            return self._handle_aggregate(rows, columns, table_name)
+        if aggregating:
+            return self._aggregate_plan(node, columns, table_name, join)
+        
+        # Apply ORDER BY if specified
+        if order_by:
+            node = self._sort_plan(node, table_name, columns, join, order_by)
+        
+        # Apply OFFSET and LIMIT if specified
+        if offset or limit is not None:
+            node = self._limit_plan(node, limit, offset)
         
         # Select specific columns
         if columns != '*':
-            selected_rows = []
-            for row in rows:
-                selected_row = {}
-                for col_spec in columns.split(','):
-                    col_spec = col_spec.strip()
-                    
-                    # Try exact match first
-                    if col_spec in row:
-                        selected_row[col_spec] = row[col_spec]
-                        continue
-                    
-                    # If no exact match, try to find a matching key
-                    # Extract column name (without table prefix if present)
-                    if '.' in col_spec:
-                        col_name = col_spec.split('.')[-1]
-                    else:
-                        col_name = col_spec
-                    
-                    # Look for any key that contains this column name
-                    found_key = None
-                    for key in row.keys():
-                        if key == col_spec:
-                            found_key = key
-                            break
-                        elif key.endswith('.' + col_name):
-                            found_key = key
-                            break
-                    
-                    if found_key:
-                        selected_row[col_spec] = row[found_key]
-                
-                selected_rows.append(selected_row)
-            rows = selected_rows
+            node = self._project_plan(node, columns, table_name, join)
         
-        # Apply ORDER BY if specified
-        if order_by:
-            rows = self._apply_order_by(rows, order_by)
+        return node
+    
+    def _filter_plan(self, table_name, where, join):
+        """Plan reading a table and applying the WHERE conditions on it alone
         
-        # Apply LIMIT if specified
-        if limit:
-            try:
-                limit_int = int(limit)
-                rows = rows[:limit_int]
-            except:
-                pass
+        An equality condition on an indexed column reads only the rows the
+        index lists. Returns the node and the conditions left for the joined
+        rows.
+        """
+        if not where or (join and not self._is_local_condition(where, table_name)):
+            return self._scan_plan(table_name), where
         
-        return rows
+        lookup = self._index_lookup(table_name, where)
+        if lookup is None:
+            node = self._scan_plan(table_name)
+        else:
+            col_name, value = lookup
+            node = PlanNode('Index Lookup', lambda: f"on {table_name} ({col_name} = {format_value(value)})",
+                            run=lambda: self._index_rows(table_name, col_name, value))
+        node = PlanNode('Filter', lambda: format_expression(where), (node,),
+                        lambda rows: self._apply_where(rows, where, table_name))
+        return node, None
     
-    def _handle_aggregate(self, rows, columns, table_name):
-        """Handle aggregate functions like COUNT(*), AVG(column), etc."""
-        import re
-        
-        # Helper function to extract column name and alias
-        def parse_aggregate(pattern, sql):
-            match = re.match(pattern, sql, re.IGNORECASE)
-            if match:
-                col_name = match.group(1).strip()
-                # Check for alias
-                alias_match = re.search(r'AS\s+(\w+)', sql, re.IGNORECASE)
-                alias = alias_match.group(1) if alias_match else None
-                return col_name, alias
-            return None, None
-        
-        # COUNT(*)
-        count_star_match = re.match(r'COUNT\(\s*\*\s*\)', columns, re.IGNORECASE)
-        if count_star_match:
-            count = len(rows)
-            alias_match = re.search(r'AS\s+(\w+)', columns, re.IGNORECASE)
-            if alias_match:
-                return [{alias_match.group(1): count}]
-            return [{'COUNT(*)': count}]
-        
-        # COUNT(column)
-        count_match = re.match(r'COUNT\(\s*(\w+)\s*\)', columns, re.IGNORECASE)
-        if count_match:
-            col_name = count_match.group(1)
-            count = sum(1 for row in rows if col_name in row and row[col_name] is not None)
-            alias_match = re.search(r'AS\s+(\w+)', columns, re.IGNORECASE)
-            if alias_match:
-                return [{alias_match.group(1): count}]
-            return [{f'COUNT({col_name})': count}]
-        
-        # SUM(column)
-        sum_match = re.match(r'SUM\(\s*(\w+)\s*\)', columns, re.IGNORECASE)
-        if sum_match:
-            col_name = sum_match.group(1)
-            values = []
-            for row in rows:
-                if col_name in row and row[col_name] is not None:
-                    try:
-                        values.append(float(row[col_name]))
-                    except (ValueError, TypeError):
-                        pass
-            total = sum(values) if values else 0
-            alias_match = re.search(r'AS\s+(\w+)', columns, re.IGNORECASE)
-            if alias_match:
-                return [{alias_match.group(1): total}]
-            return [{f'SUM({col_name})': total}]
-        
-        # AVG(column)
-        avg_match = re.match(r'AVG\(\s*(\w+)\s*\)', columns, re.IGNORECASE)
-        if avg_match:
-            col_name = avg_match.group(1)
-            values = []
-            for row in rows:
-                if col_name in row and row[col_name] is not None:
-                    try:
-                        values.append(float(row[col_name]))
-                    except (ValueError, TypeError):
-                        pass
-            if values:
-                avg_val = sum(values) / len(values)
-            else:
-                avg_val = 0
-            alias_match = re.search(r'AS\s+(\w+)', columns, re.IGNORECASE)
-            if alias_match:
-                return [{alias_match.group(1): avg_val}]
-            return [{f'AVG({col_name})': avg_val}]
-        
-        # MIN(column)
-        min_match = re.match(r'MIN\(\s*(\w+)\s*\)', columns, re.IGNORECASE)
-        if min_match:
-            col_name = min_match.group(1)
-            values = []
-            for row in rows:
-                if col_name in row and row[col_name] is not None:
-                    try:
-                        values.append(float(row[col_name]))
-                    except (ValueError, TypeError):
-                        values.append(row[col_name])
-            if values:
-                try:
-                    # Try numeric comparison first
-                    min_val = min(values)
-                except TypeError:
-                    # Fall back to string comparison
-                    min_val = min(str(v) for v in values)
-            else:
-                min_val = None
-            alias_match = re.search(r'AS\s+(\w+)', columns, re.IGNORECASE)
-            if alias_match:
-                return [{alias_match.group(1): min_val}]
-            return [{f'MIN({col_name})': min_val}]
-        
-        # MAX(column)
-        max_match = re.match(r'MAX\(\s*(\w+)\s*\)', columns, re.IGNORECASE)
-        if max_match:
-            col_name = max_match.group(1)
-            values = []
-            for row in rows:
-                if col_name in row and row[col_name] is not None:
-                    try:
-                        values.append(float(row[col_name]))
-                    except (ValueError, TypeError):
-                        values.append(row[col_name])
-            if values:
-                try:
-                    # Try numeric comparison first
-                    max_val = max(values)
-                except TypeError:
-                    # Fall back to string comparison
-                    max_val = max(str(v) for v in values)
-            else:
-                max_val = None
-            alias_match = re.search(r'AS\s+(\w+)', columns, re.IGNORECASE)
-            if alias_match:
-                return [{alias_match.group(1): max_val}]
-            return [{f'MAX({col_name})': max_val}]
-        
-        # Multiple aggregates (simple implementation)
-        if ',' in columns:
-            results = {}
-            for agg in columns.split(','):
-                agg = agg.strip()
-                single_result = self._handle_aggregate(rows, agg, table_name)
-                if single_result and isinstance(single_result, list) and len(single_result) > 0:
-                    results.update(single_result[0])
-            return [results]
-        
-        return [{}]
-    
-    def _apply_order_by(self, rows, order_by):
-        """Simple ORDER BY implementation"""
-        if not rows or not order_by:
-            return rows
+    def _scan_plan(self, table_name):
+        return PlanNode('Seq Scan', lambda: f"on {table_name}", run=lambda: self.data.get(table_name, []))
+    
+    def _join_plan(self, node, join_dict):
+        """Plan one hash join of the rows so far with another table"""
+        other_table = join_dict['table']
+        build = PlanNode('Seq Scan', f"on {other_table}",
+                         run=lambda: self.data.get(other_table, []))
+        join_node = PlanNode('Hash Join', f"{other_table} ON {join_dict['left']} = {join_dict['right']}",
+                             (node, build))
         
-        # Parse ORDER BY clause
-        # Simple: just handle single column for now
-        order_col = order_by.strip()
-        descending = False
+        def run(rows, _other_rows):
+            if not rows:
+                return rows
+            if self._use_parallel_join(rows, join_dict):
+                join_node.note(f"partitioned across {self.max_parallel_workers} workers")
+            return self._apply_single_join(rows, join_dict)
         
-        if ' DESC' in order_by.upper():
-            order_col = order_col.replace(' DESC', '').replace(' desc', '').strip()
-            descending = True
-        elif ' ASC' in order_by.upper():
-            order_col = order_col.replace(' ASC', '').replace(' asc', '').strip()
+        join_node.run = run
+        return join_node
+    
+    def _joined_filter_plan(self, node, where):
+        return PlanNode('Filter', lambda: format_expression(where), (node,),
+                        lambda rows: self._apply_where(rows, where) if rows else rows)
+    
+    def _group_plan(self, node, table_name, columns, join, group_by, having, order_by, limit,
+                    offset):
+        def run(rows):
+            return self._handle_group_by(rows, columns, group_by, having,
+                                         self._row_resolver(rows, table_name, join),
+                                         order_by, limit, table_name, offset)
         
-        # Sort rows
-        try:
-            return sorted(rows, 
-                        key=lambda x: x.get(order_col, ''), 
-                        reverse=descending)
-        except:
-            return rows
+        detail = lambda: _group_detail(columns, group_by, having, order_by, limit, offset)
+        return PlanNode('HashAggregate', detail, (node,), run)
     
-    def _apply_where(self, rows, where_clause):
-        """Simple WHERE clause evaluation"""
-        filtered = []
-        for row in rows:
-            if self._evaluate_condition(row, where_clause):
-                filtered.append(row)
-        return filtered
-    
-    def _evaluate_condition(self, row, condition):
-        """Evaluate a condition like "age > 18 AND name = 'John'"""
-        # Implementation for basic conditions
-        if ' AND ' in condition:
-            parts = condition.split(' AND ')
-            return all(self._evaluate_condition(row, part) for part in parts)
-        elif ' OR ' in condition:
-            parts = condition.split(' OR ')
-            return any(self._evaluate_condition(row, part) for part in parts)
-        elif '=' in condition:
-            col, value = condition.split('=', 1)
-            col = col.strip()
-            value = value.strip().strip("'")
-            return str(row.get(col)) == value
-        elif '>' in condition:
-            col, value = condition.split('>', 1)
-            col = col.strip()
-            value = value.strip().strip("'")
-            try:
-                return float(row.get(col)) > float(value)
-            except:
-                return False
-        elif '<' in condition:
-            col, value = condition.split('<', 1)
-            col = col.strip()
-            value = value.strip().strip("'")
-            try:
-                return float(row.get(col)) < float(value)
-            except:
-                return False
-        return True
+    def _aggregate_plan(self, node, columns, table_name, join):
+        detail = lambda: _select_detail(columns)
+        return PlanNode('Aggregate', detail, (node,),
+                        lambda rows: self._handle_aggregate(
+                            rows, columns, self._row_resolver(rows, table_name, join), table_name))
     
-    def _apply_join(self, rows, join_clause):
-        """Apply JOIN operations - handles multiple joins"""
-        if not join_clause:
-            return rows
+    def _sort_plan(self, node, table_name, columns, join, order_by):
+        return PlanNode('Sort', lambda: _order_detail(order_by), (node,),
+                        lambda rows: self._apply_order_by(
+                            rows, order_by, self._row_resolver(rows, table_name, join), columns))
+    
+    def _limit_plan(self, node, limit, offset):
+        start = int(offset or 0)
+        stop = None if limit is None else start + int(limit)
+        return PlanNode('Limit', lambda: _limit_detail(limit, offset), (node,),
+                        lambda rows: rows[start:stop])
+    
+    def _project_plan(self, node, columns, table_name, join):
+        """Plan picking (and renaming) the SELECT list columns of each row"""
+        def run(rows):
+            resolve = self._row_resolver(rows, table_name, join)
+            fields = [(item['alias'] or item['name'], resolve(item['name'])) for item in columns]
+            return [{name: row[key] for name, key in fields if key in row} for row in rows]
+        
+        return PlanNode('Project', lambda: _select_detail(columns), (node,), run)
+    
+    def _row_resolver(self, rows, table_name, join):
+        """Column resolver for rows of a table, or of a join once rows exist"""
+        if join:
+            return self._column_resolver(rows[0].keys() if rows else ())
+        keys = [col['name'] for col in self.schema[table_name]['columns']]
+        return self._column_resolver(keys, table_name)
+    
+    def _ordered_plan(self, table_name, columns, where, join, order_by, limit, offset):
+        """Plan one page of an ORDER BY ... LIMIT query read through an ordered index
         
-        # Process joins recursively
-        result = self._apply_join_recursive(rows, join_clause)
+        Rows are visited in ORDER BY order, starting after the keyset of a
+        "(a, b) > (?, ?)" condition when WHERE has one, and reading stops as
+        soon as offset + limit rows matched. Returns None for queries the
+        general plan handles: aggregates, mixed sort directions, sort keys
+        outside this table, WHERE conditions on joined tables or answered
+        by an equality index, and columns whose values don't sort.
+        """
+        if columns != '*' and any(item['type'] == 'AGGREGATE' for item in columns):
+            return None
+        if len({item['descending'] for item in order_by}) > 1:
+            return None
+        if where and join and not self._is_local_condition(where, table_name):
+            return None
+        if where and self._index_lookup(table_name, where) is not None:
+            return None
         
-        return result
-
-    def _apply_join_recursive(self, rows, join_clause):
-        """Recursively apply multiple joins"""
-        # Strip whitespace first
-        join_clause = join_clause.strip()
-        if not join_clause or not rows:
-            return rows
+        schema_keys = [col['name'] for col in self.schema[table_name]['columns']]
+        resolve = self._column_resolver(schema_keys, table_name)
+        joined = set()
+        for join_dict in join or []:
+            other = self.schema.get(join_dict['table'], {})
+            joined.update(col['name'] for col in other.get('columns', []))
+        aliases = {}
+        if columns != '*':
+            aliases = {item['alias']: item['name'] for item in columns if item['alias']}
         
-        join_clause_upper = join_clause.upper()
+        keys = []
+        for item in order_by:
+            name = aliases.get(item['column'], item['column'])
+            key = resolve(name)
+            # An unqualified name shared with a joined table is ambiguous
+            if key not in schema_keys or ('.' not in name and name in joined):
+                return None
+            keys.append(key)
         
-        # Check for INNER JOIN at the beginning
-        if join_clause_upper.startswith('INNER JOIN '):
-            join_idx = join_clause_upper.find('INNER JOIN ')
-            before_join = join_clause[:join_idx].strip()
-            after_join = join_clause[join_idx + 11:].strip()
-            
-            # The part before JOIN should be empty (except for previous ON clause)
-            if before_join and not before_join.upper().startswith('ON '):
-                return rows
-                
-        elif 'JOIN ' in join_clause_upper:
-            join_idx = join_clause_upper.find('JOIN ')
-            before_join = join_clause[:join_idx].strip()
-            after_join = join_clause[join_idx + 5:].strip()
+        descending = order_by[0]['descending']
+        index = self.ordered_indexes.index(self, table_name, keys, descending)
+        if index is None:
+            return None
+        
+        coerce = self._literal_coercer(table_name)
+        bound, inclusive = keyset_bound(where, keys, descending, resolve, coerce)
+        table_rows = self.data[table_name]
+        detail = f"on {table_name} ({', '.join(keys)}{' DESC' if descending else ''})"
+        if bound is not None:
+            values = ', '.join(format_value(value) for _, value in bound)
+            detail += f" {'from' if inclusive else 'after'} ({values})"
+        node = PlanNode('Ordered Index Scan', detail, streams=True,
+                        run=lambda: (table_rows[position] for position in index.scan(bound, inclusive)))
+        
+        if where:
+            predicate = compile_expression(where, resolve, coerce)
+            node = PlanNode('Filter', lambda: format_expression(where), (node,), streams=True,
+                            run=lambda rows: (row for row in rows if predicate(row)))
+        for join_dict in join or []:
+            other_table = join_dict['table']
+            build = PlanNode('Seq Scan', f"on {other_table}",
+                             run=lambda other_table=other_table: self.data.get(other_table, []))
+            node = PlanNode('Hash Join', f"{other_table} ON {join_dict['left']} = {join_dict['right']}",
+                            (node, build), streams=True,
+                            run=lambda rows, _other_rows, join_dict=join_dict: self._iter_join(rows, join_dict))
+        
+        start = int(offset or 0)
+        node = PlanNode('Limit', lambda: _limit_detail(limit, offset), (node,),
+                        lambda rows: list(islice(rows, start, start + int(limit))))
+        
+        if columns == '*':
+            return node
+        return self._project_plan(node, columns, table_name, join)
+    
+    def iter_select(self, table_name, columns='*', where=None, join=None, order_by=None, limit=None,
+                    group_by=None, having=None, offset=None):
+        """Yield the rows select() would return, one at a time
+        
+        Filtering, joins and projection are applied lazily, so the result is
+        never collected into a list. ORDER BY and aggregates need every row
+        before producing the first one, so those queries use select(), as
+        do GROUP BY queries.
+        """
+        if table_name not in self.schema:
+            raise ValueError(f"Table '{table_name}' doesn't exist")
+        
+        columns, where, join, order_by = self._parse_clauses(columns, where, join, order_by)
+        if order_by or group_by or having or (
+                columns != '*' and any(item['type'] == 'AGGREGATE' for item in columns)):
+            yield from self.select(table_name, columns, where, join, order_by, limit,
+                                   group_by, having, offset)
+            return
+        
+        keys = [col['name'] for col in self.schema[table_name]['columns']]
+        rows = self.data[table_name]
+        
+        if where and (not join or self._is_local_condition(where, table_name)):
+            candidates = self._index_candidates(table_name, where)
+            if candidates is not None:
+                rows = candidates
+            predicate = compile_expression(where, self._column_resolver(keys, table_name),
+                                           self._literal_coercer(table_name))
+            rows = (row for row in rows if predicate(row))
+            where = None
+        
+        for join_dict in join or []:
+            rows = self._iter_join(rows, join_dict)
+        
+        # Joined rows use prefixed keys, known once the first row is built
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is None:
+            return
+        rows = chain([first], rows)
+        
+        if join:
+            resolve = self._column_resolver(first.keys())
         else:
-            return rows
+            resolve = self._column_resolver(keys, table_name)
         
-        # Parse the JOIN: table_name ON condition
-        parts = after_join.split(None, 1)
-        if len(parts) < 2:
-            return rows
+        if where:
+            predicate = compile_expression(where, self._column_resolver(first.keys()),
+                                           self._literal_coercer())
+            rows = (row for row in rows if predicate(row))
+        
+        if offset or limit is not None:
+            start = int(offset or 0)
+            rows = islice(rows, start, None if limit is None else start + int(limit))
+        
+        if columns != '*':
+            fields = [(item['alias'] or item['name'], resolve(item['name'])) for item in columns]
+            rows = ({name: row[key] for name, key in fields if key in row} for row in rows)
+        
+        yield from rows
+    
+    def _parse_clauses(self, columns, where, join, order_by):
+        """Parse clauses given as SQL text; parsed nodes pass through"""
+        if isinstance(columns, str) and columns.strip() != '*':
+            columns = SQLParser.parse_select_list(columns)
+        if isinstance(where, str):
+            where = parse_where(where)
+        if isinstance(join, str):
+            join = SQLParser.parse_joins(join)
+        if isinstance(order_by, str):
+            order_by = SQLParser.parse_order_by(order_by)
+        return columns, where, join, order_by
+    
+    def _handle_aggregate(self, rows, columns, resolve, table_name=None):
+        """Compute every aggregate in the SELECT list in a single scan"""
+        labels, aggregates = self._aggregate_items(columns, resolve, table_name)
+        
+        # COUNT(*) alone needs no scan at all
+        if aggregates == [('COUNT', None)]:
+            return [{labels[0]: len(rows)}]
+        
+        return [dict(zip(labels, aggregate_rows(rows, aggregates)))]
+    
+    def _aggregate_items(self, columns, resolve, table_name=None):
+        """Return the result labels and (func, row key) pairs of the SELECT aggregates"""
+        labels = []
+        aggregates = []
+        for item in columns:
+            if item['type'] != 'AGGREGATE':
+                continue
+            func, arg = item['func'], item['arg']
+            labels.append(item['alias'] or f"{func}({arg if arg else '*'})")
+            aggregates.append(self._aggregate_spec(func, arg, resolve, table_name))
+        return labels, aggregates
+    
+    def _batch_select(self, table_name, columns, where):
+        """Run a single-table filter or aggregate over NumPy column batches
         
-        other_table = parts[0]
-        rest = parts[1]
+        Returns the aggregate result when the SELECT list is made of
+        aggregates, otherwise the rows matching where. Returns None when the
+        query should run row by row: NumPy is missing, the table is small,
+        an index answers the condition, or something in the query is not
+        numeric.
+        """
+        if not self._use_batch(table_name, columns, where):
+            return None
         
-        # Find the ON clause
-        if not rest.upper().startswith('ON '):
+        rows = self.data[table_name]
+        keys = [col['name'] for col in self.schema[table_name]['columns']]
+        resolve = self._column_resolver(keys, table_name)
+        
+        def column(key):
+            col = self._column_schema(key, table_name)
+            return None if col is None else self.column_cache.column(self, table_name, col)
+        
+        try:
+            mask = None
+            if where is not None:
+                compiler = vectorized.MaskCompiler(column, resolve, self._literal_coercer(table_name))
+                mask = compiler.compile(where)
+            scan = vectorized.BatchScan(rows, mask, self.batch_size)
+            if columns == '*' or columns[0]['type'] != 'AGGREGATE':
+                return scan.filter()
+            
+            labels, aggregates = self._aggregate_items(columns, resolve, table_name)
+            batch_aggregates = []
+            for func, key in aggregates:
+                arrays = column(key) if key else None
+                if key and arrays is None:
+                    return None
+                batch_aggregates.append((func, arrays))
+            return [dict(zip(labels, scan.aggregate(batch_aggregates)))]
+        except vectorized.Unsupported:
+            return None
+    
+    def _parallel_select(self, table_name, columns, where):
+        """Run a single-table filter or aggregate on a pool of worker processes
+        
+        Same contract as _batch_select; returns None unless max_parallel_workers
+        is above 1 and the table has at least parallel_min_rows rows.
+        """
+        if not self._use_parallel(table_name, columns, where):
+            return None
+        
+        scanner = self._parallel_scanner()
+        if columns == '*' or columns[0]['type'] != 'AGGREGATE':
+            return scanner.filter(self, table_name, where)
+        
+        keys = [col['name'] for col in self.schema[table_name]['columns']]
+        labels, aggregates = self._aggregate_items(columns, self._column_resolver(keys, table_name),
+                                                   table_name)
+        return [dict(zip(labels, scanner.aggregate(self, table_name, where, aggregates)))]
+    
+    def _use_batch(self, table_name, columns, where):
+        """Check whether _batch_select may take a query (it can still find it unsupported)"""
+        if not self.batch_mode or not vectorized.available():
+            return False
+        if len(self.data[table_name]) < self.batch_min_rows:
+            return False
+        return self._is_full_scan(table_name, columns, where)
+    
+    def _use_parallel(self, table_name, columns, where):
+        """Check whether _parallel_select takes a query"""
+        if self.max_parallel_workers <= 1 or len(self.data[table_name]) < self.parallel_min_rows:
+            return False
+        if not parallel.available() or not self._is_full_scan(table_name, columns, where):
+            return False
+        # COUNT(*) of the whole table is just its length
+        return not (where is None and len(columns) == 1
+                    and columns[0]['func'] == 'COUNT' and columns[0]['arg'] is None)
+    
+    def _batch_plan(self, table_name, columns, where, fallback):
+        """Plan a Batch Scan, or None if the query can't use one"""
+        if not self._use_batch(table_name, columns, where):
+            return None
+        return PlanNode('Batch Scan', lambda: _scan_detail(table_name, columns, where),
+                        run=lambda: self._batch_select(table_name, columns, where),
+                        fallback=fallback, reads=lambda: len(self.data[table_name]))
+    
+    def _parallel_plan(self, table_name, columns, where, fallback):
+        """Plan a Parallel Scan, or None if the query can't use one"""
+        if not self._use_parallel(table_name, columns, where):
+            return None
+        detail = lambda: (f"{_scan_detail(table_name, columns, where)} "
+                          f"with {self.max_parallel_workers} workers")
+        return PlanNode('Parallel Scan', detail,
+                        run=lambda: self._parallel_select(table_name, columns, where),
+                        fallback=fallback, reads=lambda: len(self.data[table_name]))
+    
+    def _is_full_scan(self, table_name, columns, where):
+        """Check for a whole-table filter, or aggregates alone in the SELECT list
+        
+        These are the queries _batch_select and _parallel_select take over;
+        a condition an index can answer is left to the index.
+        """
+        aggregating = columns != '*' and any(item['type'] == 'AGGREGATE' for item in columns)
+        if aggregating:
+            return all(item['type'] == 'AGGREGATE' for item in columns)
+        return where is not None and self._index_lookup(table_name, where) is None
+    
+    def _parallel_scanner(self):
+        """Return the worker pool wrapper, starting one for the current worker count"""
+        with self._snapshot_lock:
+            if self._scanner is None or self._scanner.workers != self.max_parallel_workers:
+                if self._scanner is not None:
+                    self._scanner.close()
+                self._scanner = parallel.ParallelScanner(self.max_parallel_workers)
+            return self._scanner
+    
+    def close(self):
+        """Stop the parallel scan worker processes, if any were started"""
+        if self._scanner is not None:
+            self._scanner.close()
+            self._scanner = None
+    
+    def _aggregate_spec(self, func, arg, resolve, table_name=None):
+        """Return the (func, row key) pair for an aggregate call, checking its type"""
+        key = resolve(arg) if arg else None
+        col = self._column_schema(key, table_name) if key else None
+        if func in ('SUM', 'AVG') and col and col['type'] not in (DataType.INT, DataType.FLOAT):
+            raise ValueError(f"{func} needs a numeric column, '{arg}' is {col['type']}")
+        return func, key
+    
+    def _handle_group_by(self, rows, columns, group_by, having, resolve, order_by, limit,
+                         table_name=None, offset=None):
+        """Aggregate rows per group with a hash aggregation pass"""
+        if columns == '*':
+            raise ValueError("SELECT * cannot be used with GROUP BY")
+        
+        # Group rows are keyed by the GROUP BY names and aggregate labels
+        group_keys = {resolve(name): name for name in group_by}
+        aggregates = {}  # label -> (func, row key)
+        names = {}  # select alias or column name -> group row key
+        
+        def aggregate_label(node):
+            label = f"{node['func']}({node['arg'] or '*'})"
+            if label not in aggregates:
+                aggregates[label] = self._aggregate_spec(node['func'], node['arg'], resolve, table_name)
+            return label
+        
+        fields = []
+        for item in columns:
+            if item['type'] == 'AGGREGATE':
+                key = aggregate_label(item)
+                fields.append((item['alias'] or key, key))
+            else:
+                key = group_keys.get(resolve(item['name']))
+                if key is None:
+                    raise ValueError(f"Column '{item['name']}' must appear in GROUP BY "
+                                     f"or be used in an aggregate function")
+                fields.append((item['alias'] or item['name'], key))
+                names[item['name']] = key
+            if item['alias']:
+                names[item['alias']] = key
+        
+        def group_resolve(name):
+            if name in names:
+                return names[name]
+            return group_keys.get(resolve(name), name)
+        
+        predicate = None
+        if having:
+            having = self._replace_aggregates(having, aggregate_label)
+            predicate = compile_expression(having, group_resolve)
+        
+        operator = HashAggregate(group_keys, aggregates.values(), self.max_groups)
+        labels = list(group_keys.values())
+        results = list(aggregates)
+        group_rows = []
+        for key, values in operator.run(rows):
+            group_row = dict(zip(labels, key))
+            group_row.update(zip(results, values))
+            if predicate is None or predicate(group_row):
+                group_rows.append(group_row)
+        
+        if order_by:
+            group_rows = self._apply_order_by(group_rows, order_by, group_resolve)
+        if offset or limit is not None:
+            start = int(offset or 0)
+            group_rows = group_rows[start:None if limit is None else start + int(limit)]
+        
+        return [{name: row[key] for name, key in fields} for row in group_rows]
+    
+    def _replace_aggregates(self, node, label_for):
+        """Turn aggregate calls in a HAVING condition into group row columns"""
+        if isinstance(node, list):
+            return [self._replace_aggregates(item, label_for) for item in node]
+        if not isinstance(node, dict):
+            return node
+        if node.get('type') == 'AGGREGATE':
+            return {'type': 'COLUMN', 'name': label_for(node)}
+        return {key: self._replace_aggregates(value, label_for) for key, value in node.items()}
+    
+    def _apply_order_by(self, rows, order_by, resolve, columns='*'):
+        """Sort rows on one or more ORDER BY columns"""
+        if not rows or not order_by:
             return rows
         
-        # Extract ON condition (up to next JOIN or end)
-        on_text = rest[3:].strip()  # Remove "ON "
+        # ORDER BY may name a column by its SELECT alias
+        aliases = {}
+        if columns != '*':
+            aliases = {item['alias']: item['name'] for item in columns
+                       if item['type'] == 'COLUMN' and item['alias']}
         
-        # Find where this ON clause ends (next JOIN or end)
-        upper_on = on_text.upper()
-        next_inner_join = upper_on.find(' INNER JOIN ')
-        next_join = upper_on.find(' JOIN ')
+        # Stable sorts applied from the last key to the first
+        try:
+            for item in reversed(order_by):
+                key = resolve(aliases.get(item['column'], item['column']))
+                rows = sorted(rows,
+                              key=lambda row: (row.get(key) is not None, row.get(key)),
+                              reverse=item['descending'])
+        except TypeError:
+            pass
+        return rows
+    
+    def _apply_where(self, rows, where, table_name=None):
+        """Filter rows with a WHERE condition compiled once per query"""
+        if isinstance(where, str):
+            where = parse_where(where)
+        
+        if table_name is not None:
+            keys = [col['name'] for col in self.schema[table_name]['columns']]
+        elif rows:
+            keys = list(rows[0].keys())
+        else:
+            return []
         
-        next_join_pos = -1
-        if next_inner_join != -1:
-            next_join_pos = next_inner_join
-        if next_join != -1 and (next_join_pos == -1 or next_join < next_join_pos):
-            next_join_pos = next_join
+        predicate = compile_expression(where, self._column_resolver(keys, table_name),
+                                       self._literal_coercer(table_name))
+        return [row for row in rows if predicate(row)]
+    
+    def _literal_coercer(self, table_name=None):
+        """Coerce WHERE literals to the declared type of the column they meet"""
+        def coerce(key, value):
+            col = self._column_schema(key, table_name)
+            return value if col is None else self._coerce_literal(value, col)
         
-        if next_join_pos != -1:
-            # There's another JOIN after this one
-            on_clause = on_text[:next_join_pos].strip()
-            remaining_joins = on_text[next_join_pos:].strip()
+        return coerce
+    
+    def _column_schema(self, key, table_name=None):
+        """Find the schema entry of a row key ('col' or 'table.col'), or None"""
+        if '.' in key:
+            owner, col_name = key.split('.', 1)
         else:
-            # This is the last JOIN
-            on_clause = on_text.strip()
-            remaining_joins = ""
+            owner, col_name = table_name, key
+        
+        for col in self.schema.get(owner, {}).get('columns', []):
+            if col['name'] == col_name:
+                return col
+        return None
+    
+    def _coerce_literal(self, value, col):
+        """Convert a literal to a column's type so rows compare natively"""
+        if value is None:
+            return None
         
-        # Apply this single join
-        rows = self._apply_single_join(rows, other_table, on_clause)
+        col_type = col['type']
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        if col_type in (DataType.INT, DataType.FLOAT) and is_number:
+            # 4.5 against an INT column must stay 4.5, not truncate to 4
+            return value
         
-        # Recursively apply remaining joins
-        return self._apply_join_recursive(rows, remaining_joins)
-
-    def _apply_single_join(self, rows, other_table, on_clause):
+        try:
+            return DataType.validate(value, col_type)
+        except ValueError:
+            if col_type == DataType.INT:
+                try:
+                    return float(value)
+                except ValueError:
+                    pass
+            raise
+    
+    def _index_candidates(self, table_name, where):
+        """Use a column index for an equality conjunct, or None to scan"""
+        lookup = self._index_lookup(table_name, where)
+        if lookup is None:
+            return None
+        return self._index_rows(table_name, *lookup)
+    
+    def _index_lookup(self, table_name, where):
+        """Find an equality conjunct an index answers; returns (column, value) or None"""
+        conjuncts = where['operands'] if where['type'] == 'AND' else [where]
+        col_map = {col['name']: col for col in self.schema[table_name]['columns']}
+        
+        for cond in conjuncts:
+            if cond['type'] != 'COMPARE' or cond['op'] != '=':
+                continue
+            column, literal = cond['left'], cond['right']
+            if column['type'] == 'LITERAL':
+                column, literal = literal, column
+            if column['type'] != 'COLUMN' or literal['type'] != 'LITERAL':
+                continue
+            
+            col_name = column['name']
+            if col_name.startswith(table_name + '.'):
+                col_name = col_name[len(table_name) + 1:]
+            index = self.indexes[table_name].get(col_name)
+            if col_name not in col_map or index is None:
+                continue
+            
+            return col_name, self._coerce_literal(literal['value'], col_map[col_name])
+        
+        return None
+    
+    def _index_rows(self, table_name, col_name, value):
+        """The rows an index lists for a value, in table order"""
+        index = self.indexes[table_name][col_name]
+        rows_by_id = self.rows_by_id[table_name]
+        return [rows_by_id[row_id] for row_id in sorted(index.get(value, ()))
+                if row_id in rows_by_id]
+    
+    def _column_resolver(self, keys, table_name=None):
+        """Map column references in a condition to the keys used in rows
+        
+        An unqualified name several joined tables have resolves to the
+        first of them in keys, the leftmost table of the join.
+        """
+        ordered = list(keys)
+        keys = set(ordered)
+        
+        def resolve(name):
+            if name in keys:
+                return name
+            if '.' in name:
+                prefix, col_name = name.split('.', 1)
+                if prefix == table_name and col_name in keys:
+                    return col_name
+            else:
+                for key in ordered:
+                    if key.endswith('.' + name):
+                        return key
+            return name
+        
+        return resolve
+    
+    def _is_local_condition(self, where, table_name):
+        """Check whether a condition only references columns of one table"""
+        col_names = {col['name'] for col in self.schema[table_name]['columns']}
+        for name in expression_columns(where):
+            if '.' in name:
+                prefix, name = name.split('.', 1)
+                if prefix != table_name:
+                    return False
+            if name not in col_names:
+                return False
+        return True
+    
+    def _apply_join(self, rows, joins):
+        """Apply JOIN operations - handles multiple joins"""
+        if isinstance(joins, str):
+            joins = SQLParser.parse_joins(joins)
+        
+        for join in joins:
+            if not rows:
+                break
+            rows = self._apply_single_join(rows, join)
+        return rows
+    
+    def _apply_single_join(self, rows, join):
         """Apply a single join operation"""
-        if not rows or other_table not in self.data:
+        if not rows:
             return rows
+        if self._use_parallel_join(rows, join):
+            return self._parallel_join(rows, join)
+        return list(self._iter_join(rows, join))
+    
+    def _use_parallel_join(self, rows, join):
+        """Check whether a join is large enough to partition across workers"""
+        other_table = join['table']
+        if self.max_parallel_workers <= 1 or not parallel.available():
+            return False
+        if other_table not in self.data or '.' not in join['left'] or '.' not in join['right']:
+            return False
+        return len(rows) + len(self.data[other_table]) >= self.parallel_min_rows
+    
+    def _parallel_join(self, rows, join):
+        """Partitioned hash join, with partition pairs joined by worker processes
         
-        # Parse ON clause: "table.col = other_table.col"
-        if '=' in on_clause:
-            left, right = on_clause.split('=', 1)
-            left = left.strip()
-            right = right.strip()
-            
-            # Parse table.column references
-            if '.' in left and '.' in right:
-                left_table, left_col = left.split('.')
-                right_table, right_col = right.split('.')
+        Enough partitions are used for each one's hash table to stay within
+        join_memory_budget, and at least one per worker. The result has the
+        same rows in the same order as _iter_join.
+        """
+        other_table = join['table']
+        left, right = join['left'], join['right']
+        left_table, left_col = left.split('.', 1)
+        right_col = right.split('.', 1)[1]
+        other_rows = self.data[other_table]
+        
+        keys = []
+        for left_row in rows:
+            key = left_row.get(left)
+            if key is None:
+                key = left_row.get(left_col)
+            keys.append(key)
+        
+        partitions = self._join_partitions(len(other_rows))
+        pairs = self._parallel_scanner().join(self, keys, other_table, right_col, partitions)
+        return [self._merge_join_rows(rows[position], other_rows[match], left_table, other_table)
+                for position, match in pairs]
+    
+    def _join_partitions(self, build_rows):
+        """Number of partitions for a parallel join hashing build_rows rows"""
+        table_bytes = build_rows * _HASH_ENTRY_BYTES
+        return max(self.max_parallel_workers, -(-table_bytes // self.join_memory_budget))
+    
+    def _merge_join_rows(self, left_row, right_row, left_table, other_table):
+        """Combine a left and right row into one row with table-prefixed keys"""
+        merged_row = {}
+        for col_name, value in left_row.items():
+            if col_name == '_rowid':
+                continue
+            # Columns from earlier joins already carry their table prefix
+            if '.' in col_name:
+                merged_row[col_name] = value
             else:
-                return rows
-            
-            # Build index of other table
-            other_rows = self.data[other_table]
-            other_index = {}
-            for row in other_rows:
-                key = row.get(right_col)
-                if key not in other_index:
-                    other_index[key] = []
-                other_index[key].append(row)
-            
-            # Perform join
-            joined_rows = []
-            for left_row in rows:
-                # Try to get key
-                key = left_row.get(left)  # Try with full prefix first
+                merged_row[f"{left_table}.{col_name}"] = value
+        for col_name, value in right_row.items():
+            if col_name != '_rowid':
+                merged_row[f"{other_table}.{col_name}"] = value
+        return merged_row
+    
+    def _iter_join(self, rows, join):
+        """Yield the merged rows of a single join, probing a hash of the other table"""
+        other_table = join['table']
+        left, right = join['left'], join['right']
+        if other_table not in self.data or '.' not in left or '.' not in right:
+            yield from rows
+            return
+        left_table, left_col = left.split('.', 1)
+        right_col = right.split('.', 1)[1]
+        
+        # Build index of other table
+        other_index = {}
+        for row in self.data[other_table]:
+            key = row.get(right_col)
+            if key not in other_index:
+                other_index[key] = []
+            other_index[key].append(row)
+        
+        # Perform join
+        for left_row in rows:
+            # Try to get key
+            key = left_row.get(left)  # Try with full prefix first
+            if key is None:
+                key = left_row.get(left_col)  # Try without prefix
                 if key is None:
-                    key = left_row.get(left_col)  # Try without prefix
-                    if key is None:
-                        continue
-                
-                if key in other_index:
-                    for right_row in other_index[key]:
-                        merged_row = {}
-                        
-                        # Copy all columns from left row
-                        for col_name, value in left_row.items():
-                            if col_name == '_rowid':
-                                continue
-                            
-                            # Check if column already has a table prefix
-                            if '.' in col_name:
-                                # Column already has table prefix (e.g., students.first_name from previous join)
-                                merged_row[col_name] = value
-                            else:
-                                # Column doesn't have prefix - add left_table prefix
-                                merged_row[f"{left_table}.{col_name}"] = value
-                        
-                        # Add columns from right row with table prefix
-                        for col_name, value in right_row.items():
-                            if col_name != '_rowid':
-                                merged_row[f"{other_table}.{col_name}"] = value
-                        
-                        joined_rows.append(merged_row)
+                    continue
             
-            return joined_rows
-        
-        return rows
+            if key in other_index:
+                for right_row in other_index[key]:
+                    yield self._merge_join_rows(left_row, right_row, left_table, other_table)
     
+    @_write_operation
     def update(self, table_name, set_values, where=None):
         """Update rows in table"""
+        self._check_writable(table_name)
         rows = self.select(table_name, where=where)
         updated_count = 0
+        track = self._has_views(table_name)
+        old_rows = []
+        new_rows = []
         
-        for row in rows:
-            row_id = row['_rowid']
-            # Update the row in data
-            for i, data_row in enumerate(self.data[table_name]):
-                if data_row['_rowid'] == row_id:
-                    # Remove old values from indexes
-                    for col_name in set_values:
-                        old_value = data_row.get(col_name)
-                        if old_value in self.indexes[table_name].get(col_name, {}):
-                            self.indexes[table_name][col_name][old_value].remove(row_id)
-                    
-                    # Update row
-                    for col_name, value in set_values.items():
-                        self.data[table_name][i][col_name] = value
-                        # Add to index
-                        if col_name not in self.indexes[table_name]:
-                            self.indexes[table_name][col_name] = {}
-                        if value not in self.indexes[table_name][col_name]:
-                            self.indexes[table_name][col_name][value] = []
-                        self.indexes[table_name][col_name][value].append(row_id)
-                    
-                    updated_count += 1
-                    break
+        # Validate new values once so rows and indexes keep native types
+        columns = {col['name']: col for col in self.schema[table_name]['columns']}
+        validated = {}
+        for col_name, value in set_values.items():
+            if col_name not in columns:
+                raise ValueError(f"Column '{col_name}' doesn't exist in table '{table_name}'")
+            col = columns[col_name]
+            value = DataType.validate(value, col['type'], col['max_length'])
+            if value is None and not col['nullable']:
+                raise ValueError(f"Column '{col_name}' cannot be NULL")
+            validated[col_name] = value
+        set_values = validated
+        
+        if not rows:
+            return 0
+        
+        self._copy_on_write(table_name)
+        indexes = {col_name: self._writable_index(table_name, col_name) for col_name in set_values}
+        table_rows = self.data[table_name]
+        rows_by_id = self.rows_by_id[table_name]
+        
+        # Updated rows are replaced by new dicts; snapshots keep the old ones.
+        # Positions come from a map kept for the whole write, so a batch of
+        # point updates in one transaction doesn't walk the table each time
+        for data_row in rows:
+            row_id = data_row['_rowid']
+            i = self._row_position(table_name, row_id)
+            new_row = dict(data_row)
+            for col_name, value in set_values.items():
+                index, published = indexes[col_name]
+                _index_remove(index, published, data_row.get(col_name), row_id)
+                _index_add(index, published, value, row_id)
+                new_row[col_name] = value
+            table_rows[i] = new_row
+            rows_by_id[row_id] = new_row
+            
+            if track:
+                old_rows.append(data_row)
+                new_rows.append(new_row)
+            updated_count += 1
         
         if updated_count > 0:
+            self._bump_version(table_name)
+            self._maintain_views(table_name, inserted=new_rows, deleted=old_rows)
             self.save()
         
         return updated_count
     
+    @_write_operation
     def delete(self, table_name, where=None):
         """Delete rows from table"""
+        self._check_writable(table_name)
         rows = self.select(table_name, where=where)
-        deleted_count = 0
+        if not rows:
+            return 0
         
-        for row in rows:
-            row_id = row['_rowid']
-            # Find and remove row
-            for i, data_row in enumerate(self.data[table_name]):
-                if data_row['_rowid'] == row_id:
-                    # Remove from indexes
-                    for col_name, value in data_row.items():
-                        if col_name != '_rowid' and value in self.indexes[table_name].get(col_name, {}):
-                            self.indexes[table_name][col_name][value].remove(row_id)
-                    
-                    # Remove row
-                    self.data[table_name].pop(i)
-                    deleted_count += 1
-                    break
-        
-        if deleted_count > 0:
-            self.save()
+        self._copy_on_write(table_name)
+        targets = {row['_rowid'] for row in rows}
+        rows_by_id = self.rows_by_id[table_name]
+        kept = []
+        deleted_rows = []
+        for data_row in self.data[table_name]:
+            (deleted_rows if data_row['_rowid'] in targets else kept).append(data_row)
+        
+        # Remove from indexes, dropping buckets that become empty
+        for col_name in self.indexes[table_name]:
+            index, published = self._writable_index(table_name, col_name)
+            for data_row in deleted_rows:
+                _index_remove(index, published, data_row.get(col_name), data_row['_rowid'])
+        for data_row in deleted_rows:
+            rows_by_id.pop(data_row['_rowid'], None)
+        self.data[table_name] = kept
+        self._positions.pop(table_name, None)
         
-        return deleted_count
+        self._bump_version(table_name)
+        self._maintain_views(table_name, deleted=deleted_rows)
+        self.save()
+        return len(deleted_rows)
     
+    @_write_operation
     def create_index(self, table_name, column_name):
         """Create an index on a column"""
         if table_name not in self.schema:
             raise ValueError(f"Table '{table_name}' doesn't exist")
         
         # Build index
-        if column_name not in self.indexes[table_name]:
-            self.indexes[table_name][column_name] = {}
-        
+        self._copy_on_write(table_name)
+        index, published = self._writable_index(table_name, column_name)
         for row in self.data[table_name]:
             value = row.get(column_name)
             row_id = row['_rowid']
-            if value not in self.indexes[table_name][column_name]:
-                self.indexes[table_name][column_name][value] = []
-            if row_id not in self.indexes[table_name][column_name][value]:
-                self.indexes[table_name][column_name][value].append(row_id)
+            if row_id not in index.get(value, ()):
+                _index_add(index, published, value, row_id)
         
         # Add to schema
         if column_name not in self.schema[table_name]['indexes']:
             self.schema[table_name]['indexes'].append(column_name)
         
+        self._bump_version(table_name)
         self.save()
-        return True
\ No newline at end of file
+        return True
+    
+    def _bump_version(self, table_name):
+        """Record that a table changed so cached results can be invalidated
+        
+        Counters come from one clock that rolled-back writes don't rewind,
+        so a version number never names two different table states.
+        """
+        self._version_clock += 1
+        self.table_versions[table_name] = self._version_clock
+    
+    def versions(self, table_names):
+        """Return the current change counters of the given tables"""
+        return tuple(self.table_versions[name] for name in table_names)
+    
+    @_write_operation
+    def create_materialized_view(self, view_name, query):
+        """Store a SELECT result as a table that follows its source tables"""
+        if view_name in self.schema:
+            raise ValueError(f"Table '{view_name}' already exists")
+        if query['table_name'] not in self.schema:
+            raise ValueError(f"Table '{query['table_name']}' doesn't exist")
+        
+        # Run the query once so invalid SELECTs fail before anything is created
+        self.select(query['table_name'], query['columns'], query.get('where'), query.get('join'),
+                    query.get('order_by'), query.get('limit'), query.get('group_by'),
+                    query.get('having'), query.get('offset'))
+        
+        view = MaterializedView(view_name, query, self)
+        self.create_table(view_name, view.column_definitions())
+        self.views[view_name] = view
+        view.refresh(self)
+        self.save()
+        return True
+    
+    @_write_operation
+    def refresh_materialized_view(self, view_name):
+        """Recompute a materialized view from scratch; returns its row count"""
+        if view_name not in self.views:
+            raise ValueError(f"Materialized view '{view_name}' doesn't exist")
+        
+        self._writable_view(view_name).refresh(self)
+        self.save()
+        return len(self.data[view_name])
+    
+    def _has_views(self, table_name):
+        return any(table_name in view.sources for view in self.views.values())
+    
+    def _maintain_views(self, table_name, inserted=(), deleted=()):
+        """Apply a statement's changes to the views that read table_name"""
+        for view_name, view in list(self.views.items()):
+            if table_name in view.sources:
+                self._writable_view(view_name).apply(self, table_name, inserted, deleted)
+    
+    def _check_writable(self, table_name):
+        if table_name not in self.schema:
+            raise ValueError(f"Table '{table_name}' doesn't exist")
+        if table_name in self.views:
+            raise ValueError(f"Cannot modify materialized view '{table_name}' directly")
+    
+    # Row-level writes used to maintain view tables; they don't save
+    
+    def _append_row(self, table_name, values):
+        """Append an already validated row and index it; returns its row ID"""
+        self._copy_on_write(table_name)
+        row_id = self.row_counter[table_name]
+        self.row_counter[table_name] += 1
+        row = dict(values)
+        row['_rowid'] = row_id
+        positions = self._positions.get(table_name)
+        if positions is not None:
+            positions[row_id] = len(self.data[table_name])
+        self.data[table_name].append(row)
+        self.rows_by_id[table_name][row_id] = row
+        
+        for col_name, value in values.items():
+            _index_add(*self._writable_index(table_name, col_name), value, row_id)
+        self._bump_version(table_name)
+        return row_id
+    
+    def _replace_row(self, table_name, row_id, values):
+        """Overwrite the values of one row, keeping its indexes in step"""
+        self._copy_on_write(table_name)
+        old_row = self.rows_by_id[table_name][row_id]
+        row = dict(old_row)
+        for col_name, value in values.items():
+            old_value = row.get(col_name)
+            if old_value == value and type(old_value) is type(value):
+                continue
+            index, published = self._writable_index(table_name, col_name)
+            _index_remove(index, published, old_value, row_id)
+            _index_add(index, published, value, row_id)
+            row[col_name] = value
+        
+        # The new dict takes the old one's place; snapshots keep the old one
+        self.data[table_name][self._row_position(table_name, row_id)] = row
+        self.rows_by_id[table_name][row_id] = row
+        self._bump_version(table_name)
+    
+    def _remove_rows(self, table_name, row_ids):
+        """Remove rows by ID in one pass over the table"""
+        self._copy_on_write(table_name)
+        row_ids = set(row_ids)
+        rows_by_id = self.rows_by_id[table_name]
+        for row_id in row_ids:
+            row = rows_by_id.pop(row_id, None)
+            if row is None:
+                continue
+            for col_name, value in row.items():
+                if col_name != '_rowid' and col_name in self.indexes[table_name]:
+                    _index_remove(*self._writable_index(table_name, col_name), value, row_id)
+        self.data[table_name] = [row for row in self.data[table_name]
+                                 if row['_rowid'] not in row_ids]
+        self._positions.pop(table_name, None)
+        self._bump_version(table_name)
+    
+    def _clear_table(self, table_name):
+        """Remove every row of a table"""
+        self.data[table_name] = []
+        self.rows_by_id[table_name] = {}
+        self.indexes[table_name] = {}
+        self._positions.pop(table_name, None)
+        self._bump_version(table_name)
+    
+    def _row_position(self, table_name, row_id):
+        """Position of a row in its table's list, from a map built once per write"""
+        positions = self._positions.get(table_name)
+        if positions is None or row_id not in positions:
+            positions = self._positions[table_name] = {
+                row['_rowid']: i for i, row in enumerate(self.data[table_name])}
+        return positions[row_id]
+    
+    # Versions and snapshots
+    
+    @contextmanager
+    def _writer(self):
+        """Hold the write lock for one write; the outermost one publishes its changes
+        
+        The outermost write also locks the database file exclusively and
+        first loads whatever other processes wrote to it. If the write
+        fails, the tables are put back as they were published, so a failed
+        statement leaves no partial changes behind.
+        """
+        with self.lock:
+            if self._write_depth:
+                self._write_depth += 1
+                try:
+                    yield
+                finally:
+                    self._write_depth -= 1
+                return
+            
+            with self._locked_file(shared=False) as f:
+                if self._read_file(f):
+                    self._publish()
+                self._file = f
+                self._write_depth = 1
+                committed = False
+                try:
+                    yield
+                    committed = True
+                finally:
+                    self._write_depth = 0
+                    self._file = None
+                    self._positions.clear()
+                    if committed:
+                        self._publish()
+                    else:
+                        self._restore()
+    
+    @contextmanager
+    def transaction(self):
+        """Run the writes made in a with block as one write
+        
+        They are published and saved together when the block ends, or all
+        undone if it raises. Queries in the block (on the same thread) see
+        its changes, snapshots taken elsewhere don't until it commits, and
+        other writers wait for it. Nested transactions join the outer one.
+        """
+        with self._writer():
+            if self._transaction is not None:
+                yield self
+                return
+            self._transaction = threading.get_ident()
+            self._unsaved = False
+            try:
+                yield self
+            finally:
+                unsaved = self._unsaved
+                self._transaction = None
+                self._unsaved = False
+            if unsaved:
+                self.save()
+    
+    def in_transaction(self):
+        """Check whether the calling thread has a transaction() open"""
+        return self._transaction == threading.get_ident()
+    
+    def _publish(self):
+        """Make the current tables the version new snapshots read"""
+        version = _Version(self)
+        with self._snapshot_lock:
+            self._epoch += 1
+            self._versions[self._epoch] = version
+            self._collect()
+    
+    def _restore(self):
+        """Discard a failed write's changes by going back to the published version"""
+        version = self._versions[self._epoch]
+        self.schema = dict(version.schema)
+        self.data = defaultdict(list, version.data)
+        self.indexes = defaultdict(dict, version.indexes)
+        self.rows_by_id = defaultdict(dict, version.rows_by_id)
+        self.row_counter = defaultdict(int, version.row_counter)
+        self.table_versions = defaultdict(int, version.table_versions)
+        self.views = dict(version.views)
+    
+    def _collect(self):
+        """Drop versions no snapshot reads any more; call with _snapshot_lock held"""
+        for epoch in list(self._versions):
+            if epoch != self._epoch and not self._active.get(epoch):
+                del self._versions[epoch]
+    
+    def _copy_on_write(self, table_name):
+        """Give the current write its own copy of a table's published containers
+        
+        The row list, the row ID map and the schema entry are copied whole;
+        column indexes and their buckets are copied when first changed (see
+        _writable_index). Row dicts are never changed in place.
+        """
+        version = self._versions[self._epoch]
+        if self.data[table_name] is version.data.get(table_name):
+            self.data[table_name] = list(self.data[table_name])
+        if self.rows_by_id[table_name] is version.rows_by_id.get(table_name):
+            self.rows_by_id[table_name] = dict(self.rows_by_id[table_name])
+        if self.indexes[table_name] is version.indexes.get(table_name):
+            self.indexes[table_name] = dict(self.indexes[table_name])
+        schema = self.schema.get(table_name)
+        if schema is not None and schema is version.schema.get(table_name):
+            self.schema[table_name] = dict(schema, indexes=list(schema['indexes']))
+    
+    def _writable_view(self, view_name):
+        """Return a view the current write may change, copying the published one first
+        
+        Views keep their maintenance state (groups, source row maps) in
+        place, so a failed write must not touch the object snapshots and
+        _restore() go back to.
+        """
+        view = self.views[view_name]
+        if view is self._versions[self._epoch].views.get(view_name):
+            view = self.views[view_name] = view.copy()
+        return view
+    
+    def _writable_index(self, table_name, col_name):
+        """Return (index, published index) for a column the current write changes"""
+        published = self._versions[self._epoch].indexes.get(table_name, {}).get(col_name, {})
+        indexes = self.indexes[table_name]
+        index = indexes.get(col_name)
+        if index is None:
+            index = indexes[col_name] = {}
+        elif index is published:
+            index = indexes[col_name] = dict(index)
+        return index, published
+    
+    def snapshot(self):
+        """Return a read-only Snapshot of the latest published version
+        
+        Taking a snapshot never waits for a writer. Release it (or use it as
+        a context manager) when done so the version can be dropped. Inside a
+        transaction() the snapshot holds the transaction's own changes too.
+        """
+        if self.in_transaction():
+            return Snapshot(self, None, _Version(self))
+        
+        # Changes other processes made are loaded if the file isn't being written
+        self.refresh(blocking=False)
+        
+        with self._snapshot_lock:
+            epoch = self._epoch
+            version = self._versions[epoch]
+            self._active[epoch] += 1
+        return Snapshot(self, epoch, version)
+    
+    def _release(self, epoch):
+        with self._snapshot_lock:
+            self._active[epoch] -= 1
+            if not self._active[epoch]:
+                del self._active[epoch]
+            self._collect()
+    
+    def table_stats(self):
+        """Return the rows, estimated memory and database file bytes of each table
+        
+        Memory is extrapolated from a sample of about 100 rows and leaves
+        out indexes. File bytes are the size of the table's section when
+        it was last read or written.
+        """
+        stats = {}
+        with self.snapshot() as snapshot:
+            for table_name in snapshot.schema:
+                rows = snapshot.data[table_name]
+                memory = sys.getsizeof(rows)
+                if rows:
+                    sample = rows[::max(len(rows) // 100, 1)]
+                    memory += (estimate_size(sample) - sys.getsizeof(sample)) * len(rows) // len(sample)
+                section = self._sections.get(table_name)
+                stats[table_name] = {
+                    'rows': len(rows),
+                    'memory_bytes': memory,
+                    'file_bytes': len(section[2]) if section is not None else 0,
+                }
+        return stats
+    
+    def snapshot_stats(self):
+        """Return the current version and the versions kept for open snapshots"""
+        with self._snapshot_lock:
+            return {
+                'epoch': self._epoch,
+                'active_snapshots': sum(self._active.values()),
+                'oldest_snapshot': min(self._active) if self._active else None,
+                'versions': len(self._versions),
+            }
+
+
+def _index_add(index, published, value, row_id):
+    """Add a row ID to an index bucket, copying a bucket readers still share"""
+    bucket = index.get(value)
+    if bucket is None:
+        index[value] = [row_id]
+        return
+    if bucket is published.get(value):
+        bucket = index[value] = list(bucket)
+    bucket.append(row_id)
+
+
+def _index_remove(index, published, value, row_id):
+    """Remove a row ID from an index bucket, dropping the bucket once empty"""
+    bucket = index.get(value)
+    if bucket is None or row_id not in bucket:
+        return
+    if len(bucket) == 1:
+        del index[value]
+        return
+    if bucket is published.get(value):
+        bucket = index[value] = list(bucket)
+    bucket.remove(row_id)
+
+
+# Plan node details, as EXPLAIN shows them
+
+def _select_detail(columns):
+    items = []
+    for item in columns:
+        if item['type'] == 'AGGREGATE':
+            text = f"{item['func']}({item['arg'] or '*'})"
+        else:
+            text = item['name']
+        items.append(f"{text} AS {item['alias']}" if item['alias'] else text)
+    return ', '.join(items)
+
+
+def _order_detail(order_by):
+    return ', '.join(item['column'] + (' DESC' if item['descending'] else '') for item in order_by)
+
+
+def _limit_detail(limit, offset):
+    parts = [] if limit is None else [str(limit)]
+    if offset:
+        parts.append(f"offset {offset}")
+    return ' '.join(parts)
+
+
+def _scan_detail(table_name, columns, where):
+    detail = f"on {table_name}"
+    if where is not None:
+        detail += f" filter: {format_expression(where)}"
+    if columns != '*':
+        detail += f" computing {_select_detail(columns)}"
+    return detail
+
+
+def _group_detail(columns, group_by, having, order_by, limit, offset):
+    parts = [f"group by {', '.join(group_by)}" if group_by else "whole table"]
+    parts.append(f"computing {_select_detail(columns)}")
+    if having:
+        parts.append(f"having {format_expression(having)}")
+    if order_by:
+        parts.append(f"order by {_order_detail(order_by)}")
+    if offset or limit is not None:
+        parts.append(f"limit {_limit_detail(limit, offset)}")
+    return '; '.join(parts)
+
+
+class Snapshot(StorageEngine):
+    """A read-only StorageEngine over one published version of the database
+    
+    Queries run against the tables as they were when the snapshot was
+    taken, however many writes happen meanwhile. Settings and caches are
+    shared with the engine the snapshot came from. A snapshot taken inside
+    a transaction (epoch None) reads its uncommitted tables instead, which
+    the transaction's later writes may still change.
+    """
+    
+    def __init__(self, owner, epoch, version):
+        self.__dict__.update(owner.__dict__)
+        self._owner = owner
+        self.epoch = epoch
+        self.schema = dict(version.schema)
+        self.data = defaultdict(list, version.data)
+        self.indexes = defaultdict(dict, version.indexes)
+        self.rows_by_id = defaultdict(dict, version.rows_by_id)
+        self.row_counter = defaultdict(int, version.row_counter)
+        self.table_versions = defaultdict(int, version.table_versions)
+        self.views = dict(version.views)
+        self.released = False
+    
+    def release(self):
+        """Stop reading this version so it can be garbage collected"""
+        if not self.released:
+            self.released = True
+            self.data = self.indexes = self.rows_by_id = None
+            if self.epoch is not None:
+                self._owner._release(self.epoch)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.release()
+    
+    def _writer(self):
+        raise ValueError("Snapshots are read-only")
+    
+    def save(self):
+        raise ValueError("Snapshots are read-only")
+    
+    def load(self):
+        raise ValueError("Snapshots are read-only")
+    
+    def _parallel_scanner(self):
+        return self._owner._parallel_scanner()
+    
+    def close(self):
+        self.release()
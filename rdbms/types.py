@@ -57,4 +57,67 @@ class DataType:
             raise ValueError(f"Invalid DATE format: {value}")
             
         else:
-            raise ValueError(f"Unknown data type: {data_type}")
\ No newline at end of file
+            raise ValueError(f"Unknown data type: {data_type}")
+    
+    @staticmethod
+    def coercer(data_type, max_length=None):
+        """Return a function converting raw values to data_type
+        
+        Behaves like validate() but resolves the type once, for loaders that
+        convert many values of the same column.
+        """
+        data_type_upper = data_type.upper()
+        if data_type_upper.startswith(DataType.VARCHAR):
+            data_type_upper = DataType.VARCHAR
+        
+        if data_type_upper == DataType.INT:
+            def convert(value):
+                try:
+                    return int(value)
+                except (ValueError, TypeError):
+                    raise ValueError(f"Invalid INT value: {value}")
+        
+        elif data_type_upper == DataType.FLOAT:
+            def convert(value):
+                try:
+                    return float(value)
+                except (ValueError, TypeError):
+                    raise ValueError(f"Invalid FLOAT value: {value}")
+        
+        elif data_type_upper == DataType.VARCHAR:
+            def convert(value):
+                str_value = str(value)
+                if max_length and len(str_value) > max_length:
+                    raise ValueError(f"VARCHAR exceeds max length {max_length}")
+                return str_value
+        
+        elif data_type_upper == DataType.TEXT:
+            convert = str
+        
+        elif data_type_upper == DataType.BOOL:
+            truth = {'true': True, '1': True, 't': True, 'yes': True,
+                     'false': False, '0': False, 'f': False, 'no': False}
+            
+            def convert(value):
+                if isinstance(value, bool):
+                    return value
+                try:
+                    return truth[str(value).lower()]
+                except KeyError:
+                    raise ValueError(f"Invalid BOOL value: {value}")
+        
+        elif data_type_upper == DataType.DATE:
+            def convert(value):
+                if isinstance(value, str) and len(value) == 10:
+                    return value
+                raise ValueError(f"Invalid DATE format: {value}")
+        
+        else:
+            raise ValueError(f"Unknown data type: {data_type}")
+        
+        def coerce(value):
+            if value is None:
+                return None
+            return convert(value)
+        
+        return coerce
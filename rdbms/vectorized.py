@@ -0,0 +1,357 @@
+"""Batch execution of numeric filters and aggregates with NumPy
+
+INT and FLOAT columns are copied into NumPy arrays (one array of values
+plus a mask of non-NULL entries) the first time a batch scan needs them,
+and rebuilt whenever the table changes. A WHERE condition is compiled into
+a function producing a boolean mask for a slice of the table, and scans
+walk the arrays a few thousand values at a time.
+
+Only conditions over numeric columns and literals are compiled: LIKE,
+string columns or values of other types make the compiler give up, and
+the query runs in the normal row mode. NumPy is optional; without it no
+scan is ever vectorized.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .types import DataType
+
+NUMERIC_TYPES = {DataType.INT: 'int64', DataType.FLOAT: 'float64'}
+
+_INT64_MAX = 2 ** 63 - 1
+
+
+def available():
+    """Return whether NumPy is installed"""
+    return np is not None
+
+
+class Unsupported(Exception):
+    """Raised while compiling a scan that cannot run in batch mode"""
+
+
+class ColumnCache:
+    """NumPy copies of numeric table columns, rebuilt when the table changes"""
+
+    def __init__(self):
+        self.tables = {}  # table_name -> (stamp, {column: (values, valid) or None})
+
+    def column(self, storage, table_name, col):
+        """Return (values, valid) arrays for a schema column, or None"""
+        rows = storage.data[table_name]
+        stamp = (storage.table_versions[table_name], id(rows), len(rows))
+        entry = self.tables.get(table_name)
+        if entry is None or entry[0] != stamp:
+            entry = self.tables[table_name] = (stamp, {})
+        columns = entry[1]
+        if col['name'] not in columns:
+            columns[col['name']] = self._build(rows, col)
+        return columns[col['name']]
+
+    def _build(self, rows, col):
+        dtype = NUMERIC_TYPES.get(col['type'])
+        if dtype is None:
+            return None
+        name = col['name']
+        values = [row.get(name) for row in rows]
+        valid = np.fromiter((value is not None for value in values), bool, len(values))
+        try:
+            array = np.array([0 if value is None else value for value in values], dtype)
+        except (OverflowError, TypeError, ValueError):
+            return None
+        return array, valid
+
+    def clear(self, table_name=None):
+        if table_name is None:
+            self.tables.clear()
+        else:
+            self.tables.pop(table_name, None)
+
+
+class MaskCompiler:
+    """Compile a WHERE AST into a function mapping a slice to a boolean mask
+
+    The masks follow the row-mode semantics of compile_expression: each
+    condition is compiled to a pair of masks, the rows where it is TRUE and
+    the rows where it is UNKNOWN (None when no row can be), so that NOT of
+    a comparison with NULL stays unknown. The compiled function returns the
+    TRUE mask. column(key) returns the (values, valid) arrays of a row key
+    or None, and resolve/coerce are the callbacks compile_expression takes.
+    """
+
+    def __init__(self, column, resolve, coerce):
+        self.column = column
+        self.resolve = resolve
+        self.coerce = coerce
+
+    def compile(self, node):
+        truth = self.truth(node)
+        return lambda sl: truth(sl)[0]
+
+    def truth(self, node):
+        """Compile a node into a function returning its (true, unknown) masks"""
+        handler = getattr(self, '_compile_' + node['type'].lower(), None)
+        if handler is None:
+            raise Unsupported(node['type'])
+        return handler(node)
+
+    def arrays(self, node):
+        """Return (key, values, valid) for a numeric column node"""
+        if node['type'] != 'COLUMN':
+            raise Unsupported(node['type'])
+        key = self.resolve(node['name'])
+        arrays = self.column(key)
+        if arrays is None:
+            raise Unsupported(key)
+        return key, arrays[0], arrays[1]
+
+    def literal(self, key, node):
+        """Coerce a literal against a column; only numbers and NULL qualify"""
+        if node['type'] != 'LITERAL':
+            raise Unsupported(node['type'])
+        value = self.coerce(key, node['value'])
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise Unsupported(repr(value))
+        if isinstance(value, int) and abs(value) > _INT64_MAX:
+            raise Unsupported(repr(value))
+        return value
+
+    def _compile_and(self, node):
+        parts = [self.truth(operand) for operand in node['operands']]
+
+        def all_of(sl):
+            true, unknown = parts[0](sl)
+            for part in parts[1:]:
+                other_true, other_unknown = part(sl)
+                if unknown is None and other_unknown is None:
+                    true = true & other_true
+                    continue
+                # Unknown unless either side is false or both are true
+                both = true & other_true
+                unknown = _or(true, unknown) & _or(other_true, other_unknown) & ~both
+                true = both
+            return true, unknown
+        return all_of
+
+    def _compile_or(self, node):
+        parts = [self.truth(operand) for operand in node['operands']]
+
+        def any_of(sl):
+            true, unknown = parts[0](sl)
+            for part in parts[1:]:
+                other_true, other_unknown = part(sl)
+                true = true | other_true
+                if unknown is not None or other_unknown is not None:
+                    unknown = _or(unknown, other_unknown) & ~true
+            return true, unknown
+        return any_of
+
+    def _compile_not(self, node):
+        inner = self.truth(node['operand'])
+
+        def negate(sl):
+            true, unknown = inner(sl)
+            if unknown is None:
+                return ~true, None
+            return ~(true | unknown), unknown
+        return negate
+
+    def _compile_compare(self, node):
+        op, left, right = node['op'], node['left'], node['right']
+        if left['type'] == 'LITERAL' and right['type'] == 'COLUMN':
+            op, left, right = _FLIPPED[op], right, left
+        compare = _COMPARISONS[op]
+
+        key, values, valid = self.arrays(left)
+        if right['type'] == 'COLUMN':
+            other_key, others, other_valid = self.arrays(right)
+
+            def compare_columns(sl):
+                both = valid[sl] & other_valid[sl]
+                return compare(values[sl], others[sl]) & both, ~both
+            return compare_columns
+
+        value = self.literal(key, right)
+        if value is None:
+            return _unknown
+        return lambda sl: (compare(values[sl], value) & valid[sl], ~valid[sl])
+
+    def _compile_is_null(self, node):
+        key, values, valid = self.arrays(node['operand'])
+        if node['negated']:
+            return lambda sl: (valid[sl].copy(), None)
+        return lambda sl: (~valid[sl], None)
+
+    def _compile_in(self, node):
+        key, values, valid = self.arrays(node['operand'])
+        members = [self.literal(key, value) for value in node['values']]
+        # A NULL in the list makes a value that matches nothing unknown
+        has_null = None in members
+        members = np.array([value for value in members if value is not None])
+        negated = node['negated']
+
+        def in_list(sl):
+            present = valid[sl]
+            matched = np.isin(values[sl], members) & present
+            if has_null:
+                return (_none(sl) if negated else matched), ~matched
+            return (present & ~matched if negated else matched), ~present
+        return in_list
+
+    def _compile_between(self, node):
+        key, values, valid = self.arrays(node['operand'])
+        low = self.literal(key, node['low'])
+        high = self.literal(key, node['high'])
+        negated = node['negated']
+
+        def between(sl):
+            present = valid[sl]
+            batch = values[sl]
+            outside = _none(sl)
+            if low is not None:
+                outside |= batch < low
+            if high is not None:
+                outside |= batch > high
+            outside &= present
+            if low is None or high is None:
+                # A NULL bound leaves the range test unknown unless the other one fails
+                inside, unknown = _none(sl), ~outside
+            else:
+                inside, unknown = present & ~outside, ~present
+            return (outside if negated else inside), unknown
+        return between
+
+    def _compile_literal(self, node):
+        if node['value'] is None:
+            return _unknown
+        value = bool(node['value'])
+        return lambda sl: (np.full(sl.stop - sl.start, value), None)
+
+    def _compile_column(self, node):
+        key, values, valid = self.arrays(node)
+        return lambda sl: ((values[sl] != 0) & valid[sl], ~valid[sl])
+
+
+def _none(sl):
+    return np.zeros(sl.stop - sl.start, bool)
+
+
+def _unknown(sl):
+    return _none(sl), np.ones(sl.stop - sl.start, bool)
+
+
+def _or(first, second):
+    """Union of two masks, either of which may be None for no rows"""
+    if first is None:
+        return second
+    if second is None:
+        return first
+    return first | second
+
+
+# Comparison with the operands swapped, for "literal op column"
+_FLIPPED = {'=': '=', '!=': '!=', '<>': '<>', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+if np is not None:
+    _COMPARISONS = {
+        '=': np.equal, '!=': np.not_equal, '<>': np.not_equal,
+        '<': np.less, '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+    }
+
+
+class BatchScan:
+    """A full-table scan over column arrays, filtered by an optional mask
+
+    rows is the table's row list, mask a compiled WHERE condition (or None
+    to keep every row) and batch_size the number of values processed at
+    a time.
+    """
+
+    def __init__(self, rows, mask=None, batch_size=4096):
+        self.rows = rows
+        self.mask = mask
+        self.batch_size = batch_size
+
+    def slices(self):
+        count = len(self.rows)
+        for start in range(0, count, self.batch_size):
+            yield slice(start, min(start + self.batch_size, count))
+
+    def filter(self):
+        """Return the rows matching the mask, in table order"""
+        rows = self.rows
+        matched = []
+        for sl in self.slices():
+            positions = np.flatnonzero(self.mask(sl))
+            if len(positions):
+                positions += sl.start
+                matched.extend(map(rows.__getitem__, positions.tolist()))
+        return matched
+
+    def aggregate(self, aggregates):
+        """Compute (func, arrays) aggregates over the matching rows
+
+        arrays is the (values, valid) pair of the aggregated column, or None
+        for COUNT(*). Results are plain Python numbers, NULL for SUM, AVG,
+        MIN and MAX over no values, as in row mode.
+        """
+        states = [BatchAggregate(func, arrays) for func, arrays in aggregates]
+        for sl in self.slices():
+            mask = self.mask(sl) if self.mask is not None else None
+            for state in states:
+                state.update(sl, mask)
+        return [state.result() for state in states]
+
+
+class BatchAggregate:
+    """Running count, sum and extremes of one aggregate across batches"""
+
+    def __init__(self, func, arrays):
+        self.func = func
+        self.arrays = arrays
+        self.count = 0
+        self.total = 0
+        self.low = None
+        self.high = None
+        if arrays is not None and arrays[0].dtype.kind == 'i' and func in ('SUM', 'AVG'):
+            # Batch sums are computed in int64 and must not wrap around
+            values = arrays[0]
+            largest = max(abs(int(values.min())), abs(int(values.max()))) if len(values) else 0
+            if largest and largest > _INT64_MAX // max(len(values), 1):
+                raise Unsupported("INT values too large to sum in 64 bits")
+
+    def update(self, sl, mask):
+        if self.arrays is None:
+            self.count += int(mask.sum()) if mask is not None else sl.stop - sl.start
+            return
+
+        values, valid = self.arrays
+        selected = valid[sl] if mask is None else valid[sl] & mask
+        batch = values[sl][selected]
+        if not len(batch):
+            return
+        self.count += len(batch)
+        func = self.func
+        if func in ('SUM', 'AVG'):
+            self.total += batch.sum().item()
+        elif func == 'MIN':
+            low = batch.min().item()
+            self.low = low if self.low is None else min(self.low, low)
+        elif func == 'MAX':
+            high = batch.max().item()
+            self.high = high if self.high is None else max(self.high, high)
+
+    def result(self):
+        func = self.func
+        if func == 'COUNT':
+            return self.count
+        if not self.count:
+            return None
+        if func == 'SUM':
+            return self.total
+        if func == 'AVG':
+            return self.total / self.count
+        return self.low if func == 'MIN' else self.high
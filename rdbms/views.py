@@ -0,0 +1,428 @@
+"""Materialized views
+
+A materialized view stores the result of a SELECT in an ordinary table and
+is kept up to date as its source tables change. Two shapes are maintained
+incrementally from the rows each statement inserts and deletes:
+
+* aggregates over a single table, with or without GROUP BY, where each
+  group keeps running counts and sums (MIN/MAX of a group are recomputed
+  only when its current extreme is deleted);
+* plain column lists over one table or a single INNER JOIN, where each
+  view row remembers the source rows it was built from.
+
+Any other SELECT (ORDER BY, LIMIT, HAVING, several joins, ...) is only
+recomputed by REFRESH MATERIALIZED VIEW.
+"""
+
+from .expressions import compile_expression
+from .types import DataType
+
+AGGREGATE = 'aggregate'
+ROWS = 'rows'
+
+
+class MaterializedView:
+    """A stored SELECT result plus the state needed to maintain it
+
+    Instances are pickled with the database, so they hold no reference to
+    the storage engine; it is passed to every method instead. Pickling
+    keeps only the definition: the maintenance state is saved with the
+    view's table through maintenance_state() and load_maintenance_state().
+    """
+
+    def __init__(self, name, query, storage):
+        self.name = name
+        self.query = query
+        self.table_name = query['table_name']
+        joins = query.get('join') or []
+        self.sources = [self.table_name] + [join['table'] for join in joins]
+        self.kind = self._classify(query)
+        self.output = self._output_columns(storage)
+
+        self.groups = {}  # aggregate views: group key -> [row count, view row ID, states]
+        self.row_map = {}  # row views: tuple of source row IDs -> view row ID
+        self.by_source = {name: {} for name in self.sources}  # row ID -> set of tuples
+        self._compiled = None
+
+    @property
+    def incremental(self):
+        return self.kind is not None
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_compiled'] = None  # closures are rebuilt after loading
+        for name in ('groups', 'row_map', 'by_source'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.groups = {}
+        self.row_map = {}
+        self.by_source = {name: {} for name in state['sources']}
+        # Files written before the state moved to the view's table still carry it here
+        self.__dict__.update(state)
+
+    def maintenance_state(self):
+        return self.groups, self.row_map, self.by_source
+
+    def load_maintenance_state(self, state):
+        self.groups, self.row_map, self.by_source = state
+
+    def copy(self):
+        """A copy whose maintenance state can change without affecting this view"""
+        view = object.__new__(MaterializedView)
+        view.__dict__.update(self.__dict__)
+        view.groups = {key: [group[0], group[1], [list(state) for state in group[2]]]
+                       for key, group in self.groups.items()}
+        view.row_map = dict(self.row_map)
+        view.by_source = {name: {row_id: set(linked) for row_id, linked in rows.items()}
+                          for name, rows in self.by_source.items()}
+        return view
+
+    # Setup
+
+    def _classify(self, query):
+        """Return the maintenance strategy for a query, or None for refresh-only"""
+        if (query.get('order_by') or query.get('limit') is not None or query.get('offset')
+                or query.get('having')):
+            return None
+
+        columns = query['columns']
+        joins = query.get('join') or []
+        has_aggregates = columns != '*' and any(item['type'] == 'AGGREGATE' for item in columns)
+        if has_aggregates or query.get('group_by'):
+            return AGGREGATE if not joins else None
+
+        if len(joins) > 1:
+            return None
+        if joins:
+            join = joins[0]
+            if join['table'] == self.table_name or '.' not in join['left'] or '.' not in join['right']:
+                return None
+            if join['left'].split('.', 1)[0] != self.table_name:
+                return None
+        return ROWS
+
+    def _output_columns(self, storage):
+        """List (view column, result key, source key, column definition) per output column"""
+        output = []
+        columns = self.query['columns']
+        joined = len(self.sources) > 1
+
+        if columns == '*':
+            for table in self.sources:
+                for col in storage.schema[table]['columns']:
+                    key = f"{table}.{col['name']}" if joined else col['name']
+                    output.append((col['name'], key, key, _column_type(col)))
+        else:
+            resolve = self._resolver(storage)
+            for item in columns:
+                if item['type'] == 'AGGREGATE':
+                    func, arg = item['func'], item['arg']
+                    label = f"{func}({arg or '*'})"
+                    key = resolve(arg) if arg else None
+                    col = storage._column_schema(key, self.table_name) if key else None
+                    if func == 'COUNT':
+                        col_type = DataType.INT
+                    elif func == 'AVG':
+                        col_type = DataType.FLOAT
+                    else:
+                        col_type = _column_type(col) if col else DataType.FLOAT
+                    output.append((item['alias'] or label, item['alias'] or label, key, col_type))
+                else:
+                    key = resolve(item['name'])
+                    col = storage._column_schema(key, self.table_name)
+                    name = item['alias'] or item['name'].split('.')[-1]
+                    col_type = _column_type(col) if col else DataType.TEXT
+                    output.append((name, item['alias'] or item['name'], key, col_type))
+
+        seen = set()
+        for name, _, _, _ in output:
+            if name in seen:
+                raise ValueError(f"Duplicate column '{name}' in view '{self.name}'; use AS to rename it")
+            seen.add(name)
+        return output
+
+    def column_definitions(self):
+        """Column definitions for creating the view's table"""
+        return [(name, col_type, None) for name, _, _, col_type in self.output]
+
+    def _source_keys(self, storage):
+        """Row keys of the rows the view is computed from"""
+        if len(self.sources) == 1:
+            return [col['name'] for col in storage.schema[self.table_name]['columns']]
+        return [f"{table}.{col['name']}" for table in self.sources
+                for col in storage.schema[table]['columns']]
+
+    def _resolver(self, storage):
+        table_name = self.table_name if len(self.sources) == 1 else None
+        return storage._column_resolver(self._source_keys(storage), table_name)
+
+    def _compile(self, storage):
+        """Build the WHERE predicate and output getters for this process"""
+        if self._compiled is not None:
+            return self._compiled
+
+        resolve = self._resolver(storage)
+        where = self.query.get('where')
+        predicate = None
+        if where:
+            table_name = self.table_name if len(self.sources) == 1 else None
+            predicate = compile_expression(where, resolve, storage._literal_coercer(table_name))
+
+        compiled = {'predicate': predicate}
+        if self.kind == AGGREGATE:
+            group_keys = [resolve(name) for name in self.query.get('group_by') or []]
+            aggregates = []
+            getters = []
+            for item, (_, _, key, _) in zip(self.query['columns'], self.output):
+                if item['type'] == 'AGGREGATE':
+                    getters.append(('aggregate', len(aggregates)))
+                    aggregates.append((item['func'], key))
+                else:
+                    if key not in group_keys:
+                        raise ValueError(f"Column '{item['name']}' must appear in GROUP BY "
+                                         f"or be used in an aggregate function")
+                    getters.append(('group', group_keys.index(key)))
+            compiled.update(group_keys=group_keys, aggregates=aggregates, getters=getters)
+        elif self.kind == ROWS and len(self.sources) > 1:
+            join = self.query['join'][0]
+            compiled['left_col'] = join['left'].split('.', 1)[1]
+            compiled['right_col'] = join['right'].split('.', 1)[1]
+
+        self._compiled = compiled
+        return compiled
+
+    # Maintenance
+
+    def refresh(self, storage):
+        """Recompute the whole view from its source tables"""
+        storage._clear_table(self.name)
+        self.groups = {}
+        self.row_map = {}
+        self.by_source = {name: {} for name in self.sources}
+
+        if self.kind is None:
+            q = self.query
+            rows = storage.select(q['table_name'], q['columns'], q.get('where'), q.get('join'),
+                                  q.get('order_by'), q.get('limit'), q.get('group_by'), q.get('having'),
+                                  q.get('offset'))
+            for row in rows:
+                storage._append_row(self.name, {name: row.get(result_key)
+                                                for name, result_key, _, _ in self.output})
+        else:
+            self.apply(storage, self.table_name, inserted=list(storage.data[self.table_name]))
+            if self.kind == AGGREGATE and not self.query.get('group_by') and () not in self.groups:
+                # A whole-table aggregate always has exactly one row
+                self.groups[()] = self._new_group()
+                self._write_groups(storage, [()])
+
+    def apply(self, storage, table_name, inserted=(), deleted=()):
+        """Fold the rows a statement inserted into and deleted from a source table
+
+        An UPDATE passes the old rows as deleted and the new ones as inserted.
+        Refresh-only views are left unchanged.
+        """
+        if self.kind == AGGREGATE:
+            self._apply_aggregate(storage, inserted, deleted)
+        elif self.kind == ROWS:
+            if deleted:
+                self._remove_source_rows(storage, table_name, [row['_rowid'] for row in deleted])
+            if inserted:
+                self._add_source_rows(storage, table_name, inserted)
+
+    # Aggregate views
+
+    def _new_group(self):
+        aggregates = self._compiled['aggregates']
+        return [0, None, [[0, None] for _ in aggregates]]
+
+    def _apply_aggregate(self, storage, inserted, deleted):
+        compiled = self._compile(storage)
+        predicate = compiled['predicate']
+        group_keys = compiled['group_keys']
+        aggregates = compiled['aggregates']
+        touched = {}
+        recompute = set()
+
+        for row in deleted:
+            if predicate and not predicate(row):
+                continue
+            key = tuple(row[k] for k in group_keys)
+            group = self.groups.get(key)
+            if group is None:
+                continue
+            group[0] -= 1
+            for (func, arg_key), state in zip(aggregates, group[2]):
+                value = row[arg_key] if arg_key else None
+                if value is None:
+                    continue
+                state[0] -= 1
+                if not state[0]:
+                    state[1] = None
+                elif func in ('SUM', 'AVG'):
+                    state[1] -= value
+                elif func in ('MIN', 'MAX') and value == state[1]:
+                    recompute.add(key)
+            touched[key] = group
+
+        for row in inserted:
+            if predicate and not predicate(row):
+                continue
+            key = tuple(row[k] for k in group_keys)
+            group = self.groups.get(key)
+            if group is None:
+                group = self.groups[key] = self._new_group()
+            group[0] += 1
+            for (func, arg_key), state in zip(aggregates, group[2]):
+                value = row[arg_key] if arg_key else None
+                if value is None:
+                    continue
+                state[0] += 1
+                current = state[1]
+                if current is None:
+                    state[1] = value
+                elif func in ('SUM', 'AVG'):
+                    state[1] = current + value
+                elif func == 'MIN' and value < current:
+                    state[1] = value
+                elif func == 'MAX' and value > current:
+                    state[1] = value
+            touched[key] = group
+
+        recompute = {key for key in recompute if self.groups[key][0] > 0}
+        if recompute:
+            self._recompute_extremes(storage, recompute)
+        self._write_groups(storage, touched)
+
+    def _recompute_extremes(self, storage, keys):
+        """Rescan the source table for groups whose MIN or MAX was deleted"""
+        compiled = self._compiled
+        predicate = compiled['predicate']
+        group_keys = compiled['group_keys']
+        positions = [i for i, (func, _) in enumerate(compiled['aggregates']) if func in ('MIN', 'MAX')]
+        for key in keys:
+            for i in positions:
+                self.groups[key][2][i][1] = None
+
+        for row in storage.data[self.table_name]:
+            key = tuple(row[k] for k in group_keys)
+            if key not in keys or (predicate and not predicate(row)):
+                continue
+            states = self.groups[key][2]
+            for i in positions:
+                func, arg_key = compiled['aggregates'][i]
+                value = row[arg_key]
+                current = states[i][1]
+                if value is not None and (current is None or
+                                          (value < current if func == 'MIN' else value > current)):
+                    states[i][1] = value
+
+    def _write_groups(self, storage, keys):
+        compiled = self._compiled
+        aggregates = compiled['aggregates']
+        grouped = bool(compiled['group_keys'])
+        removed = []
+
+        for key in keys:
+            group = self.groups[key]
+            if grouped and group[0] <= 0:
+                if group[1] is not None:
+                    removed.append(group[1])
+                del self.groups[key]
+                continue
+
+            values = {}
+            for (name, _, _, _), (source, index) in zip(self.output, compiled['getters']):
+                if source == 'group':
+                    values[name] = key[index]
+                else:
+                    values[name] = _result(aggregates[index][0], aggregates[index][1], group, index)
+            if group[1] is None:
+                group[1] = storage._append_row(self.name, values)
+            else:
+                storage._replace_row(self.name, group[1], values)
+
+        if removed:
+            storage._remove_rows(self.name, removed)
+
+    # Row views
+
+    def _add_source_rows(self, storage, table_name, rows):
+        compiled = self._compile(storage)
+        predicate = compiled['predicate']
+
+        for row in rows:
+            if len(self.sources) == 1:
+                matches = [((row['_rowid'],), row)]
+            else:
+                matches = self._join_matches(storage, table_name, row)
+
+            for source_ids, merged in matches:
+                if predicate and not predicate(merged):
+                    continue
+                values = {name: merged.get(key) for name, _, key, _ in self.output}
+                self.row_map[source_ids] = storage._append_row(self.name, values)
+                for source, row_id in zip(self.sources, source_ids):
+                    self.by_source[source].setdefault(row_id, set()).add(source_ids)
+
+    def _join_matches(self, storage, table_name, row):
+        """Pair a new source row with the matching rows of the other table"""
+        compiled = self._compiled
+        left_table, right_table = self.sources
+        if table_name == left_table:
+            other_table, other_col, value = right_table, compiled['right_col'], row.get(compiled['left_col'])
+        else:
+            other_table, other_col, value = left_table, compiled['left_col'], row.get(compiled['right_col'])
+        if value is None:
+            return []
+
+        index = storage.indexes[other_table].get(other_col)
+        rows_by_id = storage.rows_by_id[other_table]
+        if index is not None:
+            others = [rows_by_id[row_id] for row_id in index.get(value, ()) if row_id in rows_by_id]
+        else:
+            others = [other for other in storage.data[other_table] if other.get(other_col) == value]
+
+        matches = []
+        for other in others:
+            left, right = (row, other) if table_name == left_table else (other, row)
+            merged = {f"{left_table}.{k}": v for k, v in left.items() if k != '_rowid'}
+            merged.update((f"{right_table}.{k}", v) for k, v in right.items() if k != '_rowid')
+            matches.append(((left['_rowid'], right['_rowid']), merged))
+        return matches
+
+    def _remove_source_rows(self, storage, table_name, row_ids):
+        removed = []
+        sources = self.by_source[table_name]
+        for row_id in row_ids:
+            for source_ids in sources.pop(row_id, ()):
+                view_row_id = self.row_map.pop(source_ids, None)
+                if view_row_id is None:
+                    continue
+                removed.append(view_row_id)
+                for source, other_id in zip(self.sources, source_ids):
+                    if source != table_name:
+                        linked = self.by_source[source].get(other_id)
+                        if linked is not None:
+                            linked.discard(source_ids)
+                            if not linked:
+                                del self.by_source[source][other_id]
+        if removed:
+            storage._remove_rows(self.name, removed)
+
+
+def _column_type(col):
+    if col['type'] == DataType.VARCHAR and col.get('max_length'):
+        return f"VARCHAR({col['max_length']})"
+    return col['type']
+
+
+def _result(func, arg_key, group, index):
+    """Current value of one aggregate of a group"""
+    count, total = group[2][index]
+    if func == 'COUNT':
+        return group[0] if arg_key is None else count
+    if func == 'AVG':
+        return total / count if count else None
+    return total
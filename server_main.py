@@ -0,0 +1,33 @@
+"""Database server entry point for MyRDBMS"""
+
+import argparse
+import asyncio
+
+from rdbms.server import DatabaseServer
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Serve a MyRDBMS database over TCP")
+    parser.add_argument('--db', default='database.db', help="database file")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5433)
+    parser.add_argument('--pool-size', type=int, default=8, help="concurrent statements")
+    parser.add_argument('--allow-copy', action='store_true',
+                        help="let clients run COPY, which reads and writes files on the server")
+    args = parser.parse_args()
+
+    server = DatabaseServer(args.db, args.host, args.port, args.pool_size,
+                            allow_copy=args.allow_copy)
+    print(f"Serving {args.db} on {args.host}:{args.port}")
+    print("Press Ctrl+C to stop")
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
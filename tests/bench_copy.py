@@ -0,0 +1,85 @@
+"""Benchmark: bulk loading and export throughput
+
+Loads the same rows with executemany (batched INSERT) and with COPY from a
+CSV and a JSONL file, then compares the peak memory of exporting through
+select() with streaming through COPY ... TO.
+
+    python -m tests.bench_copy [row_count]
+"""
+
+import sys
+sys.path.append('.')
+import json
+import os
+import time
+import tracemalloc
+from rdbms.executor import QueryExecutor
+
+ROW_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+DB_FILE = 'bench_copy.db'
+CSV_FILE = 'bench_copy.csv'
+JSONL_FILE = 'bench_copy.jsonl'
+CREATE = """
+    CREATE TABLE students (
+        student_id INT PRIMARY KEY, last_name VARCHAR(50) NOT NULL,
+        enrollment_year INT, gpa FLOAT, email VARCHAR(100) UNIQUE
+    )
+"""
+
+rows = [(i, f'Name{i % 1000}', 2018 + i % 7, (i % 40) / 10.0, f's{i}@example.com')
+        for i in range(ROW_COUNT)]
+
+with open(CSV_FILE, 'w') as f:
+    for row in rows:
+        f.write(','.join(str(value) for value in row) + '\n')
+with open(JSONL_FILE, 'w') as f:
+    keys = ('student_id', 'last_name', 'enrollment_year', 'gpa', 'email')
+    for row in rows:
+        f.write(json.dumps(dict(zip(keys, row))) + '\n')
+
+
+def fresh_executor():
+    if os.path.exists(DB_FILE):
+        os.remove(DB_FILE)
+    db = QueryExecutor(DB_FILE)
+    db.execute_raw(CREATE)
+    return db
+
+
+print(f"Loading {ROW_COUNT:,} rows\n")
+
+db = fresh_executor()
+start = time.perf_counter()
+db.executemany('INSERT INTO students VALUES (?, ?, ?, ?, ?)', rows)
+seconds = time.perf_counter() - start
+print(f"{'executemany INSERT':<24} {ROW_COUNT / seconds:>12,.0f} rows/sec")
+
+for label, sql in (('COPY csv', f"COPY students FROM '{CSV_FILE}'"),
+                   ('COPY jsonl', f"COPY students FROM '{JSONL_FILE}'")):
+    db = fresh_executor()
+    result = db.execute_raw(sql)
+    assert result['rows'] == ROW_COUNT
+    print(f"{label:<24} {result['rows_per_sec']:>12,.0f} rows/sec")
+
+EXPORT_SQL = 'SELECT student_id, last_name, gpa FROM students WHERE gpa >= 0'
+
+# Export: the old way serialized a fully materialized select() result
+print()
+with open(JSONL_FILE, 'w') as f:
+    tracemalloc.start()
+    for row in db.execute_raw(EXPORT_SQL):
+        f.write(json.dumps(row) + '\n')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+print(f"{'select() + json.dumps':<24} {peak / 2**20:>9.1f} MiB peak")
+
+with open(JSONL_FILE, 'w') as f:
+    tracemalloc.start()
+    db.copy_to(EXPORT_SQL, f, format='jsonl')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+print(f"{'COPY (SELECT ...) TO':<24} {peak / 2**20:>9.1f} MiB peak")
+
+db = None
+for path in (DB_FILE, CSV_FILE, JSONL_FILE):
+    os.remove(path)
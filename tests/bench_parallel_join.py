@@ -0,0 +1,70 @@
+"""Benchmark: serial vs partitioned parallel hash join
+
+Joins enrollments against students (1M x 100k by default) with 1, 2, 4,
+... worker processes, up to the number of CPUs (or max_workers).
+
+    python -m tests.bench_parallel_join [enrollment_count] [max_workers]
+"""
+
+import sys
+sys.path.append('.')
+import os
+import time
+from rdbms.storage import StorageEngine
+
+ENROLLMENTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+MAX_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+STUDENTS = max(1, ENROLLMENTS // 10)
+DB_FILE = 'bench_parallel_join.db'
+
+if os.path.exists(DB_FILE):
+    os.remove(DB_FILE)
+
+storage = StorageEngine(DB_FILE)
+storage.create_table('students', [
+    ('student_id', 'INT'), ('last_name', 'VARCHAR(50)'), ('enrollment_year', 'INT'),
+], primary_key='student_id')
+storage.create_table('enrollments', [
+    ('enrollment_id', 'INT'), ('student_id', 'INT'), ('course_id', 'INT'), ('grade', 'VARCHAR(2)'),
+], primary_key='enrollment_id')
+
+# Fill the tables directly, as one write; this benchmark is about joins, not inserts
+with storage.transaction():
+    storage.data['students'] = [
+        {'student_id': i, 'last_name': f'Name{i % 1000}', 'enrollment_year': 2018 + i % 7, '_rowid': i}
+        for i in range(STUDENTS)
+    ]
+    storage.data['enrollments'] = [
+        {'enrollment_id': i, 'student_id': (i * 7919) % STUDENTS, 'course_id': i % 500,
+         'grade': 'ABCDF'[i % 5], '_rowid': i}
+        for i in range(ENROLLMENTS)
+    ]
+
+join = 'JOIN students ON enrollments.student_id = students.student_id'
+
+worker_counts = [1]
+while worker_counts[-1] * 2 <= MAX_WORKERS:
+    worker_counts.append(worker_counts[-1] * 2)
+
+print(f"Joining {ENROLLMENTS:,} enrollments with {STUDENTS:,} students "
+      f"on {os.cpu_count()} CPU(s)\n")
+print(f"{'workers':>7} {'partitions':>10} {'time':>10} {'rows':>12}")
+baseline = None
+for workers in worker_counts:
+    storage.close()
+    storage.max_parallel_workers = workers
+    start = time.perf_counter()
+    rows = storage.select('enrollments', '*', join=join)
+    elapsed = time.perf_counter() - start
+    if baseline is None:
+        baseline = rows
+    else:
+        assert rows == baseline
+    partitions = 1 if workers == 1 else storage._join_partitions(STUDENTS)
+    print(f"{workers:>7} {partitions:>10} {elapsed:>9.3f}s {len(rows):>12,}")
+    rows = None
+
+storage.close()
+storage = None
+if os.path.exists(DB_FILE):
+    os.remove(DB_FILE)
@@ -0,0 +1,68 @@
+"""Benchmark: serial vs process-pool table scans
+
+Times a LIKE filter and a filtered aggregate with 1, 2, 4, ... workers, up
+to the number of CPUs (or max_workers). The first query after starting a pool pays for
+forking the workers; it is reported separately.
+
+    python -m tests.bench_parallel_scan [row_count] [max_workers]
+"""
+
+import sys
+sys.path.append('.')
+import os
+import time
+from rdbms.storage import StorageEngine
+
+ROW_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+MAX_WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+DB_FILE = 'bench_parallel.db'
+
+if os.path.exists(DB_FILE):
+    os.remove(DB_FILE)
+
+storage = StorageEngine(DB_FILE)
+storage.create_table('enrollments', [
+    ('enrollment_id', 'INT'), ('student_id', 'INT'), ('course_code', 'VARCHAR(10)'),
+    ('year', 'INT'), ('grade', 'FLOAT'),
+], primary_key='enrollment_id')
+
+# Fill the table directly, as one write; this benchmark is about scans, not inserts
+with storage.transaction():
+    storage.data['enrollments'] = [
+        {'enrollment_id': i, 'student_id': i % 100000, 'course_code': f'CS{i % 500}',
+         'year': 2018 + i % 7, 'grade': (i % 41) / 10.0, '_rowid': i}
+        for i in range(ROW_COUNT)
+    ]
+
+queries = [
+    ('*', "course_code LIKE 'CS1%' AND grade > 2"),
+    ('COUNT(*), AVG(grade), MAX(course_code)', "year BETWEEN 2019 AND 2021 OR grade < 1"),
+]
+
+worker_counts = [1]
+while worker_counts[-1] * 2 <= MAX_WORKERS:
+    worker_counts.append(worker_counts[-1] * 2)
+
+print(f"Scanning {ROW_COUNT:,} rows on {os.cpu_count()} CPU(s)\n")
+print(f"{'workers':>7} {'pool start':>11} " + ' '.join(f"{'query ' + str(i + 1):>10}"
+                                                       for i in range(len(queries))))
+for workers in worker_counts:
+    storage.close()
+    storage.max_parallel_workers = workers
+    warmup = 0.0
+    if workers > 1:
+        start = time.perf_counter()
+        storage.select('enrollments', 'COUNT(*)', 'year < 0')
+        warmup = time.perf_counter() - start
+
+    timings = []
+    for columns, where in queries:
+        start = time.perf_counter()
+        storage.select('enrollments', columns, where)
+        timings.append(time.perf_counter() - start)
+    print(f"{workers:>7} {warmup:>10.3f}s " + ' '.join(f"{t:>9.3f}s" for t in timings))
+
+storage.close()
+storage = None
+if os.path.exists(DB_FILE):
+    os.remove(DB_FILE)
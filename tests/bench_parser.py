@@ -0,0 +1,43 @@
+"""Parser benchmark: 10k-value INSERTs and long WHERE clauses
+
+    python -m tests.bench_parser [repeat]
+"""
+
+import sys
+sys.path.append('.')
+import time
+from rdbms.lexer import tokenize
+from rdbms.parser import SQLParser
+
+REPEAT = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+values = ', '.join(f"'value {i}, with a comma'" if i % 2 else str(i) for i in range(10000))
+wide_insert = f"INSERT INTO wide VALUES ({values})"
+
+conditions = ' OR '.join(
+    f"(enrollment_year = {2000 + i % 25} AND last_name LIKE 'A{i}%')" for i in range(1000))
+long_where = f"SELECT * FROM students WHERE {conditions} ORDER BY last_name LIMIT 10"
+
+keyword_strings = "INSERT INTO notes VALUES " + "(1, 'SELECT FROM WHERE ORDER BY LIMIT')"
+
+cases = [
+    ("INSERT with 10,000 values", wide_insert),
+    ("SELECT with 1,000 OR'ed conditions", long_where),
+    ("INSERT with keywords in strings", keyword_strings),
+]
+
+print(f"{'statement':<38} {'chars':>9} {'tokens':>8} {'tokenize ms':>12} {'parse ms':>10}")
+for description, sql in cases:
+    token_count = len(tokenize(sql))
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        tokenize(sql)
+    tokenize_ms = (time.perf_counter() - start) / REPEAT * 1000
+
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        SQLParser.parse(sql)
+    parse_ms = (time.perf_counter() - start) / REPEAT * 1000
+
+    print(f"{description:<38} {len(sql):>9,} {token_count:>8,} {tokenize_ms:>12.2f} {parse_ms:>10.2f}")
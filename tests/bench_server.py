@@ -0,0 +1,86 @@
+"""Benchmark: per-query latency over the TCP server vs HTTP /api/query
+
+Runs the same point SELECT through the web app's /api/query endpoint (a
+local werkzeug server, JSON over HTTP) and through the database server's
+client, one at a time and pipelined in groups.
+
+    python -m tests.bench_server [queries] [pipeline_depth]
+"""
+
+import sys
+sys.path.append('.')
+import asyncio
+import http.client
+import json
+import os
+import threading
+import time
+from werkzeug.serving import make_server
+from web_app import create_app
+from web_app.db import init_database
+from rdbms.server import DatabaseServer
+from rdbms.client import Connection
+
+QUERIES = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+DEPTH = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+DATABASE = 'bench_server.db'
+SQL = 'SELECT * FROM students WHERE student_id = ?'
+
+app = create_app({'DATABASE': DATABASE})
+db_path = os.path.join(app.instance_path, DATABASE)
+with app.app_context():
+    init_database()
+
+http_server = make_server('127.0.0.1', 0, app, threaded=True)
+threading.Thread(target=http_server.serve_forever, daemon=True).start()
+
+server = DatabaseServer(db_path, port=0)
+ready = threading.Event()
+
+
+def serve():
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    ready.set()
+    loop.run_forever()
+
+
+threading.Thread(target=serve, daemon=True).start()
+ready.wait()
+
+
+def over_http():
+    for i in range(QUERIES):
+        conn = http.client.HTTPConnection('127.0.0.1', http_server.server_port)
+        conn.request('POST', '/api/query', json.dumps({'sql': SQL, 'params': [1 + i % 5]}),
+                     {'Content-Type': 'application/json'})
+        json.loads(conn.getresponse().read())
+        conn.close()
+
+
+def over_tcp():
+    with Connection(port=server.port) as conn:
+        statement = conn.prepare(SQL)
+        for i in range(QUERIES):
+            statement.execute([1 + i % 5])
+
+
+def over_tcp_pipelined():
+    with Connection(port=server.port) as conn:
+        statement = conn.prepare(SQL)
+        for start in range(0, QUERIES, DEPTH):
+            conn.pipeline([(statement, [1 + i % 5]) for i in range(start, start + DEPTH)])
+
+
+print(f"{QUERIES} point SELECTs\n")
+for label, run in [('HTTP + JSON (/api/query)', over_http),
+                   ('TCP server, prepared', over_tcp),
+                   (f'TCP server, pipelined x{DEPTH}', over_tcp_pipelined)]:
+    start = time.perf_counter()
+    run()
+    seconds = time.perf_counter() - start
+    print(f"{label:<28} {seconds:7.3f}s  {seconds / QUERIES * 1e6:8.1f} us/query")
+
+http_server.shutdown()
+if os.path.exists(db_path):
+    os.remove(db_path)
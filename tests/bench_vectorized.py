@@ -0,0 +1,76 @@
+"""Benchmark: row mode vs NumPy batch mode for numeric filters and aggregates
+
+Times each query in row mode and in batch mode (the first batch run also
+builds the column arrays, reported separately). Run it at 1M and 10M rows;
+10M rows of dicts need several GB of memory.
+
+    python -m tests.bench_vectorized [row_count]
+"""
+
+import sys
+sys.path.append('.')
+import os
+import time
+from rdbms.storage import StorageEngine
+from rdbms import vectorized
+
+ROW_COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+DB_FILE = 'bench_vectorized.db'
+
+if not vectorized.available():
+    print("NumPy is not installed; batch mode would fall back to row mode")
+    sys.exit(0)
+
+if os.path.exists(DB_FILE):
+    os.remove(DB_FILE)
+
+storage = StorageEngine(DB_FILE)
+storage.create_table('enrollments', [
+    ('enrollment_id', 'INT'), ('student_id', 'INT'), ('course_id', 'INT'),
+    ('year', 'INT'), ('grade', 'FLOAT'),
+], primary_key='enrollment_id')
+
+# Fill the table directly, as one write; this benchmark is about scans, not inserts
+with storage.transaction():
+    storage.data['enrollments'] = [
+        {'enrollment_id': i, 'student_id': i % 100000, 'course_id': i % 500,
+         'year': 2018 + i % 7, 'grade': None if i % 50 == 0 else (i % 41) / 10.0, '_rowid': i}
+        for i in range(ROW_COUNT)
+    ]
+
+queries = [
+    ("filter", "*", "grade > 3.5"),
+    ("filter", "*", "year BETWEEN 2019 AND 2021 AND grade < 1"),
+    ("filter", "*", "course_id IN (1, 2, 3) OR grade IS NULL"),
+    ("aggregate", "COUNT(*), AVG(grade), MIN(grade), MAX(grade)", None),
+    ("aggregate", "SUM(course_id), AVG(grade)", "year >= 2022 AND grade IS NOT NULL"),
+]
+
+
+def timed(batch_mode, columns, where):
+    storage.batch_mode = batch_mode
+    start = time.perf_counter()
+    result = storage.select('enrollments', columns, where)
+    return time.perf_counter() - start, result
+
+
+print(f"Scanning {ROW_COUNT:,} rows (batch size {storage.batch_size})\n")
+
+storage.batch_mode = True
+start = time.perf_counter()
+for col in storage.schema['enrollments']['columns']:
+    storage.column_cache.column(storage, 'enrollments', col)
+print(f"Building column arrays: {time.perf_counter() - start:.2f}s (once per table version)\n")
+
+print(f"{'query':<60} {'row mode':>10} {'batch':>10} {'speedup':>8}")
+for kind, columns, where in queries:
+    row_time, row_result = timed(False, columns, where)
+    batch_time, batch_result = timed(True, columns, where)
+    if kind == 'filter':
+        assert row_result == batch_result, where
+    label = f"{columns} WHERE {where}" if where else columns
+    print(f"{label[:60]:<60} {row_time:>9.3f}s {batch_time:>9.3f}s {row_time / batch_time:>7.1f}x")
+
+storage = None
+if os.path.exists(DB_FILE):
+    os.remove(DB_FILE)
@@ -0,0 +1,75 @@
+"""Load test: web app requests/sec with and without the session pool
+
+Runs the dashboard, course list and /api/query from several threads
+through Flask's test client, first loading the database on every request
+(DB_POOL_SIZE=0, how get_db() used to work) and then with sessions from
+the shared pool. Extra students make the per-request load visible.
+
+    python -m tests.bench_web [requests] [threads] [extra_students]
+"""
+
+import sys
+sys.path.append('.')
+import os
+import threading
+import time
+from web_app import create_app
+from rdbms.executor import QueryExecutor
+from web_app.db import init_database, reset_pool
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+EXTRA_STUDENTS = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+DATABASE = 'bench_web.db'
+
+app = create_app({'DATABASE': DATABASE})
+db_path = os.path.join(app.instance_path, DATABASE)
+
+with app.app_context():
+    init_database()
+    students = [(i, f'First{i}', f'Last{i}', f'student{i}@example.com', '2001-01-01', 2020 + i % 4)
+                for i in range(100, 100 + EXTRA_STUDENTS)]
+    QueryExecutor(db_path).executemany('INSERT INTO students VALUES (?, ?, ?, ?, ?, ?)', students)
+
+requests = [
+    lambda client: client.get('/'),
+    lambda client: client.get('/courses'),
+    lambda client: client.post('/api/query', json={
+        'sql': 'SELECT * FROM students WHERE student_id = ?', 'params': [150]}),
+]
+
+
+def run(pool_size):
+    app.config['DB_POOL_SIZE'] = pool_size
+    reset_pool(db_path)
+    per_thread = REQUESTS // THREADS
+    errors = []
+
+    def worker():
+        client = app.test_client()
+        for i in range(per_thread):
+            response = requests[i % len(requests)](client)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(THREADS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    assert not errors, errors
+    return per_thread * THREADS / elapsed
+
+
+print(f"{REQUESTS:,} requests from {THREADS} threads, "
+      f"{EXTRA_STUDENTS + 5:,} students in the database\n")
+before = run(0)
+print(f"Database loaded per request: {before:>10,.1f} req/sec")
+after = run(8)
+print(f"Shared engine, pooled:       {after:>10,.1f} req/sec ({after / before:.1f}x)")
+
+reset_pool(db_path)
+if os.path.exists(db_path):
+    os.remove(db_path)
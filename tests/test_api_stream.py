@@ -0,0 +1,57 @@
+import sys
+sys.path.append('.')
+from web_app import create_app
+from web_app.db import init_database
+import json
+import os
+
+print("Testing streamed /api/query responses...")
+
+app = create_app({'DATABASE': 'test_api_stream.db'})
+db_path = os.path.join(app.instance_path, 'test_api_stream.db')
+with app.app_context():
+    init_database()
+client = app.test_client()
+sql = {'sql': 'SELECT * FROM students WHERE enrollment_year > ?', 'params': [2020]}
+
+print("\n1. ?stream=1 sends one JSON row per line...")
+expected = client.post('/api/query', json=sql).get_json()['result']
+response = client.post('/api/query?stream=1', json=sql)
+rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+if response.mimetype == 'application/x-ndjson' and rows == expected and rows:
+    print(f"✅ {len(rows)} rows, same as the JSON response")
+else:
+    print(f"❌ Streamed {rows} vs {expected}")
+
+print("\n2. Accept: application/x-ndjson streams too...")
+response = client.post('/api/query', json=sql, headers={'Accept': 'application/x-ndjson'})
+streamed = response.is_streamed
+if response.mimetype == 'application/x-ndjson' and streamed and response.get_data():
+    print("✅ Chunked NDJSON response")
+else:
+    print(f"❌ Got {response.mimetype}")
+
+print("\n3. The body is produced lazily...")
+response = client.post('/api/query?stream=1', json={'sql': 'SELECT * FROM enrollments'},
+                       buffered=False)
+first = next(response.response)
+response.close()
+if first and json.loads(first.splitlines()[0]):
+    print("✅ First chunk read without consuming the rest")
+else:
+    print("❌ No first chunk")
+
+print("\n4. Errors and non-SELECT statements use the JSON response...")
+error = client.post('/api/query?stream=1', json={'sql': 'SELECT * FROM missing'})
+update = client.post('/api/query?stream=1', json={
+    'sql': 'UPDATE students SET enrollment_year = 2020 WHERE student_id = 1'})
+if (error.mimetype == 'application/json' and error.get_json()['success'] is False
+        and update.get_json() == {'success': True, 'result': 1}):
+    print("✅ Error and UPDATE answered as JSON")
+else:
+    print(f"❌ Unexpected: {error.get_data(as_text=True)} / {update.get_data(as_text=True)}")
+
+# Clean up
+if os.path.exists(db_path):
+    os.remove(db_path)
+print("\nTests completed!")
@@ -0,0 +1,79 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import os
+
+print("Testing multi-row INSERT and executemany...")
+
+# Clean up
+if os.path.exists('test_batch.db'):
+    os.remove('test_batch.db')
+
+db = QueryExecutor('test_batch.db')
+
+db.execute_raw("""
+    CREATE TABLE students (
+        id INT PRIMARY KEY,
+        name VARCHAR(50) NOT NULL,
+        email VARCHAR(100) UNIQUE
+    )
+""")
+
+print("\n1. Multi-row VALUES...")
+result = db.execute_raw("""
+    INSERT INTO students VALUES
+        (1, 'Alice', 'alice@example.com'),
+        (2, 'Bob', 'bob@example.com'),
+        (3, 'Carol', NULL)
+""")
+rows = db.execute_raw("SELECT * FROM students")
+if result == [0, 1, 2] and len(rows) == 3:
+    print(f"✅ Inserted 3 rows with IDs {result}")
+else:
+    print(f"❌ Unexpected result: {result}, {rows}")
+
+print("\n2. executemany with one save...")
+saves = []
+original_save = db.storage.save
+db.storage.save = lambda: saves.append(1) or original_save()
+db.executemany("INSERT INTO students (id, name, email) VALUES (?, ?, ?)",
+               [(i, f'Student {i}', f's{i}@example.com') for i in range(4, 104)])
+db.storage.save = original_save
+count = db.execute_raw("SELECT COUNT(*) AS n FROM students")[0]['n']
+if count == 103 and len(saves) == 1:
+    print("✅ 100 rows inserted with a single save()")
+else:
+    print(f"❌ {count} rows, {len(saves)} saves")
+
+print("\n3. Constraint violations reject the whole batch...")
+cases = [
+    ("Duplicate PK within batch", "INSERT INTO students VALUES (200, 'X', NULL), (200, 'Y', NULL)"),
+    ("Duplicate PK with table", "INSERT INTO students VALUES (201, 'X', NULL), (1, 'Y', NULL)"),
+    ("Duplicate UNIQUE within batch", "INSERT INTO students VALUES (202, 'X', 'same@x.com'), (203, 'Y', 'same@x.com')"),
+    ("NOT NULL violation", "INSERT INTO students VALUES (204, 'X', NULL), (205, NULL, NULL)"),
+    ("Bad type", "INSERT INTO students VALUES (206, 'X', NULL), ('abc', 'Y', NULL)"),
+]
+for description, sql in cases:
+    try:
+        db.execute_raw(sql)
+        print(f"   ❌ {description}: should have failed!")
+    except ValueError as e:
+        print(f"   ✅ {description}: {str(e)[:50]}")
+count = db.execute_raw("SELECT COUNT(*) AS n FROM students")[0]['n']
+if count == 103:
+    print("✅ No partial batches were stored")
+else:
+    print(f"❌ Table has {count} rows")
+
+print("\n4. Deleted keys can be reused...")
+db.execute_raw("DELETE FROM students WHERE id = 2")
+try:
+    db.execute_raw("INSERT INTO students VALUES (2, 'Bob again', 'bob@example.com')")
+    print("✅ Re-inserted deleted primary key and unique value")
+except ValueError as e:
+    print(f"❌ Error: {e}")
+
+db = None
+os.remove('test_batch.db')
+
+print("\n✅ Test complete!")
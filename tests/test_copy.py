@@ -0,0 +1,114 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import io
+import json
+import os
+
+print("Testing COPY bulk loading...")
+
+# Clean up
+for path in ('test_copy.db', 'test_copy.csv', 'test_copy.jsonl'):
+    if os.path.exists(path):
+        os.remove(path)
+
+db = QueryExecutor('test_copy.db')
+
+db.execute_raw("""
+    CREATE TABLE students (
+        id INT PRIMARY KEY,
+        name VARCHAR(20) NOT NULL,
+        gpa FLOAT,
+        active BOOL,
+        email VARCHAR(50) UNIQUE
+    )
+""")
+
+print("\n1. COPY FROM a CSV file with a header...")
+with open('test_copy.csv', 'w', newline='') as f:
+    f.write("id,email,name,gpa,active\n")
+    for i in range(1, 1001):
+        email = f"s{i}@example.com" if i % 10 else ""
+        f.write(f"{i},{email},Student {i},{i % 40 / 10},{'true' if i % 2 else 'false'}\n")
+
+result = db.execute_raw("COPY students FROM 'test_copy.csv' (FORMAT csv, HEADER)")
+row = db.execute_raw("SELECT * FROM students WHERE id = 7")[0]
+if result['rows'] == 1000 and row['gpa'] == 0.7 and row['active'] is True:
+    print(f"✅ Loaded {result['rows']} rows ({result['rows_per_sec']:,.0f} rows/sec)")
+else:
+    print(f"❌ Unexpected result: {result}, {row}")
+
+nulls = db.execute_raw("SELECT COUNT(*) AS n FROM students WHERE email IS NULL")[0]['n']
+if nulls == 100:
+    print("✅ Empty CSV fields loaded as NULL")
+else:
+    print(f"❌ Expected 100 NULL emails, got {nulls}")
+
+by_index = db.execute_raw("SELECT name FROM students WHERE email = 's501@example.com'")
+if by_index == [{'name': 'Student 501'}]:
+    print("✅ Indexes built for loaded rows")
+else:
+    print(f"❌ Index lookup returned {by_index}")
+
+print("\n2. COPY FROM a JSONL stream...")
+lines = [json.dumps({'id': i, 'name': f'Json {i}', 'gpa': 3.5, 'active': False})
+         for i in range(2001, 2051)]
+result = db.copy_from('students', io.StringIO('\n'.join(lines)), format='jsonl')
+count = db.execute_raw("SELECT COUNT(*) AS n FROM students")[0]['n']
+if result['rows'] == 50 and count == 1050:
+    print("✅ Loaded 50 JSONL rows")
+else:
+    print(f"❌ Loaded {result['rows']} rows, table has {count}")
+
+print("\n3. Positional CSV without a header, in small chunks...")
+data = io.StringIO("3001,Positional,1.5,yes,\n3002,Second,,no,p2@example.com\n")
+result = db.copy_from('students', data, chunk_size=1)
+row = db.execute_raw("SELECT * FROM students WHERE id = 3002")[0]
+if result['rows'] == 2 and row['gpa'] is None and row['active'] is False:
+    print("✅ Positional rows loaded")
+else:
+    print(f"❌ Unexpected row: {row}")
+
+print("\n4. Invalid input rejects the whole load...")
+cases = [
+    ("Duplicate PK with table", "9000,A,1.0,true,\n1,B,1.0,true,\n"),
+    ("Duplicate PK within file", "9001,A,1.0,true,\n9001,B,1.0,true,\n"),
+    ("Duplicate UNIQUE", "9002,A,1.0,true,u@x.com\n9003,B,1.0,true,u@x.com\n"),
+    ("NOT NULL violation", "9004,,1.0,true,\n"),
+    ("Bad type", "9005,A,abc,true,\n"),
+    ("VARCHAR too long", "9006,ThisNameIsFarTooLongToFit,1.0,true,\n"),
+    ("Wrong value count", "9007,A,1.0\n"),
+]
+for description, text in cases:
+    try:
+        db.copy_from('students', io.StringIO(text))
+        print(f"   ❌ {description}: should have failed!")
+    except ValueError as e:
+        print(f"   ✅ {description}: {e}")
+
+count = db.execute_raw("SELECT COUNT(*) AS n FROM students")[0]['n']
+if count == 1052:
+    print("✅ No rows from failed loads were kept")
+else:
+    print(f"❌ Table has {count} rows, expected 1052")
+
+try:
+    db.copy_from('students', io.StringIO('{"id": 1, "nickname": "x"}\n'), format='jsonl')
+    print("❌ Unknown JSONL column should have failed!")
+except ValueError as e:
+    print(f"✅ Unknown JSONL column rejected: {e}")
+
+print("\n5. Loaded data survives a reload...")
+db = QueryExecutor('test_copy.db')
+count = db.execute_raw("SELECT COUNT(*) AS n FROM students")[0]['n']
+row = db.execute_raw("SELECT name FROM students WHERE id = 2010")
+if count == 1052 and row == [{'name': 'Json 2010'}]:
+    print("✅ Rows persisted")
+else:
+    print(f"❌ After reload: {count} rows, {row}")
+
+# Clean up
+db = None
+for path in ('test_copy.db', 'test_copy.csv'):
+    os.remove(path)
+print("\n✅ COPY tests completed!")
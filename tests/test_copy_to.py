@@ -0,0 +1,120 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import io
+import json
+import os
+
+print("Testing streaming export with COPY ... TO...")
+
+# Clean up
+for path in ('test_copy_to.db', 'test_copy_to.csv', 'test_copy_to.jsonl'):
+    if os.path.exists(path):
+        os.remove(path)
+
+db = QueryExecutor('test_copy_to.db')
+
+db.execute_raw("CREATE TABLE students (id INT PRIMARY KEY, name VARCHAR(50), gpa FLOAT, active BOOL)")
+db.execute_raw("CREATE TABLE enrollments (enrollment_id INT PRIMARY KEY, student_id INT, course VARCHAR(10))")
+db.executemany("INSERT INTO students VALUES (?, ?, ?, ?)",
+               [(i, f'Student, {i}', None if i % 5 == 0 else i / 10, i % 2 == 0)
+                for i in range(1, 501)])
+db.executemany("INSERT INTO enrollments VALUES (?, ?, ?)",
+               [(i, i % 50 + 1, f'CS{i % 3}') for i in range(1, 301)])
+
+print("\n1. iter_rows matches execute_raw...")
+queries = [
+    "SELECT * FROM students WHERE gpa > 20",
+    "SELECT name AS n, gpa FROM students WHERE id IN (3, 4, 5) OR name LIKE '%, 49_'",
+    "SELECT students.name, enrollments.course FROM students "
+    "JOIN enrollments ON students.id = enrollments.student_id WHERE enrollments.course = 'CS1'",
+    "SELECT * FROM students WHERE id = 7",
+    "SELECT id FROM students ORDER BY gpa DESC LIMIT 5",
+    "SELECT COUNT(*) AS n, MAX(gpa) AS top FROM students",
+    "SELECT id FROM students LIMIT 3",
+]
+for sql in queries:
+    streamed = list(db.iter_rows(sql))
+    expected = db.execute_raw(sql)
+    if streamed == expected:
+        print(f"   ✅ {len(streamed)} row(s): {sql[:60]}")
+    else:
+        print(f"   ❌ {sql}: {streamed[:3]} != {expected[:3]}")
+
+rows = db.iter_rows("SELECT id FROM students WHERE id > ?", (10,))
+if next(rows) == {'id': 11} and not isinstance(rows, list):
+    print("✅ Rows are produced lazily, with parameters")
+else:
+    print("❌ iter_rows did not stream")
+
+print("\n2. COPY table TO CSV and load it back...")
+result = db.execute_raw("COPY students TO 'test_copy_to.csv' (FORMAT csv, HEADER)")
+with open('test_copy_to.csv') as f:
+    first_lines = [next(f), next(f)]
+if result['rows'] == 500 and first_lines == ['id,name,gpa,active\n', '1,"Student, 1",0.1,False\n']:
+    print(f"✅ Exported {result['rows']} rows ({result['rows_per_sec']:,.0f} rows/sec)")
+else:
+    print(f"❌ Unexpected export: {result}, {first_lines}")
+
+db.execute_raw("CREATE TABLE students_copy (id INT PRIMARY KEY, name VARCHAR(50), gpa FLOAT, active BOOL)")
+db.execute_raw("COPY students_copy FROM 'test_copy_to.csv' (FORMAT csv, HEADER)")
+original = [{k: v for k, v in row.items() if k != '_rowid'} for row in db.execute_raw("SELECT * FROM students")]
+copied = [{k: v for k, v in row.items() if k != '_rowid'} for row in db.execute_raw("SELECT * FROM students_copy")]
+if original == copied:
+    print("✅ CSV round trip preserves values and NULLs")
+else:
+    print("❌ Round trip changed the data")
+
+print("\n3. COPY (SELECT ...) TO JSONL...")
+result = db.execute_raw("""
+    COPY (SELECT students.name, enrollments.course FROM students
+          JOIN enrollments ON students.id = enrollments.student_id
+          WHERE enrollments.course = 'CS2')
+    TO 'test_copy_to.jsonl'
+""")
+with open('test_copy_to.jsonl') as f:
+    lines = [json.loads(line) for line in f]
+if result['rows'] == 100 == len(lines) and lines[0] == {'students.name': 'Student, 1', 'enrollments.course': 'CS2'}:
+    print("✅ Exported 100 joined rows as JSON lines")
+else:
+    print(f"❌ Unexpected export: {result}, {lines[:1]}")
+
+print("\n4. Output is written in bounded chunks...")
+
+
+class RecordingFile(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, text):
+        self.writes += 1
+        return super().write(text)
+
+
+out = RecordingFile()
+result = db.copy_to('SELECT id, name FROM students', out, format='jsonl', chunk_size=100)
+if result['rows'] == 500 and out.writes == 5 and out.getvalue().count('\n') == 500:
+    print("✅ 500 rows written as 5 chunks of 100")
+else:
+    print(f"❌ {result['rows']} rows in {out.writes} writes")
+
+out = io.StringIO()
+db.copy_to('SELECT id FROM students WHERE id > 1000', out, header=True)
+if out.getvalue() == '':
+    print("✅ Empty result writes nothing")
+else:
+    print(f"❌ Unexpected output: {out.getvalue()!r}")
+
+for description, source in (("Unknown table", 'missing'), ("Not a SELECT", "DELETE FROM students")):
+    try:
+        db.copy_to(source, io.StringIO())
+        print(f"❌ {description}: should have failed!")
+    except ValueError as e:
+        print(f"✅ {description}: {e}")
+
+# Clean up
+db = None
+for path in ('test_copy_to.db', 'test_copy_to.csv', 'test_copy_to.jsonl'):
+    os.remove(path)
+print("\n✅ COPY TO tests completed!")
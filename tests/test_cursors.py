@@ -0,0 +1,86 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import os
+
+print("Testing server-side cursors...")
+
+# Clean up
+if os.path.exists('test_cursors.db'):
+    os.remove('test_cursors.db')
+
+db = QueryExecutor('test_cursors.db')
+db.execute_raw("CREATE TABLE items (id INT PRIMARY KEY, name VARCHAR(20))")
+db.executemany("INSERT INTO items VALUES (?, ?)", [(i, f'item{i}') for i in range(1, 1001)])
+
+print("\n1. fetchone, fetchmany and iteration...")
+cursor = db.cursor().execute("SELECT id FROM items WHERE id <= ?", [25])
+first = cursor.fetchone()
+batch = cursor.fetchmany(10)
+cursor.arraysize = 4
+default_batch = cursor.fetchmany()
+rest = [row['id'] for row in cursor]
+if (first == {'id': 1} and [row['id'] for row in batch] == list(range(2, 12))
+        and len(default_batch) == 4 and rest == list(range(16, 26))):
+    print("✅ 25 rows fetched in pieces, in order")
+else:
+    print(f"❌ Unexpected rows: {first}, {batch}, {default_batch}, {rest}")
+if cursor.fetchone() is None and cursor.fetchmany(5) == []:
+    print("✅ Exhausted cursor returns no more rows")
+else:
+    print("❌ Rows after the end")
+
+print("\n2. A cursor reads the snapshot taken by execute()...")
+cursor = db.cursor().execute("SELECT * FROM items")
+db.execute_raw("DELETE FROM items WHERE id > 500")
+stats = db.storage.snapshot_stats()
+count = len(cursor.fetchmany(300)) + len(cursor.fetchall())
+released = db.storage.snapshot_stats()
+if count == 1000 and stats['active_snapshots'] == 1 and released['active_snapshots'] == 0:
+    print("✅ All 1000 rows despite a later DELETE; snapshot released at the end")
+else:
+    print(f"❌ {count} rows, snapshots {stats} -> {released}")
+
+print("\n3. close() releases an unfinished cursor...")
+with db.cursor() as cursor:
+    cursor.execute("SELECT * FROM items")
+    cursor.fetchone()
+try:
+    cursor.fetchone()
+    print("❌ Fetch from a closed cursor should fail")
+except ValueError:
+    if db.storage.snapshot_stats()['active_snapshots'] == 0:
+        print("✅ Closed cursor released its snapshot")
+    else:
+        print("❌ Snapshot still held")
+
+print("\n4. Other statements report rowcount...")
+cursor = db.cursor()
+cursor.execute("UPDATE items SET name = 'x' WHERE id < 11")
+updated = cursor.rowcount
+cursor.execute("INSERT INTO items VALUES (2000, 'new')")
+if updated == 10 and cursor.rowcount == 1 and cursor.lastrowid is not None:
+    print("✅ rowcount and lastrowid set")
+else:
+    print(f"❌ rowcount {updated}/{cursor.rowcount}, lastrowid {cursor.lastrowid}")
+try:
+    cursor.fetchone()
+    print("❌ INSERT has no rows to fetch")
+except ValueError as e:
+    print(f"✅ {e}")
+
+print("\n5. Errors surface in execute()...")
+try:
+    db.cursor().execute("SELECT * FROM missing")
+    print("❌ Unknown table should fail")
+except ValueError as e:
+    if db.storage.snapshot_stats()['active_snapshots'] == 0:
+        print(f"✅ {e}")
+    else:
+        print("❌ Snapshot leaked by a failed execute")
+
+# Clean up
+db = None
+if os.path.exists('test_cursors.db'):
+    os.remove('test_cursors.db')
+print("\nTests completed!")
@@ -0,0 +1,166 @@
+import sys
+sys.path.append('.')
+from rdbms import dbapi
+from rdbms.executor import QueryExecutor
+import datetime
+import os
+import threading
+import time
+
+print("Testing the DB-API 2.0 driver...")
+
+# Clean up
+if os.path.exists('test_dbapi.db'):
+    os.remove('test_dbapi.db')
+
+conn = dbapi.connect('test_dbapi.db')
+cur = conn.cursor()
+cur.execute("CREATE TABLE accounts (id INT PRIMARY KEY, owner VARCHAR(20), balance INT, opened DATE)")
+conn.commit()
+other = dbapi.connect('test_dbapi.db')  # opening waits for writers, so open it first
+
+print("\n1. Module globals and exceptions...")
+if (dbapi.apilevel == '2.0' and dbapi.paramstyle == 'qmark'
+        and issubclass(dbapi.IntegrityError, dbapi.DatabaseError)
+        and issubclass(dbapi.DatabaseError, dbapi.Error)
+        and conn.ProgrammingError is dbapi.ProgrammingError):
+    print("✅ apilevel, paramstyle and the exception hierarchy")
+else:
+    print("❌ Module globals are wrong")
+
+print("\n2. executemany inserts in one batch...")
+rows = [(i, f'owner{i}', 100 * i, datetime.date(2024, 1 + i % 12, 1)) for i in range(1, 501)]
+cur.executemany("INSERT INTO accounts VALUES (?, ?, ?, ?)", rows)
+if cur.rowcount == 500 and conn.in_transaction:
+    print("✅ 500 rows inserted; a transaction is open")
+else:
+    print(f"❌ rowcount {cur.rowcount}, in_transaction {conn.in_transaction}")
+
+# Another connection doesn't see them until commit
+before = other.execute("SELECT COUNT(*) FROM accounts").fetchone()
+ours = cur.execute("SELECT COUNT(*) FROM accounts").fetchone()
+conn.commit()
+after = other.execute("SELECT COUNT(*) FROM accounts").fetchone()
+if before == (0,) and ours == (500,) and after == (500,):
+    print("✅ Uncommitted rows are visible only to their connection")
+else:
+    print(f"❌ Counts: other {before} -> {after}, ours {ours}")
+
+print("\n3. description, fetchmany and parameters...")
+cur.execute("SELECT id, owner AS name, opened FROM accounts WHERE balance > ? ORDER BY id", (49500,))
+names = [column[0] for column in cur.description]
+first = cur.fetchmany(3)
+rest = cur.fetchall()
+if (names == ['id', 'name', 'opened'] and cur.description[0][1] == dbapi.NUMBER
+        and cur.description[2][1] == dbapi.DATETIME and first == [(496, 'owner496', '2024-05-01'),
+                                                                   (497, 'owner497', '2024-06-01'),
+                                                                   (498, 'owner498', '2024-07-01')]
+        and rest == [(499, 'owner499', '2024-08-01'), (500, 'owner500', '2024-09-01')]):
+    print("✅ Rows are tuples in description order")
+else:
+    print(f"❌ Unexpected: {cur.description}, {first}, {rest}")
+cur.execute("SELECT * FROM accounts WHERE owner = :owner", {'owner': 'owner7'})
+if [c[0] for c in cur.description] == ['id', 'owner', 'balance', 'opened'] and list(cur) == [
+        (7, 'owner7', 700, '2024-08-01')]:
+    print("✅ SELECT * and named parameters")
+else:
+    print(f"❌ Unexpected: {cur.description}")
+empty = cur.execute("SELECT balance FROM accounts WHERE id = 0")
+if empty.description[0][0] == 'balance' and empty.fetchone() is None and empty.rowcount == -1:
+    print("✅ An empty result still has a description")
+else:
+    print("❌ Empty result description is missing")
+cur.execute("CREATE TABLE branches (id INT PRIMARY KEY, owner INT, opened VARCHAR(10))")
+cur.execute("INSERT INTO branches VALUES (7, 7, 'Mon-Fri')")
+conn.commit()
+types = {}
+for sql in ("SELECT opened, owner FROM branches",
+            "SELECT opened, branches.opened AS hours, MAX(balance) AS top, COUNT(*) FROM accounts "
+            "JOIN branches ON accounts.id = branches.id",
+            "SELECT * FROM accounts JOIN branches ON accounts.id = branches.id"):
+    cur.execute(sql)
+    cur.fetchall()
+    types[sql[:18]] = [column[1] for column in cur.description]
+if (types['SELECT opened, own'] == ['VARCHAR', 'INT']
+        and types['SELECT opened, bra'] == ['DATE', 'VARCHAR', 'INT', 'INT']
+        and types['SELECT * FROM acco'] == ['INT', 'VARCHAR', 'INT', 'DATE', 'INT', 'INT', 'VARCHAR']):
+    print("✅ Type codes come from the tables the query reads")
+else:
+    print(f"❌ Unexpected type codes: {types}")
+
+print("\n4. Batched updates and rollback...")
+start = time.perf_counter()
+cur.executemany("UPDATE accounts SET balance = ? WHERE id = ?", [(0, i) for i in range(1, 501, 2)])
+elapsed = time.perf_counter() - start
+updated = cur.rowcount
+zero = conn.execute("SELECT COUNT(*) FROM accounts WHERE balance = 0").fetchone()
+conn.rollback()
+restored = conn.execute("SELECT COUNT(*) FROM accounts WHERE balance = 0").fetchone()
+if updated == 250 and zero == (250,) and restored == (0,):
+    print(f"✅ 250 updates in {elapsed * 1000:.1f} ms, then rolled back")
+else:
+    print(f"❌ updated {updated}, zero {zero}, after rollback {restored}")
+
+print("\n5. Errors map to DB-API exceptions...")
+cur.execute("DELETE FROM accounts WHERE id > 400")
+checks = [
+    ("INSERT INTO accounts VALUES (?, ?, ?, ?)", (1, 'dup', 0, '2024-01-01'), dbapi.IntegrityError),
+    ("INSERT INTO accounts VALUES (?, ?, ?, ?)", (900, 'x', 'lots', '2024-01-01'), dbapi.DataError),
+    ("SELECT nothing FROM nowhere", None, dbapi.ProgrammingError),
+]
+raised = []
+for sql, params, expected in checks:
+    try:
+        cur.execute(sql, params)
+    except expected:
+        raised.append(expected.__name__)
+count = conn.execute("SELECT COUNT(*) FROM accounts").fetchone()
+if len(raised) == 3 and count == (500,) and not conn.in_transaction:
+    print(f"✅ {', '.join(raised)}; the failed write rolled back the transaction")
+else:
+    print(f"❌ Raised {raised}, count {count}, in_transaction {conn.in_transaction}")
+try:
+    cur.executemany("SELECT * FROM accounts WHERE id = ?", [(1,)])
+    print("❌ executemany ran a SELECT")
+except dbapi.ProgrammingError:
+    print("✅ executemany rejects SELECT")
+
+print("\n6. Commits persist and wait for other writers...")
+with conn:
+    conn.execute("UPDATE accounts SET balance = 1 WHERE id = 1")
+waited = []
+
+
+def writer():
+    with dbapi.connect('test_dbapi.db') as conn2:
+        conn2.execute("UPDATE accounts SET balance = 2 WHERE id = 2")
+        waited.append(time.perf_counter())
+
+
+conn.execute("UPDATE accounts SET balance = 3 WHERE id = 3")
+thread = threading.Thread(target=writer)
+thread.start()
+time.sleep(0.2)
+committed_at = time.perf_counter()
+conn.commit()
+thread.join()
+balances = QueryExecutor('test_dbapi.db').execute_raw(
+    "SELECT id, balance FROM accounts WHERE id <= 3 ORDER BY id")
+if balances == [{'id': 1, 'balance': 1}, {'id': 2, 'balance': 2}, {'id': 3, 'balance': 3}] and \
+        waited and waited[0] >= committed_at:
+    print("✅ Both transactions were saved, the second after the first committed")
+else:
+    print(f"❌ Unexpected: {balances}, {waited}, {committed_at}")
+
+conn.close()
+other.close()
+try:
+    conn.cursor()
+    print("❌ Closed connection made a cursor")
+except dbapi.ProgrammingError:
+    print("✅ A closed connection refuses cursors")
+
+# Clean up
+if os.path.exists('test_dbapi.db'):
+    os.remove('test_dbapi.db')
+print("\nTests completed!")
@@ -0,0 +1,166 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms import dbapi, vectorized
+from web_app import create_app
+from web_app.db import init_database
+import os
+
+print("Testing EXPLAIN and EXPLAIN ANALYZE...")
+
+# Clean up
+if os.path.exists('test_explain.db'):
+    os.remove('test_explain.db')
+
+db = QueryExecutor('test_explain.db')
+db.execute_raw("CREATE TABLE people (id INT PRIMARY KEY, last VARCHAR(20), age INT, dept INT)")
+db.execute_raw("CREATE TABLE depts (dept_id INT PRIMARY KEY, name VARCHAR(20))")
+db.executemany("INSERT INTO people VALUES (?, ?, ?, ?)",
+               [(i, f'Last{i % 50}', 18 + i % 40, i % 5) for i in range(5000)])
+db.executemany("INSERT INTO depts VALUES (?, ?)", [(i, f'Dept{i}') for i in range(5)])
+db.execute_raw("CREATE INDEX idx_dept ON people(dept)")
+
+
+def plan_text(sql, params=None):
+    return '\n'.join(row['QUERY PLAN'] for row in db.execute_raw(sql, params))
+
+
+def operators(node):
+    """Operator names of a plan tree, depth first"""
+    found = [node['operator']]
+    for child in node['children']:
+        found.extend(operators(child))
+    return found
+
+
+print("\n1. EXPLAIN shows the chosen plan without running it...")
+checks = [
+    ("EXPLAIN SELECT * FROM people WHERE age > ?", [30],
+     ["Filter age > 30", "Seq Scan on people"]),
+    ("EXPLAIN SELECT id FROM people WHERE dept = 3 AND age < 20", None,
+     ["Project id", "Filter dept = 3 AND age < 20", "Index Lookup on people (dept = 3)"]),
+    ("EXPLAIN SELECT * FROM people WHERE (last, id) > ('Last7', 40) ORDER BY last, id LIMIT 10", None,
+     ["Limit 10", "Ordered Index Scan on people (last, id) after ('Last7', 40)"]),
+    ("EXPLAIN SELECT people.last, depts.name FROM people INNER JOIN depts "
+     "ON people.dept = depts.dept_id WHERE depts.name = 'Dept2'", None,
+     ["Filter depts.name = 'Dept2'", "Hash Join depts ON people.dept = depts.dept_id",
+      "Seq Scan on depts"]),
+    ("EXPLAIN SELECT dept, COUNT(*) AS n FROM people GROUP BY dept HAVING COUNT(*) > 10", None,
+     ["HashAggregate group by dept; computing dept, COUNT(*) AS n; having COUNT(*) > 10"]),
+    ("EXPLAIN SELECT MAX(age) FROM people WHERE last LIKE 'Last1%' OR age BETWEEN 20 AND 22", None,
+     ["Aggregate MAX(age)", "Filter last LIKE 'Last1%' OR age BETWEEN 20 AND 22"]),
+]
+wrong = []
+for sql, params, expected in checks:
+    text = plan_text(sql, params)
+    if any(line not in text for line in expected) or 'actual' in text:
+        wrong.append((sql, text))
+if not wrong:
+    print(f"✅ {len(checks)} plans: scans, index lookups, ordered index, joins, grouping")
+else:
+    for sql, text in wrong:
+        print(f"❌ {sql}\n{text}")
+
+print("\n2. EXPLAIN ANALYZE counts rows per operator...")
+plan = db.explain("SELECT id, age FROM people WHERE dept = 2 AND age >= 50 ORDER BY age DESC LIMIT 7",
+                  analyze=True)
+project = plan.root
+limit = project.children[0]
+sort = limit.children[0]
+filtered = sort.children[0]
+lookup = filtered.children[0]
+expected_matches = len(db.execute_raw("SELECT id FROM people WHERE dept = 2 AND age >= 50"))
+if ([node.operator for node in (project, limit, sort, filtered, lookup)]
+        == ['Project', 'Limit', 'Sort', 'Filter', 'Index Lookup']
+        and (lookup.rows, filtered.rows, sort.rows, limit.rows, project.rows)
+        == (1000, expected_matches, expected_matches, 7, 7)
+        and all(node.loops == 1 and node.time > 0 for node in (project, limit, sort, filtered, lookup))
+        and project.time >= sort.time >= filtered.time and sort.peak_memory > 0):
+    print(f"✅ 1000 -> {expected_matches} -> {expected_matches} -> 7 -> 7 rows, "
+          f"times include each operator's inputs")
+else:
+    print("❌ Unexpected statistics:\n" + '\n'.join(plan.lines()))
+lines = plan.lines()
+if lines[-1].startswith('Execution time:') and lines[-2].startswith('Planning time:') and \
+        'actual rows=7 loops=1' in lines[0] and 'memory=' in lines[0]:
+    print("✅ Text output has rows, loops, time, memory and total times")
+else:
+    print(f"❌ Unexpected text: {lines}")
+
+print("\n3. An ordered page stops reading early...")
+text = plan_text("EXPLAIN ANALYZE SELECT * FROM people INNER JOIN depts ON people.dept = depts.dept_id "
+                 "ORDER BY people.last LIMIT 3")
+scan_line = next(line for line in text.split('\n') if 'Ordered Index Scan' in line)
+if 'actual rows=3 loops=1' in scan_line:
+    print("✅ The index scan produced just the 3 rows the page needed")
+else:
+    print(f"❌ Unexpected plan:\n{text}")
+empty = plan_text("EXPLAIN ANALYZE SELECT * FROM people INNER JOIN depts ON people.dept = depts.dept_id "
+                  "WHERE people.age > 100")
+if 'Hash Join' in empty and 'actual rows=0' in empty:
+    print("✅ Operators with no input report zero rows")
+else:
+    print(f"❌ Unexpected plan:\n{empty}")
+
+print("\n4. Batch scans fall back and say so...")
+if vectorized.available():
+    batch_db = QueryExecutor('test_explain.db', batch_mode=True)
+    batch_db.storage.batch_min_rows = 0
+    fast = batch_db.explain("SELECT COUNT(*) FROM people WHERE age > 30", analyze=True)
+    fallback = batch_db.explain("SELECT COUNT(*) FROM people WHERE last LIKE 'Last1%'", analyze=True)
+    if (fast.root.operator == 'Batch Scan' and not fast.root.children
+            and fallback.root.operator == 'Batch Scan' and fallback.root.notes
+            and operators(fallback.to_dict()['plan'])[1:] == ['Aggregate', 'Filter', 'Seq Scan']):
+        print("✅ Numeric filters run in batches; a LIKE falls back to the row plan")
+    else:
+        print(f"❌ Unexpected plans: {fast.lines()} {fallback.lines()}")
+else:
+    print("✅ NumPy not installed, batch plans skipped")
+
+print("\n5. Only SELECT can be explained...")
+try:
+    db.execute_raw("EXPLAIN DELETE FROM people")
+    print("❌ EXPLAIN DELETE was accepted")
+except ValueError as e:
+    print(f"✅ Rejected: {e}")
+count = db.execute_raw("SELECT COUNT(*) FROM people")[0]['COUNT(*)']
+if count == 5000:
+    print("✅ Nothing was deleted")
+else:
+    print(f"❌ {count} rows left")
+
+print("\n6. Plans over the DB-API and the web interface...")
+conn = dbapi.connect('test_explain.db')
+cur = conn.execute("EXPLAIN SELECT * FROM people WHERE dept = ?", (1,))
+rows = cur.fetchall()
+if cur.description[0][0] == 'QUERY PLAN' and rows[0] == ('Filter dept = 1',):
+    print("✅ A cursor fetches plan lines")
+else:
+    print(f"❌ Unexpected: {cur.description}, {rows}")
+conn.close()
+
+app = create_app({'DATABASE': 'test_explain_web.db'})
+db_path = os.path.join(app.instance_path, 'test_explain_web.db')
+with app.app_context():
+    init_database()
+client = app.test_client()
+body = client.post('/api/query', json={
+    'sql': 'EXPLAIN ANALYZE SELECT * FROM students WHERE enrollment_year = ?', 'params': [2022],
+}).get_json()
+html = client.post('/query', data={'sql': 'EXPLAIN SELECT * FROM courses ORDER BY course_code LIMIT 2'})
+html = html.get_data(as_text=True)
+if (body['success'] and operators(body['plan']) == ['Filter', 'Index Lookup']
+        and body['plan']['rows'] == len(client.post('/api/query', json={
+            'sql': 'SELECT * FROM students WHERE enrollment_year = 2022'}).get_json()['result'])
+        and 'execution_time_ms' in body and body['result'][0]['QUERY PLAN'].startswith('Filter')
+        and '<pre' in html and 'Ordered Index Scan on courses (course_code)' in html):
+    print("✅ /api/query returns the analyzed tree, /query shows the plan text")
+else:
+    print(f"❌ Unexpected: {body}")
+
+# Clean up
+if os.path.exists(db_path):
+    os.remove(db_path)
+if os.path.exists('test_explain.db'):
+    os.remove('test_explain.db')
+print("\nTests completed!")
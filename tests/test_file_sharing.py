@@ -0,0 +1,140 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms.storage import StorageEngine
+import io
+import multiprocessing
+import os
+import pickle
+
+print("Testing several processes sharing one database file...")
+
+# Clean up
+if os.path.exists('test_sharing.db'):
+    os.remove('test_sharing.db')
+
+first = QueryExecutor('test_sharing.db')
+first.execute_raw("CREATE TABLE students (id INT PRIMARY KEY, name VARCHAR(20))")
+first.execute_raw("CREATE TABLE courses (id INT PRIMARY KEY, code VARCHAR(10))")
+first.execute_raw("INSERT INTO students VALUES (1, 'Ann')")
+first.execute_raw("INSERT INTO courses VALUES (1, 'CS101')")
+second = QueryExecutor('test_sharing.db')
+
+print("\n1. Writes from one engine don't overwrite another's...")
+first.execute_raw("INSERT INTO students VALUES (2, 'Bob')")
+second.execute_raw("INSERT INTO students VALUES (3, 'Cy')")
+ids = [row['id'] for row in StorageEngine('test_sharing.db').select('students')]
+if ids == [1, 2, 3]:
+    print("✅ Both engines' rows were saved")
+else:
+    print(f"❌ Rows lost: {ids}")
+
+print("\n2. Readers pick up other engines' writes...")
+courses = first.storage.data['courses']
+result = first.execute_raw("SELECT name FROM students WHERE id = 3")
+if result == [{'name': 'Cy'}]:
+    print("✅ Row written by the other engine is visible")
+else:
+    print(f"❌ Stale read: {result}")
+if first.storage.data['courses'] is courses:
+    print("✅ Unchanged table was not reloaded")
+else:
+    print("❌ Unchanged table reloaded")
+
+print("\n3. Concurrent writer processes...")
+
+
+def insert_rows(base):
+    db = QueryExecutor('test_sharing.db')
+    for i in range(25):
+        db.execute_raw("INSERT INTO students VALUES (?, ?)", (base + i, f'P{base}'))
+
+
+if 'fork' in multiprocessing.get_all_start_methods():
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=insert_rows, args=(base,)) for base in (100, 200, 300)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    count = first.execute_raw("SELECT COUNT(*) FROM students")[0]['COUNT(*)']
+    if count == 78:
+        print(f"✅ {count} rows after 3 processes inserted 25 each")
+    else:
+        print(f"❌ {count} rows, expected 78")
+else:
+    print("(fork() is not available: skipped)")
+
+print("\n4. Tables another engine created...")
+first.execute_raw("CREATE TABLE rooms (id INT PRIMARY KEY, name VARCHAR(10))")
+second.execute_raw("INSERT INTO rooms VALUES (1, 'A101')")
+second.copy_from('rooms', io.StringIO("2,B202\n"))
+exported = io.StringIO()
+second.copy_to('rooms', exported)
+if exported.getvalue().splitlines() == ['1,A101', '2,B202']:
+    print("✅ Positional INSERT, COPY FROM and COPY TO found the new table")
+else:
+    print(f"❌ Unexpected rows: {exported.getvalue()!r}")
+
+print("\n5. Materialized views shared between engines...")
+
+
+def header_length():
+    with open('test_sharing.db', 'rb') as f:
+        f.seek(8)
+        return int.from_bytes(f.read(16)[8:], 'little')
+
+
+first.execute_raw("CREATE TABLE scores (id INT PRIMARY KEY, team INT, points INT)")
+first.executemany("INSERT INTO scores VALUES (?, ?, ?)",
+                  [(i, i % 7, i % 100) for i in range(3000)])
+first.execute_raw("CREATE MATERIALIZED VIEW team_points AS "
+                  "SELECT team, SUM(points), COUNT(*) FROM scores GROUP BY team")
+first.execute_raw("CREATE MATERIALIZED VIEW high_scores AS SELECT id, points FROM scores "
+                  "WHERE points > 90")
+small = header_length()
+first.executemany("INSERT INTO scores VALUES (?, ?, ?)",
+                  [(i, i % 7, i % 100) for i in range(3000, 6000)])
+# Maintained by the other engine from the state saved with each view's table
+second.execute_raw("DELETE FROM scores WHERE id < 1000")
+second.execute_raw("UPDATE scores SET points = 99 WHERE id = 1500")
+first.execute_raw("INSERT INTO scores VALUES (6000, 3, 95)")
+views = {
+    'team_points': "SELECT team, SUM(points), COUNT(*) FROM scores GROUP BY team",
+    'high_scores': "SELECT id, points FROM scores WHERE points > 90",
+}
+fresh = QueryExecutor('test_sharing.db')
+stale = [name for name, sql in views.items() for db in (first, second, fresh)
+         if sorted(sorted((k, v) for k, v in row.items() if k != '_rowid')
+                   for row in db.execute_raw(f"SELECT * FROM {name}"))
+         != sorted(sorted(row.items()) for row in db.execute_raw(sql))]
+# The old header carried every view row's source map, thousands of bytes here
+if not stale and header_length() < small + 200:
+    print(f"✅ Views maintained by both engines; the {small} byte header holds only definitions")
+else:
+    print(f"❌ Stale views {stale}, header {small} -> {header_length()} bytes")
+
+print("\n6. Files written before the header format still load...")
+with open('test_sharing.db', 'wb') as f:
+    pickle.dump({
+        'schema': first.storage.schema,
+        'data': {'students': [{'id': 7, 'name': 'Old', '_rowid': 0}]},
+        'indexes': {'students': {'id': {7: [0]}, 'name': {'Old': [0]}}},
+        'row_counter': {'students': 1},
+        'views': {},
+    }, f)
+legacy = QueryExecutor('test_sharing.db')
+legacy.execute_raw("INSERT INTO students VALUES (8, 'New')")
+rows = QueryExecutor('test_sharing.db').execute_raw("SELECT id, name FROM students WHERE id > 6")
+with open('test_sharing.db', 'rb') as f:
+    upgraded = f.read(8) == b'MYRDBMS\x02'
+if rows == [{'id': 7, 'name': 'Old'}, {'id': 8, 'name': 'New'}] and upgraded:
+    print("✅ Old file loaded and rewritten in the new format")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+# Clean up
+first = second = legacy = None
+if os.path.exists('test_sharing.db'):
+    os.remove('test_sharing.db')
+print("\nTests completed!")
@@ -0,0 +1,101 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms.aggregate import aggregate_rows
+import os
+import tracemalloc
+
+print("Testing single-pass aggregate evaluation...")
+
+# Clean up
+if os.path.exists('test_fused.db'):
+    os.remove('test_fused.db')
+
+db = QueryExecutor('test_fused.db')
+
+db.execute_raw("CREATE TABLE courses (course_id INT PRIMARY KEY, code VARCHAR(10), credits INT, start DATE)")
+db.executemany("INSERT INTO courses VALUES (?, ?, ?, ?)", [
+    (1, 'CS9', 9, '2024-09-01'),
+    (2, 'CS10', 10, '2024-01-15'),
+    (3, 'MATH2', 2, None),
+    (4, 'ART100', None, '2023-12-31'),
+])
+
+
+class CountingList(list):
+    """Counts how many times the rows are scanned"""
+
+    scans = 0
+
+    def __iter__(self):
+        CountingList.scans += 1
+        return super().__iter__()
+
+
+print("\n1. Several aggregates are computed in one scan...")
+with db.storage.transaction():
+    db.storage.data['courses'] = CountingList(db.storage.data['courses'])
+result = db.execute_raw("SELECT COUNT(*), COUNT(credits), SUM(credits), AVG(credits), "
+                        "MIN(credits), MAX(credits) FROM courses")
+expected = {'COUNT(*)': 4, 'COUNT(credits)': 3, 'SUM(credits)': 21, 'AVG(credits)': 7.0,
+            'MIN(credits)': 2, 'MAX(credits)': 10}
+if result == [expected] and CountingList.scans == 1:
+    print("✅ Six aggregates from a single scan")
+else:
+    print(f"❌ {result} after {CountingList.scans} scans")
+
+print("\n2. MIN/MAX compare values natively...")
+result = db.execute_raw("SELECT MIN(credits) AS lo, MAX(credits) AS hi, MIN(code) AS first_code, "
+                        "MAX(start) AS latest FROM courses")[0]
+# As strings '10' < '2' < '9', and as floats the INTs would come back as 2.0 and 10.0
+if (result == {'lo': 2, 'hi': 10, 'first_code': 'ART100', 'latest': '2024-09-01'}
+        and type(result['lo']) is int):
+    print(f"✅ {result}")
+else:
+    print(f"❌ Unexpected result: {result}")
+
+try:
+    aggregate_rows([{'v': 1}, {'v': 'a'}], [('MAX', 'v')])
+    print("❌ Mixed types should not fall back to string comparison")
+except ValueError as e:
+    print(f"✅ Mixed types rejected: {e}")
+
+print("\n3. AVG keeps constant memory...")
+
+
+def numbers(count):
+    for i in range(count):
+        yield {'v': i}
+
+
+tracemalloc.start()
+small = aggregate_rows(numbers(1000), [('AVG', 'v'), ('MIN', 'v'), ('MAX', 'v')])
+small_peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.reset_peak()
+large = aggregate_rows(numbers(200000), [('AVG', 'v'), ('MIN', 'v'), ('MAX', 'v')])
+large_peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+if large == [99999.5, 0, 199999] and large_peak < small_peak + 4096:
+    print(f"✅ Peak {large_peak} bytes for 200,000 rows vs {small_peak} for 1,000")
+else:
+    print(f"❌ {large}, peak {large_peak} vs {small_peak}")
+
+print("\n4. Empty input and invalid aggregates...")
+result = db.execute_raw("SELECT COUNT(*), COUNT(credits), SUM(credits), AVG(credits), MAX(code) "
+                        "FROM courses WHERE course_id > 100")
+if result == [{'COUNT(*)': 0, 'COUNT(credits)': 0, 'SUM(credits)': None,
+               'AVG(credits)': None, 'MAX(code)': None}]:
+    print("✅ Aggregates of no rows: COUNT is 0, the rest are NULL")
+else:
+    print(f"❌ Unexpected result: {result}")
+
+try:
+    db.execute_raw("SELECT AVG(code) FROM courses")
+    print("❌ AVG of a VARCHAR column should have failed!")
+except ValueError as e:
+    print(f"✅ {e}")
+
+# Clean up
+db = None
+os.remove('test_fused.db')
+print("\n✅ Fused aggregate tests completed!")
@@ -0,0 +1,119 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms.aggregate import HashAggregate
+import os
+from collections import defaultdict
+
+print("Testing GROUP BY and HAVING...")
+
+# Clean up
+if os.path.exists('test_group_by.db'):
+    os.remove('test_group_by.db')
+
+db = QueryExecutor('test_group_by.db')
+
+db.execute_raw("CREATE TABLE students (student_id INT PRIMARY KEY, name VARCHAR(50), year INT, gpa FLOAT)")
+db.execute_raw("CREATE TABLE enrollments (enrollment_id INT PRIMARY KEY, student_id INT, course_id INT)")
+students = [(i, f'Student {i}', 2019 + i % 4, None if i % 9 == 0 else round(2 + (i % 20) / 10, 1))
+            for i in range(1, 201)]
+db.executemany("INSERT INTO students VALUES (?, ?, ?, ?)", students)
+db.executemany("INSERT INTO enrollments VALUES (?, ?, ?)",
+               [(i, i % 200 + 1, 100 + i % 7) for i in range(1, 601)])
+
+# Expected per-year results computed in Python
+by_year = defaultdict(list)
+for student_id, name, year, gpa in students:
+    by_year[year].append(gpa)
+
+print("\n1. Per-year COUNT, SUM, AVG, MIN, MAX...")
+result = db.execute_raw("""
+    SELECT year, COUNT(*) AS n, COUNT(gpa) AS graded, SUM(gpa) AS total,
+           AVG(gpa) AS mean, MIN(gpa) AS low, MAX(gpa) AS high
+    FROM students GROUP BY year ORDER BY year
+""")
+ok = len(result) == 4
+for row in result:
+    gpas = [g for g in by_year[row['year']] if g is not None]
+    ok = ok and row['n'] == len(by_year[row['year']]) and row['graded'] == len(gpas)
+    ok = ok and abs(row['total'] - sum(gpas)) < 1e-9 and abs(row['mean'] - sum(gpas) / len(gpas)) < 1e-9
+    ok = ok and row['low'] == min(gpas) and row['high'] == max(gpas)
+if ok:
+    print(f"✅ {len(result)} groups match a Python reference")
+else:
+    print(f"❌ Unexpected groups: {result}")
+
+print("\n2. Per-course enrollment counts over a JOIN...")
+result = db.execute_raw("""
+    SELECT enrollments.course_id AS course, COUNT(*) AS enrolled
+    FROM enrollments JOIN students ON enrollments.student_id = students.student_id
+    WHERE students.year = 2020
+    GROUP BY enrollments.course_id ORDER BY course
+""")
+expected = defaultdict(int)
+for i in range(1, 601):
+    if 2019 + (i % 200 + 1) % 4 == 2020:
+        expected[100 + i % 7] += 1
+if result == [{'course': c, 'enrolled': n} for c, n in sorted(expected.items())]:
+    print(f"✅ Counts for {len(result)} courses")
+else:
+    print(f"❌ Unexpected counts: {result}")
+
+print("\n3. HAVING, aliases, multiple keys and parameters...")
+result = db.execute_raw("""
+    SELECT year, gpa, COUNT(*) AS n FROM students
+    GROUP BY year, gpa HAVING COUNT(*) > 2 AND n < 10 ORDER BY n DESC, year LIMIT 3
+""")
+if len(result) == 3 and all(2 < row['n'] < 10 for row in result) and result[0]['n'] >= result[-1]['n']:
+    print(f"✅ HAVING on aggregates: {result[0]}")
+else:
+    print(f"❌ Unexpected result: {result}")
+
+result = db.execute_raw("SELECT year FROM students GROUP BY year HAVING MAX(gpa) >= ? AND year > ?",
+                        (3.8, 2019))
+if sorted(row['year'] for row in result) == [2021, 2022]:
+    print("✅ HAVING with parameters and an aggregate not in the SELECT list")
+else:
+    print(f"❌ Unexpected result: {result}")
+
+print("\n4. Spilling to disk gives the same groups...")
+query = "SELECT student_id, COUNT(*) AS n, MAX(course_id) AS top FROM enrollments GROUP BY student_id"
+in_memory = sorted(db.execute_raw(query), key=lambda row: row['student_id'])
+db.storage.max_groups = 10
+spilled = sorted(db.execute_raw(query), key=lambda row: row['student_id'])
+db.storage.max_groups = 100000
+if in_memory == spilled and len(spilled) == 200:
+    print("✅ 200 groups with a budget of 10 groups")
+else:
+    print("❌ Spilled aggregation differs")
+
+rows = [{'k': i % 500, 'v': i} for i in range(5000)]
+operator = HashAggregate(['k'], [('COUNT', None), ('SUM', 'v')], max_groups=20, partitions=4)
+groups = dict((key[0], values) for key, values in operator.run(rows))
+expected_sums = defaultdict(int)
+for row in rows:
+    expected_sums[row['k']] += row['v']
+if (operator.spilled_rows > 0 and len(groups) == 500 and
+        all(groups[k] == [10, expected_sums[k]] for k in expected_sums)):
+    print(f"✅ HashAggregate spilled {operator.spilled_rows} rows and merged every group once")
+else:
+    print("❌ HashAggregate spill results are wrong")
+
+print("\n5. Invalid GROUP BY queries...")
+cases = [
+    ("Ungrouped column", "SELECT name, COUNT(*) FROM students GROUP BY year"),
+    ("SELECT *", "SELECT * FROM students GROUP BY year"),
+    ("SUM of text", "SELECT year, SUM(name) FROM students GROUP BY year"),
+    ("Aggregate in WHERE", "SELECT year FROM students WHERE COUNT(*) > 1 GROUP BY year"),
+]
+for description, sql in cases:
+    try:
+        db.execute_raw(sql)
+        print(f"   ❌ {description}: should have failed!")
+    except ValueError as e:
+        print(f"   ✅ {description}: {e}")
+
+# Clean up
+db = None
+os.remove('test_group_by.db')
+print("\n✅ GROUP BY tests completed!")
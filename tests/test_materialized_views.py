@@ -0,0 +1,180 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms.views import MaterializedView
+from rdbms import dbapi
+import os
+import random
+
+print("Testing materialized views...")
+
+# Clean up
+if os.path.exists('test_views.db'):
+    os.remove('test_views.db')
+
+db = QueryExecutor('test_views.db')
+
+db.execute_raw("CREATE TABLE students (student_id INT PRIMARY KEY, name VARCHAR(30), year INT, gpa FLOAT)")
+db.execute_raw("CREATE TABLE enrollments (enrollment_id INT PRIMARY KEY, student_id INT, course VARCHAR(10))")
+db.executemany("INSERT INTO students VALUES (?, ?, ?, ?)",
+               [(i, f'Student {i}', 2019 + i % 4, None if i % 6 == 0 else (i % 9) / 2) for i in range(1, 41)])
+db.executemany("INSERT INTO enrollments VALUES (?, ?, ?)",
+               [(i, i % 40 + 1, f'CS{i % 5}') for i in range(1, 81)])
+
+VIEWS = {
+    'year_stats': """SELECT year, COUNT(*) AS n, COUNT(gpa) AS graded, SUM(gpa) AS total,
+                            AVG(gpa) AS mean, MIN(gpa) AS lo, MAX(gpa) AS hi
+                     FROM students WHERE year > 2019 GROUP BY year""",
+    'totals': "SELECT COUNT(*) AS n, MAX(gpa) AS top, MIN(name) AS first_name FROM students",
+    'roster': """SELECT students.name, enrollments.course AS course, students.year
+                 FROM enrollments JOIN students ON enrollments.student_id = students.student_id
+                 WHERE students.year >= 2020""",
+    'honors': "SELECT student_id, name, gpa FROM students WHERE gpa >= 3",
+    'top_three': "SELECT name, gpa FROM students ORDER BY gpa DESC LIMIT 3",
+}
+
+
+def normalized(rows):
+    """Rows as sorted tuples with rounded floats, ignoring row IDs
+
+    View columns drop the table prefix of joined columns.
+    """
+    def value(v):
+        return round(v, 6) if isinstance(v, float) else v
+    return sorted((tuple(sorted((k.split('.')[-1], value(v)) for k, v in row.items() if k != '_rowid'))
+                   for row in rows), key=repr)
+
+
+def check_views(step, names):
+    ok = True
+    for name in names:
+        stored = normalized(db.execute_raw(f"SELECT * FROM {name}"))
+        expected = normalized(db.execute_raw(VIEWS[name]))
+        if stored != expected:
+            print(f"   ❌ {step}: view '{name}' differs from its query")
+            print(f"      stored:   {stored[:3]}")
+            print(f"      expected: {expected[:3]}")
+            ok = False
+    return ok
+
+
+print("\n1. Creating views...")
+for name, sql in VIEWS.items():
+    db.execute_raw(f"CREATE MATERIALIZED VIEW {name} AS {sql}")
+views = db.storage.views
+kinds = {name: views[name].kind for name in VIEWS}
+if check_views('create', VIEWS) and kinds == {'year_stats': 'aggregate', 'totals': 'aggregate',
+                                             'roster': 'rows', 'honors': 'rows', 'top_three': None}:
+    print(f"✅ {len(VIEWS)} views created: {kinds}")
+else:
+    print(f"❌ Unexpected view kinds: {kinds}")
+
+print("\n2. Views follow INSERT, UPDATE and DELETE without recomputing...")
+refreshes = []
+original_refresh = MaterializedView.refresh
+MaterializedView.refresh = lambda self, storage: refreshes.append(self.name) or original_refresh(self, storage)
+
+incremental = [name for name in VIEWS if views[name].incremental]
+rng = random.Random(7)
+next_student, next_enrollment = 41, 81
+ok = True
+for step in range(60):
+    action = rng.choice(['insert', 'insert', 'update', 'update', 'delete', 'enroll', 'unenroll', 'move'])
+    if action == 'insert':
+        db.execute_raw("INSERT INTO students VALUES (?, ?, ?, ?)",
+                       (next_student, f'New {next_student}', rng.randint(2019, 2022),
+                        rng.choice([None, 0.5, 2.0, 3.5, 4.0])))
+        next_student += 1
+    elif action == 'update':
+        db.execute_raw("UPDATE students SET gpa = ?, year = ? WHERE student_id = ?",
+                       (rng.choice([None, 1.0, 3.0, 4.5]), rng.randint(2019, 2022), rng.randint(1, next_student)))
+    elif action == 'delete':
+        db.execute_raw("DELETE FROM students WHERE student_id = ?", (rng.randint(1, next_student),))
+    elif action == 'enroll':
+        db.executemany("INSERT INTO enrollments VALUES (?, ?, ?)",
+                       [(next_enrollment + i, rng.randint(1, next_student), 'NEW') for i in range(3)])
+        next_enrollment += 3
+    elif action == 'unenroll':
+        db.execute_raw("DELETE FROM enrollments WHERE course = ?", (f'CS{rng.randint(0, 4)}',))
+    else:
+        db.execute_raw("UPDATE enrollments SET student_id = ? WHERE enrollment_id = ?",
+                       (rng.randint(1, next_student), rng.randint(1, next_enrollment)))
+    ok = check_views(f"step {step} ({action})", incremental) and ok
+    if not ok:
+        break
+
+MaterializedView.refresh = original_refresh
+if ok and not refreshes:
+    print(f"✅ {len(incremental)} incremental views matched their queries after 60 random changes")
+else:
+    print(f"❌ Maintenance failed (refreshes: {refreshes})")
+
+print("\n3. Unsupported shapes are refreshed explicitly...")
+stale = normalized(db.execute_raw("SELECT * FROM top_three"))
+db.execute_raw("INSERT INTO students VALUES (999, 'Top Student', 2021, 9.5)")
+before = normalized(db.execute_raw("SELECT * FROM top_three"))
+count = db.execute_raw("REFRESH MATERIALIZED VIEW top_three")
+if before == stale and count == 3 and check_views('refresh', ['top_three']):
+    print("✅ ORDER BY/LIMIT view stays as is until REFRESH")
+else:
+    print("❌ REFRESH did not recompute the view")
+
+print("\n4. Views persist and keep being maintained after a reload...")
+db = QueryExecutor('test_views.db')
+db.execute_raw("INSERT INTO students VALUES (1000, 'Reloaded', 2020, 4.0)")
+db.execute_raw("INSERT INTO enrollments VALUES (5000, 1000, 'CS9')")
+if check_views('reload', incremental):
+    print("✅ Views updated after reopening the database")
+
+print("\n5. Views are read-only and need valid queries...")
+cases = [
+    ("INSERT into a view", "INSERT INTO totals VALUES (1, 2.0, 'x')"),
+    ("DELETE from a view", "DELETE FROM honors"),
+    ("Name already used", "CREATE MATERIALIZED VIEW students AS SELECT * FROM enrollments"),
+    ("Duplicate column names", "CREATE MATERIALIZED VIEW bad AS SELECT * FROM enrollments "
+                               "JOIN students ON enrollments.student_id = students.student_id"),
+    ("Invalid query", "CREATE MATERIALIZED VIEW bad AS SELECT name, COUNT(*) FROM students GROUP BY year"),
+    ("Unknown view", "REFRESH MATERIALIZED VIEW missing"),
+]
+for description, sql in cases:
+    try:
+        db.execute_raw(sql)
+        print(f"   ❌ {description}: should have failed!")
+    except ValueError as e:
+        print(f"   ✅ {description}: {e}")
+
+print("\n6. Rolled back writes leave the views as they were...")
+before = {name: normalized(db.execute_raw(f"SELECT * FROM {name}")) for name in incremental}
+try:
+    # The second set's name is too long, after the first changed a year's GPAs
+    db.executemany("UPDATE students SET gpa = ?, name = ? WHERE year = ?",
+                   [(4.5, 'Changed', 2020), (1.0, 'x' * 40, 2021)])
+    print("❌ The long name should have failed")
+except ValueError:
+    pass
+after = {name: normalized(db.execute_raw(f"SELECT * FROM {name}")) for name in incremental}
+# The next write maintains the views from the state the failed one left
+db.execute_raw("UPDATE students SET gpa = 2.5 WHERE year = 2020")
+if after == before and check_views('failed executemany', incremental):
+    print("✅ A failed executemany() UPDATE left every view unchanged")
+else:
+    print("❌ A failed executemany() changed a view")
+
+before = {name: normalized(db.execute_raw(f"SELECT * FROM {name}")) for name in incremental}
+conn = dbapi.connect('test_views.db')
+conn.execute("INSERT INTO students VALUES (1001, 'Uncommitted', 2021, 4.5)")
+conn.execute("UPDATE students SET gpa = 0.5 WHERE year = 2022")
+conn.rollback()
+conn.close()
+db = QueryExecutor('test_views.db')
+after = {name: normalized(db.execute_raw(f"SELECT * FROM {name}")) for name in incremental}
+db.execute_raw("UPDATE students SET gpa = 3.5 WHERE year = 2022")
+if after == before and check_views('rollback', incremental):
+    print("✅ A DB-API rollback left every view unchanged, also after reopening")
+else:
+    print("❌ A rolled back transaction changed a view")
+
+# Clean up
+db = None
+os.remove('test_views.db')
+print("\n✅ Materialized view tests completed!")
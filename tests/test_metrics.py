@@ -0,0 +1,121 @@
+import sys
+sys.path.append('.')
+from web_app import create_app, metrics
+from web_app.db import init_database
+import os
+import re
+import threading
+
+print("Testing the Prometheus /metrics endpoint...")
+
+SAMPLE_RE = re.compile(r'^([a-z_]+)(\{[^}]*\})? (\S+)$')
+
+
+def scrape(client):
+    """Samples of a /metrics response as {'name{labels}': value}"""
+    response = client.get('/metrics')
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith('#'):
+            continue
+        match = SAMPLE_RE.match(line)
+        if match is None:
+            raise ValueError(f"Malformed sample: {line!r}")
+        samples[match.group(1) + (match.group(2) or '')] = float(match.group(3))
+    return response, samples
+
+
+app = create_app({'DATABASE': 'test_metrics.db'})
+db_path = os.path.join(app.instance_path, 'test_metrics.db')
+with app.app_context():
+    init_database()
+client = app.test_client()
+
+print("\n1. The endpoint speaks the Prometheus text format...")
+response, before = scrape(client)
+if (response.status_code == 200 and response.content_type.startswith('text/plain; version=0.0.4')
+        and before['myrdbms_table_rows{table="students"}'] == 5
+        and before['myrdbms_http_requests_in_progress'] == 1):
+    print(f"✅ {len(before)} samples, table sizes and the scrape itself in progress")
+else:
+    print(f"❌ Unexpected response: {response.status_code} {response.content_type}")
+
+print("\n2. Statements are counted by type...")
+for year in (2021, 2022, 2023):
+    client.post('/api/query', json={'sql': 'SELECT * FROM students WHERE enrollment_year = ?',
+                                    'params': [year]})
+client.post('/api/query', json={'sql': 'SELECT * FROM missing_table'})
+client.post('/api/query', json={'sql': "UPDATE students SET email = 'new@example.com' "
+                                       "WHERE student_id = 1"})
+_, after = scrape(client)
+
+
+def delta(name):
+    return after.get(name, 0) - before.get(name, 0)
+
+
+selects = delta('myrdbms_statement_duration_seconds_count{type="SELECT"}')
+inf = delta('myrdbms_statement_duration_seconds_bucket{type="SELECT",le="+Inf"}')
+if (selects == inf == 4 and delta('myrdbms_statement_errors_total{type="SELECT"}') == 1
+        and delta('myrdbms_rows_returned_total{type="SELECT"}') == 5
+        and delta('myrdbms_rows_scanned_total{type="UPDATE"}') == 1
+        and delta('myrdbms_statement_duration_seconds_sum{type="SELECT"}') > 0):
+    print("✅ 4 SELECTs (1 failed) and 1 UPDATE with their rows and latency")
+else:
+    print(f"❌ Unexpected deltas: {selects}, {inf}")
+
+print("\n3. Saves, caches and sessions...")
+saved = delta('myrdbms_save_bytes_total')
+if (saved >= after['myrdbms_table_file_bytes{table="students"}']
+        and delta('myrdbms_save_flush_seconds_count') == 1
+        and delta('myrdbms_save_duration_seconds_count') == 1):
+    print(f"✅ The UPDATE's save wrote {saved:.0f} bytes and was flushed once")
+else:
+    print(f"❌ Unexpected save metrics: {saved}")
+if ('myrdbms_cache_misses_total{cache="result"}' in after
+        and after['myrdbms_cache_misses_total{cache="statement"}'] >= 3
+        and after['myrdbms_db_sessions{state="idle"}'] >= 1
+        and after['myrdbms_db_sessions{state="busy"}'] == 0):
+    print("✅ Result and statement cache counters, idle and busy sessions")
+else:
+    print("❌ Cache or session metrics are missing")
+
+print("\n4. Increments from many threads add up...")
+counter = metrics.Counter('test_increments_total', "Test counter", 'kind', ('a', 'other'))
+histogram = metrics.Histogram('test_seconds', "Test histogram", buckets=(0.5, 1.0))
+
+
+def work():
+    for i in range(10000):
+        counter.inc(1, 'a')
+        counter.inc(1, 'unknown')
+        histogram.observe(0.75)
+
+
+threads = [threading.Thread(target=work) for _ in range(8)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+totals = counter.totals()
+lines = histogram.lines()
+if (totals == [80000, 80000] and 'test_seconds_bucket{le="0.5"} 0' in lines
+        and 'test_seconds_bucket{le="1.0"} 80000' in lines and 'test_seconds_sum 60000.0' in lines):
+    print("✅ 8 threads x 10000 increments, unknown labels counted as 'other'")
+else:
+    print(f"❌ Lost increments: {totals}, {lines}")
+
+print("\n5. Without a session pool...")
+unpooled = create_app({'DATABASE': 'test_metrics.db', 'DB_POOL_SIZE': 0})
+unpooled_client = unpooled.test_client()
+unpooled_client.post('/api/query', json={'sql': 'SELECT * FROM courses'})
+_, samples = scrape(unpooled_client)
+if samples['myrdbms_table_rows{table="courses"}'] == 5 and 'myrdbms_db_sessions{state="idle"}' not in samples:
+    print("✅ The request's own executor is scraped")
+else:
+    print("❌ Unexpected samples without a pool")
+
+# Clean up
+if os.path.exists(db_path):
+    os.remove(db_path)
+print("\nTests completed!")
@@ -0,0 +1,217 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms.parser import SQLParser
+from rdbms.ordered import after_condition
+from web_app import create_app
+from web_app.db import init_database
+import os
+import re
+import time
+
+print("Testing OFFSET and keyset pagination...")
+
+# Clean up
+if os.path.exists('test_pagination.db'):
+    os.remove('test_pagination.db')
+
+db = QueryExecutor('test_pagination.db')
+db.execute_raw("CREATE TABLE people (id INT PRIMARY KEY, last VARCHAR(20), first VARCHAR(20), age INT)")
+names = ['Smith', 'Jones', None, 'Brown', 'Adams']
+db.executemany("INSERT INTO people VALUES (?, ?, ?, ?)",
+               [(i, names[i % 5], ['Ann', 'Bob', 'Cy'][i % 3], 18 + i % 13) for i in range(20000)])
+
+
+def unindexed(sql, params=None):
+    """Run a query on the sort-everything path, for comparison"""
+    db.storage._ordered_plan = lambda *args: None
+    try:
+        return db.execute_raw(sql, params)
+    finally:
+        del db.storage._ordered_plan
+
+
+print("\n1. LIMIT ... OFFSET parses and binds...")
+parsed = SQLParser.parse("SELECT * FROM people ORDER BY id LIMIT ? OFFSET ?")
+rows = db.execute_raw("SELECT id FROM people ORDER BY id LIMIT ? OFFSET ?", [3, 10])
+skipped = db.execute_raw("SELECT id FROM people WHERE id < 5 OFFSET 3")
+if (parsed['offset'] == {'type': 'PARAM', 'index': 1} and [r['id'] for r in rows] == [10, 11, 12]
+        and [r['id'] for r in skipped] == [3, 4]):
+    print("✅ OFFSET with and without LIMIT")
+else:
+    print(f"❌ Unexpected: {parsed['offset']}, {rows}, {skipped}")
+
+print("\n2. Row value comparisons...")
+rows = db.execute_raw("SELECT id FROM people WHERE (age, id) > (30, 19990) AND age = 30")
+equal = db.execute_raw("SELECT id FROM people WHERE (id, first) = (7, 'Bob')")
+nulls = db.execute_raw("SELECT id FROM people WHERE (last, id) > ('A', 0) AND id < 10")
+if ([r['id'] for r in rows] == [19993] and [r['id'] for r in equal] == [7]
+        and [r['id'] for r in nulls] == [0, 1, 3, 4, 5, 6, 8, 9]):
+    print("✅ Lexicographic comparison; a NULL before the decision compares false")
+else:
+    print(f"❌ Unexpected: {rows}, {equal}, {nulls[:10]}")
+try:
+    db.execute_raw("SELECT id FROM people WHERE (id, age) > (1, 2, 3)")
+    print("❌ Rows of different sizes compared")
+except ValueError as e:
+    print(f"✅ Rejected: {e}")
+
+print("\n3. Ordered pages match a full sort...")
+queries = [
+    ("SELECT * FROM people ORDER BY last, first LIMIT 25", None),
+    ("SELECT id, last FROM people ORDER BY last DESC, first DESC LIMIT 25 OFFSET 4000", None),
+    ("SELECT id FROM people WHERE (last, first, id) > (?, ?, ?) ORDER BY last, first, id LIMIT 30",
+     ['Jones', 'Bob', 500]),
+    ("SELECT id FROM people WHERE (last, id) <= (?, ?) AND age > 20 ORDER BY last DESC, id DESC "
+     "LIMIT 30", ['Jones', 9000]),
+    ("SELECT id AS person, age AS years FROM people ORDER BY years DESC LIMIT 40", None),
+    ("SELECT id FROM people ORDER BY age, last DESC LIMIT 10", None),
+]
+mismatched = [sql for sql, params in queries
+              if db.execute_raw(sql, params) != unindexed(sql, params)]
+if not mismatched:
+    print(f"✅ {len(queries)} queries agree, including NULLs, ties and aliases")
+else:
+    print(f"❌ Different rows for {mismatched}")
+
+print("\n4. Deep keyset pages cost the same as the first...")
+# A NULL in the keyset compares false, so page over the rows with a last name
+page_sql = ("SELECT * FROM people WHERE last IS NOT NULL AND (last, first, id) > (?, ?, ?) "
+            "ORDER BY last, first, id LIMIT 50")
+first_sql = "SELECT * FROM people WHERE last IS NOT NULL ORDER BY last, first, id LIMIT 50"
+db.execute_raw(first_sql)  # builds the index
+seen = []
+after = None
+for _ in range(5):
+    if after is None:
+        page = db.execute_raw(first_sql)
+    else:
+        page = db.execute_raw(page_sql, after)
+    seen.extend(row['id'] for row in page)
+    after = [page[-1]['last'], page[-1]['first'], page[-1]['id']]
+expected = [row['id'] for row in unindexed(first_sql.replace('LIMIT 50', 'LIMIT 250'))]
+timings = {}
+for label, params in (('first', ['Adams', 'Ann', -1]), ('deep', ['Smith', 'Bob', 19000])):
+    start = time.perf_counter()
+    for _ in range(20):
+        db.execute_raw(page_sql, params)
+    timings[label] = (time.perf_counter() - start) / 20
+start = time.perf_counter()
+unindexed(page_sql, ['Smith', 'Bob', 19000])
+full_sort = time.perf_counter() - start
+if seen == expected:
+    print("✅ Five keyset pages walk the sorted table without gaps or repeats")
+else:
+    print("❌ Keyset pages differ from the sorted table")
+print(f"   first page {timings['first'] * 1000:.2f} ms, deep page {timings['deep'] * 1000:.2f} ms, "
+      f"full sort {full_sort * 1000:.1f} ms")
+
+print("\n5. Keysets with NULLs seek too...")
+# NULL last names sort first ascending and last descending; walk both ways
+stats = db.statement_stats
+for descending in (False, True):
+    direction = ' DESC' if descending else ''
+    order = f"ORDER BY last{direction}, first{direction}, id{direction}"
+    walked = []
+    after = None
+    while True:
+        sql = f"SELECT * FROM people {order} LIMIT 500"
+        params = {}
+        if after is not None:
+            sql = (f"SELECT * FROM people WHERE "
+                   f"{after_condition(['last', 'first', 'id'], [':a', ':b', ':c'], after, descending)} "
+                   f"{order} LIMIT 500")
+            params = {name: value for name, value in zip('abc', after) if value is not None}
+        page = db.execute_raw(sql, params)
+        if not page:
+            break
+        walked.extend(row['id'] for row in page)
+        after = [page[-1]['last'], page[-1]['first'], page[-1]['id']]
+    expected = [row['id'] for row in unindexed(f"SELECT id FROM people {order}")]
+    if walked == expected:
+        print(f"✅ {'Descending' if descending else 'Ascending'} pages walk every row once, "
+              f"NULLs {'last' if descending else 'first'}")
+    else:
+        print(f"❌ {'Descending' if descending else 'Ascending'} pages differ from the sorted table")
+
+stats.reset()
+deep = after_condition(['last', 'first', 'id'], [':a', ':b', ':c'], ['Brown', 'Ann', 1003], True)
+null_deep = after_condition(['last', 'first', 'id'], [':a', ':b', ':c'], [None, 'Bob', 19000], True)
+db.execute_raw(f"SELECT * FROM people WHERE {deep} ORDER BY last DESC, first DESC, id DESC LIMIT 50",
+               {'a': 'Brown', 'b': 'Ann', 'c': 1003})
+db.execute_raw(f"SELECT * FROM people WHERE {null_deep} ORDER BY last DESC, first DESC, id DESC "
+               f"LIMIT 50", {'b': 'Bob', 'c': 19000})
+scanned = [row['rows_scanned'] for row in stats.rows()]
+plan = db.explain(f"SELECT * FROM people WHERE {deep} ORDER BY last DESC, first DESC, id DESC LIMIT 50",
+                  {'a': 'Brown', 'b': 'Ann', 'c': 1003})
+if scanned == [50, 50] and 'after (' in '\n'.join(plan.lines()):
+    print("✅ Deep descending pages, before and among the NULLs, read 50 rows each")
+else:
+    print(f"❌ Rows read: {scanned}")
+
+print("\n6. Writes rebuild the index...")
+db.execute_raw("INSERT INTO people VALUES (?, ?, ?, ?)", [20000, 'Aaron', 'Zoe', 40])
+db.execute_raw("UPDATE people SET last = 'Zzz' WHERE id = 1")
+top = db.execute_raw("SELECT id FROM people WHERE last IS NOT NULL ORDER BY last LIMIT 1")
+bottom = db.execute_raw("SELECT id FROM people ORDER BY last DESC LIMIT 1")
+if top == [{'id': 20000}] and bottom == [{'id': 1}]:
+    print("✅ Pages see inserted and updated rows")
+else:
+    print(f"❌ Stale pages: {top}, {bottom}")
+
+print("\n7. Web list pages follow ?after= cursors...")
+app = create_app({'DATABASE': 'test_pagination_web.db'})
+db_path = os.path.join(app.instance_path, 'test_pagination_web.db')
+with app.app_context():
+    init_database()
+QueryExecutor(db_path).executemany(
+    'INSERT INTO students VALUES (?, ?, ?, ?, ?, ?)',
+    [(i, f'First{i}', f'Last{i % 40}', f's{i}@example.com', '2001-01-01', 2021)
+     for i in range(100, 220)])
+client = app.test_client()
+ids = []
+url = '/students'
+pages = 0
+while url:
+    html = client.get(url).get_data(as_text=True)
+    ids.extend(int(found) for found in re.findall(r'<td><code>(\d+)</code></td>', html))
+    pages += 1
+    next_link = re.search(r'href="([^"]*after=[^"]*)"[^>]*>\s*Next page', html)
+    url = next_link.group(1).replace('&amp;', '&') if next_link else None
+total = QueryExecutor(db_path).execute_raw('SELECT COUNT(*) FROM students')[0]['COUNT(*)']
+if pages == 3 and len(ids) == total and len(set(ids)) == total:
+    print(f"✅ {total} students over {pages} pages, each shown once")
+else:
+    print(f"❌ {pages} pages, {len(ids)} rows, {len(set(ids))} distinct of {total}")
+# Enrollment dates sort first, then NULL dates: page 2 ends on a NULL one
+QueryExecutor(db_path).executemany(
+    'INSERT INTO enrollments VALUES (?, ?, ?, ?, ?)',
+    [(i, 1, 101, '2024-01-01' if i % 3 == 0 else None, 'A') for i in range(100, 220)])
+ids = []
+url = '/enrollments'
+pages = 0
+while url and pages < 10:
+    html = client.get(url).get_data(as_text=True)
+    ids.extend(int(found) for found in re.findall(r'<td><code>(\d+)</code></td>', html))
+    pages += 1
+    next_link = re.search(r'href="([^"]*after=[^"]*)"[^>]*>\s*Next page', html)
+    url = next_link.group(1).replace('&amp;', '&') if next_link else None
+expected = ([i for i in range(219, 99, -1) if i % 3 == 0] + list(range(10, 0, -1))
+            + [i for i in range(219, 99, -1) if i % 3])
+if pages == 3 and ids == expected:
+    print("✅ 130 enrollments over 3 pages, past a page ending on a NULL date")
+else:
+    print(f"❌ {pages} pages, {len(ids)} rows, {len(set(ids))} distinct of 130")
+searched = client.get('/students?search=Last7').get_data(as_text=True)
+bad_cursor = client.get('/students?after=not-a-cursor')
+if 'First127' in searched and 'First128' not in searched and bad_cursor.status_code == 200:
+    print("✅ Search pages and a malformed cursor falls back to the first page")
+else:
+    print("❌ Search or bad cursor failed")
+
+# Clean up
+if os.path.exists(db_path):
+    os.remove(db_path)
+if os.path.exists('test_pagination.db'):
+    os.remove('test_pagination.db')
+print("\nTests completed!")
@@ -0,0 +1,102 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms import parallel
+import os
+import random
+
+print("Testing parallel table scans...")
+
+# Clean up
+if os.path.exists('test_parallel.db'):
+    os.remove('test_parallel.db')
+
+db = QueryExecutor('test_parallel.db', max_parallel_workers=3)
+db.storage.parallel_min_rows = 0
+
+db.execute_raw("CREATE TABLE students (student_id INT PRIMARY KEY, name VARCHAR(20), "
+               "enrollment_year INT, gpa FLOAT)")
+rng = random.Random(3)
+db.storage.bulk_load('students', [[
+    (i, f'Student{i % 50}', rng.choice([2019, 2020, 2021, None]),
+     rng.choice([None, round(rng.uniform(0, 4), 1)]))
+    for i in range(1, 2001)
+]])
+
+
+def serial(sql):
+    db.storage.max_parallel_workers = 0
+    try:
+        return db.execute_raw(sql)
+    finally:
+        db.storage.max_parallel_workers = 3
+
+
+if not parallel.available():
+    print("\n(fork() is not available: every scan below ran serially)")
+
+print("\n1. Parallel filters return the serial rows in table order...")
+conditions = [
+    "enrollment_year > 2019 AND gpa < 2",
+    "name LIKE 'Student1%' OR gpa IS NULL",
+    "NOT enrollment_year IN (2019, 2021)",
+    "student_id BETWEEN 100 AND 1900 AND name != 'Student3'",
+]
+failures = 0
+for condition in conditions:
+    sql = f"SELECT * FROM students WHERE {condition}"
+    if db.execute_raw(sql) != serial(sql):
+        print(f"❌ {condition}")
+        failures += 1
+if parallel.available() and db.storage._scanner is None:
+    print("❌ No worker pool was started")
+elif not failures:
+    print(f"✅ {len(conditions)} conditions give the same rows")
+
+print("\n2. Partial aggregates are merged...")
+queries = [
+    "SELECT COUNT(*), COUNT(gpa), SUM(enrollment_year), AVG(gpa), MIN(gpa), MAX(name) FROM students",
+    "SELECT SUM(gpa) AS total, MIN(enrollment_year) AS first FROM students WHERE gpa > 3",
+    "SELECT COUNT(*), SUM(gpa), MAX(gpa) FROM students WHERE student_id < 0",
+]
+failures = 0
+for sql in queries:
+    result, expected = db.execute_raw(sql), serial(sql)
+    close = all(abs(a - b) < 1e-9 if isinstance(a, float) else a == b
+                for a, b in zip(result[0].values(), expected[0].values()))
+    if not close or result[0].keys() != expected[0].keys():
+        print(f"❌ {sql}\n   parallel: {result}\n   serial:   {expected}")
+        failures += 1
+if not failures:
+    print(f"✅ {len(queries)} aggregate queries give the same results")
+
+print("\n3. Workers see writes made after the pool started...")
+db.execute_raw("INSERT INTO students VALUES (9000, 'Late', 2030, 1.0)")
+result = db.execute_raw("SELECT name FROM students WHERE enrollment_year > 2029")
+if result == [{'name': 'Late'}]:
+    print("✅ Pool restarted with the new rows")
+else:
+    print(f"❌ Stale workers: {result}")
+
+print("\n4. Errors raised in workers reach the caller...")
+try:
+    db.execute_raw("SELECT * FROM students WHERE enrollment_year > 'soon'")
+    print("❌ Bad literal should fail")
+except ValueError as e:
+    print(f"✅ {e}")
+
+print("\n5. Small tables stay serial...")
+db.storage.close()
+db.storage.parallel_min_rows = 100000
+db.execute_raw("SELECT * FROM students WHERE gpa > 1")
+if db.storage._scanner is None:
+    print("✅ No workers for a 2,001 row table")
+else:
+    print("❌ Worker pool started below the threshold")
+
+# Clean up
+db.storage.close()
+db = None
+if os.path.exists('test_parallel.db'):
+    os.remove('test_parallel.db')
+print("\nTests completed!")
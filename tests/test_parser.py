@@ -0,0 +1,78 @@
+import sys
+sys.path.append('.')
+from rdbms.parser import SQLParser
+
+print("Testing SQL parser...")
+
+def check(description, sql, expected):
+    try:
+        parsed = SQLParser.parse(sql)
+        mismatched = {k: parsed.get(k) for k, v in expected.items() if parsed.get(k) != v}
+        if mismatched:
+            print(f"❌ {description}: got {mismatched}")
+        else:
+            print(f"✅ {description}")
+    except Exception as e:
+        print(f"❌ {description} raised: {e}")
+
+def check_error(description, sql):
+    try:
+        SQLParser.parse(sql)
+        print(f"❌ {description}: should have failed!")
+    except ValueError as e:
+        print(f"✅ {description}: {str(e)[:50]}...")
+
+check("Keywords inside string literals",
+      "INSERT INTO notes VALUES (1, 'SELECT * FROM x WHERE a = 1, (b)', 'It''s')",
+      {'columns': None, 'rows': [[1, 'SELECT * FROM x WHERE a = 1, (b)', "It's"]]})
+
+check("Named INSERT with NULL and negative number",
+      "INSERT INTO t (a, b, c) VALUES (NULL, -4.5, \"x\");",
+      {'columns': ['a', 'b', 'c'], 'rows': [[None, -4.5, 'x']]})
+
+check("Multi-row INSERT",
+      "INSERT INTO t VALUES (1, 'a'), (2, 'b'),(3, NULL)",
+      {'columns': None, 'rows': [[1, 'a'], [2, 'b'], [3, None]]})
+
+check("CREATE TABLE with column and table constraints",
+      """CREATE TABLE courses (
+             course_id INT PRIMARY KEY,
+             course_code VARCHAR(20) UNIQUE NOT NULL,
+             instructor VARCHAR(100),
+             UNIQUE KEY(instructor)
+         )""",
+      {'columns': [('course_id', 'INT', None), ('course_code', 'VARCHAR(20)', 'NOT NULL'),
+                   ('instructor', 'VARCHAR(100)', None)],
+       'primary_key': 'course_id', 'unique_keys': ['course_code', 'instructor']})
+
+check("SELECT with joins, ORDER BY and LIMIT",
+      """SELECT students.first_name, grade AS g FROM enrollments
+         INNER JOIN students ON students.student_id = enrollments.student_id
+         JOIN courses ON enrollments.course_id = courses.course_id
+         WHERE grade = 'A' ORDER BY last_name DESC, first_name LIMIT 5""",
+      {'columns': [{'type': 'COLUMN', 'name': 'students.first_name', 'alias': None},
+                   {'type': 'COLUMN', 'name': 'grade', 'alias': 'g'}],
+       'join': [{'table': 'students', 'left': 'enrollments.student_id', 'right': 'students.student_id'},
+                {'table': 'courses', 'left': 'enrollments.course_id', 'right': 'courses.course_id'}],
+       'where': {'type': 'COMPARE', 'op': '=', 'left': {'type': 'COLUMN', 'name': 'grade'},
+                 'right': {'type': 'LITERAL', 'value': 'A'}},
+       'order_by': [{'column': 'last_name', 'descending': True},
+                    {'column': 'first_name', 'descending': False}],
+       'limit': 5})
+
+check("Aggregates with aliases",
+      "select count(*) as n, MAX(credits) from courses",
+      {'columns': [{'type': 'AGGREGATE', 'func': 'COUNT', 'arg': None, 'alias': 'n'},
+                   {'type': 'AGGREGATE', 'func': 'MAX', 'arg': 'credits', 'alias': None}]})
+
+check("UPDATE with string containing WHERE",
+      "UPDATE notes SET body = 'x WHERE y', n = 2 WHERE id = 1",
+      {'set_values': {'body': 'x WHERE y', 'n': 2}})
+
+check_error("Unsupported command", "DROP TABLE students")
+check_error("Trailing garbage", "SELECT * FROM students extra")
+check_error("Unterminated VALUES", "INSERT INTO t VALUES (1, 2")
+check_error("Bad LIMIT", "SELECT * FROM t LIMIT 'x'")
+check_error("Ragged multi-row INSERT", "INSERT INTO t VALUES (1, 'a'), (2)")
+
+print("\n✅ Test complete!")
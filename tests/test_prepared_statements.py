@@ -0,0 +1,75 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import os
+
+print("Testing prepared statements...")
+
+# Clean up
+if os.path.exists('test_prepared.db'):
+    os.remove('test_prepared.db')
+
+db = QueryExecutor('test_prepared.db')
+
+db.execute_raw("""
+    CREATE TABLE students (
+        student_id INT PRIMARY KEY,
+        name VARCHAR(50),
+        enrollment_year INT
+    )
+""")
+
+# Positional placeholders in VALUES
+print("\n1. Reusing a prepared INSERT...")
+insert = db.prepare("INSERT INTO students VALUES (?, ?, ?)")
+for row in [(1, "O'Brien", 2022), (2, 'Robert; DROP TABLE students', 2023), (3, 'Alice', '2022')]:
+    db.execute(insert, row)
+rows = db.execute_raw("SELECT * FROM students")
+if len(rows) == 3 and rows[1]['name'] == 'Robert; DROP TABLE students':
+    print("✅ Values bound without being parsed as SQL")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+# Named placeholders in WHERE and SET
+print("\n2. Named placeholders...")
+db.execute_raw("UPDATE students SET name = :name WHERE student_id = :id", {'name': 'Bob', 'id': 2})
+rows = db.execute_raw("SELECT name FROM students WHERE enrollment_year = :year ORDER BY name",
+                      {'year': 2023})
+if rows == [{'name': 'Bob'}]:
+    print("✅ Named parameters bound")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+print("\n3. Placeholders in IN, LIKE and LIMIT...")
+rows = db.execute_raw("SELECT student_id FROM students WHERE student_id IN (?, ?) AND name LIKE ? LIMIT ?",
+                      (1, 3, '%ic%', 5))
+if [row['student_id'] for row in rows] == [3]:
+    print("✅ IN/LIKE/LIMIT parameters bound")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+print("\n4. Plan cache...")
+before = db.plan_cache_stats()
+for student_id in (1, 2, 3):
+    db.execute_raw("SELECT * FROM students   WHERE student_id = ?", (student_id,))
+db.execute_raw("SELECT * FROM students WHERE student_id = ?;", (1,))
+after = db.plan_cache_stats()
+if after['misses'] - before['misses'] == 1 and after['hits'] - before['hits'] == 3:
+    print(f"✅ Normalized SQL reused from cache: {after}")
+else:
+    print(f"❌ Unexpected cache stats: {before} -> {after}")
+
+print("\n5. Testing error cases...")
+for sql, params in [("SELECT * FROM students WHERE student_id = ?", None),
+                    ("SELECT * FROM students WHERE student_id = ?", (1, 2)),
+                    ("SELECT * FROM students WHERE student_id = :id", {'other': 1})]:
+    try:
+        db.execute_raw(sql, params)
+        print("   ❌ Should have failed!")
+    except ValueError as e:
+        print(f"   ✅ Correctly failed: {str(e)[:50]}...")
+
+db = None
+os.remove('test_prepared.db')
+
+print("\n✅ Test complete!")
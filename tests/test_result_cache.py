@@ -0,0 +1,95 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import os
+
+print("Testing result cache...")
+
+# Clean up
+if os.path.exists('test_result_cache.db'):
+    os.remove('test_result_cache.db')
+
+db = QueryExecutor('test_result_cache.db', result_cache_bytes=64 * 1024)
+
+db.execute_raw("CREATE TABLE students (student_id INT PRIMARY KEY, name VARCHAR(50), year INT)")
+db.execute_raw("CREATE TABLE courses (course_id INT PRIMARY KEY, title VARCHAR(50))")
+db.execute_raw("CREATE TABLE enrollments (id INT PRIMARY KEY, student_id INT, course_id INT)")
+db.execute_raw("INSERT INTO students VALUES (1, 'Alice', 2022)")
+db.execute_raw("INSERT INTO students VALUES (2, 'Bob', 2023)")
+db.execute_raw("INSERT INTO courses VALUES (10, 'Databases')")
+db.execute_raw("INSERT INTO enrollments VALUES (100, 1, 10)")
+
+count_sql = "SELECT COUNT(*) AS n FROM students"
+
+print("\n1. Repeated query is served from the cache...")
+first = db.execute_raw(count_sql)
+second = db.execute_raw(count_sql)
+stats = db.result_cache_stats()
+if first == second == [{'n': 2}] and stats['hits'] == 1:
+    print("✅ Second run was a cache hit")
+else:
+    print(f"❌ Unexpected results: {first}, {second}, {stats}")
+
+print("\n2. Writes to the table invalidate cached results...")
+db.execute_raw("INSERT INTO students VALUES (3, 'Carol', 2023)")
+result = db.execute_raw(count_sql)
+if result == [{'n': 3}] and db.result_cache_stats()['invalidations'] == 1:
+    print("✅ INSERT invalidated the cached COUNT")
+else:
+    print(f"❌ Stale result: {result}")
+
+print("\n3. Writes to unrelated tables keep the entry...")
+db.execute_raw(count_sql)
+hits = db.result_cache_stats()['hits']
+db.execute_raw("UPDATE courses SET title = 'Systems' WHERE course_id = 10")
+db.execute_raw(count_sql)
+if db.result_cache_stats()['hits'] == hits + 1:
+    print("✅ UPDATE on courses did not invalidate students results")
+else:
+    print(f"❌ Unexpected stats: {db.result_cache_stats()}")
+
+print("\n4. Joins are invalidated by changes to any joined table...")
+join_sql = """SELECT students.name, courses.title FROM enrollments
+              INNER JOIN students ON enrollments.student_id = students.student_id
+              INNER JOIN courses ON enrollments.course_id = courses.course_id"""
+db.execute_raw(join_sql)
+db.execute_raw("UPDATE courses SET title = 'Compilers' WHERE course_id = 10")
+result = db.execute_raw(join_sql)
+if result == [{'students.name': 'Alice', 'courses.title': 'Compilers'}]:
+    print("✅ Join result refreshed after UPDATE on a joined table")
+else:
+    print(f"❌ Stale join result: {result}")
+
+print("\n5. Parameters are part of the cache key...")
+by_year = "SELECT name FROM students WHERE year = ? ORDER BY name"
+a = db.execute_raw(by_year, (2022,))
+b = db.execute_raw(by_year, (2023,))
+if a == [{'name': 'Alice'}] and b == [{'name': 'Bob'}, {'name': 'Carol'}]:
+    print("✅ Different parameters give different results")
+else:
+    print(f"❌ Unexpected results: {a}, {b}")
+
+print("\n6. Callers cannot corrupt cached results...")
+rows = db.execute_raw(by_year, (2022,))
+rows[0]['name'] = 'Mallory'
+rows.append({'name': 'Eve'})
+rows = db.execute_raw(by_year, (2022,))
+if rows == [{'name': 'Alice'}]:
+    print("✅ Cached rows are copies")
+else:
+    print(f"❌ Cached result was modified: {rows}")
+
+print("\n7. Memory bound evicts least recently used entries...")
+small = QueryExecutor('test_result_cache.db', result_cache_bytes=800)
+for student_id in (1, 2, 3):
+    small.execute_raw("SELECT * FROM students WHERE student_id = ?", (student_id,))
+stats = small.result_cache_stats()
+if stats['bytes'] <= 800 and stats['evictions'] > 0:
+    print(f"✅ Cache stayed within budget: {stats['bytes']} bytes, {stats['evictions']} evictions")
+else:
+    print(f"❌ Unexpected stats: {stats}")
+
+db = small = None
+os.remove('test_result_cache.db')
+
+print("\n✅ Test complete!")
@@ -0,0 +1,183 @@
+import sys
+sys.path.append('.')
+from rdbms.server import DatabaseServer, FRAME_HEADER, read_frame
+from rdbms.client import Connection, ConnectionPool, QueryError
+import asyncio
+import os
+import socket
+import threading
+
+print("Testing the database server and client...")
+
+# Clean up
+if os.path.exists('test_server.db'):
+    os.remove('test_server.db')
+
+server = DatabaseServer('test_server.db', port=0, batch_size=100)
+ready = threading.Event()
+running = {}
+
+
+async def serve():
+    running['loop'] = asyncio.get_running_loop()
+    running['stop'] = asyncio.Event()
+    await server.start()
+    ready.set()
+    await running['stop'].wait()
+    server.close()
+
+
+thread = threading.Thread(target=asyncio.run, args=(serve(),))
+thread.start()
+ready.wait()
+
+conn = Connection(port=server.port)
+conn.execute("CREATE TABLE students (id INT PRIMARY KEY, name VARCHAR(20), gpa FLOAT)")
+
+print("\n1. Statements and prepared statements...")
+insert = conn.prepare("INSERT INTO students VALUES (?, ?, ?)")
+for i in range(1, 251):
+    insert.execute([i, f'Student{i}', i / 100])
+rows = conn.execute("SELECT id, name FROM students WHERE id = :id", {'id': 7})
+if rows == [{'id': 7, 'name': 'Student7'}] and insert.param_count == 3:
+    print("✅ Rows inserted through a prepared statement and read back")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+named = conn.prepare("UPDATE students SET name = :name WHERE id = :id")
+if named.param_names == ['id', 'name'] and named.execute({'id': 3, 'name': 'Third'}) == 1:
+    print("✅ Named parameters come back as a list")
+else:
+    print(f"❌ Unexpected parameter names: {named.param_names!r}")
+named.close()
+
+print("\n2. Results are streamed in batches...")
+rows = conn.iter_rows("SELECT id FROM students")
+first = next(rows)
+if first == {'id': 1} and len(list(rows)) == 249:
+    print("✅ 250 rows over 3 batches")
+else:
+    print("❌ Streamed rows lost")
+recorded = [row for row in conn.execute("SHOW STATEMENT STATS")
+            if row['statement'] == "SELECT id FROM students"]
+if recorded and recorded[0]['calls'] == 1 and recorded[0]['rows_returned'] == 250:
+    print("✅ The streamed SELECT is in the statement statistics")
+else:
+    print(f"❌ Streamed SELECT not recorded: {recorded}")
+partial = conn.iter_rows("SELECT * FROM students")
+if next(partial) == {'id': 1, 'name': 'Student1', 'gpa': 0.01}:
+    print("✅ SELECT * sends the table's columns only")
+else:
+    print("❌ SELECT * sent internal columns")
+if conn.execute("SELECT COUNT(*) FROM students") == [{'COUNT(*)': 250}]:
+    print("✅ Abandoned stream skipped before the next statement")
+else:
+    print("❌ Connection out of step after an abandoned stream")
+
+print("\n3. Pipelined requests...")
+results = conn.pipeline([
+    ("UPDATE students SET gpa = ? WHERE id = ?", [4.0, 1]),
+    "SELECT gpa FROM students WHERE id = 1",
+    (insert, [251, 'Late', 1.5]),
+    "SELECT COUNT(*) FROM students",
+])
+# An INSERT answers with the new row ID, counted from 0
+if results == [1, [{'gpa': 4.0}], 250, [{'COUNT(*)': 251}]]:
+    print("✅ Four statements answered in order")
+else:
+    print(f"❌ Unexpected results: {results}")
+
+print("\n4. Errors come back as ValueError...")
+try:
+    conn.execute("SELECT * FROM missing")
+    print("❌ Unknown table should fail")
+except ValueError as e:
+    if conn.ping():
+        print(f"✅ {e} (connection still usable)")
+    else:
+        print("❌ Connection broken after an error")
+
+try:
+    conn.execute("COPY students TO 'test_server_leak.csv'")
+    print("❌ COPY should be refused")
+except ValueError as e:
+    if not os.path.exists('test_server_leak.csv'):
+        print(f"✅ {e}")
+    else:
+        print("❌ COPY wrote a file on the server")
+
+
+async def cut_off():
+    reader = asyncio.StreamReader()
+    reader.feed_data(FRAME_HEADER.pack(100) + b'{"id": 1, "op"')
+    reader.feed_eof()
+    return await read_frame(reader)
+
+
+try:
+    ended = asyncio.run(cut_off()) is None
+except asyncio.IncompleteReadError:
+    ended = False
+raw = socket.create_connection(('127.0.0.1', server.port))
+raw.sendall(FRAME_HEADER.pack(100) + b'{"id": 1, "op"')
+raw.close()
+if ended and conn.ping():
+    print("✅ A client leaving mid-frame ends its connection quietly")
+else:
+    print("❌ A truncated frame raised out of read_frame")
+
+print("\n5. Connection pool shared by threads...")
+pool = ConnectionPool(port=server.port, size=3)
+counts = []
+
+
+def worker():
+    for _ in range(20):
+        with pool.connection() as c:
+            counts.append(c.execute("SELECT COUNT(*) FROM students")[0]['COUNT(*)'])
+
+
+threads = [threading.Thread(target=worker) for _ in range(6)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+if counts == [251] * 120 and pool.stats()['created'] <= 3:
+    print(f"✅ 120 queries over {pool.stats()['created']} connections")
+else:
+    print(f"❌ Unexpected pool results: {len(counts)} queries, {pool.stats()}")
+
+created = pool.stats()['created']
+try:
+    with pool.connection() as c:
+        c.execute("SELECT * FROM no_such_table")
+except QueryError:
+    pass
+kept = pool.stats()
+for error in (KeyError('application bug'), ValueError('Connection closed by the server')):
+    try:
+        with pool.connection() as c:
+            raise error
+    except (KeyError, ValueError):
+        pass
+dropped = pool.stats()
+if kept['created'] == created and dropped['created'] == created - 2 and dropped['idle'] == created - 2:
+    print("✅ A query error keeps the connection; other errors close it and free the slot")
+else:
+    print(f"❌ Pool after errors: {kept}, {dropped}")
+with pool.connection() as c:
+    healthy = c.execute("SELECT COUNT(*) FROM students")[0]['COUNT(*)']
+if healthy == 251:
+    print("✅ The pool still serves queries")
+else:
+    print(f"❌ Unexpected count {healthy}")
+
+# Clean up
+pool.close()
+conn.close()
+running['loop'].call_soon_threadsafe(running['stop'].set)
+thread.join()
+for path in ('test_server.db', 'test_server_leak.csv'):
+    if os.path.exists(path):
+        os.remove(path)
+print("\nTests completed!")
@@ -0,0 +1,99 @@
+import sys
+sys.path.append('.')
+from rdbms.pool import SessionPool
+import os
+import threading
+
+print("Testing the shared-engine session pool...")
+
+# Clean up
+if os.path.exists('test_pool.db'):
+    os.remove('test_pool.db')
+
+pool = SessionPool('test_pool.db', size=3, timeout=0.2, result_cache_bytes=1024 * 1024)
+
+print("\n1. Sessions share one storage engine...")
+first, second = pool.acquire(), pool.acquire()
+first.execute_raw("CREATE TABLE counters (id INT PRIMARY KEY, value INT)")
+first.execute_raw("INSERT INTO counters VALUES (1, 0)")
+if first.storage is second.storage and second.execute_raw("SELECT id, value FROM counters") == [
+        {'id': 1, 'value': 0}]:
+    print("✅ A write in one session is visible in the other")
+else:
+    print("❌ Sessions do not share data")
+
+print("\n2. The pool never hands out more than size sessions...")
+third = pool.acquire()
+try:
+    pool.acquire()
+    print("❌ Fourth session handed out")
+except ValueError as e:
+    print(f"✅ {e}")
+for session in (first, second, third):
+    pool.release(session)
+if pool.stats() == {'size': 3, 'created': 3, 'idle': 3}:
+    print("✅ Released sessions are idle again")
+else:
+    print(f"❌ Unexpected stats: {pool.stats()}")
+
+print("\n3. Concurrent sessions see whole statements...")
+errors = []
+
+
+def writer(base):
+    session = pool.acquire()
+    try:
+        for i in range(50):
+            session.executemany("INSERT INTO counters VALUES (?, ?)",
+                                [(base + i * 2, 1), (base + i * 2 + 1, 1)])
+    except Exception as e:
+        errors.append(e)
+    finally:
+        pool.release(session)
+
+
+def reader():
+    session = pool.acquire()
+    try:
+        for _ in range(50):
+            # Each batch adds two rows, so the count can never be even
+            count = session.execute_raw("SELECT COUNT(*) FROM counters")[0]['COUNT(*)']
+            if count % 2 == 0:
+                errors.append(f"half-applied batch: {count} rows")
+    except Exception as e:
+        errors.append(e)
+    finally:
+        pool.release(session)
+
+
+threads = [threading.Thread(target=writer, args=(1000,)),
+           threading.Thread(target=writer, args=(2000,)),
+           threading.Thread(target=reader)]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+session = pool.acquire()
+total = session.execute_raw("SELECT COUNT(*) FROM counters")[0]['COUNT(*)']
+pool.release(session)
+if not errors and total == 201:
+    print(f"✅ {total} rows, no torn reads")
+else:
+    print(f"❌ {total} rows, errors: {errors[:3]}")
+
+print("\n4. The storage lock is released after each statement...")
+session = pool.acquire()
+acquired = pool.storage.lock.acquire(timeout=0)
+if acquired:
+    pool.storage.lock.release()
+    print("✅ Storage lock is free between statements")
+else:
+    print("❌ Storage lock leaked by an earlier statement")
+pool.release(session)
+
+# Clean up
+pool.close()
+pool = None
+if os.path.exists('test_pool.db'):
+    os.remove('test_pool.db')
+print("\nTests completed!")
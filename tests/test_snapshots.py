@@ -0,0 +1,100 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import os
+import threading
+
+print("Testing snapshot reads...")
+
+# Clean up
+if os.path.exists('test_snapshots.db'):
+    os.remove('test_snapshots.db')
+
+db = QueryExecutor('test_snapshots.db')
+db.execute_raw("CREATE TABLE accounts (id INT PRIMARY KEY, owner VARCHAR(20), balance INT)")
+db.execute_raw("INSERT INTO accounts VALUES (1, 'Ann', 100), (2, 'Bob', 50), (3, 'Cy', 75)")
+storage = db.storage
+
+print("\n1. A snapshot keeps reading the version it started with...")
+snapshot = storage.snapshot()
+db.execute_raw("UPDATE accounts SET balance = 0 WHERE id = 1")
+db.execute_raw("INSERT INTO accounts VALUES (4, 'Dee', 10)")
+db.execute_raw("DELETE FROM accounts WHERE id = 2")
+before = snapshot.select('accounts', '*', 'balance > 60')
+after = db.execute_raw("SELECT id, balance FROM accounts")
+if [(row['id'], row['balance']) for row in before] == [(1, 100), (3, 75)]:
+    print("✅ Snapshot unaffected by a later UPDATE, INSERT and DELETE")
+else:
+    print(f"❌ Snapshot saw later writes: {before}")
+if after == [{'id': 1, 'balance': 0}, {'id': 3, 'balance': 75}, {'id': 4, 'balance': 10}]:
+    print("✅ New statements see the writes")
+else:
+    print(f"❌ Unexpected current rows: {after}")
+if snapshot.select('accounts', '*', 'owner = \'Bob\'') and not db.execute_raw(
+        "SELECT * FROM accounts WHERE owner = 'Bob'"):
+    print("✅ Index lookups read the snapshot's own index")
+else:
+    print("❌ Index shared between versions")
+
+print("\n2. Snapshots are read-only...")
+try:
+    snapshot.insert_many('accounts', [{'id': 9, 'owner': 'Eve', 'balance': 1}])
+    print("❌ Write through a snapshot should fail")
+except ValueError as e:
+    print(f"✅ {e}")
+
+print("\n3. Old versions are dropped once no snapshot reads them...")
+stats = storage.snapshot_stats()
+snapshot.release()
+released = storage.snapshot_stats()
+if stats['versions'] > 1 and released['versions'] == 1 and released['active_snapshots'] == 0:
+    print(f"✅ {stats['versions']} versions while the snapshot was open, 1 after")
+else:
+    print(f"❌ Versions not collected: {stats} -> {released}")
+
+print("\n4. Readers don't block writers...")
+reading = threading.Event()
+done = threading.Event()
+results = []
+
+
+def reader():
+    for row in db.iter_rows("SELECT id FROM accounts"):
+        reading.set()
+        done.wait(5)
+        results.append(row['id'])
+
+
+thread = threading.Thread(target=reader)
+thread.start()
+reading.wait(5)
+db.execute_raw("INSERT INTO accounts VALUES (5, 'Flo', 20)")
+wrote = len(db.execute_raw("SELECT * FROM accounts")) == 4
+done.set()
+thread.join()
+if wrote and results == [1, 3, 4]:
+    print("✅ INSERT finished while a reader was part way through a scan")
+else:
+    print(f"❌ wrote={wrote}, reader saw {results}")
+
+print("\n5. A failed write leaves no partial changes...")
+try:
+    db.execute_raw("INSERT INTO accounts VALUES (6, 'Gus', 1), (1, 'Dup', 1)")
+    print("❌ Duplicate key should fail")
+except ValueError:
+    pass
+try:
+    db.execute_raw("UPDATE accounts SET balance = 'lots' WHERE id = 3")
+except ValueError:
+    pass
+rows = db.execute_raw("SELECT id, balance FROM accounts")
+if [row['id'] for row in rows] == [1, 3, 4, 5] and rows[1]['balance'] == 75:
+    print("✅ Table unchanged after failed statements")
+else:
+    print(f"❌ Partial changes left: {rows}")
+
+# Clean up
+db = storage = snapshot = None
+if os.path.exists('test_snapshots.db'):
+    os.remove('test_snapshots.db')
+print("\nTests completed!")
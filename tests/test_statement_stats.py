@@ -0,0 +1,151 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms.pool import SessionPool
+from rdbms.stats import statement_fingerprint, current_metrics
+from rdbms import dbapi
+import json
+import os
+
+print("Testing statement statistics and the slow query log...")
+
+# Clean up
+for path in ('test_statement_stats.db', 'test_slow_queries.log'):
+    if os.path.exists(path):
+        os.remove(path)
+
+db = QueryExecutor('test_statement_stats.db', slow_query_log='test_slow_queries.log',
+                   slow_query_ms=60000)
+db.execute_raw("CREATE TABLE items (id INT PRIMARY KEY, category INT, name VARCHAR(20))")
+db.executemany("INSERT INTO items VALUES (?, ?, ?)",
+               [(i, i % 10, f'item{i}') for i in range(3000)])
+db.execute_raw("CREATE INDEX idx_category ON items(category)")
+
+
+def stats_for(fingerprint):
+    return next((row for row in db.execute_raw("SHOW STATEMENT STATS")
+                 if row['statement'] == fingerprint), None)
+
+
+print("\n1. Statements are grouped by fingerprint...")
+if (statement_fingerprint("SELECT * FROM items  WHERE name = 'a''b' AND id > 10.5;")
+        == "SELECT * FROM items WHERE name = ? AND id > ?"
+        and statement_fingerprint("SELECT t1.col2 FROM t1") == "SELECT t1.col2 FROM t1"):
+    print("✅ Literals become '?', identifiers with digits are kept")
+else:
+    print("❌ Unexpected fingerprint")
+for i in range(40):
+    db.execute_raw(f"SELECT * FROM items WHERE id > {2990 - i % 3}")
+row = stats_for("SELECT * FROM items WHERE id > ?")
+if row and row['calls'] == 40 and row['rows_scanned'] == 40 * 3000 and \
+        row['rows_returned'] == sum(9 + i % 3 for i in range(40)):
+    print(f"✅ 40 calls: {row['rows_scanned']} rows scanned for {row['rows_returned']} returned")
+else:
+    print(f"❌ Unexpected stats: {row}")
+
+print("\n2. Index lookups, writes and timings...")
+for category in range(5):
+    db.execute_raw("SELECT name FROM items WHERE category = ?", [category])
+db.execute_raw("UPDATE items SET name = 'renamed' WHERE id = ?", [7])
+lookup = stats_for("SELECT name FROM items WHERE category = ?")
+update = stats_for("UPDATE items SET name = ? WHERE id = ?")
+if lookup and lookup['rows_scanned'] == lookup['rows_returned'] == 5 * 300 and lookup['bytes_written'] == 0:
+    print("✅ An index lookup scans only the rows it returns")
+else:
+    print(f"❌ Unexpected lookup stats: {lookup}")
+if (update and update['rows_returned'] == 1 and update['bytes_written'] > os.path.getsize(
+        'test_statement_stats.db') // 2 and update['persist_ms'] > 0
+        and abs(update['parse_ms'] + update['plan_ms'] + update['execute_ms'] + update['persist_ms']
+                - update['total_ms']) < 0.01):
+    print(f"✅ The UPDATE wrote {update['bytes_written']} bytes in {update['persist_ms']} ms; "
+          f"the phases add up to its time")
+else:
+    print(f"❌ Unexpected update stats: {update}")
+row = stats_for("SELECT * FROM items WHERE id > ?")
+if row['mean_ms'] <= row['max_ms'] and row['p95_ms'] <= row['p99_ms'] <= row['max_ms']:
+    print(f"✅ mean {row['mean_ms']} ms, p95 {row['p95_ms']} ms, p99 {row['p99_ms']} ms")
+else:
+    print(f"❌ Percentiles out of order: {row}")
+
+print("\n3. Failed statements are counted...")
+try:
+    db.execute_raw("INSERT INTO items VALUES (?, ?, ?)", [1, 1, 'duplicate'])
+except ValueError:
+    pass
+row = stats_for("INSERT INTO items VALUES (?, ?, ?)")
+if row and row['calls'] == 1 and row['errors'] == 1:
+    print("✅ A duplicate key INSERT counts as an error")
+else:
+    print(f"❌ Unexpected stats: {row}")
+
+print("\n4. Slow statements are logged...")
+if not os.path.exists('test_slow_queries.log'):
+    print("✅ Nothing logged under the threshold")
+else:
+    print("❌ Fast statements were logged")
+db.statement_stats.slow_query_ms = 0
+db.execute_raw("SELECT COUNT(*) FROM items WHERE name LIKE ?", ['item1%'])
+db.execute_raw("DELETE FROM items WHERE id = 5")
+with open('test_slow_queries.log', encoding='utf-8') as f:
+    records = [json.loads(line) for line in f]
+if (len(records) == 2 and records[0]['params'] == ['item1%']
+        and records[0]['rows_scanned'] == 3000 and records[0]['rows_returned'] == 1
+        and records[1]['statement'] == "DELETE FROM items WHERE id = 5"
+        and records[1]['bytes_written'] > 0 and 'time' in records[1]):
+    print("✅ Each slow statement is a JSON line with its text, parameters and timings")
+else:
+    print(f"❌ Unexpected log: {records}")
+
+print("\n5. SHOW STATEMENT STATS over the DB-API and a session pool...")
+conn = dbapi.connect('test_statement_stats.db')
+conn.executor.execute_raw("SELECT COUNT(*) FROM items")
+cur = conn.execute("SHOW STATEMENT STATS")
+rows = cur.fetchall()
+names = [column[0] for column in cur.description]
+if names[:3] == ['statement', 'calls', 'errors'] and rows == [(
+        'SELECT COUNT(*) FROM items',) + rows[0][1:]] and rows[0][1] == 1:
+    print("✅ A cursor fetches the statistics rows")
+else:
+    print(f"❌ Unexpected: {names}, {rows}")
+conn.close()
+
+pool = SessionPool('test_statement_stats.db', size=2)
+first, second = pool.acquire(), pool.acquire()
+first.execute_raw("SELECT * FROM items WHERE id = 1")
+second.execute_raw("SELECT * FROM items WHERE id = 2")
+shared = [row for row in second.execute_raw("SHOW STATEMENT STATS")
+          if row['statement'] == "SELECT * FROM items WHERE id = ?"]
+if shared and shared[0]['calls'] == 2:
+    print("✅ Sessions of a pool add to the same statistics")
+else:
+    print(f"❌ Unexpected: {shared}")
+pool.close()
+
+print("\n6. Streamed SELECTs are recorded when they end...")
+db.statement_stats.reset()
+streamed = sum(1 for _ in db.iter_rows("SELECT * FROM items WHERE category = ?", [3]))
+rows = db.iter_rows("SELECT name FROM items WHERE id < 100 ORDER BY name")
+first_rows = [next(rows) for _ in range(5)]
+db.execute_raw("SELECT COUNT(*) FROM items")
+between = current_metrics()
+next(rows)
+rows.close()
+full = stats_for("SELECT * FROM items WHERE category = ?")
+closed = stats_for("SELECT name FROM items WHERE id < ? ORDER BY name")
+counted = stats_for("SELECT COUNT(*) FROM items")
+if (streamed == 300 and full and full['calls'] == 1 and full['rows_returned'] == 300
+        and closed and closed['calls'] == 1 and closed['rows_returned'] == 6
+        and closed['rows_scanned'] > 0 and closed['errors'] == 0):
+    print("✅ An exhausted and a closed stream each count as one call")
+else:
+    print(f"❌ Unexpected: {full}, {closed}")
+if counted and counted['calls'] == 1 and counted['rows_returned'] == 1 and between is None:
+    print("✅ A statement run between streamed rows is measured on its own")
+else:
+    print(f"❌ Unexpected: {counted}, {between}")
+
+# Clean up
+for path in ('test_statement_stats.db', 'test_slow_queries.log'):
+    if os.path.exists(path):
+        os.remove(path)
+print("\nTests completed!")
@@ -0,0 +1,152 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+from rdbms import vectorized
+import os
+import random
+
+print("Testing vectorized batch execution...")
+
+# Clean up
+if os.path.exists('test_vectorized.db'):
+    os.remove('test_vectorized.db')
+
+db = QueryExecutor('test_vectorized.db', batch_mode=True)
+db.storage.batch_min_rows = 0
+db.storage.batch_size = 64
+
+db.execute_raw("CREATE TABLE students (student_id INT PRIMARY KEY, name VARCHAR(20), "
+               "enrollment_year INT, gpa FLOAT)")
+rng = random.Random(7)
+db.storage.bulk_load('students', [[
+    (i, f'Student{i % 50}', rng.choice([2019, 2020, 2021, 2022, None]),
+     rng.choice([None, round(rng.uniform(0, 4), 1)]))
+    for i in range(1, 1001)
+]])
+
+
+def row_mode(sql):
+    db.storage.batch_mode = False
+    try:
+        return db.execute_raw(sql)
+    finally:
+        db.storage.batch_mode = True
+
+
+def same(first, second):
+    """Compare results, allowing float sums to differ in the last bits"""
+    if len(first) != len(second):
+        return False
+    for a, b in zip(first, second):
+        if a.keys() != b.keys():
+            return False
+        for key in a:
+            x, y = a[key], b[key]
+            if isinstance(x, float) and isinstance(y, float):
+                if abs(x - y) > 1e-9 * max(1, abs(x)):
+                    return False
+            elif x != y or type(x) is not type(y):
+                return False
+    return True
+
+
+print("\n1. Numeric filters match row mode...")
+conditions = [
+    "enrollment_year > 2020",
+    "enrollment_year >= 2020 AND gpa < 2",
+    "gpa < 1 OR enrollment_year = 2019",
+    "NOT enrollment_year = 2021",
+    "NOT (gpa > 3.5)",
+    "enrollment_year IN (2019, 2022)",
+    "enrollment_year NOT IN (2019, 2022)",
+    "gpa BETWEEN 1.5 AND 2.5",
+    "gpa NOT BETWEEN 1.5 AND 2.5",
+    "gpa IS NULL",
+    "gpa IS NOT NULL AND enrollment_year IS NULL",
+    "2021 < enrollment_year",
+    "enrollment_year > gpa",
+    "enrollment_year = 4.5",
+    "enrollment_year = NULL",
+    "gpa NOT BETWEEN NULL AND 2",
+    "NOT (gpa > 3.5 OR enrollment_year = 2020)",
+    "NOT (gpa > 3.5 AND enrollment_year = 2020)",
+    "NOT enrollment_year IN (2019, NULL)",
+    "NOT gpa BETWEEN NULL AND 2",
+    "NOT NOT gpa < 1",
+]
+failures = 0
+for condition in conditions:
+    sql = f"SELECT * FROM students WHERE {condition}"
+    if db.execute_raw(sql) != row_mode(sql):
+        print(f"❌ {condition}")
+        failures += 1
+if vectorized.available() and not db.storage.column_cache.tables:
+    print("❌ Batch mode never built column arrays")
+elif not failures:
+    print(f"✅ {len(conditions)} conditions give the same rows")
+# NOT of a comparison with NULL is still unknown, so NULL rows stay out
+negated = db.execute_raw("SELECT gpa FROM students WHERE NOT (gpa > 3.5)")
+if negated and all(row['gpa'] is not None for row in negated):
+    print("✅ NOT keeps rows with a NULL operand out")
+else:
+    print(f"❌ NOT matched {sum(row['gpa'] is None for row in negated)} NULL rows")
+
+print("\n2. Aggregates match row mode...")
+queries = [
+    "SELECT COUNT(*), COUNT(gpa), SUM(enrollment_year), AVG(gpa), MIN(gpa), MAX(enrollment_year) "
+    "FROM students",
+    "SELECT SUM(gpa) AS total, AVG(enrollment_year) AS mean FROM students WHERE gpa > 2",
+    "SELECT MIN(enrollment_year), MAX(gpa) FROM students WHERE enrollment_year IS NULL",
+    "SELECT COUNT(*), SUM(gpa), MIN(gpa) FROM students WHERE student_id < 0",
+]
+failures = 0
+for sql in queries:
+    batch, rows = db.execute_raw(sql), row_mode(sql)
+    if not same(batch, rows):
+        print(f"❌ {sql}\n   batch: {batch}\n   rows:  {rows}")
+        failures += 1
+if not failures:
+    print(f"✅ {len(queries)} aggregate queries give the same results")
+
+print("\n3. Non-numeric parts fall back to row mode...")
+for sql in ["SELECT * FROM students WHERE name LIKE 'Student1%' AND gpa > 1",
+            "SELECT * FROM students WHERE name = 'Student7'",
+            "SELECT MAX(name) FROM students WHERE gpa > 3"]:
+    if db.execute_raw(sql) != row_mode(sql):
+        print(f"❌ {sql}")
+        break
+else:
+    print("✅ String columns and LIKE use the row path")
+
+print("\n4. Column arrays are rebuilt after writes...")
+before = db.execute_raw("SELECT COUNT(*) FROM students WHERE gpa > 3.9")[0]['COUNT(*)']
+db.execute_raw("INSERT INTO students VALUES (5000, 'New', 2020, 4.0)")
+db.execute_raw("UPDATE students SET gpa = 4.0 WHERE student_id = 1")
+after = db.execute_raw("SELECT COUNT(*) FROM students WHERE gpa > 3.9")[0]['COUNT(*)']
+if after == row_mode("SELECT COUNT(*) FROM students WHERE gpa > 3.9")[0]['COUNT(*)'] and after > before:
+    print(f"✅ {before} -> {after} matching rows")
+else:
+    print(f"❌ Stale column arrays: {before} -> {after}")
+
+print("\n5. Without NumPy every query runs in row mode...")
+numpy_module = vectorized.np
+vectorized.np = None
+try:
+    sql = "SELECT AVG(gpa) FROM students WHERE enrollment_year > 2020"
+    db.storage.column_cache.clear()
+    result = db.execute_raw(sql)
+    if not db.storage.column_cache.tables and same(result, row_mode(sql)):
+        print("✅ Transparent fallback")
+    else:
+        print("❌ Batch mode used without NumPy")
+finally:
+    vectorized.np = numpy_module
+
+if not vectorized.available():
+    print("\n(NumPy is not installed: the results above came from row mode)")
+
+# Clean up
+db = None
+if os.path.exists('test_vectorized.db'):
+    os.remove('test_vectorized.db')
+print("\nTests completed!")
@@ -0,0 +1,117 @@
+import sys
+sys.path.append('.')
+from rdbms.executor import QueryExecutor
+import os
+
+print("Testing WHERE expressions...")
+
+# Clean up
+if os.path.exists('test_where.db'):
+    os.remove('test_where.db')
+
+db = QueryExecutor('test_where.db')
+
+db.execute_raw("""
+    CREATE TABLE courses (
+        course_id INT PRIMARY KEY,
+        course_code VARCHAR(20),
+        course_name VARCHAR(100),
+        instructor VARCHAR(100),
+        credits INT
+    )
+""")
+db.execute_raw("INSERT INTO courses VALUES (101, 'CS101', 'Intro to CS', 'Dr. Timon', 3)")
+db.execute_raw("INSERT INTO courses VALUES (102, 'MATH201', 'Calculus I', 'Prof. Betty', 4)")
+db.execute_raw("INSERT INTO courses VALUES (103, 'ENG101', 'English AND Writing', NULL, 3)")
+db.execute_raw("INSERT INTO courses VALUES (104, 'PHYS101', 'Physics', 'Prof. Wilson', 4)")
+db.execute_raw("INSERT INTO courses VALUES (105, 'CS201', 'Data Structures', 'Dr. Joyce', 5)")
+
+test_cases = [
+    ("credits = 4", [102, 104]),
+    ("credits != 4", [101, 103, 105]),
+    ("credits <> 4", [101, 103, 105]),
+    ("credits >= 4", [102, 104, 105]),
+    ("credits <= 3", [101, 103]),
+    ("credits > 3 AND course_code LIKE 'CS%'", [105]),
+    ("(credits = 3 OR credits = 5) AND NOT course_id = 101", [103, 105]),
+    ("course_id IN (101, 103, 999)", [101, 103]),
+    ("course_id NOT IN (101, 103)", [102, 104, 105]),
+    ("credits BETWEEN 4 AND 5", [102, 104, 105]),
+    ("credits NOT BETWEEN 4 AND 5", [101, 103]),
+    ("instructor IS NULL", [103]),
+    ("instructor IS NOT NULL AND credits = 3", [101]),
+    ("course_name LIKE '%and%'", [103]),
+    ("course_name NOT LIKE '%u%'", [101, 103, 104]),
+    ("course_code LIKE 'CS1_1'", [101]),
+    ("courses.credits = 5", [105]),
+    ("course_name = 'English AND Writing'", [103]),
+    # Literals are coerced to the column type once, then compared natively
+    ("credits = 4.0", [102, 104]),
+    ("credits = '4'", [102, 104]),
+    ("credits < 3.5", [101, 103]),
+    ("credits IN ('3', 5.0)", [101, 103, 105]),
+    ("4 = credits", [102, 104]),
+    ("course_id = 103", [103]),
+    ("course_id = '103' AND credits = 3", [103]),
+    # A NULL instructor makes these UNKNOWN, and NOT UNKNOWN is still UNKNOWN
+    ("NOT instructor = 'Dr. Timon'", [102, 104, 105]),
+    ("NOT (instructor > 'E')", [101, 105]),
+    ("NOT instructor LIKE 'Prof%'", [101, 105]),
+    ("NOT (instructor = 'Dr. Joyce' AND credits = 4)", [101, 102, 103, 104, 105]),
+    ("NOT (instructor = 'Dr. Joyce' OR credits = 4)", [101]),
+    ("NOT (instructor IN ('Dr. Timon') OR credits < 3)", [102, 104, 105]),
+    ("instructor NOT IN ('Dr. Timon', NULL)", []),
+    ("NOT NOT instructor != 'Dr. Timon'", [102, 104, 105]),
+]
+
+print("\n" + "="*60)
+for condition, expected in test_cases:
+    try:
+        rows = db.execute_raw(f"SELECT course_id FROM courses WHERE {condition}")
+        ids = sorted(row['course_id'] for row in rows)
+        if ids == expected:
+            print(f"✅ {condition} -> {ids}")
+        else:
+            print(f"❌ {condition} -> {ids}, expected {expected}")
+    except Exception as e:
+        print(f"❌ {condition} raised: {e}")
+
+# Malformed conditions should be reported, not silently match everything
+print("\nTesting malformed WHERE...")
+try:
+    db.execute_raw("SELECT * FROM courses WHERE credits = ")
+    print("❌ Should have failed!")
+except ValueError as e:
+    print(f"✅ Correctly failed: {str(e)[:50]}...")
+
+print("Testing literal that doesn't fit the column type...")
+try:
+    db.execute_raw("SELECT * FROM courses WHERE credits = 'four'")
+    print("❌ Should have failed!")
+except ValueError as e:
+    print(f"✅ Correctly failed: {str(e)[:50]}...")
+
+print("\nTesting UPDATE stores typed values...")
+db.execute_raw("UPDATE courses SET credits = '5' WHERE course_id = 101")
+rows = db.execute_raw("SELECT course_id FROM courses WHERE credits = 5")
+if sorted(row['course_id'] for row in rows) == [101, 105]:
+    print("✅ UPDATE value coerced to INT")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+print("\nTesting columns both joined tables have...")
+db.execute_raw("CREATE TABLE sections (section_id INT PRIMARY KEY, course_id INT, "
+               "course_code VARCHAR(20), instructor VARCHAR(100), credits INT)")
+db.execute_raw("INSERT INTO sections VALUES (1, 102, 'MATH201-A', 'TA Nora', 1)")
+rows = db.execute_raw("SELECT course_code, instructor, credits FROM courses "
+                      "JOIN sections ON courses.course_id = sections.course_id "
+                      "WHERE instructor = 'Prof. Betty' ORDER BY credits")
+if rows == [{'course_code': 'MATH201', 'instructor': 'Prof. Betty', 'credits': 4}]:
+    print("✅ Unqualified names refer to the leftmost table")
+else:
+    print(f"❌ Unexpected rows: {rows}")
+
+db = None
+os.remove('test_where.db')
+
+print("\n✅ Test complete!")
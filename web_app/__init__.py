@@ -11,7 +11,15 @@ def create_app(test_config=None):
     app.config.from_mapping(
         SECRET_KEY='dev-secret-key-for-simple-rdbms',
         DATABASE='web_database.db',
+        RESULT_CACHE_BYTES=4 * 1024 * 1024,
+        DB_POOL_SIZE=8,  # sessions sharing one loaded database; 0 loads it per request
+        DB_POOL_TIMEOUT=30,
+        SLOW_QUERY_LOG=None,  # file the statements slower than SLOW_QUERY_MS are appended to
+        SLOW_QUERY_MS=100,
+        DB_FSYNC=False,  # fsync the database file after every write
     )
+    if test_config is not None:
+        app.config.from_mapping(test_config)
     
     # Ensure instance folder exists
     try:
@@ -23,6 +31,10 @@ def create_app(test_config=None):
     from . import db
     db.init_app(app)
     
+    # Count requests in progress for /metrics
+    from . import metrics
+    metrics.init_app(app)
+    
     # Register blueprints
     from . import routes
     app.register_blueprint(routes.bp)
@@ -6,25 +6,70 @@ import os
 # Add parent directory to path to import MyRDBMS
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import threading
+
 from rdbms.executor import QueryExecutor
+from rdbms.pool import SessionPool
+from . import metrics
+
+# One session pool, and so one loaded database, per database path and process
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool():
+    """Get the session pool of the app's database, loading it on first use"""
+    from flask import current_app
+    
+    db_path = os.path.join(current_app.instance_path, current_app.config['DATABASE'])
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = _pools[db_path] = SessionPool(
+                db_path,
+                size=current_app.config.get('DB_POOL_SIZE', 8),
+                timeout=current_app.config.get('DB_POOL_TIMEOUT', 30),
+                result_cache_bytes=current_app.config.get('RESULT_CACHE_BYTES', 0),
+                slow_query_log=current_app.config.get('SLOW_QUERY_LOG'),
+                slow_query_ms=current_app.config.get('SLOW_QUERY_MS', 100))
+            pool.storage.fsync = current_app.config.get('DB_FSYNC', False)
+            metrics.watch(pool.statement_stats, pool.storage)
+    return pool
 
 def get_db():
     """Get database connection"""
     from flask import current_app, g
     
     if 'db' not in g:
-        # Create a new database connection
-        db_path = os.path.join(current_app.instance_path, current_app.config['DATABASE'])
-        g.db = QueryExecutor(db_path)
+        if current_app.config.get('DB_POOL_SIZE', 8):
+            # Borrow a session sharing the process-wide storage engine
+            g.db_pool = get_pool()
+            g.db = g.db_pool.acquire()
+        else:
+            # Pooling disabled: load the database for this request only
+            db_path = os.path.join(current_app.instance_path, current_app.config['DATABASE'])
+            g.db = QueryExecutor(db_path,
+                                 result_cache_bytes=current_app.config.get('RESULT_CACHE_BYTES', 0),
+                                 slow_query_log=current_app.config.get('SLOW_QUERY_LOG'),
+                                 slow_query_ms=current_app.config.get('SLOW_QUERY_MS', 100))
+            g.db.storage.fsync = current_app.config.get('DB_FSYNC', False)
+            metrics.watch(g.db.statement_stats, g.db.storage)
     
     return g.db
 
 def close_db(e=None):
-    """Close database connection"""
+    """Return the request's session to the pool"""
     from flask import g
     db = g.pop('db', None)
-    if db is not None:
-        pass
+    pool = g.pop('db_pool', None)
+    if db is not None and pool is not None:
+        pool.release(db)
+
+def reset_pool(db_path):
+    """Drop the pool of a database file that was replaced on disk"""
+    with _pools_lock:
+        pool = _pools.pop(db_path, None)
+    if pool is not None:
+        pool.close()
 
 def init_app(app):
     """Register database functions with the Flask app"""
@@ -39,6 +84,7 @@ def init_database():
     # Remove existing database file
     if os.path.exists(db_path):
         os.remove(db_path)
+    reset_pool(db_path)
     
     db = QueryExecutor(db_path)
     
@@ -91,12 +137,7 @@ def init_database():
         (5, 'Will', 'Kilonzo', 'will.kilonzo@example.com', '2002-01-18', 2023)
     ]
     
-    for student in students:
-        db.execute_raw(f'''
-            INSERT INTO students 
-            VALUES ({student[0]}, '{student[1]}', '{student[2]}', 
-                   '{student[3]}', '{student[4]}', {student[5]})
-        ''')
+    db.executemany('INSERT INTO students VALUES (?, ?, ?, ?, ?, ?)', students)
     
     # Courses
     courses = [
@@ -107,12 +148,7 @@ def init_database():
         (105, 'CS201', 'Data Structures', 'Dr. Joyce', 3)
     ]
     
-    for course in courses:
-        db.execute_raw(f'''
-            INSERT INTO courses 
-            VALUES ({course[0]}, '{course[1]}', '{course[2]}', 
-                   '{course[3]}', {course[4]})
-        ''')
+    db.executemany('INSERT INTO courses VALUES (?, ?, ?, ?, ?)', courses)
     
     # Enrollments
     enrollments = [
@@ -128,11 +164,6 @@ def init_database():
         (10, 5, 105, '2023-09-01', 'B')
     ]
     
-    for enrollment in enrollments:
-        db.execute_raw(f'''
-            INSERT INTO enrollments 
-            VALUES ({enrollment[0]}, {enrollment[1]}, {enrollment[2]}, 
-                   '{enrollment[3]}', '{enrollment[4]}')
-        ''')
+    db.executemany('INSERT INTO enrollments VALUES (?, ?, ?, ?, ?)', enrollments)
     
     print(f"Database initialized with {len(students)} students, {len(courses)} courses, and {len(enrollments)} enrollments")
\ No newline at end of file
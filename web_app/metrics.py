@@ -0,0 +1,246 @@
+"""Prometheus metrics for the web application
+
+GET /metrics answers in the Prometheus text format, so a local Prometheus
+(or curl) can scrape the app directly. Counters and histograms are filled
+on the hot path: statement timings come from the statement statistics of
+each executor, save sizes and flush times from the storage engine. Table
+sizes, cache counters and sessions in use are read when scraped.
+
+Recording takes no locks. Each metric preallocates its values, one slot
+per label value (and per bucket for histograms), and every thread adds to
+its own copy of them; a scrape sums the copies. Label values not known in
+advance are counted under "other".
+"""
+
+import threading
+from bisect import bisect_left
+
+# Statement types as parsed, the label values of the statement metrics
+STATEMENT_TYPES = (
+    'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CREATE_TABLE', 'CREATE_INDEX',
+    'CREATE_MATERIALIZED_VIEW', 'REFRESH_MATERIALIZED_VIEW', 'COPY_FROM', 'COPY_TO',
+    'EXPLAIN', 'SHOW_STATEMENT_STATS', 'other',
+)
+
+# Seconds, from a cached point query to a full save of a large database
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Metric:
+    """Values preallocated per label value, each thread updating its own copy"""
+
+    kind = None
+    width = 1  # values per label value
+
+    def __init__(self, name, help, label=None, label_values=('',)):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.label_values = tuple(label_values)
+        self.slots = {value: i * self.width for i, value in enumerate(self.label_values)}
+        self.other = self.slots.get('other', 0)
+        self._shards = {}  # thread ident -> list of values
+        self._lock = threading.Lock()  # taken when a thread updates the metric the first time
+
+    def _values(self):
+        ident = threading.get_ident()
+        values = self._shards.get(ident)
+        if values is None:
+            # Idents are reused once a thread ends, so finished threads' copies are too
+            with self._lock:
+                values = self._shards.setdefault(ident, [0] * (len(self.label_values) * self.width))
+        return values
+
+    def totals(self):
+        """Values summed over all threads"""
+        with self._lock:
+            shards = list(self._shards.values())
+        totals = [0] * (len(self.label_values) * self.width)
+        for values in shards:
+            for i, value in enumerate(values):
+                totals[i] += value
+        return totals
+
+    def _labels(self, value, extra=''):
+        labels = [f'{self.label}="{_escape(value)}"'] if self.label else []
+        if extra:
+            labels.append(extra)
+        return '{' + ','.join(labels) + '}' if labels else ''
+
+    def lines(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        totals = self.totals()
+        for value in self.label_values:
+            lines.extend(self._samples(value, totals[self.slots[value]:self.slots[value] + self.width]))
+        return lines
+
+    def _samples(self, label_value, values):
+        return [f"{self.name}{self._labels(label_value)} {_number(values[0])}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, label=''):
+        self._values()[self.slots.get(label, self.other)] += amount
+
+
+class Gauge(_Metric):
+    """A value going up and down, such as requests in progress"""
+
+    kind = 'gauge'
+
+    def inc(self, amount=1, label=''):
+        self._values()[self.slots.get(label, self.other)] += amount
+
+    def dec(self, amount=1, label=''):
+        self._values()[self.slots.get(label, self.other)] -= amount
+
+
+class Histogram(_Metric):
+    """Counts of observations per bucket, then their sum, for each label value"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, label=None, label_values=('',), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.width = len(self.buckets) + 2  # the buckets, +Inf and the sum
+        super().__init__(name, help, label, label_values)
+
+    def observe(self, value, label=''):
+        values = self._values()
+        slot = self.slots.get(label, self.other)
+        values[slot + bisect_left(self.buckets, value)] += 1
+        values[slot + self.width - 1] += value
+
+    def _samples(self, label_value, values):
+        samples = []
+        count = 0
+        for bound, observed in zip(self.buckets + ('+Inf',), values):
+            count += observed
+            le = f'le="{bound}"'
+            samples.append(f"{self.name}_bucket{self._labels(label_value, le)} {count}")
+        samples.append(f"{self.name}_sum{self._labels(label_value)} {_number(values[-1])}")
+        samples.append(f"{self.name}_count{self._labels(label_value)} {count}")
+        return samples
+
+
+STATEMENT_SECONDS = Histogram(
+    'myrdbms_statement_duration_seconds', "Time to parse, plan, execute and save a statement",
+    'type', STATEMENT_TYPES)
+STATEMENT_ERRORS = Counter(
+    'myrdbms_statement_errors_total', "Statements that raised an error", 'type', STATEMENT_TYPES)
+ROWS_SCANNED = Counter(
+    'myrdbms_rows_scanned_total', "Table rows read by scans and index lookups", 'type',
+    STATEMENT_TYPES)
+ROWS_RETURNED = Counter(
+    'myrdbms_rows_returned_total', "Rows returned, or inserted, updated or deleted", 'type',
+    STATEMENT_TYPES)
+SAVE_BYTES = Counter('myrdbms_save_bytes_total', "Bytes written to the database file")
+SAVE_SECONDS = Histogram('myrdbms_save_duration_seconds', "Time to write the database file")
+FLUSH_SECONDS = Histogram(
+    'myrdbms_save_flush_seconds', "Time to flush (and fsync, with DB_FSYNC) the database file")
+REQUESTS_IN_PROGRESS = Gauge('myrdbms_http_requests_in_progress', "HTTP requests being served")
+
+_METRICS = (STATEMENT_SECONDS, STATEMENT_ERRORS, ROWS_SCANNED, ROWS_RETURNED, SAVE_BYTES,
+            SAVE_SECONDS, FLUSH_SECONDS, REQUESTS_IN_PROGRESS)
+
+
+def record_statement(metrics):
+    """Statement statistics observer: add one statement execution"""
+    query_type = metrics.query_type
+    STATEMENT_SECONDS.observe(metrics.total_time, query_type)
+    ROWS_SCANNED.inc(metrics.rows_scanned, query_type)
+    ROWS_RETURNED.inc(metrics.rows_returned, query_type)
+    if metrics.failed:
+        STATEMENT_ERRORS.inc(1, query_type)
+
+
+def record_save(size, seconds, flush_seconds):
+    """Storage engine save observer"""
+    SAVE_BYTES.inc(size)
+    SAVE_SECONDS.observe(seconds)
+    FLUSH_SECONDS.observe(flush_seconds)
+
+
+def watch(statement_stats, storage):
+    """Record the statements and saves of an executor or session pool"""
+    if statement_stats is not None and record_statement not in statement_stats.observers:
+        statement_stats.observers.append(record_statement)
+    if record_save not in storage.save_observers:
+        storage.save_observers.append(record_save)
+
+
+def init_app(app):
+    """Count the requests in progress"""
+    app.before_request(_request_started)
+    app.teardown_request(_request_finished)
+
+
+def _request_started():
+    REQUESTS_IN_PROGRESS.inc()
+
+
+def _request_finished(exc=None):
+    REQUESTS_IN_PROGRESS.dec()
+
+
+def render(storage, result_cache=None, sessions=(), pool=None):
+    """All metrics in the Prometheus text format
+
+    storage, result_cache and sessions are those of the session pool (or
+    the request's executor) serving the app's database.
+    """
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.lines())
+
+    tables = storage.table_stats()
+    for name, key, help in (
+            ('myrdbms_table_rows', 'rows', "Rows per table"),
+            ('myrdbms_table_memory_bytes', 'memory_bytes', "Estimated memory of each table's rows"),
+            ('myrdbms_table_file_bytes', 'file_bytes', "Bytes of each table in the database file")):
+        lines.extend(_gauge(name, help, [(f'table="{_escape(table)}"', stats[key])
+                                         for table, stats in sorted(tables.items())]))
+
+    caches = []
+    if result_cache is not None:
+        caches.append(('result', result_cache.stats()))
+    if sessions:
+        plan_stats = [session.plan_cache.stats() for session in sessions]
+        caches.append(('statement', {key: sum(stats[key] for stats in plan_stats)
+                                     for key in ('hits', 'misses')}))
+    for name, key, help in (('myrdbms_cache_hits_total', 'hits', "Cache lookups that hit"),
+                            ('myrdbms_cache_misses_total', 'misses', "Cache lookups that missed")):
+        lines.extend(_gauge(name, help, [(f'cache="{cache}"', stats[key]) for cache, stats in caches],
+                            'counter'))
+    if result_cache is not None:
+        lines.extend(_gauge('myrdbms_result_cache_bytes', "Memory held by cached results",
+                            [('', result_cache.bytes)]))
+
+    if pool is not None:
+        stats = pool.stats()
+        lines.extend(_gauge('myrdbms_db_sessions', "Database sessions of the pool",
+                            [('state="busy"', stats['created'] - stats['idle']),
+                             ('state="idle"', stats['idle'])]))
+    lines.extend(_gauge('myrdbms_open_snapshots', "Snapshots being read by queries",
+                        [('', storage.snapshot_stats()['active_snapshots'])]))
+    return '\n'.join(lines) + '\n'
+
+
+def _gauge(name, help, samples, kind='gauge'):
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{{{labels}}} {_number(value)}" if labels else f"{name} {_number(value)}"
+                 for labels, value in samples)
+    return lines
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
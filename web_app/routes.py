@@ -1,10 +1,18 @@
 """Routes for MyRDBMS web application"""
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from .db import get_db
+import base64
+import json
+from itertools import chain, islice
+from flask import (Blueprint, render_template, request, redirect, url_for, flash, jsonify,
+                   current_app, Response, stream_with_context)
+from rdbms.ordered import after_condition
+from .db import get_db, get_pool
+from . import metrics
 
 bp = Blueprint('main', __name__)
 
+PAGE_SIZE = 50  # rows per page of the list pages
+
 @bp.route('/')
 def index():
     """Home page - Dashboard"""
@@ -54,24 +62,24 @@ def index():
 
 @bp.route('/students')
 def list_students():
-    """List all students"""
+    """List students a page at a time, ordered by name"""
     db = get_db()
     
     # Get search parameter
     search = request.args.get('search', '')
     
+    conditions = []
+    params = {}
     if search:
-        students = db.execute_raw(f'''
-            SELECT * FROM students 
-            WHERE first_name LIKE '%{search}%' 
-               OR last_name LIKE '%{search}%'
-               OR email LIKE '%{search}%'
-            ORDER BY last_name, first_name
-        ''')
-    else:
-        students = db.execute_raw('SELECT * FROM students ORDER BY last_name, first_name')
+        conditions.append('(first_name LIKE :pattern OR last_name LIKE :pattern '
+                          'OR email LIKE :pattern)')
+        params['pattern'] = f'%{search}%'
+    
+    students, next_after = _keyset_page(db, 'SELECT * FROM students', conditions, params,
+                                        ['last_name', 'first_name', 'student_id'])
     
-    return render_template('students/list.html', students=students, search=search)
+    return render_template('students/list.html', students=students, search=search,
+                           next_after=next_after, paged='after' in request.args)
 
 @bp.route('/students/add', methods=['GET', 'POST'])
 def add_student():
@@ -88,11 +96,11 @@ def add_student():
         db = get_db()
         
         try:
-            db.execute_raw(f'''
+            db.execute_raw('''
                 INSERT INTO students 
-                VALUES ({student_id}, '{first_name}', '{last_name}', 
-                       '{email}', '{date_of_birth}', {enrollment_year})
-            ''')
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (student_id, first_name, last_name,
+                  email, date_of_birth, enrollment_year))
             flash('Student added successfully!', 'success')
             return redirect(url_for('main.list_students'))
         except Exception as e:
@@ -113,20 +121,21 @@ def edit_student(student_id):
         enrollment_year = request.form['enrollment_year']
         
         try:
-            db.execute_raw(f'''
+            db.execute_raw('''
                 UPDATE students 
-                SET first_name='{first_name}', last_name='{last_name}', 
-                    email='{email}', date_of_birth='{date_of_birth}', 
-                    enrollment_year={enrollment_year}
-                WHERE student_id={student_id}
-            ''')
+                SET first_name=?, last_name=?, 
+                    email=?, date_of_birth=?, 
+                    enrollment_year=?
+                WHERE student_id=?
+            ''', (first_name, last_name, email, date_of_birth,
+                  enrollment_year, student_id))
             flash('Student updated successfully!', 'success')
             return redirect(url_for('main.list_students'))
         except Exception as e:
             flash(f'Error updating student: {str(e)}', 'danger')
     
     # GET request - load student data
-    student = db.execute_raw(f'SELECT * FROM students WHERE student_id={student_id}')
+    student = db.execute_raw('SELECT * FROM students WHERE student_id=?', (student_id,))
     
     if not student:
         flash('Student not found', 'danger')
@@ -141,8 +150,8 @@ def delete_student(student_id):
 
     try:
         # Delete associated enrollments first (no FK cascade in custom RDBMS)
-        db.execute_raw(f'DELETE FROM enrollments WHERE student_id={student_id}')
-        db.execute_raw(f'DELETE FROM students WHERE student_id={student_id}')
+        db.execute_raw('DELETE FROM enrollments WHERE student_id=?', (student_id,))
+        db.execute_raw('DELETE FROM students WHERE student_id=?', (student_id,))
         flash('Student and their enrollments deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting student: {str(e)}', 'danger')
@@ -151,41 +160,41 @@ def delete_student(student_id):
 
 @bp.route('/courses')
 def list_courses():
-    """List all courses"""
+    """List courses a page at a time, ordered by course code"""
     db = get_db()
     
     search = request.args.get('search', '')
     
+    conditions = []
+    params = {}
     if search:
-        courses = db.execute_raw(f'''
-            SELECT * FROM courses 
-            WHERE course_name LIKE '%{search}%' 
-               OR course_code LIKE '%{search}%'
-               OR instructor LIKE '%{search}%'
-            ORDER BY course_code
-        ''')
-    else:
-        courses = db.execute_raw('SELECT * FROM courses ORDER BY course_code')
+        conditions.append('(course_name LIKE :pattern OR course_code LIKE :pattern '
+                          'OR instructor LIKE :pattern)')
+        params['pattern'] = f'%{search}%'
+    
+    courses, next_after = _keyset_page(db, 'SELECT * FROM courses', conditions, params,
+                                       ['course_code', 'course_id'])
     
-    return render_template('courses/list.html', courses=courses, search=search)
+    return render_template('courses/list.html', courses=courses, search=search,
+                           next_after=next_after, paged='after' in request.args)
 
 @bp.route('/enrollments')
 def list_enrollments():
-    """List all enrollments with JOIN"""
+    """List enrollments with JOIN, newest first, a page at a time"""
     db = get_db()
 
     try:
-        enrollments = db.execute_raw('''
+        enrollments, next_after = _keyset_page(db, '''
             SELECT enrollment_id, enrollment_date, grade,
                    student_id, first_name, last_name,
                    course_id, course_code, course_name
             FROM enrollments
             INNER JOIN students ON enrollments.student_id = students.student_id
             INNER JOIN courses ON enrollments.course_id = courses.course_id
-            ORDER BY enrollment_date DESC
-        ''')
+        ''', [], {}, ['enrollment_date', 'enrollment_id'], descending=True)
+        total = db.execute_raw('SELECT COUNT(*) FROM enrollments')[0]['COUNT(*)']
     except Exception:
-        enrollments = []
+        enrollments, next_after, total = [], None, 0
 
     # Load students and courses for the enroll form
     try:
@@ -200,6 +209,9 @@ def list_enrollments():
 
     return render_template('enrollments/list.html',
                            enrollments=enrollments,
+                           total=total,
+                           next_after=next_after,
+                           paged='after' in request.args,
                            students=students,
                            courses=courses)
 
@@ -225,19 +237,18 @@ def add_enrollment():
         next_id = max_id + 1
 
         # Check for duplicate enrollment
-        existing = db.execute_raw(f'''
+        existing = db.execute_raw('''
             SELECT enrollment_id FROM enrollments
-            WHERE student_id={student_id} AND course_id={course_id}
-        ''')
+            WHERE student_id=? AND course_id=?
+        ''', (student_id, course_id))
         if existing:
             flash('This student is already enrolled in that course.', 'warning')
             return redirect(url_for('main.list_enrollments'))
 
-        grade_val = 'NULL' if not grade else f"'{grade}'"
-        db.execute_raw(f'''
+        db.execute_raw('''
             INSERT INTO enrollments
-            VALUES ({next_id}, {student_id}, {course_id}, '{enrollment_date}', {grade_val})
-        ''')
+            VALUES (?, ?, ?, ?, ?)
+        ''', (next_id, student_id, course_id, enrollment_date, grade or None))
         flash('Enrollment added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding enrollment: {str(e)}', 'danger')
@@ -251,7 +262,7 @@ def delete_enrollment(enrollment_id):
     db = get_db()
 
     try:
-        db.execute_raw(f'DELETE FROM enrollments WHERE enrollment_id={enrollment_id}')
+        db.execute_raw('DELETE FROM enrollments WHERE enrollment_id=?', (enrollment_id,))
         flash('Enrollment removed successfully.', 'success')
     except Exception as e:
         flash(f'Error removing enrollment: {str(e)}', 'danger')
@@ -265,8 +276,8 @@ def update_grade(enrollment_id):
     grade = request.form.get('grade', '').strip()
 
     try:
-        grade_val = f"'{grade}'" if grade else 'NULL'
-        db.execute_raw(f"UPDATE enrollments SET grade={grade_val} WHERE enrollment_id={enrollment_id}")
+        db.execute_raw("UPDATE enrollments SET grade=? WHERE enrollment_id=?",
+                       (grade or None, enrollment_id))
         flash('Grade updated.', 'success')
     except Exception as e:
         flash(f'Error updating grade: {str(e)}', 'danger')
@@ -286,11 +297,10 @@ def add_course():
 
         db = get_db()
         try:
-            db.execute_raw(f'''
+            db.execute_raw('''
                 INSERT INTO courses
-                VALUES ({course_id}, '{course_code}', '{course_name}',
-                        '{instructor}', {credits})
-            ''')
+                VALUES (?, ?, ?, ?, ?)
+            ''', (course_id, course_code, course_name, instructor, credits))
             flash('Course added successfully!', 'success')
             return redirect(url_for('main.list_courses'))
         except Exception as e:
@@ -304,13 +314,19 @@ def delete_course(course_id):
     """Delete a course"""
     db = get_db()
     try:
-        db.execute_raw(f'DELETE FROM courses WHERE course_id={course_id}')
+        db.execute_raw('DELETE FROM courses WHERE course_id=?', (course_id,))
         flash('Course deleted successfully!', 'success')
     except Exception as e:
         flash(f'Error deleting course: {str(e)}', 'danger')
     return redirect(url_for('main.list_courses'))
 
 
+def _check_statement(sql):
+    """COPY reads files on the server, so it is not exposed over HTTP"""
+    if sql.lstrip().upper().startswith('COPY'):
+        raise ValueError("COPY is not available from the web interface")
+
+
 @bp.route('/query', methods=['GET', 'POST'])
 def sql_query():
     """Execute raw SQL queries"""
@@ -319,7 +335,13 @@ def sql_query():
         db = get_db()
         
         try:
-            result = db.execute_raw(sql)
+            _check_statement(sql)
+            statement = db.prepare(sql)
+            if statement.parsed_query['type'] == 'EXPLAIN':
+                plan = db.explain(statement)
+                return render_template('query.html', sql=sql, result=plan.rows(),
+                                       plan='\n'.join(plan.lines()), error=None)
+            result = db.execute(statement)
             return render_template('query.html', sql=sql, result=result, error=None)
         except Exception as e:
             return render_template('query.html', sql=sql, result=None, error=str(e))
@@ -331,6 +353,7 @@ def api_query():
     """API endpoint for executing SQL queries"""
     data = request.get_json()
     sql = data.get('sql', '')
+    params = data.get('params')
     
     if not sql:
         return jsonify({'error': 'No SQL query provided'}), 400
@@ -338,11 +361,63 @@ def api_query():
     db = get_db()
     
     try:
-        result = db.execute_raw(sql)
+        _check_statement(sql)
+        statement = db.prepare(sql)
+        if statement.parsed_query['type'] == 'EXPLAIN':
+            # The plan tree comes as JSON too, with per-operator statistics for ANALYZE
+            plan = db.explain(statement, params)
+            return jsonify({'success': True, 'result': plan.rows(), **plan.to_dict()})
+        if _wants_stream() and statement.parsed_query['type'] == 'SELECT':
+            return _stream_rows(db.iter_rows(statement, params))
+        result = db.execute(statement, params)
         return jsonify({'success': True, 'result': result})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Counters and histograms in the Prometheus text format"""
+    if current_app.config.get('DB_POOL_SIZE', 8):
+        pool = get_pool()
+        text = metrics.render(pool.storage, pool.result_cache, list(pool.sessions), pool)
+    else:
+        db = get_db()
+        text = metrics.render(db.storage, db.result_cache, [db])
+    return Response(text, content_type=metrics.CONTENT_TYPE)
+
+
+def _wants_stream():
+    """Rows are streamed as NDJSON on request by Accept header or ?stream=1"""
+    return (request.args.get('stream') == '1'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+
+def _stream_rows(rows, chunk_size=500):
+    """Send SELECT rows as one JSON object per line while they are produced
+    
+    The first row is read before responding, so errors such as an unknown
+    table still get an ordinary JSON response. A failure later on ends the
+    stream with an {"success": false, "error": ...} line.
+    """
+    first = next(rows, None)
+    dumps = current_app.json.dumps
+    
+    def generate():
+        remaining = rows if first is None else chain([first], rows)
+        try:
+            while True:
+                chunk = list(islice(remaining, chunk_size))
+                if not chunk:
+                    return
+                yield ''.join(dumps(row) + '\n' for row in chunk)
+        except Exception as e:
+            yield dumps({'success': False, 'error': str(e)}) + '\n'
+        finally:
+            rows.close()
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @bp.route('/demo')
 def demo():
     """Demonstration page showing MyRDBMS features"""
@@ -382,4 +457,67 @@ def demo():
         }
     ]
     
-    return render_template('demo.html', demo_queries=demo_queries)
\ No newline at end of file
+    return render_template('demo.html', demo_queries=demo_queries)
+
+
+def _keyset_page(db, select, conditions, params, order, descending=False):
+    """Run one page of a list query; returns (rows, cursor of the next page or None)
+
+    order names the sort columns, ending with a unique one so no two rows
+    tie. The ?after= cursor holds the sort values of the previous page's
+    last row, and the page continues with "(a, b) > (:after_0, :after_1)",
+    which the ordered index turns into a seek: every page costs the same
+    however deep it is, where OFFSET would skip over all earlier rows.
+    Sort values may be NULL; see _after_condition() for those pages.
+    """
+    conditions = list(conditions)
+    params = dict(params)
+    after = _decode_cursor(request.args.get('after'), len(order))
+    if after is not None:
+        names = [f':after_{i}' for i in range(len(order))]
+        conditions.append(_after_condition(order, names, after, descending))
+        params.update((name[1:], value) for name, value in zip(names, after) if value is not None)
+
+    direction = ' DESC' if descending else ''
+    sql = select
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    sql += f" ORDER BY {', '.join(column + direction for column in order)} LIMIT {PAGE_SIZE + 1}"
+
+    # One extra row tells whether there is a next page
+    rows = db.execute_raw(sql, params)
+    if len(rows) <= PAGE_SIZE:
+        return rows, None
+    rows = rows[:PAGE_SIZE]
+    return rows, _encode_cursor([rows[-1][column] for column in order])
+
+
+def _after_condition(order, names, after, descending):
+    """WHERE condition for the rows ordered after the cursor values
+
+    ORDER BY puts NULLs first when ascending and last when descending, but
+    a NULL compares false in "(a, b) > (x, y)". An ascending cursor without
+    NULLs uses the row value comparison; otherwise the condition is spelled
+    out column by column, which the ordered index still turns into a seek.
+    """
+    if not descending and None not in after:
+        return f"({', '.join(order)}) > ({', '.join(names)})"
+    return after_condition(order, names, after, descending)
+
+
+def _encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(token, length):
+    """The values of an ?after= cursor, or None for a missing or malformed one"""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+    except ValueError:
+        return None
+    # Sort values may be NULL, but not the unique column that ends them
+    if not isinstance(values, list) or len(values) != length or values[-1] is None:
+        return None
+    return values